@@ -5,12 +5,14 @@ set of utilities for interacting with LVM.
 """
 import logging
 import os
+import threading
 import uuid
+from contextlib import contextmanager
 from itertools import repeat
 from math import floor
 from ceph_volume import process, util, conf
 from ceph_volume.exceptions import SizeAllocationError
-from typing import Any, Dict, Optional, List, Union, Set
+from typing import Any, Dict, Iterator, Optional, List, Union, Set
 
 
 logger = logging.getLogger(__name__)
@@ -413,6 +415,7 @@ class PVolume:
             ],
             run_on_host=True
         )
+        invalidate_state()
 
 
 def create_pv(device: str) -> None:
@@ -427,6 +430,7 @@ def create_pv(device: str) -> None:
         '--yes', # answer yes to any prompts
         device
     ], run_on_host=True)
+    invalidate_state()
 
 
 def remove_pv(pv_name: str) -> None:
@@ -455,6 +459,7 @@ def remove_pv(pv_name: str) -> None:
         run_on_host=True,
         fail_msg=fail_msg,
     )
+    invalidate_state()
 
 
 def get_pvs(fields: str = PV_FIELDS, filters: Optional[Dict[str, Any]] = None, tags: Optional[Dict[str, Any]] = None) -> List[PVolume]:
@@ -477,6 +482,11 @@ def get_pvs(fields: str = PV_FIELDS, filters: Optional[Dict[str, Any]] = None, t
         filters = {}
     if tags is None:
         tags = {}
+    state = _get_state()
+    if state is not None:
+        pvs_report = state.query('pv', fields, filters, tags)
+        if pvs_report is not None:
+            return [PVolume(**pv_report) for pv_report in pvs_report]
     filters_str = make_filters_lvmcmd_ready(filters, tags)
     args = ['pvs', '--noheadings', '--readonly', '--separator=";"', '-S',
             filters_str, '-o', fields]
@@ -676,6 +686,7 @@ def create_vg(devices: Union[str, Set, List[str]], name: Optional[str] = None, n
         name] + devices,
         run_on_host=True
     )
+    invalidate_state()
 
     return get_single_vg(filters={'vg_name': name})
 
@@ -701,6 +712,7 @@ def extend_vg(vg: VolumeGroup, devices: Union[List[str], str]) -> Optional[Volum
         vg.name] + devices,
         run_on_host=True
     )
+    invalidate_state()
 
     return get_single_vg(filters={'vg_name': vg.name})
 
@@ -724,6 +736,7 @@ def reduce_vg(vg: VolumeGroup, devices: Union[List[str], str]) -> Optional[Volum
         vg.name] + devices,
         run_on_host=True
     )
+    invalidate_state()
 
     return get_single_vg(filters={'vg_name': vg.name})
 
@@ -746,6 +759,7 @@ def remove_vg(vg_name: str) -> None:
         run_on_host=True,
         fail_msg=fail_msg,
     )
+    invalidate_state()
 
 
 def get_vgs(fields: str = VG_FIELDS, filters: Optional[Dict[str, Any]] = None, tags: Optional[Dict[str, Any]] = None) -> List[VolumeGroup]:
@@ -768,6 +782,11 @@ def get_vgs(fields: str = VG_FIELDS, filters: Optional[Dict[str, Any]] = None, t
         filters = {}
     if tags is None:
         tags = {}
+    state = _get_state()
+    if state is not None:
+        vgs_report = state.query('vg', fields, filters, tags)
+        if vgs_report is not None:
+            return [VolumeGroup(**vg_report) for vg_report in vgs_report]
     filters_str = make_filters_lvmcmd_ready(filters, tags)
     args = ['vgs'] + VG_CMD_OPTIONS + ['-S', filters_str, '-o', fields]
 
@@ -794,6 +813,10 @@ def get_single_vg(fields: str = VG_FIELDS, filters: Optional[Dict[str, Any]] = N
 
 
 def get_device_vgs(device: str, name_prefix: str = '') -> List[VolumeGroup]:
+    state = _get_state()
+    if state is not None:
+        vgs = state.device_vgs(device)
+        return [VolumeGroup(**vg) for vg in vgs if vg['vg_name'] and vg['vg_name'].startswith(name_prefix)]
     stdout, stderr, returncode = process.call(
         ['pvs'] + VG_CMD_OPTIONS + ['-o', VG_FIELDS, device],
         run_on_host=True,
@@ -804,6 +827,9 @@ def get_device_vgs(device: str, name_prefix: str = '') -> List[VolumeGroup]:
 
 
 def get_all_devices_vgs(name_prefix: str = '') -> List[VolumeGroup]:
+    state = _get_state()
+    if state is not None:
+        return [VolumeGroup(**vg) for vg in state.all_devices_vgs() if vg['vg_name']]
     vg_fields = f'pv_name,{VG_FIELDS}'
     cmd = ['pvs'] + VG_CMD_OPTIONS + ['-o', vg_fields]
     stdout, stderr, returncode = process.call(
@@ -903,6 +929,7 @@ class Volume:
         del_tag_args = self._format_tag_args('--deltag', del_tags)
         # --deltag returns successful even if the to be deleted tag is not set
         process.call(['lvchange'] + del_tag_args + [self.lv_path], run_on_host=True)
+        invalidate_state()
         for k in del_tags.keys():
             del self.tags[k]
 
@@ -922,6 +949,7 @@ class Volume:
         self.clear_tags(list(tags.keys()))
         add_tag_args = self._format_tag_args('--addtag', tags)
         process.call(['lvchange'] + add_tag_args + [self.lv_path], run_on_host=True)
+        invalidate_state()
         for k, v in tags.items():
             self.tags[k] = v
 
@@ -931,6 +959,7 @@ class Volume:
             current_value = self.tags[key]
             tag = "%s=%s" % (key, current_value)
             process.call(['lvchange', '--deltag', tag, self.lv_path], run_on_host=True)
+            invalidate_state()
             del self.tags[key]
 
 
@@ -948,6 +977,7 @@ class Volume:
             ],
             run_on_host=True
         )
+        invalidate_state()
         self.tags[key] = value
 
     def deactivate(self) -> None:
@@ -1028,6 +1058,7 @@ def create_lv(name_prefix: str,
             '-n', name, vg.vg_name
         ]
     process.run(command, run_on_host=True)
+    invalidate_state()
 
     lv = get_single_lv(filters={'lv_name': name, 'vg_name': vg.vg_name})
 
@@ -1123,6 +1154,7 @@ def remove_lv(lv: Union[str, Volume]) -> bool:
         show_command=True,
         terminal_verbose=True,
     )
+    invalidate_state()
     if returncode != 0:
         raise RuntimeError("Unable to remove %s" % path)
     return True
@@ -1148,6 +1180,11 @@ def get_lvs(fields: str = LV_FIELDS, filters: Optional[Dict[str, Any]] = None, t
         filters = {}
     if tags is None:
         tags = {}
+    state = _get_state()
+    if state is not None:
+        lvs_report = state.query('lv', fields, filters, tags)
+        if lvs_report is not None:
+            return [Volume(**lv_report) for lv_report in lvs_report]
     filters_str = make_filters_lvmcmd_ready(filters, tags)
     args = ['lvs'] + LV_CMD_OPTIONS + ['-S', filters_str, '-o', fields]
 
@@ -1204,6 +1241,10 @@ def get_lvs_by_tag(lv_tag: str) -> List[Volume]:
 
 
 def get_device_lvs(device: str, name_prefix: str = '') -> List[Volume]:
+    state = _get_state()
+    if state is not None:
+        return [Volume(**lv) for lv in state.device_lvs(device) if
+                lv['lv_name'].startswith(name_prefix)]
     stdout, stderr, returncode = process.call(
         ['pvs'] + LV_CMD_OPTIONS + ['-o', LV_FIELDS, device],
         run_on_host=True,
@@ -1213,6 +1254,31 @@ def get_device_lvs(device: str, name_prefix: str = '') -> List[Volume]:
     return [Volume(**lv) for lv in lvs if lv['lv_name'] and
             lv['lv_name'].startswith(name_prefix)]
 
+def get_all_devices_lvs(name_prefix: str = '') -> Dict[str, List[Volume]]:
+    """
+    Same as ``get_device_lvs()``, but for all the PVs of the host with a
+    single ``pvs`` call.
+
+    :returns: dictionary of PV name to the LVs residing on it, PVs without
+              LVs map to an empty list
+    """
+    state = _get_state()
+    if state is not None:
+        return {pv_name: [Volume(**lv) for lv in lvs if lv['lv_name'].startswith(name_prefix)]
+                for pv_name, lvs in state.all_devices_lvs().items()}
+    fields = f'pv_name,{LV_FIELDS}'
+    stdout, stderr, returncode = process.call(
+        ['pvs'] + LV_CMD_OPTIONS + ['-o', fields],
+        run_on_host=True,
+        verbose_on_failure=False
+    )
+    result: Dict[str, List[Volume]] = {}
+    for lv in _output_parser(stdout, fields):
+        lvs = result.setdefault(lv.pop('pv_name'), [])
+        if lv['lv_name'] and lv['lv_name'].startswith(name_prefix):
+            lvs.append(Volume(**lv))
+    return result
+
 def get_lvs_from_path(devpath: str) -> List[Volume]:
     lvs = []
     if os.path.isabs(devpath):
@@ -1235,3 +1301,170 @@ def get_lv_by_fullname(full_name: str) -> Optional[Volume]:
     except ValueError:
         res_lv = None
     return res_lv
+
+
+#################################
+#
+# Code for the LVM state cache
+#
+###############################
+
+class LVMState(object):
+    """
+    A snapshot of the PVs, VGs and LVs of the host, loaded with one ``pvs``
+    and one ``lvs`` call, that answers the queries of this module in memory
+    instead of running a ``pvs``, ``vgs`` or ``lvs`` command for each of
+    them. Queries that filter on fields the snapshot does not know about are
+    not answered, and the caller falls back to running the command.
+    """
+    PV_REPORT_FIELDS = ','.join(dict.fromkeys(
+        PV_FIELDS.split(',') + VG_FIELDS.split(',') + ['vg_tags']))
+    LV_REPORT_FIELDS = LV_FIELDS + ',lv_dm_path'
+    FIELDS = {
+        'pv': PV_REPORT_FIELDS.split(','),
+        'vg': VG_FIELDS.split(',') + ['vg_tags'],
+        'lv': LV_REPORT_FIELDS.split(','),
+    }
+    TAG_FIELDS = {'pv': 'pv_tags', 'vg': 'vg_tags', 'lv': 'lv_tags'}
+    # names the -S option of LVM accepts for some of the fields
+    FILTER_ALIASES = {'path': 'lv_path'}
+
+    def __init__(self) -> None:
+        stdout, stderr, returncode = process.call(
+            ['pvs'] + VG_CMD_OPTIONS + ['-o', self.PV_REPORT_FIELDS],
+            run_on_host=True,
+            verbose_on_failure=False
+        )
+        # as lv_uuid is part of the report, there is one row per PV segment
+        pvs = _output_parser(stdout, self.PV_REPORT_FIELDS)
+        stdout, stderr, returncode = process.call(
+            ['lvs'] + LV_CMD_OPTIONS + ['-o', self.LV_REPORT_FIELDS],
+            run_on_host=True,
+            verbose_on_failure=False
+        )
+        lvs = _output_parser(stdout, self.LV_REPORT_FIELDS)
+        vgs = {pv['vg_name']: pv for pv in pvs if pv['vg_name']}
+        self.rows: Dict[str, List[Dict[str, Any]]] = {
+            'pv': pvs,
+            'vg': list(vgs.values()),
+            'lv': lvs,
+        }
+        self._lvs_by_uuid = {lv['lv_uuid']: lv for lv in lvs}
+        # PVs by the path of the device they are on, in the order pvs
+        # reported them
+        self._pvs_by_path: Dict[str, List[Dict[str, Any]]] = {}
+        for pv in pvs:
+            self._pvs_by_path.setdefault(os.path.realpath(pv['pv_name']), []).append(pv)
+
+    def query(self,
+              kind: str,
+              fields: str,
+              filters: Dict[str, Any],
+              tags: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        The equivalent of ``pvs``, ``vgs`` or ``lvs -S <filters> -o <fields>``
+
+        :param kind: one of 'pv', 'vg' or 'lv'
+        :returns: the matching rows, or None if the snapshot can not answer
+                  the query
+        """
+        field_names = fields.split(',')
+        known = self.FIELDS[kind]
+        filters = {self.FILTER_ALIASES.get(k, k): v for k, v in filters.items()}
+        if not all(f in known for f in field_names) or not all(f in known for f in filters):
+            return None
+        tags_field = self.TAG_FIELDS[kind]
+        result = []
+        for row in self.rows[kind]:
+            if any(row[k] != v for k, v in filters.items()):
+                continue
+            if tags:
+                row_tags = parse_tags(row[tags_field])
+                if any(row_tags.get(k) != v for k, v in tags.items()):
+                    continue
+            item = {f: row[f] for f in field_names}
+            # without lv_uuid pvs reports each PV once, not once per segment
+            if kind == 'pv' and 'lv_uuid' not in field_names and item in result:
+                continue
+            result.append(item)
+        return result
+
+    def _device_pvs(self, device: str) -> List[Dict[str, Any]]:
+        return self._pvs_by_path.get(os.path.realpath(device), [])
+
+    def device_vgs(self, device: str) -> List[Dict[str, Any]]:
+        """
+        The equivalent of ``pvs -o VG_FIELDS <device>``
+        """
+        return [{f: pv[f] for f in VG_FIELDS.split(',')} for pv in self._device_pvs(device)[:1]]
+
+    def all_devices_vgs(self) -> List[Dict[str, Any]]:
+        """
+        The equivalent of ``pvs -o pv_name,VG_FIELDS``
+        """
+        return [{f: pvs[0][f] for f in ['pv_name'] + VG_FIELDS.split(',')}
+                for pvs in self._pvs_by_path.values()]
+
+    def _pv_lvs(self, pvs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        lvs = [self._lvs_by_uuid[pv['lv_uuid']] for pv in pvs
+               if pv['lv_uuid'] in self._lvs_by_uuid]
+        # an LV with several segments on a PV is only listed once
+        unique = {lv['lv_uuid']: lv for lv in lvs}
+        return [{f: lv[f] for f in LV_FIELDS.split(',')} for lv in unique.values()]
+
+    def device_lvs(self, device: str) -> List[Dict[str, Any]]:
+        """
+        The equivalent of ``pvs -o LV_FIELDS <device>``
+        """
+        return self._pv_lvs(self._device_pvs(device))
+
+    def all_devices_lvs(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        The equivalent of ``pvs -o pv_name,LV_FIELDS``, grouped by PV
+        """
+        return {pvs[0]['pv_name']: self._pv_lvs(pvs) for pvs in self._pvs_by_path.values()}
+
+
+_state: Optional[LVMState] = None
+_state_users = 0
+_state_lock = threading.Lock()
+
+
+def _get_state() -> Optional[LVMState]:
+    global _state
+    with _state_lock:
+        if not _state_users:
+            return None
+        if _state is None:
+            _state = LVMState()
+        return _state
+
+
+def invalidate_state() -> None:
+    """
+    Drop the LVM state snapshot, if any, so that the next query loads a
+    fresh one. Called by the functions of this module that change LVM.
+    """
+    global _state
+    with _state_lock:
+        _state = None
+
+
+@contextmanager
+def cached_state() -> Iterator[None]:
+    """
+    Answer the LVM queries made within the block from a snapshot of the
+    LVM state, which is loaded on the first query and dropped whenever this
+    module changes LVM, as well as when leaving the block. Changes made to
+    LVM by other means while the block runs are not noticed.
+    """
+    global _state, _state_users
+    with _state_lock:
+        _state_users += 1
+    try:
+        yield
+    finally:
+        with _state_lock:
+            _state_users -= 1
+            if not _state_users:
+                _state = None
@@ -5,8 +5,8 @@ import logging
 from textwrap import dedent
 from ceph_volume import terminal, decorators
 from ceph_volume.util import device, disk, prompt_bool, arg_validators, templates
-from ceph_volume.util import prepare
 from . import common
+from . import planner
 from .create import Create
 from .prepare import Prepare
 from typing import Any, Dict, List, Optional, Tuple
@@ -33,87 +33,27 @@ def ensure_disjoint_device_lists(data: List[str],
         raise Exception('Device lists are not disjoint')
 
 
-def separate_devices_from_lvs(devices: List[device.Device]) -> Tuple[List[device.Device], List[device.Device]]:
-    phys = []
-    lvm = []
-    for d in devices:
-        phys.append(d) if d.is_device else lvm.append(d)
-    return phys, lvm
+def _to_batch_alloc(alloc: planner.Alloc) -> Tuple[str, float, disk.Size, int]:
+    return (alloc.path, alloc.rel_size, disk.Size(b=alloc.abs_size), alloc.slots)
 
 
 def get_physical_fast_allocs(devices: List[device.Device], type_: str, fast_slots_per_device: int, new_osds: int, args: argparse.Namespace) -> List[Tuple[str, float, disk.Size, int]]:
-    requested_slots = getattr(args, '{}_slots'.format(type_))
-    if not requested_slots or requested_slots < fast_slots_per_device:
-        if requested_slots:
-            mlogger.info('{}_slots argument is too small, ignoring'.format(type_))
-        requested_slots = fast_slots_per_device
-
-    requested_size = getattr(args, '{}_size'.format(type_), 0)
-    if not requested_size or requested_size == 0:
-        # no size argument was specified, check ceph.conf
-        get_size_fct = getattr(prepare, 'get_{}_size'.format(type_))
-        requested_size = get_size_fct(lv_format=False)
-
-    ret: List[Tuple[str, float, disk.Size, int]] = []
-    vg_device_map = group_devices_by_vg(devices)
-    for vg_name, vg_devices in vg_device_map.items():
-        for dev in vg_devices:
-            if not dev.available_lvm:
-                continue
-            # any LV present is considered a taken slot
-            occupied_slots = len(dev.lvs)
-            # prior to v15.2.8, db/wal deployments were grouping multiple fast devices into single VGs - we need to
-            # multiply requested_slots (per device) by the number of devices in the VG in order to ensure that
-            # abs_size is calculated correctly from vg_size
-            if vg_name == 'unused_devices':
-                slots_for_vg = requested_slots
-            else:
-                if len(vg_devices) > 1:
-                    slots_for_vg = len(args.devices)
-                else:
-                    slots_for_vg = len(vg_devices) * requested_slots
-            dev_size = dev.vg_size[0]
-            # this only looks at the first vg on device, unsure if there is a better
-            # way
-            abs_size = disk.Size(b=int(dev_size / slots_for_vg))
-            free_size = dev.vg_free[0]
-            relative_size = int(abs_size) / dev_size
-            if requested_size:
-                if requested_size <= abs_size:
-                    abs_size = requested_size
-                    relative_size = int(abs_size) / dev_size
-                else:
-                    mlogger.error(
-                        '{} was requested for {}, but only {} can be fulfilled'.format(
-                            requested_size,
-                            '{}_size'.format(type_),
-                            abs_size,
-                        ))
-                    exit(1)
-            while abs_size <= free_size and len(ret) < new_osds and occupied_slots < fast_slots_per_device:
-                free_size -= abs_size.b
-                occupied_slots += 1
-                ret.append((dev.path, relative_size, abs_size, requested_slots))
-    return ret
-
-def group_devices_by_vg(devices: List[device.Device]) -> Dict[str, Any]:
-    result: Dict[str, Any] = dict()
-    result['unused_devices'] = []
-    for dev in devices:
-        if len(dev.vgs) > 0:
-            vg_name = dev.vgs[0].name
-            if vg_name in result:
-                result[vg_name].append(dev)
-            else:
-                result[vg_name] = [dev]
-        else:
-            result['unused_devices'].append(dev)
-    return result
+    spec = planner.spec_from_args(args, fast_types=(type_,))
+    try:
+        allocs, messages = planner.physical_fast_allocs(planner.snapshot(devices),
+                                                        type_,
+                                                        fast_slots_per_device,
+                                                        new_osds,
+                                                        spec)
+    except planner.PlanError as e:
+        mlogger.error(str(e))
+        exit(1)
+    for message in messages:
+        mlogger.info(message)
+    return [_to_batch_alloc(alloc) for alloc in allocs]
 
 def get_lvm_fast_allocs(lvs: List[device.Device]) -> List[Tuple[str, float, disk.Size, int]]:
-    return [("{}/{}".format(d.vg_name, d.lv_name), 100.0,
-             disk.Size(b=int(d.lvs[0].lv_size)), 1) for d in lvs if not
-            d.journal_used_by_ceph]
+    return [_to_batch_alloc(alloc) for alloc in planner.lvm_fast_allocs(planner.snapshot(lvs))]
 
 
 class Batch(object):
@@ -389,87 +329,42 @@ class Batch(object):
         '''
         The methods here are mostly just organization, error reporting and
         setting up of (default) args. The heavy lifting code for the deployment
-        layout can be found in the static get_*_osds and get_*_fast_allocs
-        functions.
+        layout can be found in the planner module, which works on a snapshot of
+        the devices.
         '''
-        devices = self.args.devices
-        fast_devices = self.args.db_devices
-        very_fast_devices = self.args.wal_devices
-        plan = []
-        phys_devs, lvm_devs = separate_devices_from_lvs(devices)
+        devices = planner.snapshot(self.args.devices)
+        fast_devices = planner.snapshot(self.args.db_devices)
+        very_fast_devices = planner.snapshot(self.args.wal_devices)
         mlogger.debug(('passed data devices: {} physical,'
-                       ' {} LVM').format(len(phys_devs), len(lvm_devs)))
-
-        plan.extend(get_physical_osds(phys_devs, self.args))
-
-        plan.extend(get_lvm_osds(lvm_devs, self.args))
-
-        num_osds = len(plan)
-        if num_osds == 0:
-            mlogger.info('All data devices are unavailable')
-            return plan
-        requested_osds = self.args.osds_per_device * len(phys_devs) + len(lvm_devs)
-
-        if self.args.objectstore == 'bluestore':
-            fast_type = 'block_db'
-        fast_allocations = self.fast_allocations(fast_devices,
-                                                 requested_osds,
-                                                 num_osds,
-                                                 fast_type)
-        if fast_devices and not fast_allocations:
-            mlogger.info('{} fast devices were passed, but none are available'.format(len(fast_devices)))
-            return []
-        if fast_devices and not len(fast_allocations) == num_osds:
-            mlogger.error('{} fast allocations != {} num_osds'.format(
-                len(fast_allocations), num_osds))
-            exit(1)
-
-        very_fast_allocations = self.fast_allocations(very_fast_devices,
-                                                      requested_osds,
-                                                      num_osds,
-                                                      'block_wal')
-        if very_fast_devices and not very_fast_allocations:
-            mlogger.info('{} very fast devices were passed, but none are available'.format(len(very_fast_devices)))
-            return []
-        if very_fast_devices and not len(very_fast_allocations) == num_osds:
-            mlogger.error('{} very fast allocations != {} num_osds'.format(
-                len(very_fast_allocations), num_osds))
+                       ' {} LVM').format(len([d for d in devices if d.is_device]),
+                                         len([d for d in devices if not d.is_device])))
+        fast_types = tuple(type_ for type_, devs in (('block_db', fast_devices),
+                                                     ('block_wal', very_fast_devices))
+                           if devs)
+        spec = planner.spec_from_args(self.args, fast_types=fast_types)
+        try:
+            plan = planner.plan(devices, fast_devices, very_fast_devices, spec)
+        except planner.PlanError as e:
+            mlogger.error(str(e))
             exit(1)
-
-        for osd in plan:
-            if fast_devices:
-                osd.add_fast_device(*fast_allocations.pop(),
-                                    type_=fast_type)
-            if very_fast_devices and self.args.objectstore == 'bluestore':
-                osd.add_very_fast_device(*very_fast_allocations.pop())
-        return plan
+        for message in plan.messages:
+            mlogger.info(message)
+        return [self.OSD.from_planned(osd) for osd in plan.osds]
 
     def fast_allocations(self, devices: List[device.Device], requested_osds: int, new_osds: int, type_: str) -> List[Tuple[str, float, disk.Size, int]]:
-        ret: List[Tuple[str, float, disk.Size, int]] = []
-        if not devices:
-            return ret
-        phys_devs, lvm_devs = separate_devices_from_lvs(devices)
-        mlogger.debug(('passed {} devices: {} physical,'
-                       ' {} LVM').format(type_, len(phys_devs), len(lvm_devs)))
-
-        ret.extend(get_lvm_fast_allocs(lvm_devs))
-
-        # fill up uneven distributions across fast devices: 5 osds and 2 fast
-        # devices? create 3 slots on each device rather then deploying
-        # heterogeneous osds
-        slot_divider = max(1, len(phys_devs))
-        if (requested_osds - len(lvm_devs)) % slot_divider:
-            fast_slots_per_device = int((requested_osds - len(lvm_devs)) / slot_divider) + 1
-        else:
-            fast_slots_per_device = int((requested_osds - len(lvm_devs)) / slot_divider)
-
-
-        ret.extend(get_physical_fast_allocs(phys_devs,
-                                            type_,
-                                            fast_slots_per_device,
-                                            new_osds,
-                                            self.args))
-        return ret
+        spec = planner.spec_from_args(self.args, fast_types=(type_,) if devices else ())
+        try:
+            allocs, messages = planner.fast_allocs(planner.snapshot(devices),
+                                                   requested_osds,
+                                                   new_osds,
+                                                   type_,
+                                                   spec)
+        except planner.PlanError as e:
+            mlogger.error(str(e))
+            exit(1)
+        for message in messages:
+            mlogger.info(message)
+        return [_to_batch_alloc(alloc) for alloc in allocs]
 
     class OSD(object):
         '''
@@ -502,6 +397,18 @@ class Batch(object):
             self.encryption: Optional[str] = encryption
             self.symlink: Optional[str] = symlink
 
+        @classmethod
+        def from_planned(cls, planned: planner.PlannedOSD) -> "Batch.OSD":
+            osd = cls(*_to_batch_alloc(planned.data),
+                      id_=planned.osd_id,
+                      encryption=planned.encryption,
+                      symlink=planned.symlink)
+            if planned.fast:
+                osd.add_fast_device(*_to_batch_alloc(planned.fast), type_='block_db')
+            if planned.very_fast:
+                osd.add_very_fast_device(*_to_batch_alloc(planned.very_fast))
+            return osd
+
         def add_fast_device(self, path: str, rel_size: float, abs_size: disk.Size, slots: int, type_: str) -> None:
             self.fast = self.VolSpec(path=path,
                                      rel_size=rel_size,
@@ -579,53 +486,29 @@ class Batch(object):
             # json.dumps
             return {k: str(v) for k, v in self._get_osd_plan().items()}
 
+def _pop_osd_id(args: argparse.Namespace) -> Optional[str]:
+    if args.osd_ids:
+        return args.osd_ids.pop()
+    return None
+
 def get_physical_osds(devices: List[device.Device], args: argparse.Namespace) -> List[Batch.OSD]:
     '''
     Goes through passed physical devices and assigns OSDs
     '''
-    data_slots = args.osds_per_device
-    if args.data_slots:
-        data_slots = max(args.data_slots, args.osds_per_device)
-    rel_data_size = args.data_allocate_fraction / data_slots
-    mlogger.debug('relative data size: {}'.format(rel_data_size))
-    ret = []
-    for dev in devices:
-        if dev.available_lvm:
-            dev_size = dev.vg_size[0]
-            abs_size = disk.Size(b=int(dev_size * rel_data_size))
-            free_size = dev.vg_free[0]
-            for _ in range(args.osds_per_device):
-                if abs_size > free_size:
-                    break
-                free_size -= abs_size.b
-                osd_id = None
-                if args.osd_ids:
-                    osd_id = args.osd_ids.pop()
-                ret.append(Batch.OSD(dev.path,
-                                     rel_data_size,
-                                     abs_size,
-                                     args.osds_per_device,
-                                     osd_id,
-                                     'dmcrypt' if args.dmcrypt else None,
-                                     dev.symlink))
-    return ret
+    allocs = planner.physical_data_allocs(planner.snapshot(devices),
+                                          planner.spec_from_args(args))
+    return [Batch.OSD(*_to_batch_alloc(alloc),
+                      _pop_osd_id(args),
+                      'dmcrypt' if args.dmcrypt else None,
+                      symlink)
+            for alloc, symlink in allocs]
 
 def get_lvm_osds(lvs: List[device.Device], args: argparse.Namespace) -> List[Batch.OSD]:
     '''
     Goes through passed LVs and assigns planned osds
     '''
-    ret = []
-    for lv in lvs:
-        if lv.used_by_ceph:
-            continue
-        osd_id = None
-        if args.osd_ids:
-            osd_id = args.osd_ids.pop()
-        osd = Batch.OSD("{}/{}".format(lv.vg_name, lv.lv_name),
-                        100.0,
-                        disk.Size(b=int(lv.lvs[0].lv_size)),
-                        1,
-                        osd_id,
-                        'dmcrypt' if args.dmcrypt else None)
-        ret.append(osd)
-    return ret
\ No newline at end of file
+    allocs = planner.lvm_data_allocs(planner.snapshot(lvs))
+    return [Batch.OSD(*_to_batch_alloc(alloc),
+                      _pop_osd_id(args),
+                      'dmcrypt' if args.dmcrypt else None)
+            for alloc in allocs]
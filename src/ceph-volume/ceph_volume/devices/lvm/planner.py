@@ -0,0 +1,289 @@
+"""
+The planning stage of ``ceph-volume lvm batch``: given a snapshot of the
+devices and the requested layout, work out the size and placement of the
+data, block.db and block.wal volumes of every OSD.
+
+Everything in here is free of side effects: the planner does not look at the
+system, read the configuration, log or mutate its arguments, so that the same
+snapshot of a host can be planned against any number of layouts, and the same
+input always results in the same plan.
+"""
+import argparse
+from collections import namedtuple
+from ceph_volume.util import disk, prepare
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class PlanError(Exception):
+    """
+    The devices can not fulfill the requested layout.
+    """
+    pass
+
+
+# A device as seen by the planner. ``vg_size`` and ``vg_free`` are in bytes,
+# ``lv_count`` is the number of LVs (taken slots) on a physical device, and
+# ``lv_size`` is the size of the volume for an LV.
+PlanDevice = namedtuple('PlanDevice',
+                        ['path',
+                         'is_device',
+                         'available',
+                         'vg_name',
+                         'vg_size',
+                         'vg_free',
+                         'lv_count',
+                         'symlink',
+                         'lv_size',
+                         'used_by_ceph',
+                         'journal_used_by_ceph'],
+                        defaults=[True, True, '', 0, 0, 0, None, 0, False, False])
+
+
+def snapshot(devices: List[Any]) -> List[PlanDevice]:
+    """
+    Take the snapshot of ``Device`` objects the planner works on. This is
+    where the (possibly expensive) properties of the devices are read, and
+    it only needs to happen once per host.
+    """
+    result = []
+    for dev in devices:
+        if dev.is_device:
+            available = bool(dev.available_lvm)
+            result.append(PlanDevice(
+                path=dev.path,
+                is_device=True,
+                available=available,
+                vg_name=dev.vgs[0].name if dev.vgs else '',
+                # this only looks at the first vg on device
+                vg_size=int(dev.vg_size[0]) if available else 0,
+                vg_free=int(dev.vg_free[0]) if available else 0,
+                lv_count=len(dev.lvs),
+                symlink=dev.symlink))
+        else:
+            result.append(PlanDevice(
+                path='{}/{}'.format(dev.vg_name, dev.lv_name),
+                is_device=False,
+                lv_size=int(dev.lvs[0].lv_size),
+                used_by_ceph=bool(dev.used_by_ceph),
+                journal_used_by_ceph=bool(dev.journal_used_by_ceph)))
+    return result
+
+
+# The requested layout, in the terms of the ``lvm batch`` arguments. Sizes
+# are in bytes, 0 meaning "as much as possible".
+PlanSpec = namedtuple('PlanSpec',
+                      ['osds_per_device',
+                       'data_slots',
+                       'data_allocate_fraction',
+                       'dmcrypt',
+                       'osd_ids',
+                       'block_db_slots',
+                       'block_db_size',
+                       'block_wal_slots',
+                       'block_wal_size',
+                       'num_data_devices'],
+                      defaults=[1, None, 1.0, False, (), None, 0, None, 0, 0])
+
+
+def spec_from_args(args: argparse.Namespace, fast_types: Tuple[str, ...] = ()) -> PlanSpec:
+    """
+    Build the PlanSpec of the given ``lvm batch`` arguments. The sizes are
+    only looked at for the ``fast_types`` volumes that will be planned, and
+    fall back to the ones in ceph.conf when they were not passed.
+    """
+    sizes: Dict[str, int] = {'block_db': 0, 'block_wal': 0}
+    for type_ in fast_types:
+        size = getattr(args, '{}_size'.format(type_), 0)
+        if not size:
+            size = getattr(prepare, 'get_{}_size'.format(type_))(lv_format=False)
+        if isinstance(size, str):
+            size = disk.Size.parse(size)
+        sizes[type_] = int(size) if size else 0
+    return PlanSpec(osds_per_device=getattr(args, 'osds_per_device', 1),
+                    data_slots=getattr(args, 'data_slots', None),
+                    data_allocate_fraction=getattr(args, 'data_allocate_fraction', 1.0),
+                    dmcrypt=bool(getattr(args, 'dmcrypt', False)),
+                    osd_ids=tuple(getattr(args, 'osd_ids', None) or ()),
+                    block_db_slots=getattr(args, 'block_db_slots', None),
+                    block_db_size=sizes['block_db'],
+                    block_wal_slots=getattr(args, 'block_wal_slots', None),
+                    block_wal_size=sizes['block_wal'],
+                    num_data_devices=len(getattr(args, 'devices', None) or ()))
+
+
+# A volume to create: on ``path`` (a device, or vg/lv for an existing LV),
+# taking ``rel_size`` of it, ``abs_size`` bytes, out of ``slots`` slots
+Alloc = namedtuple('Alloc', ['path', 'rel_size', 'abs_size', 'slots'])
+
+# An OSD of the plan, with its data, block.db and block.wal allocations
+PlannedOSD = namedtuple('PlannedOSD',
+                        ['data', 'fast', 'very_fast', 'osd_id', 'encryption', 'symlink'],
+                        defaults=[None, None, None, None, None])
+
+# The plan and the messages explaining why it may not be the one expected
+Plan = namedtuple('Plan', ['osds', 'messages'])
+
+
+def _count(free: int, size: int, limit: int) -> int:
+    """
+    How many volumes of ``size`` bytes, at most ``limit``, fit in ``free``
+    """
+    if limit <= 0:
+        return 0
+    if size <= 0:
+        return limit
+    return min(limit, free // size)
+
+
+def physical_data_allocs(devices: List[PlanDevice], spec: PlanSpec) -> List[Tuple[Alloc, Optional[str]]]:
+    """
+    The data volumes to create on physical devices, with the symlink of the
+    device they are on.
+    """
+    data_slots = spec.osds_per_device
+    if spec.data_slots:
+        data_slots = max(spec.data_slots, spec.osds_per_device)
+    rel_data_size = spec.data_allocate_fraction / data_slots
+    ret = []
+    for dev in devices:
+        if not dev.available:
+            continue
+        abs_size = int(dev.vg_size * rel_data_size)
+        alloc = Alloc(dev.path, rel_data_size, abs_size, spec.osds_per_device)
+        ret.extend([(alloc, dev.symlink)] * _count(dev.vg_free, abs_size, spec.osds_per_device))
+    return ret
+
+
+def lvm_data_allocs(lvs: List[PlanDevice]) -> List[Alloc]:
+    """
+    The data volumes for the passed LVs that are not used by ceph yet
+    """
+    return [Alloc(lv.path, 100.0, lv.lv_size, 1) for lv in lvs if not lv.used_by_ceph]
+
+
+def lvm_fast_allocs(lvs: List[PlanDevice]) -> List[Alloc]:
+    return [Alloc(lv.path, 100.0, lv.lv_size, 1) for lv in lvs if not lv.journal_used_by_ceph]
+
+
+def group_by_vg(devices: List[PlanDevice]) -> Dict[str, List[PlanDevice]]:
+    result: Dict[str, List[PlanDevice]] = {'unused_devices': []}
+    for dev in devices:
+        result.setdefault(dev.vg_name or 'unused_devices', []).append(dev)
+    return result
+
+
+def physical_fast_allocs(devices: List[PlanDevice],
+                         type_: str,
+                         fast_slots_per_device: int,
+                         new_osds: int,
+                         spec: PlanSpec) -> Tuple[List[Alloc], List[str]]:
+    """
+    The block.db or block.wal volumes to create on physical devices.
+
+    :returns: the allocations, and the messages about ignored arguments
+    :raises PlanError: if the requested size does not fit
+    """
+    messages = []
+    requested_slots = getattr(spec, '{}_slots'.format(type_))
+    if not requested_slots or requested_slots < fast_slots_per_device:
+        if requested_slots:
+            messages.append('{}_slots argument is too small, ignoring'.format(type_))
+        requested_slots = fast_slots_per_device
+    requested_size = getattr(spec, '{}_size'.format(type_))
+
+    ret: List[Alloc] = []
+    for vg_name, vg_devices in group_by_vg(devices).items():
+        # prior to v15.2.8, db/wal deployments were grouping multiple fast
+        # devices into single VGs - we need to multiply requested_slots (per
+        # device) by the number of devices in the VG in order to ensure that
+        # abs_size is calculated correctly from vg_size
+        if vg_name == 'unused_devices':
+            slots_for_vg = requested_slots
+        elif len(vg_devices) > 1:
+            slots_for_vg = spec.num_data_devices
+        else:
+            slots_for_vg = requested_slots
+        for dev in vg_devices:
+            if not dev.available:
+                continue
+            abs_size = int(dev.vg_size / slots_for_vg)
+            if requested_size:
+                if requested_size > abs_size:
+                    raise PlanError('{} was requested for {}_size, but only {} can be fulfilled'.format(
+                        disk.Size(b=requested_size), type_, disk.Size(b=abs_size)))
+                abs_size = requested_size
+            # any LV present is considered a taken slot
+            count = _count(dev.vg_free, abs_size,
+                           min(new_osds - len(ret), fast_slots_per_device - dev.lv_count))
+            ret.extend([Alloc(dev.path, abs_size / dev.vg_size, abs_size, requested_slots)] * count)
+    return ret, messages
+
+
+def fast_allocs(devices: List[PlanDevice],
+                requested_osds: int,
+                new_osds: int,
+                type_: str,
+                spec: PlanSpec) -> Tuple[List[Alloc], List[str]]:
+    """
+    The block.db or block.wal volumes to create on the passed devices, LVs
+    first.
+    """
+    if not devices:
+        return [], []
+    phys_devs = [d for d in devices if d.is_device]
+    lvm_devs = [d for d in devices if not d.is_device]
+    ret = lvm_fast_allocs(lvm_devs)
+    # fill up uneven distributions across fast devices: 5 osds and 2 fast
+    # devices? create 3 slots on each device rather then deploying
+    # heterogeneous osds
+    slot_divider = max(1, len(phys_devs))
+    fast_slots_per_device = -(-(requested_osds - len(lvm_devs)) // slot_divider)
+    allocs, messages = physical_fast_allocs(phys_devs, type_, fast_slots_per_device, new_osds, spec)
+    return ret + allocs, messages
+
+
+def plan(data: List[PlanDevice],
+         db: List[PlanDevice],
+         wal: List[PlanDevice],
+         spec: PlanSpec) -> Plan:
+    """
+    Plan the OSDs to deploy on the ``data`` devices, with their block.db on
+    ``db`` and their block.wal on ``wal``.
+
+    :raises PlanError: if the fast devices can not be shared by the OSDs
+    """
+    messages: List[str] = []
+    phys_devs = [d for d in data if d.is_device]
+    lvm_devs = [d for d in data if not d.is_device]
+
+    datas = physical_data_allocs(phys_devs, spec)
+    datas.extend((alloc, None) for alloc in lvm_data_allocs(lvm_devs))
+    num_osds = len(datas)
+    if num_osds == 0:
+        messages.append('All data devices are unavailable')
+        return Plan([], messages)
+    requested_osds = spec.osds_per_device * len(phys_devs) + len(lvm_devs)
+
+    fast_layout: List[List[Alloc]] = []
+    for devices, type_, name in ((db, 'block_db', 'fast'), (wal, 'block_wal', 'very fast')):
+        allocs, alloc_messages = fast_allocs(devices, requested_osds, num_osds, type_, spec)
+        messages.extend(alloc_messages)
+        if devices and not allocs:
+            messages.append('{} {} devices were passed, but none are available'.format(len(devices), name))
+            return Plan([], messages)
+        if devices and not len(allocs) == num_osds:
+            raise PlanError('{} {} allocations != {} num_osds'.format(len(allocs), name, num_osds))
+        fast_layout.append(allocs)
+
+    db_allocs, wal_allocs = fast_layout
+    osd_ids = list(spec.osd_ids)
+    osds = []
+    for data_alloc, symlink in datas:
+        osds.append(PlannedOSD(data=data_alloc,
+                               # fast volumes are handed out from the end
+                               fast=db_allocs.pop() if db_allocs else None,
+                               very_fast=wal_allocs.pop() if wal_allocs else None,
+                               osd_id=osd_ids.pop() if osd_ids else None,
+                               encryption='dmcrypt' if spec.dmcrypt else None,
+                               symlink=symlink))
+    return Plan(osds, messages)
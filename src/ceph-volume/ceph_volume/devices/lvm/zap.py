@@ -3,15 +3,16 @@ import os
 import logging
 import time
 
+from functools import partial
 from textwrap import dedent
 
 from ceph_volume import decorators, terminal, process, BEING_REPLACED_HEADER
 from ceph_volume.api import lvm as api
-from ceph_volume.util import system, encryption, disk, arg_validators, str_to_int, merge_dict
+from ceph_volume.util import system, encryption, disk, arg_validators, str_to_int, merge_dict, parallel
 from ceph_volume.util.device import Device
 from ceph_volume.systemd import systemctl
 from ceph_volume.devices.raw.list import direct_report
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Set, Tuple
 
 logger = logging.getLogger(__name__)
 mlogger = terminal.MultiLogger(__name__)
@@ -26,6 +27,8 @@ def zap_device(path: str) -> None:
     zap_bluestore(path)
     wipefs(path)
     zap_data(path)
+    # wiping a PV removes it from LVM
+    api.invalidate_state()
 
 def zap_bluestore(path: str) -> None:
     """Remove all BlueStore signature on a device.
@@ -92,6 +95,56 @@ def zap_data(path: str) -> None:
     ])
 
 
+def physical_disk(device: Device) -> str:
+    """Find the disk a device lives on.
+
+    Args:
+        device (Device): A partition, an LV, a mapper or a whole device.
+
+    Returns:
+        str: The path of the disk, e.g. ``/dev/sda`` for ``/dev/sda1`` or
+        for an LV on it. The path of the device itself for a whole device.
+    """
+    path = device.path
+    parent = device.disk_api.get('PKNAME', '')
+    # an LV on a dmcrypt mapping on a partition is three levels down
+    for _ in range(8):
+        if not parent:
+            break
+        path = f'/dev/{parent}'
+        parent = disk.lsblk(path).get('PKNAME', '')
+    return path
+
+
+def group_by_disk(devices: List[Device]) -> List[Tuple[str, List[Device]]]:
+    """Group the devices to zap by the disk they live on.
+
+    Devices on the same disk, or in the same VG, end up in the same group, so
+    that they are zapped one after the other while different disks can be
+    zapped concurrently.
+
+    Args:
+        devices (List[Device]): The devices to zap.
+
+    Returns:
+        List[Tuple[str, List[Device]]]: The disks of each group, and its
+        devices in the order they were given.
+    """
+    groups: List[Tuple[Set[str], List[int]]] = []
+    for index, device in enumerate(devices):
+        keys = {physical_disk(device)}
+        keys.update(f'vg:{lv.vg_name}' for lv in device.lvs if lv.vg_name)
+        members = [index]
+        for group in [g for g in groups if g[0] & keys]:
+            groups.remove(group)
+            keys |= group[0]
+            members.extend(group[1])
+        groups.append((keys, members))
+    return [(', '.join(sorted(k for k in keys if not k.startswith('vg:'))),
+             [devices[i] for i in sorted(members)])
+            for keys, members in sorted(groups, key=lambda g: min(g[1]))]
+
+
 class Zap:
     help = 'Removes all data and filesystems from a logical volume or partition.'
 
@@ -283,7 +336,7 @@ class Zap:
         else:
             raise RuntimeError(f"Unexpected error while attempting to zap LV device {device}.")
         self.unmount_lv(lv)
-        self.parent_device: str = disk.get_parent_device_from_mapper(lv.lv_path)
+        parent_device: str = disk.get_parent_device_from_mapper(lv.lv_path)
         zap_device(device.path)
 
         if self.args.destroy:
@@ -301,8 +354,8 @@ class Zap:
                     'wal': self.args.replace_wal
                 }
                 if replacement_args.get(lv.tags.get('ceph.type', ''), False):
-                    mlogger.info(f'Marking {self.parent_device} as being replaced')
-                    self._write_replacement_header(self.parent_device)
+                    mlogger.info(f'Marking {parent_device} as being replaced')
+                    self._write_replacement_header(parent_device)
             else:
                 mlogger.info('More than 1 LV left in VG, will proceed to '
                              'destroy LV only')
@@ -388,19 +441,14 @@ class Zap:
         # if self.args.replace_block:
         #     disk._dd_write(device.path, 'CEPH_DEVICE_BEING_REPLACED')
 
-    @decorators.needs_root
-    def zap(self) -> None:
-        """Zap a device.
+    def zap_devices(self, devices: List[Device]) -> None:
+        """Zap the given devices, one after the other.
 
-        Raises:
-            SystemExit: When the device is a mapper and not a mpath device.
+        Args:
+            devices (List[Device]): The devices to zap, all on the same disk.
         """
-        devices = self.args.devices
         for device in devices:
             mlogger.info("Zapping: %s", device.path)
-            if device.is_mapper and not device.is_mpath:
-                terminal.error("Refusing to zap the mapper device: {}".format(device))
-                raise SystemExit(1)
             if device.is_lvm_member:
                 self.zap_lvm_member(device)
             if device.is_lv:
@@ -410,6 +458,39 @@ class Zap:
             if device.is_device:
                 self.zap_raw_device(device)
 
+    @decorators.needs_root
+    def zap(self) -> None:
+        """Zap a device.
+
+        All the devices are checked before any of them is zapped. The devices
+        are then grouped by the disk they live on, and the disks are zapped
+        concurrently, see ``--max-workers``.
+
+        Raises:
+            SystemExit: When the device is a mapper and not a mpath device.
+            RuntimeError: When zapping any of the disks failed.
+        """
+        devices = self.args.devices
+        for device in devices:
+            if device.is_mapper and not device.is_mpath:
+                terminal.error("Refusing to zap the mapper device: {}".format(device))
+                raise SystemExit(1)
+
+        jobs = {}
+        for disk_path, disk_devices in group_by_disk(devices):
+            paths = [d.path for d in disk_devices]
+            name = disk_path if paths == [disk_path] else f'{disk_path} ({", ".join(paths)})'
+            jobs[name] = partial(self.zap_devices, disk_devices)
+        results = parallel.run_jobs(jobs, getattr(self.args, 'max_workers',
+                                                  parallel.DEFAULT_MAX_WORKERS))
+        if len(results) > 1:
+            parallel.report('Zap summary', results)
+        if len(results) == 1 and results[0].exception is not None:
+            raise results[0].exception
+        failed = [result.name for result in results if result.failed]
+        if failed:
+            raise RuntimeError('Zapping failed for: %s' % ', '.join(failed))
+
         if self.args.devices:
             terminal.success(
                 "Zapping successful for: %s" % ", ".join([str(d) for d in self.args.devices])
@@ -544,6 +625,14 @@ class Zap:
             help='Mark the wal device as unavailable.'
         )
 
+        parser.add_argument(
+            '--max-workers',
+            dest='max_workers',
+            type=int,
+            default=parallel.DEFAULT_MAX_WORKERS,
+            help='Maximum number of disks to zap concurrently (default: %(default)s)'
+        )
+
         parser.add_argument(
             '--clear-replace-header',
             dest='clear_replace_header',
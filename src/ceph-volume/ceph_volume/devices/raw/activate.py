@@ -3,6 +3,7 @@ import argparse
 import logging
 from textwrap import dedent
 from ceph_volume import objectstore
+from ceph_volume.util import parallel
 
 
 logger = logging.getLogger(__name__)
@@ -83,6 +84,13 @@ class Activate(object):
             action='store_true',
             help='Do not use a tmpfs mount for OSD data dir'
             )
+        parser.add_argument(
+            '--max-workers',
+            dest='max_workers',
+            type=int,
+            default=parallel.DEFAULT_MAX_WORKERS,
+            help='Maximum number of OSDs to activate concurrently (default: %(default)s)'
+        )
 
         if not self.argv:
             print(sub_command_help)
@@ -27,6 +27,7 @@ except ImportError:
         return entry_points(group=group)  # type: ignore
 
 from ceph_volume.decorators import catches
+from ceph_volume.api import lvm
 from ceph_volume import log, devices, configuration, conf, exceptions, terminal, inventory, drive_group, activate
 
 
@@ -170,8 +171,10 @@ Ceph Conf: {ceph_path}
             # (like reading from lvm tags)
             logger.warning('ignoring inability to load ceph.conf', exc_info=1)
             terminal.yellow(error)
-        # dispatch to sub-commands
-        terminal.dispatch(self.mapper, subcommand_args)
+        # dispatch to sub-commands, answering their LVM queries from a
+        # snapshot that is only loaded once per invocation
+        with lvm.cached_state():
+            terminal.dispatch(self.mapper, subcommand_args)
 
 
 def _load_library_extensions():
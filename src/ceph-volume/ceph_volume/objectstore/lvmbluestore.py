@@ -1,11 +1,14 @@
+import copy
 import json
 import logging
 import os
+import threading
+from functools import partial
 from ceph_volume import conf, terminal, decorators, configuration, process
 from ceph_volume.api import lvm as api
 from ceph_volume.util import prepare as prepare_utils
 from ceph_volume.util import encryption as encryption_utils
-from ceph_volume.util import system, disk
+from ceph_volume.util import system, disk, parallel
 from ceph_volume.systemd import systemctl
 from ceph_volume.devices.lvm.common import rollback_osd
 from ceph_volume.devices.lvm.listing import direct_report
@@ -18,12 +21,19 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# OSDs are activated concurrently, but the ceph configuration is global
+_conf_lock = threading.Lock()
+
 
 class LvmBlueStore(BlueStore):
     def __init__(self, args: "argparse.Namespace") -> None:
         super().__init__(args)
         self.method = 'lvm'
         self.tags: Dict[str, Any] = {}
+        # when activating all OSDs, the LVs and the holders of the block
+        # devices are listed once and shared by the activations
+        self.listed_lvs: Optional[List["Volume"]] = None
+        self.block_device_holders: Optional[Dict[str, str]] = None
 
     def pre_prepare(self) -> None:
         if self.encrypted and not self.with_tpm:
@@ -338,17 +348,22 @@ class LvmBlueStore(BlueStore):
         is_encrypted = osd_block_lv.tags.get('ceph.encrypted', '0') == '1'
         dmcrypt_secret = ''
         osd_id = osd_block_lv.tags['ceph.osd_id']
-        conf.cluster = osd_block_lv.tags['ceph.cluster_name']
         osd_fsid = osd_block_lv.tags['ceph.osd_fsid']
-        configuration.load_ceph_conf_path(
-            osd_block_lv.tags['ceph.cluster_name'])
-        configuration.load()
+        # another activation may load the configuration of its own cluster
+        # once the lock is released, so only use `cluster` from here on
+        with _conf_lock:
+            conf.cluster = osd_block_lv.tags['ceph.cluster_name']
+            configuration.load_ceph_conf_path(
+                osd_block_lv.tags['ceph.cluster_name'])
+            configuration.load()
+            cluster = conf.cluster
 
         # mount on tmpfs the osd directory
-        self.osd_path = '/var/lib/ceph/osd/%s-%s' % (conf.cluster, osd_id)
+        self.osd_path = '/var/lib/ceph/osd/%s-%s' % (cluster, osd_id)
         if not system.path_is_mounted(self.osd_path):
             # mkdir -p and mount as tmpfs
-            prepare_utils.create_osd_path(osd_id, tmpfs=not no_tmpfs)
+            prepare_utils.create_osd_path(osd_id, tmpfs=not no_tmpfs,
+                                          cluster=cluster)
 
         # XXX This needs to be removed once ceph-bluestore-tool can deal with
         # symlinks that exist in the osd dir
@@ -362,12 +377,16 @@ class LvmBlueStore(BlueStore):
             if not self.with_tpm:
                 encryption_utils.write_lockbox_keyring(osd_id,
                                                        osd_fsid,
-                                                       lockbox_secret)
-                dmcrypt_secret = encryption_utils.get_dmcrypt_key(osd_id, osd_fsid)
+                                                       lockbox_secret,
+                                                       cluster=cluster)
+                dmcrypt_secret = encryption_utils.get_dmcrypt_key(
+                    osd_id, osd_fsid, cluster=cluster)
             lv_path: str = osd_block_lv.__dict__['lv_path']
             if disk.has_holders(lv_path):
                 real_path_device = os.path.realpath(lv_path)
-                holders = disk.get_block_device_holders()
+                holders = self.block_device_holders
+                if holders is None:
+                    holders = disk.get_block_device_holders()
 
                 if real_path_device in holders.keys() and real_path_device in holders.values():
                     osd_lv_path = disk.get_lvm_mapper_path_from_dm(next(k for k, v in holders.items() if v == real_path_device))
@@ -393,7 +412,7 @@ class LvmBlueStore(BlueStore):
         # somehow messed up.
         system.chown(self.osd_path)
         prime_command = [
-            'ceph-bluestore-tool', '--cluster=%s' % conf.cluster,
+            'ceph-bluestore-tool', '--cluster=%s' % cluster,
             'prime-osd-dir', '--dev', osd_lv_path,
             '--path', self.osd_path, '--no-mon-config']
 
@@ -447,7 +466,11 @@ class LvmBlueStore(BlueStore):
             terminal.warning('Verify OSDs are present with '
                              '"ceph-volume lvm list"')
             return
-        for osd_fsid, osd_id in osds.items():
+
+        self.listed_lvs = api.get_lvs()
+        self.block_device_holders = disk.get_block_device_holders()
+
+        def activate_osd(store: "LvmBlueStore", osd_id: str, osd_fsid: str) -> None:
             if not self.args.no_systemd and systemctl.osd_is_active(osd_id):
                 terminal.warning(
                     'OSD ID %s FSID %s process is active. '
@@ -456,7 +479,22 @@ class LvmBlueStore(BlueStore):
             else:
                 terminal.info('Activating OSD ID %s FSID %s' % (osd_id,
                                                                 osd_fsid))
-                self.activate(self.args, osd_id=osd_id, osd_fsid=osd_fsid)
+                store.activate(self.args, osd_id=osd_id, osd_fsid=osd_fsid)
+
+        # every activation works on a copy, as the object keeps the state
+        # (e.g. the OSD path) of the OSD being activated
+        jobs = {
+            'osd.%s' % osd_id: partial(activate_osd,
+                                       copy.copy(self) if len(osds) > 1 else self,
+                                       osd_id, osd_fsid)
+            for osd_fsid, osd_id in osds.items()
+        }
+        results = parallel.run_jobs(jobs, getattr(self.args, 'max_workers',
+                                                  parallel.DEFAULT_MAX_WORKERS))
+        parallel.report('OSD activation', results)
+        failed = [result.name for result in results if result.failed]
+        if failed:
+            raise RuntimeError('failed to activate %s' % ', '.join(failed))
 
     @decorators.needs_root
     def activate(self,
@@ -482,7 +520,11 @@ class LvmBlueStore(BlueStore):
                                'osd_fsid too'.format(osd_id))
         else:
             raise RuntimeError('Please provide both osd_id and osd_fsid')
-        lvs = api.get_lvs(tags=tags)
+        if self.listed_lvs is not None:
+            lvs = [lv for lv in self.listed_lvs
+                   if all(lv.tags.get(k) == v for k, v in tags.items())]
+        else:
+            lvs = api.get_lvs(tags=tags)
         if not lvs:
             raise RuntimeError('could not find osd.%s with osd_fsid %s' %
                                (osd_id, osd_fsid))
@@ -1,9 +1,11 @@
+import copy
 import logging
 import json
 import os
+from functools import partial
 from .bluestore import BlueStore
 from ceph_volume import terminal, decorators, conf, process
-from ceph_volume.util import system, disk
+from ceph_volume.util import system, disk, parallel
 from ceph_volume.util import prepare as prepare_utils
 from ceph_volume.util import encryption as encryption_utils
 from ceph_volume.util.device import Device
@@ -156,13 +158,14 @@ class RawBlueStore(BlueStore):
         the function pre-activates it. After collecting the relevant devices, it attempts to
         activate any OSDs found.
 
+        The matching OSDs are activated concurrently, see ``--max-workers``.
+
         Raises:
-            RuntimeError: If no matching OSDs are found to activate.
+            RuntimeError: If no matching OSDs are found to activate, or if
+            any of them failed to activate.
         """
         assert self.devices or self.osd_id or self.osd_fsid
 
-        activated_any: bool = False
-
         for d in disk.lsblk_all(abspath=True):
             device: str = d.get('NAME', '')
             luks2 = encryption_utils.CephLuks2(device)
@@ -172,26 +175,53 @@ class RawBlueStore(BlueStore):
         found = direct_report(self.devices)
 
         holders = disk.get_block_device_holders()
+        # several OSDs can share a parent device, only look it up once
+        lvm_parents: Dict[str, bool] = {}
+        matching: List[Dict[str, Any]] = []
         for osd_uuid, meta in found.items():
             realpath_device = os.path.realpath(meta['device'])
             parent_device = holders.get(realpath_device)
-            if parent_device and any('ceph.cluster_fsid' in lv.lv_tags for lv in Device(parent_device).lvs):
-                continue
+            if parent_device:
+                if parent_device not in lvm_parents:
+                    lvm_parents[parent_device] = any('ceph.cluster_fsid' in lv.lv_tags
+                                                     for lv in Device(parent_device).lvs)
+                if lvm_parents[parent_device]:
+                    continue
             osd_id = meta['osd_id']
             if self.osd_id is not None and str(osd_id) != str(self.osd_id):
                 continue
             if self.osd_fsid is not None and osd_uuid != self.osd_fsid:
                 continue
-            self.block_device_path = meta.get('device')
-            self.db_device_path = meta.get('device_db', '')
-            self.wal_device_path = meta.get('device_wal', '')
-            logger.info(f'Activating osd.{osd_id} uuid {osd_uuid} cluster {meta["ceph_fsid"]}')
-            self._activate(osd_id, osd_uuid)
-            activated_any = True
-
-        if not activated_any:
+            matching.append(dict(meta, osd_uuid=osd_uuid))
+
+        if not matching:
             raise RuntimeError('did not find any matching OSD to activate')
 
+        def activate_osd(store: "RawBlueStore", meta: Dict[str, Any]) -> None:
+            store.block_device_path = meta.get('device')
+            store.db_device_path = meta.get('device_db', '')
+            store.wal_device_path = meta.get('device_wal', '')
+            logger.info(f'Activating osd.{meta["osd_id"]} uuid {meta["osd_uuid"]} cluster {meta["ceph_fsid"]}')
+            store._activate(meta['osd_id'], meta['osd_uuid'])
+
+        # the device paths of the OSD being activated are kept on the object,
+        # concurrent activations each need their own copy of it
+        jobs = {
+            'osd.%s' % meta['osd_id']: partial(activate_osd,
+                                               copy.copy(self) if len(matching) > 1 else self,
+                                               meta)
+            for meta in matching
+        }
+        results = parallel.run_jobs(jobs, getattr(self.args, 'max_workers',
+                                                  parallel.DEFAULT_MAX_WORKERS))
+        if len(results) > 1:
+            parallel.report('OSD activation', results)
+        if len(results) == 1 and results[0].exception is not None:
+            raise results[0].exception
+        failed = [result for result in results if result.failed]
+        if failed:
+            raise RuntimeError('failed to activate %s' % ', '.join(result.name for result in failed))
+
     def pre_activate_tpm2(self, device: str) -> None:
         """Pre-activate a TPM2-encrypted device for Ceph.
 
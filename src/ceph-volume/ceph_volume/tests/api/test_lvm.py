@@ -634,6 +634,30 @@ class TestGetDeviceLvs(object):
         assert vgs == []
 
 
+class TestGetAllDevicesLvs(object):
+
+    def test_groups_lvs_by_pv(self, stub_call):
+        stub_call(([
+            ' /dev/sda;ceph.osd_id=0;/dev/vg1/lv1;lv1;vg1;uuid1;1024',
+            ' /dev/sda;;/dev/vg1/lv2;lv2;vg1;uuid2;1024',
+            ' /dev/sdb;ceph.osd_id=1;/dev/vg2/lv3;lv3;vg2;uuid3;1024',
+            ' /dev/sdc;;;;vg3;;',
+        ], [], 0))
+        lvs = api.get_all_devices_lvs()
+        assert sorted(lvs) == ['/dev/sda', '/dev/sdb', '/dev/sdc']
+        assert [lv.lv_path for lv in lvs['/dev/sda']] == ['/dev/vg1/lv1', '/dev/vg1/lv2']
+        assert lvs['/dev/sdb'][0].tags == {'ceph.osd_id': '1'}
+        assert lvs['/dev/sdc'] == []
+
+    def test_name_prefix(self, stub_call):
+        stub_call(([
+            ' /dev/sda;;/dev/vg1/osd-block-1;osd-block-1;vg1;uuid1;1024',
+            ' /dev/sda;;/dev/vg1/other;other;vg1;uuid2;1024',
+        ], [], 0))
+        lvs = api.get_all_devices_lvs(name_prefix='osd-block')
+        assert [lv.name for lv in lvs['/dev/sda']] == ['osd-block-1']
+
+
 # NOTE: api.convert_filters_to_str() and api.convert_tags_to_str() should get
 # tested automatically while testing api.make_filters_lvmcmd_ready()
 class TestMakeFiltersLVMCMDReady(object):
@@ -883,3 +907,77 @@ class TestGetSingleLV(object):
 
         assert isinstance(lv_, api.Volume)
         assert lv_.name == 'lv1'
+
+
+class TestCachedState(object):
+
+    # pv_name,pv_tags,pv_uuid,vg_name,lv_uuid,<VG_FIELDS>,vg_tags
+    PVS = [
+        ' /dev/sda;;pvuuid1;vg1;uuid1;1;2;wz--n-;100;10;4096;',
+        ' /dev/sda;;pvuuid1;vg1;uuid2;1;2;wz--n-;100;10;4096;',
+        ' /dev/sdb;;pvuuid2;vg2;uuid3;1;1;wz--n-;200;0;4096;ceph.foo=1',
+        ' /dev/sdc;;pvuuid3;;;;;;;;;',
+    ]
+    # <LV_FIELDS>,lv_dm_path
+    LVS = [
+        ' ceph.osd_id=0,ceph.type=block;/dev/vg1/lv1;lv1;vg1;uuid1;1024;/dev/mapper/vg1-lv1',
+        ' ceph.osd_id=0,ceph.type=db;/dev/vg1/lv2;lv2;vg1;uuid2;1024;/dev/mapper/vg1-lv2',
+        ' ceph.osd_id=1,ceph.type=block;/dev/vg2/lv3;lv3;vg2;uuid3;1024;/dev/mapper/vg2-lv3',
+    ]
+
+    @pytest.fixture
+    def state_call(self, stub_call):
+        # process.call stubs return their values in reverse order
+        return stub_call([(self.LVS, [], 0), (self.PVS, [], 0)])
+
+    def test_queries_are_answered_from_one_snapshot(self, state_call):
+        with api.cached_state():
+            assert [lv.name for lv in api.get_lvs(tags={'ceph.osd_id': '0'})] == ['lv1', 'lv2']
+            assert api.get_single_lv(filters={'lv_name': 'lv3', 'vg_name': 'vg2'}).tags['ceph.osd_id'] == '1'
+            assert api.get_single_lv(filters={'lv_dm_path': '/dev/mapper/vg1-lv2'}).name == 'lv2'
+            assert [lv.name for lv in api.get_lvs(filters={'path': '/dev/vg2/lv3'})] == ['lv3']
+            assert [vg.name for vg in api.get_vgs()] == ['vg1', 'vg2']
+            assert api.get_single_vg(tags={'ceph.foo': '1'}).name == 'vg2'
+            assert [pv.pv_name for pv in api.get_pvs(filters={'lv_uuid': 'uuid2'})] == ['/dev/sda']
+            assert [lv.name for lv in api.get_device_lvs('/dev/sda')] == ['lv1', 'lv2']
+            assert [vg.name for vg in api.get_device_vgs('/dev/sdb')] == ['vg2']
+            assert api.get_device_vgs('/dev/sdc') == []
+            assert [vg.pv_name for vg in api.get_all_devices_vgs()] == ['/dev/sda', '/dev/sdb']
+            assert api.get_all_devices_lvs()['/dev/sdc'] == []
+        assert len(state_call.calls) == 2
+
+    def test_lvs_match_the_command_output(self, state_call):
+        with api.cached_state():
+            lv = api.get_single_lv(filters={'lv_name': 'lv1'})
+        assert lv.lv_api == {'lv_tags': 'ceph.osd_id=0,ceph.type=block',
+                             'lv_path': '/dev/vg1/lv1',
+                             'lv_name': 'lv1',
+                             'vg_name': 'vg1',
+                             'lv_uuid': 'uuid1',
+                             'lv_size': '1024'}
+
+    def test_pvs_without_lv_fields_are_listed_once(self, state_call):
+        with api.cached_state():
+            pvs = api.get_pvs(fields='pv_name,pv_tags,pv_uuid')
+        assert [pv.pv_name for pv in pvs] == ['/dev/sda', '/dev/sdb', '/dev/sdc']
+
+    def test_unknown_filters_run_the_command(self, state_call):
+        state_call.return_values.insert(0, ([], [], 0))
+        with api.cached_state():
+            api.get_lvs(filters={'lv_attr': 'foo'})
+        assert state_call.calls[-1]['args'][0][0] == 'lvs'
+        assert '-S' in state_call.calls[-1]['args'][0]
+
+    def test_changes_invalidate_the_snapshot(self, state_call):
+        with api.cached_state():
+            api.get_lvs()
+            state_call.return_values = [(self.LVS, [], 0), (self.PVS, [], 0), ('', '', 0)]
+            api.get_single_lv(filters={'lv_name': 'lv1'}).set_tag('ceph.foo', 'bar')
+            api.get_lvs()
+        assert [c['args'][0][0] for c in state_call.calls] == ['pvs', 'lvs', 'lvchange', 'pvs', 'lvs']
+
+    def test_not_cached_outside_of_the_block(self, stub_call):
+        call = stub_call([([], [], 0), ([], [], 0)])
+        api.get_lvs()
+        api.get_lvs()
+        assert len(call.calls) == 2
@@ -288,6 +288,7 @@ def disable_kernel_queries(monkeypatch):
     '''
     monkeypatch.setattr("ceph_volume.util.device.disk.get_devices", lambda device='': {})
     monkeypatch.setattr("ceph_volume.util.disk.udevadm_property", lambda *a, **kw: {})
+    monkeypatch.setattr("ceph_volume.util.disk.udevadm_properties_all", lambda: {})
 
 
 @pytest.fixture(params=[
@@ -377,6 +378,10 @@ def device_info(monkeypatch, patch_bluestore_label):
         monkeypatch.setattr("ceph_volume.util.device.disk.lsblk", lambda path: lsblk)
         monkeypatch.setattr("ceph_volume.util.device.disk.blkid", lambda path: blkid)
         monkeypatch.setattr("ceph_volume.util.disk.udevadm_property", lambda *a, **kw: udevadm)
+        # let the Devices snapshot fall back to the per device calls above
+        monkeypatch.setattr("ceph_volume.util.device.disk.blkid_all", lambda paths: {})
+        monkeypatch.setattr("ceph_volume.util.disk.udevadm_properties_all", lambda: {})
+        monkeypatch.setattr("ceph_volume.util.device.lvm.get_all_devices_lvs", lambda: {})
     return apply
 
 @pytest.fixture(params=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.999, 1.0])
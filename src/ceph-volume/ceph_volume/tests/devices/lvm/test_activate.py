@@ -202,6 +202,8 @@ class TestActivateAll(object):
 
     def test_detects_running_osds(self, m_create_key, capsys, is_root, capture, monkeypatch):
         monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.direct_report', lambda: direct_report)
+        monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.api.get_lvs', lambda **kw: [])
+        monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.disk.get_block_device_holders', lambda: {})
         monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.systemctl.osd_is_active', lambda x: True)
         args = ['--all']
         activation = activate.Activate(args)
@@ -213,6 +215,8 @@ class TestActivateAll(object):
     @patch('ceph_volume.objectstore.lvmbluestore.LvmBlueStore.activate')
     def test_detects_osds_to_activate_systemd(self, m_activate, m_create_key, is_root, monkeypatch):
         monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.direct_report', lambda: direct_report)
+        monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.api.get_lvs', lambda **kw: [])
+        monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.disk.get_block_device_holders', lambda: {})
         monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.systemctl.osd_is_active', lambda x: False)
         args = ['--all', '--bluestore']
         a = activate.Activate(args)
@@ -221,6 +225,7 @@ class TestActivateAll(object):
             call(Namespace(activate_all=True,
                            auto_detect_objectstore=False,
                            bluestore=True,
+                           max_workers=8,
                            no_systemd=False,
                            no_tmpfs=False,
                            objectstore='bluestore',
@@ -231,6 +236,7 @@ class TestActivateAll(object):
             call(Namespace(activate_all=True,
                            auto_detect_objectstore=False,
                            bluestore=True,
+                           max_workers=8,
                            no_systemd=False,
                            no_tmpfs=False,
                            objectstore='bluestore',
@@ -239,11 +245,13 @@ class TestActivateAll(object):
                            osd_id='1',
                            osd_fsid='d0f3e4ad-e52a-4520-afc0-a8789a96ce8b')
         ]
-        m_activate.assert_has_calls(calls)
+        m_activate.assert_has_calls(calls, any_order=True)
 
     @patch('ceph_volume.objectstore.lvmbluestore.LvmBlueStore.activate')
     def test_detects_osds_to_activate_no_systemd(self, m_activate, m_create_key, is_root, monkeypatch):
         monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.direct_report', lambda: direct_report)
+        monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.api.get_lvs', lambda **kw: [])
+        monkeypatch.setattr('ceph_volume.objectstore.lvmbluestore.disk.get_block_device_holders', lambda: {})
         args = ['--all', '--no-systemd', '--bluestore']
         a = activate.Activate(args)
         a.main()
@@ -251,6 +259,7 @@ class TestActivateAll(object):
             call(Namespace(activate_all=True,
                            auto_detect_objectstore=False,
                            bluestore=True,
+                           max_workers=8,
                            no_systemd=True,
                            no_tmpfs=False,
                            objectstore='bluestore',
@@ -261,6 +270,7 @@ class TestActivateAll(object):
             call(Namespace(activate_all=True,
                            auto_detect_objectstore=False,
                            bluestore=True,
+                           max_workers=8,
                            no_systemd=True,
                            no_tmpfs=False,
                            objectstore='bluestore',
@@ -269,7 +279,7 @@ class TestActivateAll(object):
                            osd_id='1',
                            osd_fsid='d0f3e4ad-e52a-4520-afc0-a8789a96ce8b')
         ]
-        m_activate.assert_has_calls(calls)
+        m_activate.assert_has_calls(calls, any_order=True)
 
 #
 # Activate All fixture
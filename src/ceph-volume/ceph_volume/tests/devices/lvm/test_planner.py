@@ -0,0 +1,106 @@
+import time
+import pytest
+from ceph_volume.devices.lvm import planner
+
+GB = 1024 ** 3
+
+
+def host(num_data=80, num_fast=20):
+    """
+    A synthetic host: ``num_data`` empty 10TB disks and ``num_fast`` empty
+    2TB NVMe devices.
+    """
+    data = [planner.PlanDevice(path=f'/dev/sd{n}', vg_size=10000 * GB, vg_free=10000 * GB)
+            for n in range(num_data)]
+    fast = [planner.PlanDevice(path=f'/dev/nvme{n}n1', vg_size=2000 * GB, vg_free=2000 * GB)
+            for n in range(num_fast)]
+    return data, fast
+
+
+class TestPlan(object):
+
+    def test_data_only(self):
+        data, _ = host(num_data=4)
+        plan = planner.plan(data, [], [], planner.PlanSpec(osds_per_device=2))
+        assert len(plan.osds) == 8
+        assert {osd.data.abs_size for osd in plan.osds} == {5000 * GB}
+        assert all(osd.fast is None for osd in plan.osds)
+
+    def test_db_devices_are_shared(self):
+        data, fast = host(num_data=5, num_fast=2)
+        spec = planner.PlanSpec(num_data_devices=5)
+        plan = planner.plan(data, fast, [], spec)
+        assert len(plan.osds) == 5
+        # 5 OSDs on 2 devices, 3 slots on each
+        assert {osd.fast.slots for osd in plan.osds} == {3}
+        assert sorted(osd.fast.path for osd in plan.osds).count('/dev/nvme0n1') == 3
+
+    def test_osd_ids_are_not_consumed(self):
+        data, _ = host(num_data=2)
+        spec = planner.PlanSpec(osd_ids=('1', '2'))
+        first = planner.plan(data, [], [], spec)
+        assert [osd.osd_id for osd in first.osds] == ['2', '1']
+        assert planner.plan(data, [], [], spec) == first
+
+    def test_unavailable_devices_are_skipped(self):
+        data, fast = host(num_data=2, num_fast=1)
+        fast = [fast[0]._replace(available=False)]
+        plan = planner.plan(data, fast, [], planner.PlanSpec())
+        assert plan.osds == []
+        assert '1 fast devices were passed, but none are available' in plan.messages
+
+    def test_requested_size_too_large(self):
+        data, fast = host(num_data=4, num_fast=1)
+        spec = planner.PlanSpec(block_db_size=1000 * GB)
+        with pytest.raises(planner.PlanError) as error:
+            planner.plan(data, fast, [], spec)
+        assert str(error.value) == ('1000.00 GB was requested for block_db_size, '
+                                    'but only 500.00 GB can be fulfilled')
+
+    def test_taken_slots(self):
+        data, fast = host(num_data=4, num_fast=2)
+        fast[0] = fast[0]._replace(lv_count=1, vg_name='ceph-db', vg_free=1000 * GB)
+        allocs, _ = planner.fast_allocs(fast, 4, 2, 'block_db', planner.PlanSpec())
+        assert [a.path for a in allocs] == ['/dev/nvme1n1', '/dev/nvme1n1']
+
+
+class TestPlanLargeHost(object):
+
+    def test_plan_100_disk_host_layouts(self):
+        data, fast = host()
+        specs = [planner.PlanSpec(osds_per_device=osds_per_device,
+                                  block_db_slots=db_slots,
+                                  data_allocate_fraction=fraction,
+                                  num_data_devices=len(data))
+                 for osds_per_device in (1, 2, 4)
+                 for db_slots in (None, 4, 8, 16)
+                 for fraction in (0.5, 0.75, 0.9, 1.0)]
+        for spec in specs:
+            plan = planner.plan(data, fast, fast[:4], spec)
+            assert len(plan.osds) == len(data) * spec.osds_per_device
+
+
+class TestPlanBenchmark(object):
+    """
+    Time the planning of every layout of a 100 disk host. The bound is far
+    above the expected run time, it only catches the planner regressing to
+    a per-slot search over all the devices.
+    """
+
+    def test_plan_100_disk_hosts(self, capsys):
+        data, fast = host()
+        specs = [planner.PlanSpec(osds_per_device=osds_per_device,
+                                  block_db_slots=db_slots,
+                                  data_allocate_fraction=fraction,
+                                  num_data_devices=len(data))
+                 for osds_per_device in (1, 2, 4)
+                 for db_slots in (None, 4, 8, 16)
+                 for fraction in (0.5, 0.75, 0.9, 1.0)] * 5
+        start = time.monotonic()
+        for spec in specs:
+            planner.plan(data, fast, fast[:4], spec)
+        elapsed = time.monotonic() - start
+        with capsys.disabled():
+            print('\nplanned {} layouts of a {} disk host in {:.3f}s'.format(
+                len(specs), len(data) + len(fast), elapsed))
+        assert elapsed < 30
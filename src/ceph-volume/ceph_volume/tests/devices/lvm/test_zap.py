@@ -243,6 +243,49 @@ class TestZap:
         out, err = capsys.readouterr()
         assert "Zapping successful for OSD: 1" in err
 
+    def _device(self, path, parent='', vg_name=''):
+        lvs = [Mock(vg_name=vg_name)] if vg_name else []
+        return Mock(path=path, disk_api={'PKNAME': parent}, lvs=lvs,
+                    is_mapper=False, is_lvm_member=False, is_lv=False,
+                    is_partition=False, is_device=True)
+
+    @patch('ceph_volume.devices.lvm.zap.disk.lsblk')
+    def test_group_by_disk(self, m_lsblk):
+        m_lsblk.side_effect = lambda path: {'/dev/sdb1': {'PKNAME': 'sdb'}}.get(path, {})
+        lv1 = self._device('/dev/vg1/lv1', parent='sdb1', vg_name='vg1')
+        lv2 = self._device('/dev/vg1/lv2', parent='sdc', vg_name='vg1')
+        sdd = self._device('/dev/sdd')
+        sdb2 = self._device('/dev/sdb2', parent='sdb')
+        groups = zap.group_by_disk([lv1, sdd, lv2, sdb2])
+        # the LVs share a VG, /dev/sdb2 is on the same disk as lv1
+        assert groups == [('/dev/sdb, /dev/sdc', [lv1, lv2, sdb2]),
+                          ('/dev/sdd', [sdd])]
+
+    @patch('ceph_volume.devices.lvm.zap.disk.lsblk', Mock(return_value={}))
+    def test_zap_disks_concurrently(self, factory, is_root, capsys):
+        cli_zap = zap.Zap([])
+        devices = [self._device('/dev/sdb'), self._device('/dev/sdc')]
+        cli_zap.args = factory(devices=devices, osd_id=None, osd_fsid=None, max_workers=2)
+        cli_zap.zap_raw_device = Mock(side_effect=[None, RuntimeError('boom')])
+        with pytest.raises(RuntimeError):
+            cli_zap.zap()
+        assert cli_zap.zap_raw_device.call_count == 2
+        out, err = capsys.readouterr()
+        assert 'Zap summary:' in err
+        assert 'boom' in err
+
+    def test_mapper_is_refused_before_zapping(self, factory, is_root):
+        cli_zap = zap.Zap([])
+        mapper = self._device('/dev/mapper/foo')
+        mapper.is_mapper = True
+        mapper.is_mpath = False
+        cli_zap.args = factory(devices=[self._device('/dev/sdb'), mapper],
+                               osd_id=None, osd_fsid=None)
+        cli_zap.zap_raw_device = Mock()
+        with pytest.raises(SystemExit):
+            cli_zap.zap()
+        assert cli_zap.zap_raw_device.call_count == 0
+
     @patch('ceph_volume.api.lvm.process.call', Mock(return_value=('', '', 0)))
     def test_multiple_dbs_are_found(self):
         tags = 'ceph.osd_id=0,ceph.osd_fsid=asdf-lkjh,ceph.journal_uuid=x,ceph.type=db'
@@ -2,6 +2,7 @@ import pytest
 from mock import patch, Mock, MagicMock, call
 from ceph_volume.objectstore.lvmbluestore import LvmBlueStore
 from ceph_volume.api.lvm import Volume
+from ceph_volume import conf
 from ceph_volume.util import system
 
 
@@ -485,6 +486,31 @@ class TestLvmBlueStore:
                                       'kwargs': {}}]
         assert m_success.mock_calls == [call('ceph-volume lvm activate successful for osd ID: 0')]
 
+    @patch('ceph_volume.objectstore.lvmbluestore.prepare_utils.create_osd_path')
+    @patch('ceph_volume.terminal.success', MagicMock())
+    def test__activate_keeps_its_cluster(self, m_create_osd_path,
+                                         monkeypatch, fake_run, conf_ceph_stub):
+        conf_ceph_stub('[global]\nfsid=asdf-lkjh')
+        monkeypatch.setattr(system, 'chown', lambda path: 0)
+        monkeypatch.setattr('ceph_volume.configuration.load', lambda: None)
+
+        def path_is_mounted(path):
+            # another activation loads its configuration meanwhile
+            monkeypatch.setattr(conf, 'cluster', 'other')
+            return False
+        monkeypatch.setattr('ceph_volume.util.system.path_is_mounted', path_is_mounted)
+        lvs = [Volume(lv_name='lv_foo-block',
+                      lv_path='/fake-block-path',
+                      vg_name='vg_foo',
+                      lv_tags='ceph.type=block,ceph.block_uuid=fake-block-uuid,ceph.osd_id=0,ceph.osd_fsid=abcd,ceph.cluster_name=ceph',
+                      lv_uuid='fake-block-uuid')]
+        self.lvm_bs._activate(lvs, no_systemd=True)
+        assert self.lvm_bs.osd_path == '/var/lib/ceph/osd/ceph-0'
+        m_create_osd_path.assert_called_once_with('0', tmpfs=True, cluster='ceph')
+        assert fake_run.calls[0]['args'][0][:2] == ['ceph-bluestore-tool', '--cluster=ceph']
+
+    @patch('ceph_volume.objectstore.lvmbluestore.disk.get_block_device_holders', Mock(return_value={}))
+    @patch('ceph_volume.api.lvm.get_lvs', Mock(return_value=[]))
     @patch('ceph_volume.systemd.systemctl.osd_is_active', return_value=False)
     def test_activate_all(self,
                           m_create_key,
@@ -496,12 +522,44 @@ class TestLvmBlueStore:
         self.lvm_bs.args = args
         self.lvm_bs.activate = MagicMock()
         self.lvm_bs.activate_all()
-        assert self.lvm_bs.activate.mock_calls == [call(args,
-                                                        osd_id='1',
-                                                        osd_fsid='824f7edf-371f-4b75-9231-4ab62a32d5c0'),
-                                                   call(args,
-                                                        osd_id='0',
-                                                        osd_fsid='a0e07c5b-bee1-4ea2-ae07-cb89deda9b27')]
+        self.lvm_bs.activate.assert_has_calls([call(args,
+                                                    osd_id='1',
+                                                    osd_fsid='824f7edf-371f-4b75-9231-4ab62a32d5c0'),
+                                               call(args,
+                                                    osd_id='0',
+                                                    osd_fsid='a0e07c5b-bee1-4ea2-ae07-cb89deda9b27')],
+                                              any_order=True)
+        assert self.lvm_bs.activate.call_count == 2
+
+    @patch('ceph_volume.objectstore.lvmbluestore.disk.get_block_device_holders', Mock(return_value={}))
+    @patch('ceph_volume.api.lvm.get_lvs')
+    @patch('ceph_volume.systemd.systemctl.osd_is_active', return_value=False)
+    def test_activate_all_lists_lvs_once(self,
+                                         m_osd_is_active,
+                                         m_get_lvs,
+                                         mock_lvm_direct_report,
+                                         is_root,
+                                         factory,
+                                         capsys):
+        lvs = [Volume(lv_name='lv_foo',
+                      lv_path='/fake-path',
+                      vg_name='vg_foo',
+                      lv_tags=f'ceph.osd_id={osd_id},ceph.osd_fsid={osd_fsid}',
+                      lv_uuid='fake-uuid')
+               for osd_id, osd_fsid in (('0', 'a0e07c5b-bee1-4ea2-ae07-cb89deda9b27'),
+                                        ('1', '824f7edf-371f-4b75-9231-4ab62a32d5c0'))]
+        m_get_lvs.return_value = lvs
+        self.lvm_bs.args = factory(no_systemd=True, no_tmpfs=False, max_workers=2)
+        self.lvm_bs._activate = MagicMock(side_effect=[None, RuntimeError('fail')])
+        with pytest.raises(RuntimeError):
+            self.lvm_bs.activate_all()
+        assert m_get_lvs.mock_calls == [call()]
+        self.lvm_bs._activate.assert_has_calls([call([lvs[0]], True, False),
+                                                call([lvs[1]], True, False)],
+                                               any_order=True)
+        stdout, stderr = capsys.readouterr()
+        assert 'OSD activation:' in stderr
+        assert 'failed after' in stderr
 
     @patch('ceph_volume.systemd.systemctl.osd_is_active', return_value=False)
     def test_activate_all_no_osd_found(self,
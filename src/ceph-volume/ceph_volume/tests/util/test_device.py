@@ -474,6 +474,78 @@ class TestDevice(object):
                 assert not disk.has_bluestore_label
 
 
+class TestDiscoverySnapshot(object):
+
+    @pytest.fixture
+    def snapshot(self, monkeypatch, patch_bluestore_label):
+        def per_device_call(*a, **kw):
+            raise AssertionError('the snapshot should have been used')
+
+        sda = {'size': 1999844147200.0, 'partitions': {'sda1': {'size': 1024}},
+               'device_nodes': ['sda']}
+        sdb = {'size': 1999844147200.0, 'partitions': {}, 'device_nodes': ['sdb']}
+        lv = api.Volume(lv_name='lv', lv_uuid='y', vg_name='vg', lv_size='1024',
+                        lv_tags='ceph.osd_id=0,ceph.type=block', lv_path='/dev/vg/lv')
+        vg = api.VolumeGroup(pv_name='/dev/sda1', vg_name='vg', vg_free_count=6,
+                             vg_extent_size=1073741824)
+        monkeypatch.setattr('ceph_volume.sys_info.devices', {'/dev/sda': sda, '/dev/sdb': sdb})
+        monkeypatch.setattr(api, 'get_lvs', lambda: [lv])
+        monkeypatch.setattr(api, 'get_all_devices_vgs', lambda: [vg])
+        monkeypatch.setattr(api, 'get_all_devices_lvs', lambda: {'/dev/sda1': [lv]})
+        monkeypatch.setattr(device.disk, 'lsblk_all', lambda: [
+            {'NAME': 'sda', 'TYPE': 'disk'},
+            {'NAME': 'sda1', 'TYPE': 'part', 'PKNAME': 'sda'},
+            {'NAME': 'sdb', 'TYPE': 'disk'},
+        ])
+        monkeypatch.setattr(device.disk, 'get_lvm_mappers', lambda: ['/dev/dm-0'])
+        monkeypatch.setattr(device.disk, 'blkid_all', lambda paths: {
+            '/dev/sda': {'PTTYPE': 'gpt'}, '/dev/sda1': {}, '/dev/sdb': {}})
+        monkeypatch.setattr(device.disk, 'udevadm_properties_all', lambda: {
+            '/dev/sda': {}, '/dev/sdb': {'ID_MODEL': 'Model', 'ID_SERIAL_SHORT': 'Serial'}})
+        for name in ['blkid', 'lsblk', 'udevadm_property']:
+            monkeypatch.setattr(device.disk, name, per_device_call)
+        for name in ['get_device_lvs', 'get_single_lv']:
+            monkeypatch.setattr(api, name, per_device_call)
+        return device.DiscoverySnapshot()
+
+    def test_lookups(self, snapshot):
+        assert snapshot.get_lv('/dev/vg/lv').lv_name == 'lv'
+        assert snapshot.get_lv('vg/lv').lv_name == 'lv'
+        assert snapshot.get_lv('/dev/sda') is None
+        assert snapshot.get_partition('sda1') == {'size': 1024}
+        assert snapshot.get_lsblk('/dev/sda1')['PKNAME'] == 'sda'
+        assert snapshot.get_pv_vg('/dev/sda1').vg_name == 'vg'
+        assert snapshot.get_pv_vg('/dev/sdb') is None
+        assert snapshot.get_blkid('/dev/sda') == {'PTTYPE': 'gpt'}
+        assert snapshot.get_blkid('/dev/sdc') is None
+
+    def test_devices_share_the_snapshot(self, snapshot):
+        sda = device.Device('/dev/sda', lvs=snapshot.lvs, lsblk_all=snapshot.lsblk_all,
+                            all_devices_vgs=snapshot.all_devices_vgs, snapshot=snapshot)
+        sdb = device.Device('/dev/sdb', lvs=snapshot.lvs, lsblk_all=snapshot.lsblk_all,
+                            all_devices_vgs=snapshot.all_devices_vgs, snapshot=snapshot)
+        assert sda.is_lvm_member
+        assert sda.vg_name == 'vg'
+        assert [lv.name for lv in sda.lvs] == ['lv']
+        assert sda.ceph_device_lvm
+        assert sda.has_gpt_headers
+        assert not sda.is_lv
+        assert not sdb.is_lvm_member
+        assert sdb.device_id == 'Model_Serial'
+        assert sdb.available
+
+    def test_no_vgs_in_the_snapshot(self, snapshot, monkeypatch):
+        def get_all_devices_vgs():
+            raise AssertionError('the snapshot should have been used')
+
+        monkeypatch.setattr(api, 'get_all_devices_vgs', get_all_devices_vgs)
+        snapshot.all_devices_vgs = []
+        snapshot._vgs_by_pv = {}
+        sdb = device.Device('/dev/sdb', lvs=snapshot.lvs, lsblk_all=snapshot.lsblk_all,
+                            all_devices_vgs=snapshot.all_devices_vgs, snapshot=snapshot)
+        assert not sdb.is_lvm_member
+
+
 class TestDeviceEncryption(object):
 
     @patch("ceph_volume.util.disk.has_bluestore_label", lambda x: False)
@@ -102,6 +102,58 @@ class TestBlkid(object):
         assert result['UUID'] == '62416664-cbaf-40bd-9689-10bd337379c3'
         assert result['TYPE'] == 'xfs'
 
+
+class TestBlkidAll(object):
+
+    def test_parses_per_device(self, stub_call):
+        output = [
+            '/dev/sdb: PTUUID="c8f91d57" PTTYPE="gpt"',
+            '/dev/sdb1: UUID="62416664-cbaf-40bd-9689-10bd337379c3" TYPE="xfs" PART_ENTRY_NAME="ceph data"',  # noqa
+        ]
+        stub_call((output, [], 2))
+        result = disk.blkid_all(['/dev/sda', '/dev/sdb', '/dev/sdb1'])
+        assert result['/dev/sda'] == {}
+        assert result['/dev/sdb'] == {'PTTYPE': 'gpt'}
+        assert result['/dev/sdb1']['PARTLABEL'] == 'ceph data'
+        assert result['/dev/sdb1']['TYPE'] == 'xfs'
+
+    def test_probes_unreported_devices_on_failure(self, stub_call, monkeypatch):
+        stub_call((['/dev/sdb: PTUUID="c8f91d57" PTTYPE="gpt"'], [], 4))
+        monkeypatch.setattr(disk, 'blkid', lambda device: {'TYPE': 'probed ' + device})
+        result = disk.blkid_all(['/dev/sda', '/dev/sdb'])
+        assert result['/dev/sda'] == {'TYPE': 'probed /dev/sda'}
+        assert result['/dev/sdb'] == {'PTTYPE': 'gpt'}
+
+    def test_no_devices(self, fake_call):
+        assert disk.blkid_all([]) == {}
+        assert not fake_call.calls
+
+
+class TestUdevadmPropertiesAll(object):
+
+    def test_indexes_by_devname(self, stub_call):
+        output = [
+            'P: /devices/virtual/block/dm-0',
+            'N: dm-0',
+            'E: DEVNAME=/dev/dm-0',
+            'E: DM_NAME=vg-lv',
+            'P: /devices/pci0000:00/0000:00:17.0/ata3/block/sda',
+            'N: sda',
+            'S: disk/by-id/ata-SK_hynix',
+            'E: DEVNAME=/dev/sda',
+            'E: ID_MODEL=SK_hynix_SC311_SATA_512GB',
+            'E: ID_SERIAL_SHORT=MS83N71801150416A',
+            'P: /devices/virtual/net/lo',
+            'E: INTERFACE=lo',
+        ]
+        stub_call((output, [], 0))
+        result = disk.udevadm_properties_all()
+        assert sorted(result) == ['/dev/dm-0', '/dev/sda']
+        assert result['/dev/dm-0'] == {'DEVNAME': '/dev/dm-0', 'DM_NAME': 'vg-lv'}
+        assert result['/dev/sda']['ID_MODEL'] == 'SK_hynix_SC311_SATA_512GB'
+        assert result['/dev/sda']['ID_SERIAL_SHORT'] == 'MS83N71801150416A'
+
+
 class TestUdevadmProperty(object):
 
     def test_good_output(self, stub_call):
@@ -0,0 +1,51 @@
+import threading
+from ceph_volume.util import parallel
+
+
+class TestRunJobs(object):
+
+    def test_no_jobs(self):
+        assert parallel.run_jobs({}) == []
+
+    def test_results_are_in_order(self):
+        jobs = {'job%d' % i: (lambda i=i: i * 2) for i in range(10)}
+        results = parallel.run_jobs(jobs, max_workers=4)
+        assert [r.name for r in results] == list(jobs)
+        assert [r.value for r in results] == [i * 2 for i in range(10)]
+        assert not any(r.failed for r in results)
+
+    def test_failure_does_not_stop_other_jobs(self):
+        def fail():
+            raise RuntimeError('boom')
+        results = parallel.run_jobs({'fail': fail, 'ok': lambda: 'ok'})
+        assert results[0].failed
+        assert str(results[0].exception) == 'boom'
+        assert results[1].value == 'ok'
+
+    def test_max_workers(self):
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def job():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            threading.Event().wait(0.01)
+            with lock:
+                running.pop()
+        parallel.run_jobs({str(i): job for i in range(8)}, max_workers=2)
+        assert max(peak) <= 2
+
+
+class TestReport(object):
+
+    def test_report(self, capsys):
+        ok = parallel.JobResult('osd.0')
+        failed = parallel.JobResult('osd.1')
+        failed.exception = RuntimeError('boom')
+        parallel.report('OSD activation', [ok, failed])
+        stdout, stderr = capsys.readouterr()
+        assert 'osd.0 completed in' in stderr
+        assert 'osd.1 failed after' in stderr
+        assert 'boom' in stderr
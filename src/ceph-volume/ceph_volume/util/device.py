@@ -27,6 +27,76 @@ def encryption_status(abspath: str) -> Dict[str, Any]:
     return encryption.status(abspath)
 
 
+class DiscoverySnapshot(object):
+    """
+    The state of the block devices of this host (lsblk, blkid, udev and
+    LVM), gathered with a single call per tool and indexed, so that the
+    ``Device`` instances of an inventory share it instead of querying the
+    system one device at a time.
+
+    Lookups for anything that was not part of the snapshot return ``None``,
+    callers are then expected to query the device directly.
+    """
+
+    def __init__(self) -> None:
+        if not sys_info.devices:
+            sys_info.devices = disk.get_devices()
+        self.lvs = lvm.get_lvs()
+        self.lsblk_all = disk.lsblk_all()
+        self.all_devices_vgs = lvm.get_all_devices_vgs()
+        self.lvm_mappers = set(disk.get_lvm_mappers())
+
+        self._lvs_by_path = {lv.lv_path: lv for lv in self.lvs}
+        self._lvs_by_name = {(lv.vg_name, lv.lv_name): lv for lv in self.lvs}
+        self._lsblk_by_name: Dict[str, Dict[str, str]] = {}
+        for dev in self.lsblk_all:
+            self._lsblk_by_name.setdefault(dev['NAME'], dev)
+        # a pv can only be in one vg
+        self._vgs_by_pv = {vg.pv_name: vg for vg in self.all_devices_vgs}
+        self._lvs_by_pv = lvm.get_all_devices_lvs()
+
+        self._partitions: Dict[str, Dict[str, Any]] = {}
+        paths = []
+        for path, info in sys_info.devices.items():
+            paths.append(path)
+            for partname, part in info.get('partitions', {}).items():
+                self._partitions.setdefault(partname, part)
+                paths.append(os.path.join(os.path.dirname(path), partname))
+        self._blkid = disk.blkid_all(paths)
+        self._udev = disk.udevadm_properties_all()
+
+    def get_lv(self, path: str) -> Optional[lvm.Volume]:
+        """
+        :param path: the path of the LV, or its 'vg/lv' name
+        """
+        if path[0] == '/':
+            return self._lvs_by_path.get(path)
+        vgname, lvname = path.split('/')
+        return self._lvs_by_name.get((vgname, lvname))
+
+    def get_partition(self, partname: str) -> Dict[str, Any]:
+        return self._partitions.get(partname, {})
+
+    def get_lsblk(self, path: str) -> Optional[Dict[str, str]]:
+        return self._lsblk_by_name.get(os.path.basename(path))
+
+    def get_pv_vg(self, pv_name: str) -> Optional[lvm.VolumeGroup]:
+        return self._vgs_by_pv.get(pv_name)
+
+    def get_pv_lvs(self, pv_name: str) -> Optional[List[lvm.Volume]]:
+        return self._lvs_by_pv.get(pv_name)
+
+    def get_blkid(self, path: str) -> Optional[Dict[str, str]]:
+        return self._blkid.get(path)
+
+    def get_udev(self, path: str) -> Optional[Dict[str, str]]:
+        properties = self._udev.get(path)
+        if properties is None:
+            # udev knows device mapper devices by their dm-N node
+            properties = self._udev.get(os.path.realpath(path))
+        return properties
+
+
 class Devices(object):
     """
     A container for Device instances with reporting
@@ -36,16 +106,13 @@ class Devices(object):
                  filter_for_batch: bool = False,
                  with_lsm: bool = False,
                  list_all: bool = False) -> None:
-        lvs = lvm.get_lvs()
-        lsblk_all = disk.lsblk_all()
-        all_devices_vgs = lvm.get_all_devices_vgs()
-        if not sys_info.devices:
-            sys_info.devices = disk.get_devices()
+        snapshot = DiscoverySnapshot()
         self._devices = [Device(k,
                                 with_lsm,
-                                lvs=lvs,
-                                lsblk_all=lsblk_all,
-                                all_devices_vgs=all_devices_vgs) for k in
+                                lvs=snapshot.lvs,
+                                lsblk_all=snapshot.lsblk_all,
+                                all_devices_vgs=snapshot.all_devices_vgs,
+                                snapshot=snapshot) for k in
                          sys_info.devices.keys()]
         self.devices = []
         for device in self._devices:
@@ -115,8 +182,10 @@ class Device(object):
                  with_lsm: bool = False,
                  lvs: Optional[List[lvm.Volume]] = None,
                  lsblk_all: Optional[List[Dict[str, str]]] = None,
-                 all_devices_vgs: Optional[List[lvm.VolumeGroup]] = None) -> None:
+                 all_devices_vgs: Optional[List[lvm.VolumeGroup]] = None,
+                 snapshot: Optional[DiscoverySnapshot] = None) -> None:
         self.path = path
+        self.snapshot = snapshot
         # LVs can have a vg/lv path, while disks will have /dev/sda
         self.symlink = None
         # check if we are a symlink
@@ -191,20 +260,28 @@ class Device(object):
 
     def load_blkid_api(self) -> None:
         if not self.blkid_api:
-            self.blkid_api = disk.blkid(self.path)
+            blkid_api = self.snapshot.get_blkid(self.path) if self.snapshot else None
+            if blkid_api is None:
+                blkid_api = disk.blkid(self.path)
+            self.blkid_api = blkid_api
 
     def _parse(self) -> None:
         lv = None
         if not self.sys_api:
             # if no device was found check if we are a partition
             partname = self.path.split('/')[-1]
-            for device, info in sys_info.devices.items():
-                part = info['partitions'].get(partname, {})
-                if part:
-                    self.sys_api = part
-                    break
+            if self.snapshot:
+                self.sys_api = self.snapshot.get_partition(partname)
+            else:
+                for device, info in sys_info.devices.items():
+                    part = info['partitions'].get(partname, {})
+                    if part:
+                        self.sys_api = part
+                        break
 
-        if self.lvs:
+        if self.snapshot:
+            lv = self.snapshot.get_lv(self.path)
+        elif self.lvs:
             for _lv in self.lvs:
                 # if the path is not absolute, we have 'vg/lv', let's use LV name
                 # to get the LV.
@@ -243,7 +320,9 @@ class Device(object):
             self.ceph_device_lvm = lvm.is_ceph_device(lv)
         else:
             self.lvs = []
-            if self.lsblk_all:
+            if self.snapshot:
+                dev = self.snapshot.get_lsblk(self.path) or disk.lsblk(self.path)
+            elif self.lsblk_all:
                 for dev in self.lsblk_all:
                     if dev['NAME'] == os.path.basename(self.path):
                         break
@@ -321,7 +400,11 @@ class Device(object):
         """
         props = ['ID_VENDOR', 'ID_MODEL', 'ID_MODEL_ENC', 'ID_SERIAL_SHORT', 'ID_SERIAL',
                  'ID_SCSI_SERIAL']
-        p = disk.udevadm_property(self.path, props)
+        udev = self.snapshot.get_udev(self.path) if self.snapshot else None
+        if udev is not None:
+            p = {k: v for k, v in udev.items() if k in props}
+        else:
+            p = disk.udevadm_property(self.path, props)
         if p.get('ID_MODEL','').startswith('LVM PV '):
             p['ID_MODEL'] = p.get('ID_MODEL_ENC', '').replace('\\x20', ' ').strip()
         if 'ID_VENDOR' in p and 'ID_MODEL' in p and 'ID_SCSI_SERIAL' in p:
@@ -358,20 +441,32 @@ class Device(object):
             # can each host a PV and VG. I think the vg_name property is
             # actually unused (not 100% sure) and can simply be removed
             vgs = None
-            if not self.all_devices_vgs:
+            # the VGs of the snapshot are final, even if there are none
+            if not self.all_devices_vgs and not self.snapshot:
                 self.all_devices_vgs = lvm.get_all_devices_vgs()
             for path in device_to_check:
-                for dev_vg in self.all_devices_vgs:
-                    if dev_vg.pv_name == path:
+                if self.snapshot:
+                    dev_vg = self.snapshot.get_pv_vg(path)
+                    if dev_vg:
                         vgs = [dev_vg]
+                else:
+                    for dev_vg in self.all_devices_vgs:
+                        if dev_vg.pv_name == path:
+                            vgs = [dev_vg]
                 if vgs:
                     self.vgs.extend(vgs)
                     self.vg_name = vgs[0].vg_name
                     self._is_lvm_member = True
-                    self.lvs.extend(lvm.get_device_lvs(path))
+                    self.lvs.extend(self._get_device_lvs(path))
                 if self.lvs:
                     self.ceph_device_lvm = any([True if lv.tags.get('ceph.osd_id') else False for lv in self.lvs])
 
+    def _get_device_lvs(self, path: str) -> List[lvm.Volume]:
+        lvs = self.snapshot.get_pv_lvs(path) if self.snapshot else None
+        if lvs is None:
+            lvs = lvm.get_device_lvs(path)
+        return lvs
+
     def _get_partitions(self) -> List[str]:
         """
         For block devices LVM can reside on the raw block device or on a
@@ -486,6 +581,8 @@ class Device(object):
     @property
     def is_lv(self) -> bool:
         path = os.path.realpath(self.path)
+        if self.snapshot:
+            return path in self.snapshot.lvm_mappers
         return path in disk.get_lvm_mappers()
 
     @property
@@ -106,6 +106,33 @@ def blkid(device):
     return _blkid_parser(' '.join(out))
 
 
+def blkid_all(devices: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Same as ``blkid()``, but probes all the given devices with a single call
+    to the CLI. Every device is part of the result, with an empty dict if
+    nothing was found on it. Should the call fail, the devices it did not
+    report are probed one at a time with ``blkid()``.
+    """
+    if not devices:
+        return {}
+    out, err, rc = process.call(
+        ['blkid', '-c', '/dev/null', '-p'] + devices,
+        verbose_on_failure=False
+    )
+    result: Dict[str, Dict[str, str]] = {}
+    for line in out:
+        # each line is prefixed by the device it belongs to, e.g. "/dev/sdb1: "
+        device = line.split(':', 1)[0]
+        if device in devices:
+            result[device] = _blkid_parser(line)
+    for device in devices:
+        if device not in result:
+            # 2 means nothing was found, any other error might be specific
+            # to one of the devices
+            result[device] = {} if rc in (0, 2) else blkid(device)
+    return result
+
+
 def get_part_entry_type(device):
     """
     Parses the ``ID_PART_ENTRY_TYPE`` from the "low level" (bypasses the cache)
@@ -230,6 +257,37 @@ def udevadm_property(device, properties=[]):
     return ret
 
 
+def udevadm_properties_all() -> Dict[str, Dict[str, str]]:
+    """
+    Query udevadm once for the properties of all the devices it knows of,
+    as returned by ``udevadm_property()`` per device, and index them by
+    their device node (e.g. ``/dev/sda``).
+
+    Expected output format::
+        # udevadm info --export-db
+        P: /devices/pci0000:00/0000:00:17.0/ata3/host2/target2:0:0/2:0:0:0/block/sda
+        N: sda
+        E: DEVNAME=/dev/sda
+        E: DEVTYPE=disk
+        ...
+    """
+    out, _err, _rc = process.call(['udevadm', 'info', '--export-db'],
+                                  logfile_verbose=False,
+                                  verbose_on_failure=False)
+    ret: Dict[str, Dict[str, str]] = {}
+    properties: Dict[str, str] = {}
+    for line in out:
+        if line.startswith('P:'):
+            # a new device starts
+            properties = {}
+        elif line.startswith('E:'):
+            p, v = line[2:].strip().split('=', 1)
+            properties[p] = v
+            if p == 'DEVNAME':
+                ret[v] = properties
+    return ret
+
+
 def _udevadm_info(device):
     """
     Call udevadm and return the output
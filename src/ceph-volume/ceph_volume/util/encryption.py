@@ -241,7 +241,7 @@ def dmcrypt_close(mapping, skip_path_check=False):
     # don't be strict about the remove call, but still warn on the terminal if it fails
     process.run(['cryptsetup', 'remove', mapping], stop_on_error=False)
 
-def get_dmcrypt_key(osd_id, osd_fsid, lockbox_keyring=None):
+def get_dmcrypt_key(osd_id, osd_fsid, lockbox_keyring=None, cluster=None):
     """
     Retrieve the dmcrypt (secret) key stored initially on the monitor. The key
     is sent initially with JSON, and the Monitor then mangles the name to
@@ -251,9 +251,12 @@ def get_dmcrypt_key(osd_id, osd_fsid, lockbox_keyring=None):
     assumed it will exist on the path for the same OSD that is being activated.
     To support scanning, it is optionally configurable to a custom location
     (e.g. inside a lockbox partition mounted in a temporary location)
+
+    ``cluster`` defaults to the cluster of the loaded configuration.
     """
+    cluster = cluster or conf.cluster
     if lockbox_keyring is None:
-        lockbox_keyring = '/var/lib/ceph/osd/%s-%s/lockbox.keyring' % (conf.cluster, osd_id)
+        lockbox_keyring = '/var/lib/ceph/osd/%s-%s/lockbox.keyring' % (cluster, osd_id)
     name = 'client.osd-lockbox.%s' % osd_fsid
     config_key = 'dm-crypt/osd/%s/luks' % osd_fsid
 
@@ -261,7 +264,7 @@ def get_dmcrypt_key(osd_id, osd_fsid, lockbox_keyring=None):
     stdout, stderr, returncode = process.call(
         [
             'ceph',
-            '--cluster', conf.cluster,
+            '--cluster', cluster,
             '--name', name,
             '--keyring', lockbox_keyring,
             'config-key',
@@ -276,7 +279,7 @@ def get_dmcrypt_key(osd_id, osd_fsid, lockbox_keyring=None):
     return ' '.join(stdout).strip()
 
 
-def write_lockbox_keyring(osd_id, osd_fsid, secret):
+def write_lockbox_keyring(osd_id, osd_fsid, secret, cluster=None):
     """
     Helper to write the lockbox keyring. This is needed because the bluestore OSD will
     not persist the keyring.
@@ -284,8 +287,11 @@ def write_lockbox_keyring(osd_id, osd_fsid, secret):
     For bluestore: A tmpfs filesystem is mounted, so the path can get written
     to, but the files are ephemeral, which requires this file to be created
     every time it is activated.
+
+    ``cluster`` defaults to the cluster of the loaded configuration.
     """
-    if os.path.exists('/var/lib/ceph/osd/%s-%s/lockbox.keyring' % (conf.cluster, osd_id)):
+    cluster = cluster or conf.cluster
+    if os.path.exists('/var/lib/ceph/osd/%s-%s/lockbox.keyring' % (cluster, osd_id)):
         return
 
     name = 'client.osd-lockbox.%s' % osd_fsid
@@ -293,7 +299,8 @@ def write_lockbox_keyring(osd_id, osd_fsid, secret):
         osd_id,
         secret,
         keyring_name='lockbox.keyring',
-        name=name
+        name=name,
+        cluster=cluster
     )
 
 
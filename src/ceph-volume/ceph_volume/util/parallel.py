@@ -0,0 +1,72 @@
+"""
+Helpers to run independent, per OSD or per device, operations concurrently
+with a bounded number of workers, and to report how long each one took.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ceph_volume import terminal
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class JobResult(object):
+    """
+    The outcome of a single job: its return value, or the exception it
+    raised, and how long it ran.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.value: Any = None
+        self.exception: Optional[Exception] = None
+        self.duration = 0.0
+
+    @property
+    def failed(self) -> bool:
+        return self.exception is not None
+
+
+def run_jobs(jobs: Dict[str, Callable[[], Any]],
+             max_workers: int = DEFAULT_MAX_WORKERS) -> List[JobResult]:
+    """
+    Run the given jobs, a mapping of a name to a callable without
+    arguments, with at most ``max_workers`` of them at a time. A failing
+    job does not stop the others.
+
+    :returns: the results of all the jobs, in the order they were given
+    """
+    def run(name: str, job: Callable[[], Any]) -> JobResult:
+        result = JobResult(name)
+        start = time.monotonic()
+        try:
+            result.value = job()
+        except Exception as e:
+            logger.exception('%s failed', name)
+            result.exception = e
+        result.duration = time.monotonic() - start
+        return result
+
+    if not jobs:
+        return []
+    workers = max(1, min(max_workers, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run, name, job) for name, job in jobs.items()]
+        return [future.result() for future in futures]
+
+
+def report(title: str, results: List[JobResult]) -> None:
+    """
+    Print how long each job took and whether it failed.
+    """
+    terminal.info('%s:' % title)
+    for result in results:
+        if result.failed:
+            terminal.error('  %s failed after %.2fs: %s' % (result.name,
+                                                             result.duration,
+                                                             result.exception))
+        else:
+            terminal.info('  %s completed in %.2fs' % (result.name, result.duration))
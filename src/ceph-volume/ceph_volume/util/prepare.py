@@ -25,7 +25,7 @@ def create_key():
     return ' '.join(stdout).strip()
 
 
-def write_keyring(osd_id, secret, keyring_name='keyring', name=None):
+def write_keyring(osd_id, secret, keyring_name='keyring', name=None, cluster=None):
     """
     Create a keyring file with the ``ceph-authtool`` utility. Constructs the
     path over well-known conventions for the OSD, and allows any other custom
@@ -37,8 +37,9 @@ def write_keyring(osd_id, secret, keyring_name='keyring', name=None):
                  names, specifically for 'lockbox' type of keys
     :param keyring_name: Alternative keyring name, for supporting other
                          types of keys like for lockbox
+    :param cluster: Defaults to the cluster of the loaded configuration
     """
-    osd_keyring = '/var/lib/ceph/osd/%s-%s/%s' % (conf.cluster, osd_id, keyring_name)
+    osd_keyring = '/var/lib/ceph/osd/%s-%s/%s' % (cluster or conf.cluster, osd_id, keyring_name)
     name = name or 'osd.%s' % str(osd_id)
     mlogger.info(f'Creating keyring file for {name}')
     process.call(
@@ -200,9 +201,9 @@ def mount_tmpfs(path):
     system.set_context(path)
 
 
-def create_osd_path(osd_id, tmpfs=False):
-    path = '/var/lib/ceph/osd/%s-%s' % (conf.cluster, osd_id)
-    system.mkdir_p('/var/lib/ceph/osd/%s-%s' % (conf.cluster, osd_id))
+def create_osd_path(osd_id, tmpfs=False, cluster=None):
+    path = '/var/lib/ceph/osd/%s-%s' % (cluster or conf.cluster, osd_id)
+    system.mkdir_p(path)
     if tmpfs:
         mount_tmpfs(path)
 
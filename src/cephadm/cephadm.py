@@ -17,6 +17,8 @@ import sys
 import tempfile
 import time
 import errno
+import gzip
+import hashlib
 import ssl
 from typing import Dict, List, Tuple, Optional, Union, Any, Callable, Sequence, TypeVar, cast
 
@@ -133,6 +135,7 @@ from cephadmlib.net_utils import (
     wrap_ipv6,
 )
 from cephadmlib.locking import FileLock
+from cephadmlib.image_cache import ImageInfoCache
 from cephadmlib.daemon_identity import DaemonIdentity, DaemonSubIdentity
 from cephadmlib.packagers import create_packager, Packager
 from cephadmlib.logging import (
@@ -140,14 +143,21 @@ from cephadmlib.logging import (
     Highlight,
     LogDestination,
 )
-from cephadmlib.systemd import check_unit, check_units, terminate_service
+from cephadmlib.systemd import (
+    check_unit,
+    check_unit_states,
+    check_units,
+    terminate_service,
+)
 from cephadmlib import systemd_unit
 from cephadmlib import runscripts
+from cephadmlib import executor
 from cephadmlib.container_types import (
     CephContainer,
     InitContainer,
     SidecarContainer,
     extract_uid_gid,
+    get_bulk_container_stats,
     get_container_stats,
     get_mgr_images,
     is_container_running,
@@ -157,7 +167,7 @@ from cephadmlib.decorators import (
     executes_early,
     require_image
 )
-from cephadmlib.host_facts import HostFacts, list_networks
+from cephadmlib.host_facts import HostFacts, HostFactsCache, list_networks
 from cephadmlib.ssh import authorize_ssh_key, check_ssh_connectivity
 from cephadmlib.daemon_form import (
     DaemonForm,
@@ -1365,6 +1375,8 @@ class CephadmAgent(DaemonForm):
     daemon_type = 'agent'
     default_port = 8498
     loop_interval = 30
+    # send all of the metadata, changed or not, every this many iterations
+    full_sync_interval = 10
     stop = False
 
     required_files = [
@@ -1411,6 +1423,9 @@ class CephadmAgent(DaemonForm):
         self.recent_iteration_run_times: List[float] = [0.0, 0.0, 0.0]
         self.recent_iteration_index: int = 0
         self.cached_ls_values: Dict[str, Dict[str, str]] = {}
+        self.host_facts_cache = HostFactsCache()
+        self.sent_hashes: Dict[str, str] = {}
+        self.iterations_until_full_sync = 0
         self.ssl_ctx = ssl.create_default_context()
         self.ssl_ctx.check_hostname = True
         self.ssl_ctx.verify_mode = ssl.CERT_REQUIRED
@@ -1544,17 +1559,32 @@ class CephadmAgent(DaemonForm):
                 for k, v in networks[key].items():
                     networks_list[key][k] = list(v)
 
-            data = json.dumps({'host': self.host,
-                               'ls': (self.ls_gatherer.data if self.ack == self.ls_gatherer.ack
-                                      and self.ls_gatherer.data is not None else []),
-                               'networks': networks_list,
-                               'facts': HostFacts(self.ctx).dump(),
-                               'volume': (self.volume_gatherer.data if self.ack == self.volume_gatherer.ack
-                                          and self.volume_gatherer.data is not None else ''),
-                               'ack': str(ack),
-                               'keyring': self.keyring,
-                               'port': self.listener_port})
-            data = data.encode('ascii')
+            sections: Dict[str, Any] = {
+                'networks': networks_list,
+                'facts': HostFacts(self.ctx).dump(self.host_facts_cache),
+            }
+            if self.ack == self.ls_gatherer.ack and self.ls_gatherer.data is not None:
+                sections['ls'] = self.ls_gatherer.data
+            if self.ack == self.volume_gatherer.ack and self.volume_gatherer.data is not None:
+                sections['volume'] = self.volume_gatherer.data
+            hashes = {section: self._section_hash(section, value) for section, value in sections.items()}
+
+            # only send the sections that changed since the mgr last received
+            # them, the hashes of the others tell the mgr they are unchanged
+            if self.iterations_until_full_sync <= 0:
+                self.sent_hashes = {}
+                self.iterations_until_full_sync = self.full_sync_interval
+            self.iterations_until_full_sync -= 1
+            payload: Dict[str, Any] = {
+                section: value for section, value in sections.items()
+                if self.sent_hashes.get(section) != hashes[section]
+            }
+            payload.update({'host': self.host,
+                            'hashes': hashes,
+                            'ack': str(ack),
+                            'keyring': self.keyring,
+                            'port': self.listener_port})
+            data = gzip.compress(json.dumps(payload).encode('ascii'))
 
             try:
                 send_time = time.monotonic()
@@ -1562,13 +1592,21 @@ class CephadmAgent(DaemonForm):
                                               port=self.target_port,
                                               data=data,
                                               endpoint='/data',
-                                              ssl_ctx=self.ssl_ctx)
+                                              ssl_ctx=self.ssl_ctx,
+                                              headers={'Content-Encoding': 'gzip'})
                 if status != 200:
                     logger.error(f'HTTP error {status} while querying agent endpoint: {response}')
                     raise RuntimeError(f'non-200 response <{status}> from agent endpoint: {response}')
                 response_json = json.loads(response)
                 total_request_time = datetime.timedelta(seconds=(time.monotonic() - send_time)).total_seconds()
                 logger.info(f'Received mgr response: "{response_json["result"]}" {total_request_time} seconds after sending request.')
+                if response_json.get('resync'):
+                    # the mgr does not know some of the sections we reported
+                    # as unchanged (e.g. after a mgr failover)
+                    logger.info('mgr requested a full sync of the metadata')
+                    self.iterations_until_full_sync = 0
+                else:
+                    self.sent_hashes = hashes
             except Exception as e:
                 logger.error(f'Failed to send metadata to mgr: {e}')
 
@@ -1581,6 +1619,19 @@ class CephadmAgent(DaemonForm):
             self.event.wait(max(self.loop_interval - int(run_time_average), 0))
             self.event.clear()
 
+    def _section_hash(self, section: str, value: Any) -> str:
+        if section == 'facts':
+            # the dynamic facts change all the time but the mgr does not act
+            # on them. They do not count as a change of the facts and are
+            # only refreshed on the mgr when the facts are sent anyway
+            try:
+                facts = json.loads(value)
+            except ValueError:
+                facts = None
+            if isinstance(facts, dict):
+                value = {k: v for k, v in facts.items() if k not in HostFacts.dynamic_facts}
+        return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
     def _ceph_volume(self, enhanced: bool = False) -> Tuple[str, bool]:
         self.ctx.command = 'inventory --format=json'.split()
         if enhanced:
@@ -1784,6 +1835,12 @@ def command_agent(ctx: CephadmContext) -> None:
     agent.run()
 
 
+@executes_early
+def command_executor(ctx: CephadmContext) -> int:
+    # each command is run, with its own context, in a child of this process
+    return executor.serve(main)
+
+
 ##################################
 
 @executes_early
@@ -3396,6 +3453,80 @@ def command_ls(ctx):
     print(json.dumps(ls, indent=4))
 
 
+def _get_daemon_version(
+    ctx: CephadmContext,
+    container_path: str,
+    identity: DaemonIdentity,
+    container_id: str,
+) -> Optional[str]:
+    """identify software version inside the container (if we can)"""
+    daemon_type = identity.daemon_type
+    version = None
+    if daemon_type == NFSGanesha.daemon_type:
+        version = NFSGanesha.get_version(ctx, container_id)
+    elif daemon_type == CephIscsi.daemon_type:
+        version = CephIscsi.get_version(ctx, container_id)
+    elif daemon_type == CephNvmeof.daemon_type:
+        version = CephNvmeof.get_version(ctx, container_id)
+    elif daemon_type == SMB.daemon_type:
+        version = SMB.get_version(ctx, container_id)
+    elif daemon_type in ceph_daemons():
+        out, err, code = call(ctx,
+                              [container_path, 'exec', container_id,
+                               'ceph', '-v'],
+                              verbosity=CallVerbosity.QUIET)
+        if not code and \
+           out.startswith('ceph version '):
+            version = out.split(' ')[2]
+    elif daemon_type == 'grafana':
+        out, err, code = call(ctx,
+                              [container_path, 'exec', container_id,
+                               'grafana', 'server', '-v'],
+                              verbosity=CallVerbosity.QUIET)
+        if not code and \
+           out.startswith('Version '):
+            version = out.split(' ')[1]
+    elif daemon_type in ['prometheus',
+                         'alertmanager',
+                         'node-exporter',
+                         'loki',
+                         'promtail']:
+        version = Monitoring.get_version(ctx, container_id, daemon_type)
+    elif daemon_type == 'haproxy':
+        out, err, code = call(ctx,
+                              [container_path, 'exec', container_id,
+                               'haproxy', '-v'],
+                              verbosity=CallVerbosity.QUIET)
+        if not code and \
+           out.startswith('HA-Proxy version ') or \
+           out.startswith('HAProxy version '):
+            version = out.split(' ')[2]
+    elif daemon_type == 'keepalived':
+        out, err, code = call(ctx,
+                              [container_path, 'exec', container_id,
+                               'keepalived', '--version'],
+                              verbosity=CallVerbosity.QUIET)
+        if not code and \
+           err.startswith('Keepalived '):
+            version = err.split(' ')[1]
+            if version[0] == 'v':
+                version = version[1:]
+    elif daemon_type == CustomContainer.daemon_type:
+        # Because a custom container can contain
+        # everything, we do not know which command
+        # to execute to get the version.
+        pass
+    elif daemon_type == SNMPGateway.daemon_type:
+        version = SNMPGateway.get_version(ctx, identity.fsid, identity.daemon_id)
+    elif daemon_type == MgmtGateway.daemon_type:
+        version = MgmtGateway.get_version(ctx, container_id)
+    elif daemon_type == OAuth2Proxy.daemon_type:
+        version = OAuth2Proxy.get_version(ctx, container_id)
+    else:
+        logger.warning('version for unknown daemon type %s' % daemon_type)
+    return version
+
+
 def list_daemons(
     ctx: CephadmContext,
     detail: bool = True,
@@ -3403,23 +3534,15 @@ def list_daemons(
     daemon_name: Optional[str] = None,
     type_of_daemon: Optional[str] = None,
 ) -> List[Dict[str, str]]:
-    host_version: Optional[str] = None
     ls = []
-    container_path = ctx.container_engine.path
 
     data_dir = ctx.data_dir
     if legacy_dir is not None:
         data_dir = os.path.abspath(legacy_dir + data_dir)
 
-    # keep track of ceph versions we see
-    seen_versions = {}  # type: Dict[str, Optional[str]]
-
-    # keep track of image digests
-    seen_digests = {}   # type: Dict[str, List[str]]
-
-    # keep track of memory and cpu usage we've seen
-    seen_memusage_cid_len, seen_memusage = parsed_container_mem_usage(ctx)
-    seen_cpuperc_cid_len, seen_cpuperc = parsed_container_cpu_perc(ctx)
+    # daemons (with the directory name of cephadm ones) to collect details for
+    legacy_daemons = []  # type: List[Dict[str, Any]]
+    cephadm_daemons = []  # type: List[Tuple[Dict[str, Any], DaemonIdentity, str]]
 
     # /var/lib/ceph
     if os.path.exists(data_dir):
@@ -3442,18 +3565,7 @@ def list_daemons(
                         'fsid': fsid if fsid is not None else 'unknown',
                         'systemd_unit': legacy_unit_name,
                     }
-                    if detail:
-                        (val['enabled'], val['state'], _) = check_unit(ctx, legacy_unit_name)
-                        if not host_version:
-                            try:
-                                out, err, code = call(ctx,
-                                                      ['ceph', '-v'],
-                                                      verbosity=CallVerbosity.QUIET)
-                                if not code and out.startswith('ceph version '):
-                                    host_version = out.split(' ')[2]
-                            except Exception:
-                                pass
-                        val['host_version'] = host_version
+                    legacy_daemons.append(val)
                     ls.append(val)
             elif is_fsid(i):
                 fsid = str(i)  # convince mypy that fsid is a str here
@@ -3476,159 +3588,163 @@ def list_daemons(
                         'fsid': fsid,
                         'systemd_unit': unit_name,
                     }
-                    if detail:
-                        # get container id
-                        (val['enabled'], val['state'], _) = check_unit(ctx, unit_name)
-                        container_id = None
-                        image_name = None
-                        image_id = None
-                        image_digests = None
-                        version = None
-                        start_stamp = None
-
-                        cinfo = get_container_stats(
-                            ctx,
-                            DaemonIdentity(fsid, daemon_type, daemon_id),
-                            container_path=container_path
-                        )
-                        if cinfo:
-                            container_id = cinfo.container_id
-                            image_name = cinfo.image_name
-                            image_id = cinfo.image_id
-                            start = cinfo.start
-                            version = cinfo.version
-                            image_id = normalize_container_id(image_id)
-                            daemon_type = name.split('.', 1)[0]
-                            start_stamp = try_convert_datetime(start)
-
-                            # collect digests for this image id
-                            image_digests = seen_digests.get(image_id)
-                            if not image_digests:
-                                out, err, code = call(
-                                    ctx,
-                                    [
-                                        container_path, 'image', 'inspect', image_id,
-                                        '--format', '{{.RepoDigests}}',
-                                    ],
-                                    verbosity=CallVerbosity.QUIET)
-                                if not code:
-                                    image_digests = list(set(map(
-                                        normalize_image_digest,
-                                        out.strip()[1:-1].split(' '))))
-                                    seen_digests[image_id] = image_digests
-
-                            # identify software version inside the container (if we can)
-                            if not version or '.' not in version:
-                                version = seen_versions.get(image_id, None)
-                            if daemon_type == NFSGanesha.daemon_type:
-                                version = NFSGanesha.get_version(ctx, container_id)
-                            if daemon_type == CephIscsi.daemon_type:
-                                version = CephIscsi.get_version(ctx, container_id)
-                            if daemon_type == CephNvmeof.daemon_type:
-                                version = CephNvmeof.get_version(ctx, container_id)
-                            if daemon_type == SMB.daemon_type:
-                                version = SMB.get_version(ctx, container_id)
-                            elif not version:
-                                if daemon_type in ceph_daemons():
-                                    out, err, code = call(ctx,
-                                                          [container_path, 'exec', container_id,
-                                                           'ceph', '-v'],
-                                                          verbosity=CallVerbosity.QUIET)
-                                    if not code and \
-                                       out.startswith('ceph version '):
-                                        version = out.split(' ')[2]
-                                        seen_versions[image_id] = version
-                                elif daemon_type == 'grafana':
-                                    out, err, code = call(ctx,
-                                                          [container_path, 'exec', container_id,
-                                                           'grafana', 'server', '-v'],
-                                                          verbosity=CallVerbosity.QUIET)
-                                    if not code and \
-                                       out.startswith('Version '):
-                                        version = out.split(' ')[1]
-                                        seen_versions[image_id] = version
-                                elif daemon_type in ['prometheus',
-                                                     'alertmanager',
-                                                     'node-exporter',
-                                                     'loki',
-                                                     'promtail']:
-                                    version = Monitoring.get_version(ctx, container_id, daemon_type)
-                                    seen_versions[image_id] = version
-                                elif daemon_type == 'haproxy':
-                                    out, err, code = call(ctx,
-                                                          [container_path, 'exec', container_id,
-                                                           'haproxy', '-v'],
-                                                          verbosity=CallVerbosity.QUIET)
-                                    if not code and \
-                                       out.startswith('HA-Proxy version ') or \
-                                       out.startswith('HAProxy version '):
-                                        version = out.split(' ')[2]
-                                        seen_versions[image_id] = version
-                                elif daemon_type == 'keepalived':
-                                    out, err, code = call(ctx,
-                                                          [container_path, 'exec', container_id,
-                                                           'keepalived', '--version'],
-                                                          verbosity=CallVerbosity.QUIET)
-                                    if not code and \
-                                       err.startswith('Keepalived '):
-                                        version = err.split(' ')[1]
-                                        if version[0] == 'v':
-                                            version = version[1:]
-                                        seen_versions[image_id] = version
-                                elif daemon_type == CustomContainer.daemon_type:
-                                    # Because a custom container can contain
-                                    # everything, we do not know which command
-                                    # to execute to get the version.
-                                    pass
-                                elif daemon_type == SNMPGateway.daemon_type:
-                                    version = SNMPGateway.get_version(ctx, fsid, daemon_id)
-                                    seen_versions[image_id] = version
-                                elif daemon_type == MgmtGateway.daemon_type:
-                                    version = MgmtGateway.get_version(ctx, container_id)
-                                    seen_versions[image_id] = version
-                                elif daemon_type == OAuth2Proxy.daemon_type:
-                                    version = OAuth2Proxy.get_version(ctx, container_id)
-                                    seen_versions[image_id] = version
-                                else:
-                                    logger.warning('version for unknown daemon type %s' % daemon_type)
-                        else:
-                            vfile = os.path.join(data_dir, fsid, j, 'unit.image')  # type: ignore
-                            try:
-                                with open(vfile, 'r') as f:
-                                    image_name = f.read().strip() or None
-                            except IOError:
-                                pass
-
-                        # unit.meta?
-                        mfile = os.path.join(data_dir, fsid, j, 'unit.meta')  # type: ignore
-                        try:
-                            with open(mfile, 'r') as f:
-                                meta = json.loads(f.read())
-                                val.update(meta)
-                        except IOError:
-                            pass
-
-                        val['container_id'] = container_id
-                        val['container_image_name'] = image_name
-                        val['container_image_id'] = image_id
-                        val['container_image_digests'] = image_digests
-                        if container_id:
-                            val['memory_usage'] = seen_memusage.get(container_id[0:seen_memusage_cid_len])
-                            val['cpu_percentage'] = seen_cpuperc.get(container_id[0:seen_cpuperc_cid_len])
-                        val['version'] = version
-                        val['started'] = start_stamp
-                        val['created'] = get_file_timestamp(
-                            os.path.join(data_dir, fsid, j, 'unit.created')
-                        )
-                        val['deployed'] = get_file_timestamp(
-                            os.path.join(data_dir, fsid, j, 'unit.image'))
-                        val['configured'] = get_file_timestamp(
-                            os.path.join(data_dir, fsid, j, 'unit.configured'))
+                    identity = DaemonIdentity(fsid, daemon_type, daemon_id)
+                    cephadm_daemons.append((val, identity, j))
                     ls.append(val)
 
+    if detail:
+        _add_legacy_daemon_details(ctx, legacy_daemons)
+        _add_cephadm_daemon_details(
+            ctx,
+            data_dir,
+            cephadm_daemons,
+            # only a full listing sees all the images that are in use
+            prune_image_cache=not (daemon_name or type_of_daemon),
+        )
     return ls
 
 
+def _add_legacy_daemon_details(
+    ctx: CephadmContext, daemons: List[Dict[str, Any]]
+) -> None:
+    if not daemons:
+        return
+    host_version: Optional[str] = None
+    unit_states = check_unit_states(ctx, [val['systemd_unit'] for val in daemons])
+    for val in daemons:
+        (val['enabled'], val['state'], _) = unit_states[val['systemd_unit']]
+        if not host_version:
+            try:
+                out, err, code = call(ctx,
+                                      ['ceph', '-v'],
+                                      verbosity=CallVerbosity.QUIET)
+                if not code and out.startswith('ceph version '):
+                    host_version = out.split(' ')[2]
+            except Exception:
+                pass
+        val['host_version'] = host_version
+
+
+def _add_cephadm_daemon_details(
+    ctx: CephadmContext,
+    data_dir: str,
+    daemons: List[Tuple[Dict[str, Any], DaemonIdentity, str]],
+    prune_image_cache: bool = False,
+) -> None:
+    """Fill in the unit, container and image details of the listed cephadm
+    daemons. The unit states and container information of all of them are
+    collected with one call each, and the image digests and versions are
+    cached on the host by image id.
+    """
+    if not daemons:
+        return
+    container_path = ctx.container_engine.path
+
+    unit_states = check_unit_states(ctx, [val['systemd_unit'] for val, _, _ in daemons])
+    container_stats = get_bulk_container_stats(
+        ctx,
+        [identity for _, identity, _ in daemons],
+        container_path=container_path,
+    )
+    image_cache = ImageInfoCache().load()
+
+    # keep track of memory and cpu usage we've seen
+    seen_memusage_cid_len, seen_memusage = parsed_container_mem_usage(ctx)
+    seen_cpuperc_cid_len, seen_cpuperc = parsed_container_cpu_perc(ctx)
+
+    image_ids = set()
+    for val, identity, j in daemons:
+        daemon_type = identity.daemon_type
+        (val['enabled'], val['state'], _) = unit_states[val['systemd_unit']]
+        container_id = None
+        image_name = None
+        image_id = None
+        image_digests = None
+        version = None
+        start_stamp = None
+
+        cinfo = container_stats.get(identity.daemon_name)
+        if cinfo:
+            container_id = cinfo.container_id
+            image_name = cinfo.image_name
+            start = cinfo.start
+            version = cinfo.version
+            image_id = normalize_container_id(cinfo.image_id)
+            start_stamp = try_convert_datetime(start)
+            image_ids.add(image_id)
+
+            # collect digests for this image id
+            image_digests = image_cache.get_digests(image_id)
+            if not image_digests:
+                out, err, code = call(
+                    ctx,
+                    [
+                        container_path, 'image', 'inspect', image_id,
+                        '--format', '{{.RepoDigests}}',
+                    ],
+                    verbosity=CallVerbosity.QUIET)
+                if not code:
+                    image_digests = list(set(map(
+                        normalize_image_digest,
+                        out.strip()[1:-1].split(' '))))
+                    image_cache.set_digests(image_id, image_digests)
+
+            # the version label of the image is the ceph version, which is
+            # not the version of the software of these daemons
+            own_version = daemon_type in [
+                NFSGanesha.daemon_type,
+                CephIscsi.daemon_type,
+                CephNvmeof.daemon_type,
+                SMB.daemon_type,
+            ]
+            if own_version or not version or '.' not in version:
+                version_key = daemon_type
+                if not own_version and daemon_type in ceph_daemons():
+                    version_key = 'ceph'
+                version = image_cache.get_version(image_id, version_key)
+                if not version:
+                    version = _get_daemon_version(ctx, container_path, identity, container_id)
+                    if version:
+                        image_cache.set_version(image_id, version_key, version)
+        else:
+            vfile = os.path.join(data_dir, identity.fsid, j, 'unit.image')
+            try:
+                with open(vfile, 'r') as f:
+                    image_name = f.read().strip() or None
+            except IOError:
+                pass
+
+        # unit.meta?
+        mfile = os.path.join(data_dir, identity.fsid, j, 'unit.meta')
+        try:
+            with open(mfile, 'r') as f:
+                meta = json.loads(f.read())
+                val.update(meta)
+        except IOError:
+            pass
+
+        val['container_id'] = container_id
+        val['container_image_name'] = image_name
+        val['container_image_id'] = image_id
+        val['container_image_digests'] = image_digests
+        if container_id:
+            val['memory_usage'] = seen_memusage.get(container_id[0:seen_memusage_cid_len])
+            val['cpu_percentage'] = seen_cpuperc.get(container_id[0:seen_cpuperc_cid_len])
+        val['version'] = version
+        val['started'] = start_stamp
+        val['created'] = get_file_timestamp(
+            os.path.join(data_dir, identity.fsid, j, 'unit.created')
+        )
+        val['deployed'] = get_file_timestamp(
+            os.path.join(data_dir, identity.fsid, j, 'unit.image'))
+        val['configured'] = get_file_timestamp(
+            os.path.join(data_dir, identity.fsid, j, 'unit.configured'))
+
+    if prune_image_cache:
+        image_cache.prune(image_ids)
+    image_cache.save()
+
+
 def get_daemon_description(ctx, fsid, name, detail=False, legacy_dir=None):
     # type: (CephadmContext, str, str, bool, Optional[str]) -> Dict[str, str]
 
@@ -4622,7 +4738,13 @@ def command_update_osd_service(ctx: CephadmContext) -> int:
 def command_gather_facts(ctx: CephadmContext) -> None:
     """gather_facts is intended to provide host related metadata to the caller"""
     host = HostFacts(ctx)
+    if not ctx.profile:
+        print(host.dump(HostFactsCache()))
+        return
+    # gather everything, bypassing the cache, to time all the probes
     print(host.dump())
+    for name, seconds in sorted(host.timings().items(), key=lambda t: -t[1]):
+        print(f'{seconds:10.6f}s {name}', file=sys.stderr)
 
 
 ##################################
@@ -5451,6 +5573,10 @@ def _get_parser():
     parser_gather_facts = subparsers.add_parser(
         'gather-facts', help='gather and return host related information (JSON format)')
     parser_gather_facts.set_defaults(func=command_gather_facts)
+    parser_gather_facts.add_argument(
+        '--profile',
+        action='store_true',
+        help='gather all facts, cached or not, and print the time spent on each fact and probe to stderr')
 
     parser_maintenance = subparsers.add_parser(
         'host-maintenance', help='Manage the maintenance state of a host')
@@ -5475,6 +5601,11 @@ def _get_parser():
         '--daemon-id',
         help='daemon id for agent')
 
+    parser_executor = subparsers.add_parser(
+        'executor',
+        help='run the cephadm commands read, as JSON requests, from stdin')
+    parser_executor.set_defaults(func=command_executor)
+
     parser_disk_rescan = subparsers.add_parser(
         'disk-rescan', help='rescan all HBAs to detect new/removed devices')
     parser_disk_rescan.set_defaults(func=command_rescan_disks)
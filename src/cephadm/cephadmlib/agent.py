@@ -1,6 +1,6 @@
 from urllib.error import HTTPError, URLError
 from urllib.request import urlopen, Request
-from typing import Optional, Any, Tuple
+from typing import Optional, Any, Dict, Tuple
 import logging
 
 logger = logging.getLogger()
@@ -13,11 +13,14 @@ def http_query(
     endpoint: str = '',
     ssl_ctx: Optional[Any] = None,
     timeout: Optional[int] = 10,
+    headers: Optional[Dict[str, str]] = None,
 ) -> Tuple[int, str]:
     url = f'https://{addr}:{port}{endpoint}'
     logger.debug(f'sending query to {url}')
     try:
-        req = Request(url, data, {'Content-Type': 'application/json'})
+        req = Request(
+            url, data, {'Content-Type': 'application/json', **(headers or {})}
+        )
         with urlopen(req, context=ssl_ctx, timeout=timeout) as response:
             response_str = response.read()
             response_status = response.status
@@ -3,7 +3,7 @@
 import os
 import logging
 
-from typing import Tuple, List, Optional, Dict, Any
+from typing import Tuple, List, Optional, Dict, Any, Set
 
 from .call_wrappers import call_throws, call, CallVerbosity
 from .context import CephadmContext
@@ -372,6 +372,80 @@ def parsed_container_stats(
     return _parse_container_stats(out, err, code)
 
 
+def _container_names(
+    ctx: CephadmContext,
+    *,
+    container_path: str,
+) -> Tuple[str, str, int]:
+    """returns the names of all containers, running or not"""
+    container_path = container_path or ctx.container_engine.path
+    cmd = [container_path, 'ps', '-a', '--format', '{{.Names}}']
+    out, err, code = call(ctx, cmd, verbosity=CallVerbosity.QUIET)
+    return out, err, code
+
+
+def _bulk_container_stats(
+    ctx: CephadmContext,
+    container_names: List[str],
+    *,
+    container_path: str,
+) -> Tuple[str, str, int]:
+    """returns container name, id, image name, image id, created time, and
+    ceph version if available for all the given containers
+    """
+    container_path = container_path or ctx.container_engine.path
+    cmd = [
+        container_path,
+        'inspect',
+        '--format',
+        '{{.Name}},{{.Id}},{{.Config.Image}},{{.Image}},{{.Created}},{{index .Config.Labels "io.ceph.version"}}',
+    ] + container_names
+    out, err, code = call(ctx, cmd, verbosity=CallVerbosity.QUIET)
+    return out, err, code
+
+
+def _parse_bulk_container_stats(
+    out: str, err: str, code: int
+) -> Optional[Dict[str, ContainerInfo]]:
+    if code != 0:
+        return None
+    result = {}
+    for line in out.splitlines():
+        if not line.strip():
+            continue
+        name, stats = line.strip().split(',', 1)
+        # docker prefixes the container name with a slash
+        # container_id, image_name, image_id, start, version
+        result[name.lstrip('/')] = ContainerInfo(*stats.split(','))
+    return result
+
+
+def parsed_bulk_container_stats(
+    ctx: CephadmContext,
+    container_names: List[str],
+    *,
+    container_path: str = '',
+) -> Optional[Dict[str, ContainerInfo]]:
+    """Return the ContainerInfo of those of the given containers that exist,
+    keyed by container name, using one listing and one inspect call for all
+    of them rather than one inspect call per name.
+    Returns None if the container engine could not be queried.
+    """
+    out, _, code = _container_names(ctx, container_path=container_path)
+    if code != 0:
+        return None
+    existing: Set[str] = set()
+    for line in out.splitlines():
+        existing.update(n.strip() for n in line.split(',') if n.strip())
+    names = [n for n in container_names if n in existing]
+    if not names:
+        return {}
+    out, err, code = _bulk_container_stats(
+        ctx, names, container_path=container_path
+    )
+    return _parse_bulk_container_stats(out, err, code)
+
+
 def _container_image_stats(
     ctx: CephadmContext, image_name: str, *, container_path: str = ''
 ) -> Tuple[str, str, int]:
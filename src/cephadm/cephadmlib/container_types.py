@@ -14,6 +14,7 @@ from .container_engines import (
     ContainerInfo,
     Docker,
     Podman,
+    parsed_bulk_container_stats,
     parsed_container_stats,
 )
 from .context import CephadmContext
@@ -687,3 +688,36 @@ def get_container_stats(
         if ci is not None:
             return ci
     return None
+
+
+def get_bulk_container_stats(
+    ctx: CephadmContext,
+    identities: List[DaemonIdentity],
+    *,
+    container_path: str = '',
+) -> Dict[str, Optional[ContainerInfo]]:
+    """returns the same information as get_container_stats for all of the
+    given daemons, keyed by daemon name, querying the container engine once
+    for all of them
+    """
+    names = {}
+    for identity in identities:
+        c = CephContainer.for_daemon(ctx, identity, 'bash')
+        names[identity.daemon_name] = (c.cname, c.old_cname)
+    stats = parsed_bulk_container_stats(
+        ctx,
+        [n for cnames in names.values() for n in cnames],
+        container_path=container_path,
+    )
+    if stats is None:
+        # fall back to inspecting the containers one at a time
+        return {
+            identity.daemon_name: get_container_stats(
+                ctx, identity, container_path=container_path
+            )
+            for identity in identities
+        }
+    result: Dict[str, Optional[ContainerInfo]] = {}
+    for daemon_name, (cname, old_cname) in names.items():
+        result[daemon_name] = stats.get(cname) or stats.get(old_cname)
+    return result
@@ -0,0 +1,181 @@
+# executor.py - run a stream of cephadm commands from one interpreter
+
+import io
+import json
+import logging
+import os
+import selectors
+import sys
+import traceback
+
+from typing import Any, Callable, Dict, IO, List, Optional, Set
+
+logger = logging.getLogger()
+
+# the version of the request/response protocol, reported when the executor
+# starts so that the caller can tell it apart from other output
+EXECUTOR_PROTOCOL = 1
+
+
+class _Job:
+    """A command running in a forked child, and the output collected from
+    it so far.
+    """
+
+    def __init__(
+        self, request_id: Any, pid: int, out_fd: int, err_fd: int
+    ) -> None:
+        self.request_id = request_id
+        self.pid = pid
+        self.out_fd = out_fd
+        self.err_fd = err_fd
+        self.buffers = {out_fd: bytearray(), err_fd: bytearray()}
+        self.closed: Set[int] = set()
+
+    @property
+    def done(self) -> bool:
+        return self.closed == {self.out_fd, self.err_fd}
+
+    def response(self, code: int) -> Dict[str, Any]:
+        return {
+            'id': self.request_id,
+            'out': self.buffers[self.out_fd].decode('utf-8', 'replace'),
+            'err': self.buffers[self.err_fd].decode('utf-8', 'replace'),
+            'code': code,
+        }
+
+
+def _run_child(main: Callable[[], None], args: List[str], stdin: str) -> None:
+    """Run a single cephadm command in the (forked) current process. Never
+    returns.
+    """
+    code = 0
+    try:
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        sys.stdin = io.StringIO(stdin)
+        # the output of the command goes to the pipes now behind fds 1 and 2
+        sys.stdout = open(1, 'w', closefd=False)
+        sys.stderr = open(2, 'w', closefd=False)
+        sys.argv = sys.argv[:1] + args
+        main()
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            code = e.code
+        elif e.code is not None:
+            sys.stderr.write(f'{e.code}\n')
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _start_job(main: Callable[[], None], request: Dict[str, Any]) -> _Job:
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        os.close(out_r)
+        os.close(err_r)
+        os.dup2(out_w, 1)
+        os.dup2(err_w, 2)
+        os.close(out_w)
+        os.close(err_w)
+        _run_child(
+            main,
+            [str(a) for a in request.get('args', [])],
+            request.get('stdin') or '',
+        )
+    os.close(out_w)
+    os.close(err_w)
+    return _Job(request.get('id'), pid, out_r, err_r)
+
+
+def _wait_code(pid: int) -> int:
+    _, status = os.waitpid(pid, 0)
+    if os.WIFEXITED(status):
+        return os.WEXITSTATUS(status)
+    return 128 + os.WTERMSIG(status)
+
+
+def serve(
+    main: Callable[[], None],
+    infile: Optional[IO[bytes]] = None,
+    outfile: Optional[IO[bytes]] = None,
+) -> int:
+    """Read JSON requests, one per line, from `infile` and run each of them
+    as a cephadm command in a child forked from this, already initialized,
+    interpreter. A request is of the form
+    `{"id": <any>, "args": [<cephadm argument>, ...], "stdin": <str>}`.
+    Commands run concurrently and a response of the form
+    `{"id": <request id>, "out": <str>, "err": <str>, "code": <int>}` is
+    written to `outfile`, one per line, as each of them completes, so
+    responses may come back in a different order than the requests.
+    Returns once the input is closed and all commands have completed.
+    """
+    in_stream = infile or sys.stdin.buffer
+    out_stream = outfile or sys.stdout.buffer
+    in_fd = in_stream.fileno()
+
+    def respond(response: Dict[str, Any]) -> None:
+        out_stream.write(json.dumps(response).encode('utf-8') + b'\n')
+        out_stream.flush()
+
+    respond({'executor': EXECUTOR_PROTOCOL, 'pid': os.getpid()})
+
+    sel = selectors.DefaultSelector()
+    sel.register(in_fd, selectors.EVENT_READ)
+    jobs: Dict[int, _Job] = {}
+    pending = bytearray()
+    lines: List[bytes]
+    reading = True
+    while reading or jobs:
+        for key, _ in sel.select():
+            fd = key.fd
+            data = os.read(fd, 65536)
+            if fd == in_fd:
+                if not data:
+                    reading = False
+                    sel.unregister(in_fd)
+                    lines = [bytes(pending)] if pending.strip() else []
+                else:
+                    pending.extend(data)
+                    *chunks, rest = pending.split(b'\n')
+                    lines = [bytes(c) for c in chunks]
+                    pending = bytearray(rest)
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        request = json.loads(line)
+                    except ValueError as e:
+                        respond(
+                            {'id': None, 'out': '', 'err': str(e), 'code': 1}
+                        )
+                        continue
+                    job = _start_job(main, request)
+                    for job_fd in (job.out_fd, job.err_fd):
+                        jobs[job_fd] = job
+                        sel.register(job_fd, selectors.EVENT_READ)
+                continue
+            job = jobs[fd]
+            if data:
+                job.buffers[fd].extend(data)
+                continue
+            sel.unregister(fd)
+            os.close(fd)
+            del jobs[fd]
+            job.closed.add(fd)
+            if job.done:
+                respond(job.response(_wait_code(job.pid)))
+    sel.close()
+    return 0
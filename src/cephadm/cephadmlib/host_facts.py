@@ -1,5 +1,6 @@
 # host_facts.py - classes/functions for gathering metadata on the host
 
+import hashlib
 import ipaddress
 import json
 import logging
@@ -12,17 +13,32 @@ import time
 from glob import glob
 from pathlib import Path
 
-from typing import Any, cast, Dict, List, Optional, Set, Union
+from typing import (
+    Any,
+    Callable,
+    cast,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Union,
+)
 
 from cephadmlib.call_wrappers import call, call_throws, CallVerbosity
+from cephadmlib.constants import CACHE_DIR
 from cephadmlib.context import CephadmContext
 from cephadmlib.data_utils import bytes_to_human
 from cephadmlib.exe_utils import find_executable
-from cephadmlib.file_utils import read_file
+from cephadmlib.file_utils import read_file, write_new
 from cephadmlib.net_utils import get_fqdn, get_ipv4_address, get_ipv6_address
 
 logger = logging.getLogger()
 
+HOST_FACTS_CACHE = os.path.join(CACHE_DIR, 'host_facts.json')
+# how long the static facts of a host are cached for at most
+HOST_FACTS_TTL = 300
+
 
 class Enclosure:
     def __init__(self, enc_id: str, enc_path: str, dev_path: str):
@@ -120,24 +136,87 @@ class HostFacts:
     _disk_vendor_workarounds = {'0x1af4': 'Virtio Block Device'}
     _excluded_block_devices = ('sr', 'zram', 'dm-', 'loop', 'md')
     _sg_generic_glob = '/sys/class/scsi_generic/*'
+    # the facts that are cheap to gather and change all the time. All the
+    # others describe the inventory and configuration of the host, and are
+    # static enough to be cached, see HostFactsCache
+    dynamic_facts = (
+        'cpu_load',
+        'memory_available_kb',
+        'memory_free_kb',
+        'system_uptime',
+        'tcp6_ports_used',
+        'tcp_ports_used',
+        'timestamp',
+        'udp6_ports_used',
+        'udp_ports_used',
+    )
 
     def __init__(self, ctx: CephadmContext):
         self.ctx: CephadmContext = ctx
-        self.cpu_model: str = 'Unknown'
-        self.sysctl_options: Dict[str, str] = self._populate_sysctl_options()
-        self.cpu_count: int = 0
-        self.cpu_cores: int = 0
-        self.cpu_threads: int = 0
-        self.interfaces: Dict[str, Any] = {}
-
-        self._meminfo: List[str] = read_file(['/proc/meminfo']).splitlines()
-        self._get_cpuinfo()
-        self._process_nics()
-        self.arch: str = platform.processor()
-        self.kernel: str = platform.release()
-        self._enclosures = self._discover_enclosures()
-        self._block_devices = self._get_block_devs()
-        self._device_list = self._get_device_info()
+        # the results of the probes of the host, each of which feeds one or
+        # more facts. Probes only run once the first of their facts is
+        # gathered
+        self._probes: Dict[str, Any] = {}
+        self._timings: Dict[str, float] = {}
+
+    def _probe(self, func: Callable[[], Any]) -> Any:
+        name = func.__name__
+        if name not in self._probes:
+            start = time.monotonic()
+            self._probes[name] = func()
+            self._timings[name] = time.monotonic() - start
+        return self._probes[name]
+
+    @property
+    def sysctl_options(self) -> Dict[str, str]:
+        return self._probe(self._populate_sysctl_options)
+
+    @property
+    def cpu_model(self) -> str:
+        return self._probe(self._get_cpuinfo)['cpu_model']
+
+    @property
+    def cpu_count(self) -> int:
+        return self._probe(self._get_cpuinfo)['cpu_count']
+
+    @property
+    def cpu_cores(self) -> int:
+        return self._probe(self._get_cpuinfo)['cpu_cores']
+
+    @property
+    def cpu_threads(self) -> int:
+        return self._probe(self._get_cpuinfo)['cpu_threads']
+
+    @property
+    def interfaces(self) -> Dict[str, Any]:
+        return self._probe(self._process_nics)
+
+    @property
+    def arch(self) -> str:
+        return platform.processor()
+
+    @property
+    def kernel(self) -> str:
+        return platform.release()
+
+    @property
+    def _meminfo(self) -> List[str]:
+        return self._probe(self._read_meminfo)
+
+    @property
+    def _enclosures(self) -> Dict[str, Enclosure]:
+        return self._probe(self._discover_enclosures)
+
+    @property
+    def _block_devices(self) -> List[str]:
+        return self._probe(self._get_block_devs)
+
+    @property
+    def _device_list(self) -> List[Dict[str, object]]:
+        return self._probe(self._get_device_info)
+
+    def _read_meminfo(self) -> List[str]:
+        return read_file(['/proc/meminfo']).splitlines()
 
     def _populate_sysctl_options(self) -> Dict[str, str]:
         sysctl_options = {}
@@ -196,24 +275,30 @@ class HostFacts:
         return len(self._enclosures.keys())
 
     def _get_cpuinfo(self):
-        # type: () -> None
+        # type: () -> Dict[str, Any]
         """Determine cpu information via /proc/cpuinfo"""
         raw = read_file(['/proc/cpuinfo'])
         output = raw.splitlines()
         cpu_set = set()
+        cpuinfo: Dict[str, Any] = {
+            'cpu_model': 'Unknown',
+            'cpu_cores': 0,
+            'cpu_threads': 0,
+        }
 
         for line in output:
             field = [f.strip() for f in line.split(':')]
             if 'model name' in line:
-                self.cpu_model = field[1]
+                cpuinfo['cpu_model'] = field[1]
             if 'physical id' in line:
                 cpu_set.add(field[1])
             if 'siblings' in line:
-                self.cpu_threads = int(field[1].strip())
+                cpuinfo['cpu_threads'] = int(field[1].strip())
             if 'cpu cores' in line:
-                self.cpu_cores = int(field[1].strip())
+                cpuinfo['cpu_cores'] = int(field[1].strip())
             pass
-        self.cpu_count = len(cpu_set)
+        cpuinfo['cpu_count'] = len(cpu_set)
+        return cpuinfo
 
     def _get_block_devs(self):
         # type: () -> List[str]
@@ -486,8 +571,9 @@ class HostFacts:
         return bytes_to_human(self.flash_capacity_bytes)
 
     def _process_nics(self):
-        # type: () -> None
+        # type: () -> Dict[str, Any]
         """Look at the NIC devices and extract network related metadata"""
+        interfaces: Dict[str, Any] = {}
         # from https://github.com/torvalds/linux/blob/master/include/uapi/linux/if_arp.h
         hw_lookup = {
             '1': 'ethernet',
@@ -557,7 +643,7 @@ class HostFacts:
                     iftype = 'logical'
                     driver = ''
 
-                self.interfaces[iface] = {
+                interfaces[iface] = {
                     'mtu': mtu,
                     'upper_devs_list': upper_devs_list,
                     'lower_devs_list': lower_devs_list,
@@ -569,6 +655,7 @@ class HostFacts:
                     'ipv4_address': get_ipv4_address(iface),
                     'ipv6_address': get_ipv6_address(iface),
                 }
+        return interfaces
 
     @property
     def nic_count(self):
@@ -671,6 +758,10 @@ class HostFacts:
     def kernel_security(self):
         # type: () -> Dict[str, str]
         """Determine the security features enabled in the kernel - SELinux, AppArmor"""
+        return self._probe(self._get_kernel_security)
+
+    def _get_kernel_security(self):
+        # type: () -> Dict[str, str]
 
         def _fetch_selinux() -> Dict[str, str]:
             """Get the selinux status"""
@@ -768,21 +859,11 @@ class HostFacts:
         """Get kernel parameters required/used in Ceph clusters"""
 
         k_param = {}
-        out, _, _ = call_throws(
-            self.ctx, ['sysctl', '-a'], verbosity=CallVerbosity.SILENT
-        )
-        if out:
-            param_list = out.split('\n')
-            param_dict = {
-                param.split(' = ')[0]: param.split(' = ')[-1]
-                for param in param_list
-            }
-
-            # return only desired parameters
-            if 'net.ipv4.ip_nonlocal_bind' in param_dict:
-                k_param['net.ipv4.ip_nonlocal_bind'] = param_dict[
-                    'net.ipv4.ip_nonlocal_bind'
-                ]
+        # return only desired parameters
+        if 'net.ipv4.ip_nonlocal_bind' in self.sysctl_options:
+            k_param['net.ipv4.ip_nonlocal_bind'] = self.sysctl_options[
+                'net.ipv4.ip_nonlocal_bind'
+            ]
 
         return k_param
 
@@ -825,18 +906,145 @@ class HostFacts:
     def udp6_ports_used(self) -> List[int]:
         return HostFacts._process_net_data('/proc/net/udp6', 'udp')
 
-    def dump(self):
-        # type: () -> str
-        """Return the attributes of this HostFacts object as json"""
-        data = {
-            k: getattr(self, k)
-            for k in dir(self)
+    def _gather(self, names: Iterable[str]) -> Dict[str, Any]:
+        facts = {}
+        for k in names:
+            start = time.monotonic()
+            v = getattr(self, k)
+            self._timings[k] = time.monotonic() - start
+            if isinstance(v, (float, int, str, list, dict, tuple)):
+                facts[k] = v
+        return facts
+
+    def static_facts(self) -> Dict[str, Any]:
+        """Return the facts that are not in `dynamic_facts`"""
+        return self._gather(
+            k
+            for k in dir(type(self))
             if not k.startswith('_')
-            and isinstance(
-                getattr(self, k), (float, int, str, list, dict, tuple)
+            and isinstance(getattr(type(self), k), property)
+            and k not in self.dynamic_facts
+        )
+
+    def timings(self) -> Dict[str, float]:
+        """Return the seconds spent gathering each of the facts gathered so
+        far, and running each of the probes that fed them
+        """
+        return dict(self._timings)
+
+    def dump(self, cache=None):
+        # type: (Optional[HostFactsCache]) -> str
+        """Return the attributes of this HostFacts object as json. The static
+        facts come from `cache`, if given and still valid.
+        """
+        data = cache.get() if cache else None
+        if data is None:
+            data = self.static_facts()
+            if cache:
+                cache.set(data)
+        data = {**data, **self._gather(self.dynamic_facts)}
+        return json.dumps(data, indent=2, sort_keys=True)
+
+
+def _host_fingerprint() -> str:
+    """Return a digest of the device and network interface state of the
+    host. It changes with every device event udev processes and with every
+    change of the state or addresses of a network interface, which is when
+    the static facts of the host may change.
+    """
+    parts = [read_file(['/proc/sys/kernel/random/boot_id'])]
+    for path in ['/run/udev/data', '/dev/disk/by-path', '/dev/mapper']:
+        try:
+            parts.append(f'{path} {os.stat(path).st_mtime_ns}')
+        except OSError:
+            pass
+    for path in ['/sys/block', '/sys/class/net']:
+        if os.path.isdir(path):
+            parts.append(f'{path} {" ".join(sorted(os.listdir(path)))}')
+    for nic_path in HostFacts._nic_path_list:
+        if not os.path.isdir(nic_path):
+            continue
+        for iface in sorted(os.listdir(nic_path)):
+            parts.append(
+                ' '.join(
+                    [
+                        iface,
+                        read_file(
+                            [os.path.join(nic_path, iface, 'operstate')]
+                        ),
+                        read_file([os.path.join(nic_path, iface, 'mtu')]),
+                        get_ipv4_address(iface),
+                    ]
+                )
+            )
+    parts.append(read_file(['/proc/net/if_inet6']))
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+class HostFactsCache:
+    """Caches the static facts of the host, in memory and in a file to share
+    them between cephadm invocations, until the devices or network
+    interfaces of the host change or `ttl` seconds pass.
+
+    Like the image info cache, the cache is best effort: an unreadable or
+    unwritable cache file only means that the facts are gathered again.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = HOST_FACTS_CACHE,
+        ttl: int = HOST_FACTS_TTL,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._entry: Optional[Dict[str, Any]] = None
+        self._fingerprint = ''
+
+    def _load(self) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entry = json.load(f)
+            if isinstance(entry, dict):
+                self._entry = entry
+        except (OSError, ValueError) as e:
+            logger.debug(
+                'unable to read host facts cache %s: %s', self.path, e
             )
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        self._fingerprint = _host_fingerprint()
+        if self._entry is None:
+            self._load()
+        entry = self._entry or {}
+        if (
+            entry.get('fingerprint') != self._fingerprint
+            or not isinstance(entry.get('timestamp'), (int, float))
+            or time.time() - entry['timestamp'] >= self.ttl
+        ):
+            return None
+        return entry.get('facts')
+
+    def set(self, facts: Dict[str, Any]) -> None:
+        """Cache the given static facts, gathered after the last call to
+        get() so that any change during the gathering invalidates them.
+        """
+        self._entry = {
+            'fingerprint': self._fingerprint or _host_fingerprint(),
+            'timestamp': time.time(),
+            'facts': facts,
         }
-        return json.dumps(data, indent=2, sort_keys=True)
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with write_new(self.path) as f:
+                json.dump(self._entry, f)
+        except OSError as e:
+            logger.debug(
+                'unable to write host facts cache %s: %s', self.path, e
+            )
 
 
 def list_networks(ctx):
@@ -0,0 +1,81 @@
+# image_cache.py - on-host cache of container image information
+
+import json
+import logging
+import os
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from .constants import CACHE_DIR
+from .file_utils import write_new
+
+logger = logging.getLogger()
+
+IMAGE_INFO_CACHE = os.path.join(CACHE_DIR, 'image_info.json')
+
+
+class ImageInfoCache:
+    """Caches the repo digests and software versions of container images,
+    keyed by image id, across cephadm invocations. An image id identifies
+    the content of an image, so whatever we learned about an image id stays
+    true for as long as the image exists.
+
+    The cache is best effort: a missing, unreadable or unwritable cache file
+    only means that the information is gathered from the images again.
+    """
+
+    def __init__(self, path: str = IMAGE_INFO_CACHE) -> None:
+        self.path = path
+        self._images: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+    def load(self) -> 'ImageInfoCache':
+        try:
+            with open(self.path, 'r') as f:
+                images = json.load(f)
+            if isinstance(images, dict):
+                self._images = images
+        except (OSError, ValueError) as e:
+            logger.debug(
+                'unable to read image info cache %s: %s', self.path, e
+            )
+        return self
+
+    def get_digests(self, image_id: str) -> Optional[List[str]]:
+        return self._images.get(image_id, {}).get('digests')
+
+    def set_digests(self, image_id: str, digests: List[str]) -> None:
+        self._images.setdefault(image_id, {})['digests'] = digests
+        self._dirty = True
+
+    def get_version(self, image_id: str, key: str) -> Optional[str]:
+        """Return the cached version of the software `key` (e.g. ceph or a
+        daemon type) in the image.
+        """
+        return self._images.get(image_id, {}).get('versions', {}).get(key)
+
+    def set_version(self, image_id: str, key: str, version: str) -> None:
+        image = self._images.setdefault(image_id, {})
+        image.setdefault('versions', {})[key] = version
+        self._dirty = True
+
+    def prune(self, image_ids: Iterable[str]) -> None:
+        """Forget about all images but the given ones."""
+        keep = set(image_ids)
+        for image_id in list(self._images):
+            if image_id not in keep:
+                del self._images[image_id]
+                self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with write_new(self.path) as f:
+                json.dump(self._images, f)
+            self._dirty = False
+        except OSError as e:
+            logger.debug(
+                'unable to write image info cache %s: %s', self.path, e
+            )
@@ -2,7 +2,7 @@
 
 import logging
 
-from typing import Tuple, List, Optional
+from typing import Dict, Tuple, List, Optional
 
 from .context import CephadmContext
 from .call_wrappers import call, CallVerbosity
@@ -55,6 +55,90 @@ def check_unit(ctx: CephadmContext, unit_name: str) -> Tuple[bool, str, bool]:
     return (enabled, state, installed)
 
 
+# UnitFileState values for which `systemctl is-enabled` exits with 0
+_ENABLED_UNIT_FILE_STATES = {
+    'enabled',
+    'enabled-runtime',
+    'static',
+    'alias',
+    'indirect',
+    'generated',
+    'transient',
+}
+
+
+def _unit_state(active_state: str, sub_state: str) -> str:
+    if sub_state == 'auto-restart' or active_state in [
+        'failed',
+        'auto-restart',
+    ]:
+        return 'error'
+    if active_state == 'active':
+        return 'running'
+    if active_state == 'inactive':
+        return 'stopped'
+    return 'unknown'
+
+
+def _parse_unit_states(out: str) -> Dict[str, Tuple[bool, str, bool]]:
+    """Parse the output of `systemctl show` for one or more units into the
+    (enabled, state, installed) tuples returned by check_unit, keyed by unit
+    name.
+    """
+    result: Dict[str, Tuple[bool, str, bool]] = {}
+    for block in out.strip().split('\n\n'):
+        props = dict(
+            line.split('=', 1) for line in block.splitlines() if '=' in line
+        )
+        unit_name = props.get('Id')
+        if not unit_name:
+            continue
+        file_state = props.get('UnitFileState', '')
+        enabled = file_state in _ENABLED_UNIT_FILE_STATES
+        installed = enabled or file_state == 'disabled'
+        state = _unit_state(
+            props.get('ActiveState', ''), props.get('SubState', '')
+        )
+        result[unit_name] = (enabled, state, installed)
+    return result
+
+
+def check_unit_states(
+    ctx: CephadmContext, unit_names: List[str]
+) -> Dict[str, Tuple[bool, str, bool]]:
+    """Return the (enabled, state, installed) tuples, as check_unit would,
+    of all the given units using a single `systemctl show` call. Units that
+    are not part of the output are looked up one at a time.
+    """
+    result: Dict[str, Tuple[bool, str, bool]] = {}
+    found: Dict[str, Tuple[bool, str, bool]] = {}
+    if not unit_names:
+        return result
+    try:
+        out, err, code = call(
+            ctx,
+            [
+                'systemctl',
+                'show',
+                '--property=Id,UnitFileState,ActiveState,SubState',
+            ]
+            + list(unit_names),
+            verbosity=CallVerbosity.QUIET,
+        )
+        if code == 0:
+            found = _parse_unit_states(out)
+    except Exception as e:
+        logger.warning('unable to run systemctl: %s' % e)
+    for unit_name in unit_names:
+        # systemctl reports the full unit name, including the .service
+        # suffix that we usually leave off
+        unit_state = found.get(unit_name) or found.get(f'{unit_name}.service')
+        if unit_state is None:
+            unit_state = check_unit(ctx, unit_name)
+        result[unit_name] = unit_state
+    return result
+
+
 def check_units(
     ctx: CephadmContext, units: List[str], enabler: Optional[Packager] = None
 ) -> bool:
@@ -1,5 +1,5 @@
 from unittest import mock
-import copy, datetime, json, os, socket, threading
+import copy, datetime, gzip, json, os, socket, threading
 
 import pytest
 
@@ -527,20 +527,23 @@ def test_agent_run(_pull_conf_settings, _port_in_use, _gatherer_start,
             agent.run()
 
         expected_data = {
-           'host': host,
-           'ls': [{'valid_daemon': 'valid_metadata'}],
            'networks': network_data_no_sets,
            'facts': 'Host Facts',
+           'ls': [{'valid_daemon': 'valid_metadata'}],
            'volume': 'ceph-volume inventory data',
+           'host': host,
+           'hashes': mock.ANY,
            'ack': str(7),
            'keyring': 'agent keyring',
            'port': str(open_listener_port)
         }
-        _RQ_init.assert_called_with(
-            f'https://{target_ip}:{target_port}/data',
-            json.dumps(expected_data).encode('ascii'),
-            {'Content-Type': 'application/json'}
-        )
+        url, data, headers = _RQ_init.call_args[0]
+        assert url == f'https://{target_ip}:{target_port}/data'
+        assert headers == {'Content-Type': 'application/json',
+                           'Content-Encoding': 'gzip'}
+        sent = json.loads(gzip.decompress(data))
+        assert sent == expected_data
+        assert sorted(sent['hashes']) == ['facts', 'ls', 'networks', 'volume']
         _listener_start.assert_called()
         _gatherer_start.assert_called()
         _urlopen.assert_called()
@@ -557,6 +560,73 @@ def test_agent_run(_pull_conf_settings, _port_in_use, _gatherer_start,
             agent.run()
 
 
+@mock.patch("threading.Event.clear")
+@mock.patch("threading.Event.wait")
+@mock.patch("cephadm.http_query")
+@mock.patch("cephadm.list_networks")
+@mock.patch("cephadm.HostFacts.dump")
+@mock.patch("cephadm.HostFacts.__init__", lambda _, __: None)
+@mock.patch("ssl.SSLContext.load_verify_locations")
+@mock.patch("threading.Thread.is_alive")
+@mock.patch("cephadm.port_in_use")
+@mock.patch("cephadm.CephadmAgent.pull_conf_settings")
+def test_agent_run_sends_changed_sections(_pull_conf_settings, _port_in_use, _is_alive,
+                                          _load_verify_locations, _HF_dump, _list_networks,
+                                          _http_query, _wait, _clear):
+    class EventCleared(Exception):
+        pass
+
+    _port_in_use.return_value = False
+    _is_alive.return_value = True
+    _list_networks.return_value = {'10.2.1.0/24': {'eth1': set(['10.2.1.122'])}}
+    _clear.side_effect = EventCleared()
+    response = {'result': 'ok'}
+    _http_query.side_effect = lambda **kwargs: (200, json.dumps(response))
+
+    def facts(**kw):
+        return json.dumps({'hostname': 'host1', 'timestamp': 1.0, **kw})
+
+    with with_cephadm_ctx([]) as ctx:
+        agent = _cephadm.CephadmAgent(ctx, FSID, AGENT_ID)
+        agent.keyring = 'agent keyring'
+        agent.ack = 7
+        agent.volume_gatherer.ack = 7
+        agent.volume_gatherer.data = 'ceph-volume inventory data'
+        agent.ls_gatherer.ack = 7
+        agent.ls_gatherer.data = [{'name': 'osd.0'}]
+        everything = ['facts', 'ls', 'networks', 'volume']
+
+        def iteration(host_facts):
+            _HF_dump.return_value = host_facts
+            with pytest.raises(EventCleared):
+                agent.run()
+            kwargs = _http_query.call_args[1]
+            assert kwargs['headers'] == {'Content-Encoding': 'gzip'}
+            sent = json.loads(gzip.decompress(kwargs['data']))
+            assert sorted(sent['hashes']) == everything
+            return [section for section in everything if section in sent]
+
+        # the first report is a full one
+        assert iteration(facts()) == everything
+        # volatile facts alone do not count as a change
+        assert iteration(facts(timestamp=2.0)) == []
+        agent.ls_gatherer.data = [{'name': 'osd.0'}, {'name': 'osd.1'}]
+        assert iteration(facts(timestamp=3.0)) == ['ls']
+        assert iteration(facts(hostname='host2')) == ['facts']
+
+        # a mgr that does not know the unchanged sections gets all of them
+        # with the next report
+        response['resync'] = True
+        assert iteration(facts(hostname='host2')) == []
+        del response['resync']
+        assert iteration(facts(hostname='host2')) == everything
+
+        # and everything is sent periodically
+        for _ in range(agent.full_sync_interval - 1):
+            assert iteration(facts(hostname='host2')) == []
+        assert iteration(facts(hostname='host2')) == everything
+
+
 @mock.patch("cephadm.CephadmAgent.pull_conf_settings")
 @mock.patch("cephadm.CephadmAgent.wakeup")
 def test_mgr_listener_handle_json_payload(_agent_wakeup, _pull_conf_settings, cephadm_fs):
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+from cephadmlib import executor
+
+
+def _fake_main():
+    args = sys.argv[1:]
+    if args[0] == 'echo':
+        print(' '.join(args[1:]))
+        sys.stderr.write(sys.stdin.read())
+        sys.exit(0)
+    if args[0] == 'fail':
+        sys.exit(int(args[1]))
+    raise ValueError('bad command')
+
+
+def _serve(requests):
+    in_r, in_w = os.pipe()
+    out_r, out_w = os.pipe()
+    with os.fdopen(in_w, 'wb') as f:
+        for request in requests:
+            f.write(request + b'\n')
+    with os.fdopen(in_r, 'rb') as infile, os.fdopen(out_w, 'wb') as outfile:
+        assert executor.serve(_fake_main, infile, outfile) == 0
+    with os.fdopen(out_r, 'rb') as f:
+        return [json.loads(line) for line in f.read().splitlines()]
+
+
+def test_executor_runs_requests():
+    responses = _serve([
+        json.dumps({'id': 1, 'args': ['echo', 'a', 'b'], 'stdin': 'in'}).encode(),
+        json.dumps({'id': 2, 'args': ['fail', '3']}).encode(),
+        json.dumps({'id': 3, 'args': ['boom']}).encode(),
+        b'not json',
+    ])
+    assert responses[0]['executor'] == executor.EXECUTOR_PROTOCOL
+    by_id = {r['id']: r for r in responses[1:]}
+    assert by_id[1] == {'id': 1, 'out': 'a b\n', 'err': 'in', 'code': 0}
+    assert by_id[2]['code'] == 3
+    assert by_id[3]['code'] == 1
+    assert 'bad command' in by_id[3]['err']
+    assert by_id[None]['code'] == 1
+    assert len(responses) == 5
+
+
+def test_executor_no_requests():
+    responses = _serve([])
+    assert len(responses) == 1
@@ -115,3 +115,74 @@ def test_host_facts_security(cephadm_fs):
     assert ksec['complain'] == 0
     assert ksec['enforce'] == 1
     assert ksec['unconfined'] == 2
+
+
+@pytest.fixture
+def proc_fs(cephadm_fs):
+    cephadm_fs.create_file('/proc/loadavg', contents='0.5 0.4 0.3 1/100 999\n')
+    cephadm_fs.create_file('/proc/uptime', contents='100.5 200.1\n')
+    cephadm_fs.create_file(
+        '/proc/meminfo',
+        contents='MemTotal: 1000 kB\nMemFree: 100 kB\nMemAvailable: 500 kB\n',
+    )
+    yield cephadm_fs
+
+
+def test_host_facts_dump_cached(proc_fs):
+    from cephadmlib.host_facts import HostFacts, HostFactsCache
+    import json
+
+    cache = HostFactsCache(path='/var/cache/cephadm/host_facts.json')
+    ctx = mock.MagicMock()
+    with mock.patch(
+        'cephadmlib.host_facts._host_fingerprint', return_value='a'
+    ) as _fingerprint:
+        with mock.patch.object(
+            HostFacts, 'static_facts', return_value={'cpu_model': 'x'}
+        ) as _static_facts:
+            facts = json.loads(HostFacts(ctx).dump(cache))
+            assert _static_facts.call_count == 1
+            assert facts['cpu_model'] == 'x'
+            assert facts['memory_free_kb'] == 100
+            assert facts['cpu_load']['1min'] == 0.5
+
+            # the static facts come from the cache, in memory or on disk
+            host = HostFacts(ctx)
+            facts = json.loads(host.dump(cache))
+            assert _static_facts.call_count == 1
+            assert facts['cpu_model'] == 'x'
+            assert not host._probes.get('_populate_sysctl_options')
+            assert '_read_meminfo' in host.timings()
+            other_cache = HostFactsCache(path=cache.path)
+            assert other_cache.get() == {'cpu_model': 'x'}
+
+            # until the host changes
+            _fingerprint.return_value = 'b'
+            HostFacts(ctx).dump(cache)
+            assert _static_facts.call_count == 2
+            assert other_cache.get() is None
+
+        # or they expire
+        assert HostFactsCache(path=cache.path).get() == {'cpu_model': 'x'}
+        assert HostFactsCache(path=cache.path, ttl=0).get() is None
+
+
+def test_host_facts_probes_run_once(proc_fs):
+    from cephadmlib.host_facts import HostFacts
+
+    class TestHostFacts(HostFacts):
+        calls = 0
+
+        def _populate_sysctl_options(self):
+            TestHostFacts.calls += 1
+            return {'net.ipv4.ip_nonlocal_bind': '1', 'vm.swappiness': '60'}
+
+    hfacts = TestHostFacts(mock.MagicMock())
+    assert hfacts.kernel_parameters == {'net.ipv4.ip_nonlocal_bind': '1'}
+    assert hfacts.sysctl_options['vm.swappiness'] == '60'
+    assert TestHostFacts.calls == 1
+    assert hfacts.memory_total_kb == 1000
+    assert set(hfacts.timings()) == {
+        '_populate_sysctl_options',
+        '_read_meminfo',
+    }
@@ -20,6 +20,28 @@ def test_list_daemons_no_detail_nothing(funkypatch):
     assert dl == []
 
 
+def _fake_systemctl_show(cmd, inactive=()):
+    blocks = []
+    for unit in cmd[3:]:
+        active = 'inactive' if any(i in unit for i in inactive) else 'active'
+        blocks.append('\n'.join([
+            f'Id={unit}.service',
+            f'ActiveState={active}',
+            'SubState=running' if active == 'active' else 'SubState=dead',
+            'UnitFileState=enabled',
+        ]))
+    return '\n\n'.join(blocks)
+
+
+def _fake_inspect(cmd, stats):
+    lines = []
+    for name in cmd[4:]:
+        for key, value in stats.items():
+            if key in name:
+                lines.append(f'{name},{value}')
+    return '\n'.join(lines)
+
+
 class _EntryHelper:
     def __init__(self, dl):
         self.dl = dl
@@ -176,12 +198,15 @@ def test_list_daemons_detail_minimal(cephadm_fs, funkypatch):
             out = '\n'.join(['bob,500 / 1000', 'kit,100 / 1000'])
         elif 'inspect' in cmd and any('RepoDigests' in a for a in cmd):
             out = f'[{img}@{img_sha}]'
-        elif 'is-active' in cmd:
-            out = 'active'
-        elif 'inspect' in cmd and 'mon' in cmd[-1]:
-            out = f'{ctr1},{img},{img_id},{date},{vers}'
-        elif 'inspect' in cmd and 'mgr' in cmd[-1]:
-            out = f'{ctr2},{img},{img_id},{date},{vers}'
+        elif 'show' in cmd:
+            out = _fake_systemctl_show(cmd)
+        elif 'ps' in cmd:
+            out = f'ceph-{fsid}-mon-ceph0\nceph-{fsid}-mgr-ceph0-zzzabc'
+        elif 'inspect' in cmd:
+            out = _fake_inspect(cmd, {
+                'mon': f'{ctr1},{img},{img_id},{date},{vers}',
+                'mgr': f'{ctr2},{img},{img_id},{date},{vers}',
+            })
         return out, '', 0
 
     _call.side_effect = _fake_call
@@ -249,14 +274,14 @@ def test_list_daemons_detail_mgrnotrunning(cephadm_fs, funkypatch):
             out = '\n'.join(['bob,500 / 1000', 'kit,100 / 1000'])
         elif 'inspect' in cmd and any('RepoDigests' in a for a in cmd):
             out = f'[{img}@{img_sha}]'
-        elif 'is-active' in cmd and 'mgr' in cmd[-1]:
-            out = 'inactive'
-        elif 'is-active' in cmd:
-            out = 'active'
-        elif 'inspect' in cmd and 'mon' in cmd[-1]:
-            out = f'{ctr1},{img},{img_id},{date},{vers}'
-        elif 'inspect' in cmd and 'mgr' in cmd[-1]:
-            code = 2
+        elif 'show' in cmd:
+            out = _fake_systemctl_show(cmd, inactive=['mgr'])
+        elif 'ps' in cmd:
+            out = f'ceph-{fsid}-mon-ceph0'
+        elif 'inspect' in cmd:
+            out = _fake_inspect(cmd, {
+                'mon': f'{ctr1},{img},{img_id},{date},{vers}',
+            })
         return out, '', code
 
     _call.side_effect = _fake_call
@@ -474,12 +499,15 @@ def test_list_daemons_detail_legacy(cephadm_fs, funkypatch):
             out = '\n'.join(['bob,500 / 1000', 'kit,100 / 1000'])
         elif 'inspect' in cmd and any('RepoDigests' in a for a in cmd):
             out = f'[{img}@{img_sha}]'
-        elif 'is-active' in cmd:
-            out = 'active'
-        elif 'inspect' in cmd and 'mon' in cmd[-1]:
-            out = f'{ctr1},{img},{img_id},{date},{vers}'
-        elif 'inspect' in cmd and 'mgr' in cmd[-1]:
-            out = f'{ctr2},{img},{img_id},{date},{vers}'
+        elif 'show' in cmd:
+            out = _fake_systemctl_show(cmd)
+        elif 'ps' in cmd:
+            out = f'ceph-{fsid}-mon-ceph0\nceph-{fsid}-mgr-ceph0-zzzabc'
+        elif 'inspect' in cmd:
+            out = _fake_inspect(cmd, {
+                'mon': f'{ctr1},{img},{img_id},{date},{vers}',
+                'mgr': f'{ctr2},{img},{img_id},{date},{vers}',
+            })
         elif 'ceph' in cmd and '-v' in cmd:
             out = 'ceph version v1.2.3 phony-version'
         return out, '', code
@@ -536,3 +564,66 @@ fsid = {fsid}
     assert losd_entry['state'] == 'running'
     assert losd_entry['host_version'] == 'v1.2.3'
     edl.assert_checked_all()
+
+
+def test_list_daemons_detail_bulk(cephadm_fs, funkypatch):
+    _cephadm = import_cephadm()
+    _call = funkypatch.patch('cephadmlib.call_wrappers.call')
+
+    img = 'quay.io/fake/ceph:ci'
+    img_id = 'fd6b0fb89677f907edf0f5dbec41b2d09850d58ff860a8a0671ad24fafa1e889'
+    img_sha = 'sha256:c217e3d06df0334fba3f33242e76548a4f71cec619dfa29f64dec9321bd518f3'
+    date = '2025-01-31 08:13:30.148338962 -0500 EST'
+    fsid = 'dc93cfee-ddc5-11ef-a056-525400220000'
+    names = [f'osd.{i}' for i in range(10)]
+    calls = []
+
+    def _fake_call(ctx, cmd, *args, **kwargs):
+        calls.append(cmd)
+        out = ''
+        if 'stats' in cmd:
+            out = ''
+        elif 'inspect' in cmd and any('RepoDigests' in a for a in cmd):
+            out = f'[{img}@{img_sha}]'
+        elif 'show' in cmd:
+            out = _fake_systemctl_show(cmd)
+        elif 'ps' in cmd:
+            out = '\n'.join(f'ceph-{fsid}-osd-{i}' for i in range(10))
+        elif 'inspect' in cmd:
+            out = _fake_inspect(cmd, {
+                f'osd-{i}': f'ctr{i},{img},{img_id},{date},'
+                for i in range(10)
+            })
+        elif 'exec' in cmd and '-v' in cmd:
+            out = 'ceph version 19.2.0 phony-version'
+        return out, '', 0
+
+    _call.side_effect = _fake_call
+
+    fake_ceph = pathlib.Path('/var/lib/fake/ceph')
+    for name in names:
+        (fake_ceph / fsid / name).mkdir(parents=True)
+
+    with with_cephadm_ctx([], mock_cephadm_call_fn=False) as ctx:
+        ctx.data_dir = str(fake_ceph)
+        dl = _cephadm.list_daemons(ctx)
+    assert sorted(d['name'] for d in dl) == sorted(names)
+    for d in dl:
+        assert d['state'] == 'running'
+        assert d['container_id'] == f'ctr{d["name"].split(".")[1]}'
+        assert d['container_image_digests'] == [f'{img}@{img_sha}']
+        assert d['version'] == '19.2.0'
+    # one call each for all the units and containers, and the image is
+    # only looked at once
+    assert len([c for c in calls if 'systemctl' in c]) == 1
+    assert len([c for c in calls if 'inspect' in c]) == 2
+    assert len([c for c in calls if 'exec' in c]) == 1
+
+    # the image digests and versions are cached on the host
+    calls.clear()
+    with with_cephadm_ctx([], mock_cephadm_call_fn=False) as ctx:
+        ctx.data_dir = str(fake_ceph)
+        dl2 = _cephadm.list_daemons(ctx)
+    assert sorted(dl2, key=lambda d: d['name']) == sorted(dl, key=lambda d: d['name'])
+    assert len([c for c in calls if 'inspect' in c]) == 1
+    assert not [c for c in calls if 'exec' in c]
@@ -420,6 +420,47 @@ def test_check_unit(enabled_out, active_out, expected):
     assert (enabled, state, installed) == expected
 
 
+def test_parse_unit_states():
+    from cephadmlib.systemd import _parse_unit_states
+
+    out = '\n'.join([
+        'Id=a.service',
+        'ActiveState=active',
+        'SubState=running',
+        'UnitFileState=enabled',
+        '',
+        'Id=b.service',
+        'ActiveState=activating',
+        'SubState=auto-restart',
+        'UnitFileState=disabled',
+        '',
+        'Id=c.service',
+        'ActiveState=inactive',
+        'SubState=dead',
+        'UnitFileState=',
+    ])
+    assert _parse_unit_states(out) == {
+        'a.service': (True, 'running', True),
+        'b.service': (False, 'error', True),
+        'c.service': (False, 'stopped', False),
+    }
+
+
+def test_check_unit_states_falls_back():
+    with with_cephadm_ctx([]) as ctx:
+        with mock.patch('cephadmlib.systemd.call') as _call:
+            _call.side_effect = [
+                ('Id=a.service\nActiveState=active\nUnitFileState=enabled', '', 0),
+                ('', '', 0),  # is-enabled b
+                ('failed', '', 0),  # is-active b
+            ]
+            result = _cephadm.check_unit_states(ctx, ['a', 'b'])
+    assert result == {
+        'a': (True, 'running', True),
+        'b': (True, 'error', True),
+    }
+
+
 class FakeEnabler:
     def __init__(self, should_be_called):
         self._should_be_called = should_be_called
@@ -16,6 +16,7 @@
 
 #include "ActivePyModules.h"
 
+#include <optional>
 #include <rocksdb/version.h>
 
 #include "common/errno.h"
@@ -985,6 +986,199 @@ PyObject* ActivePyModules::get_perf_schema_python(
   return f.get();
 }
 
+PyObject* ActivePyModules::get_latest_counters_python(
+    const std::vector<std::string> &svc_types,
+    int prio_limit,
+    const std::optional<std::vector<std::string>> &svc_ids)
+{
+  // the latest value of a counter of a daemon
+  struct LatestValue {
+    bool avg = false;
+    uint64_t v = 0;
+    uint64_t c = 0;
+  };
+  // the counters of a daemon type, in the order in which they were first
+  // seen, and the latest values of each daemon in that order
+  struct TypeCounters {
+    std::vector<std::pair<std::string, PerfCounterType>> schema;
+    std::map<std::string, size_t> positions;
+    std::map<std::string, std::vector<std::optional<LatestValue>>> daemons;
+  };
+  std::map<std::string, TypeCounters> collected;
+
+  {
+    without_gil_t no_gil;
+    std::lock_guard l(lock);
+    for (const auto &svc_type : svc_types) {
+      auto &counters = collected[svc_type];
+      DaemonStateCollection daemons;
+      if (svc_ids) {
+        // only look up the requested daemons rather than all of the type
+        for (const auto &svc_id : *svc_ids) {
+          DaemonKey key{svc_type, svc_id};
+          if (auto state = daemon_state.get(key); state) {
+            daemons.emplace(key, state);
+          }
+        }
+      } else {
+        daemons = daemon_state.get_by_service(svc_type);
+      }
+      for (auto& [key, state] : daemons) {
+        std::lock_guard l2(state->lock);
+        auto &values = counters.daemons[key.name];
+        for (const auto& [path, instance] : state->perf_counters.instances) {
+          auto type = state->perf_counters.types.find(path);
+          if (type == state->perf_counters.types.end() ||
+              type->second.priority < prio_limit) {
+            continue;
+          }
+          auto [pos, inserted] = counters.positions.emplace(
+            path, counters.schema.size());
+          if (inserted) {
+            counters.schema.emplace_back(path, type->second);
+          }
+          if (values.size() <= pos->second) {
+            values.resize(pos->second + 1);
+          }
+          LatestValue value;
+          if (type->second.type & PERFCOUNTER_LONGRUNAVG) {
+            value.avg = true;
+            if (!instance.get_data_avg().empty()) {
+              const auto &datapoint = instance.get_latest_data_avg();
+              value.v = datapoint.s;
+              value.c = datapoint.c;
+            }
+          } else if (!instance.get_data().empty()) {
+            value.v = instance.get_latest_data().v;
+          }
+          values[pos->second] = value;
+        }
+      }
+    }
+  }
+
+  PyFormatter f;
+  for (const auto& [svc_type, counters] : collected) {
+    f.open_object_section(svc_type.c_str());
+    f.open_array_section("schema");
+    for (const auto& [path, type] : counters.schema) {
+      f.open_object_section("counter");
+      f.dump_string("path", path);
+      f.dump_string("description", type.description);
+      if (!type.nick.empty()) {
+        f.dump_string("nick", type.nick);
+      }
+      f.dump_unsigned("type", type.type);
+      f.dump_unsigned("priority", type.priority);
+      f.dump_unsigned("units", type.unit);
+      f.close_section();
+    }
+    f.close_section();
+    f.open_object_section("daemons");
+    for (const auto& [name, values] : counters.daemons) {
+      f.open_array_section(name.c_str());
+      for (size_t i = 0; i < counters.schema.size(); ++i) {
+        if (i >= values.size() || !values[i]) {
+          f.dump_null("value");
+        } else if (values[i]->avg) {
+          f.open_array_section("value");
+          f.dump_unsigned("s", values[i]->v);
+          f.dump_unsigned("c", values[i]->c);
+          f.close_section();
+        } else {
+          f.dump_unsigned("v", values[i]->v);
+        }
+      }
+      f.close_section();
+    }
+    f.close_section();
+    f.close_section();
+  }
+  return f.get();
+}
+
+PyObject* ActivePyModules::get_counters_python(
+    const std::string &svc_type,
+    const std::vector<std::string> &svc_ids,
+    const std::vector<std::string> &paths)
+{
+  // a data point of a counter, `c` is only set for long running averages
+  struct DataPoint {
+    utime_t t;
+    uint64_t v;
+    uint64_t c;
+  };
+  struct History {
+    bool avg = false;
+    std::vector<DataPoint> data;
+  };
+  // daemon id -> counter path -> history, for the daemons that exist
+  std::map<std::string, std::map<std::string, History>> collected;
+
+  {
+    without_gil_t no_gil;
+    std::lock_guard l(lock);
+    for (const auto &svc_id : svc_ids) {
+      auto state = daemon_state.get(DaemonKey{svc_type, svc_id});
+      if (!state) {
+        dout(4) << "No daemon state for " << svc_type << "." << svc_id << dendl;
+        continue;
+      }
+      std::lock_guard l2(state->lock);
+      auto &histories = collected[svc_id];
+      for (const auto &path : paths) {
+        auto instance = state->perf_counters.instances.find(path);
+        auto type = state->perf_counters.types.find(path);
+        if (instance == state->perf_counters.instances.end() ||
+            type == state->perf_counters.types.end()) {
+          dout(4) << "Missing counter: '" << path << "' ("
+                  << svc_type << "." << svc_id << ")" << dendl;
+          continue;
+        }
+        auto &history = histories[path];
+        if (type->second.type & PERFCOUNTER_LONGRUNAVG) {
+          history.avg = true;
+          for (const auto &datapoint : instance->second.get_data_avg()) {
+            history.data.push_back({datapoint.t, datapoint.s, datapoint.c});
+          }
+        } else {
+          for (const auto &datapoint : instance->second.get_data()) {
+            history.data.push_back({datapoint.t, datapoint.v, 0});
+          }
+        }
+      }
+    }
+  }
+
+  PyFormatter f;
+  for (const auto &svc_id : svc_ids) {
+    auto histories = collected.find(svc_id);
+    f.open_object_section(svc_id.c_str());
+    for (const auto &path : paths) {
+      f.open_array_section(path.c_str());
+      if (histories != collected.end()) {
+        if (auto history = histories->second.find(path);
+            history != histories->second.end()) {
+          for (const auto &datapoint : history->second.data) {
+            f.open_array_section("datapoint");
+            f.dump_float("t", datapoint.t);
+            if (history->second.avg) {
+              f.dump_unsigned("s", datapoint.v);
+              f.dump_unsigned("c", datapoint.c);
+            } else {
+              f.dump_unsigned("v", datapoint.v);
+            }
+            f.close_section();
+          }
+        }
+      }
+      f.close_section();
+    }
+    f.close_section();
+  }
+  return f.get();
+}
+
 PyObject* ActivePyModules::get_rocksdb_version()
 {
   std::string version = std::to_string(ROCKSDB_MAJOR) + "." +
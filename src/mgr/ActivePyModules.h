@@ -13,6 +13,8 @@
 
 #pragma once
 
+#include <optional>
+
 #include "ActivePyModule.h"
 
 #include "common/Finisher.h"
@@ -101,6 +103,14 @@ public:
   PyObject *get_perf_schema_python(
      const std::string &svc_type,
      const std::string &svc_id);
+  PyObject *get_latest_counters_python(
+     const std::vector<std::string> &svc_types,
+     int prio_limit,
+     const std::optional<std::vector<std::string>> &svc_ids);
+  PyObject *get_counters_python(
+     const std::string &svc_type,
+     const std::vector<std::string> &svc_ids,
+     const std::vector<std::string> &paths);
   PyObject *get_rocksdb_version();
   PyObject *get_context();
   PyObject *get_osdmap();
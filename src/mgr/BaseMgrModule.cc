@@ -32,6 +32,7 @@
 #include "Gil.h"
 
 #include <algorithm>
+#include <optional>
 
 #define dout_context g_ceph_context
 #define dout_subsys ceph_subsys_mgr
@@ -676,6 +677,74 @@ get_perf_schema(BaseMgrModule *self, PyObject *args)
   return self->py_modules->get_perf_schema_python(type_str, svc_id);
 }
 
+// convert a list of str to `out`, raise a TypeError naming `what` otherwise
+static bool
+string_list_from_python(PyObject *py_list, const char *what,
+                        std::vector<std::string> *out)
+{
+  for (Py_ssize_t i = 0; i < PyList_Size(py_list); ++i) {
+    PyObject *py_item = PyList_GET_ITEM(py_list, i);
+    if (!PyUnicode_Check(py_item)) {
+      PyErr_Format(PyExc_TypeError, "%s must be strings", what);
+      return false;
+    }
+    const char *item = PyUnicode_AsUTF8(py_item);
+    if (!item) {
+      return false;
+    }
+    out->push_back(item);
+  }
+  return true;
+}
+
+static PyObject*
+get_latest_counters(BaseMgrModule *self, PyObject *args)
+{
+  PyObject *py_types = nullptr;
+  int prio_limit = 0;
+  PyObject *py_ids = Py_None;
+  if (!PyArg_ParseTuple(args, "O!i|O:get_latest_counters",
+                        &PyList_Type, &py_types, &prio_limit, &py_ids)) {
+    return nullptr;
+  }
+  std::vector<std::string> svc_types;
+  if (!string_list_from_python(py_types, "daemon types", &svc_types)) {
+    return nullptr;
+  }
+  std::optional<std::vector<std::string>> svc_ids;
+  if (py_ids != Py_None) {
+    if (!PyList_Check(py_ids)) {
+      PyErr_SetString(PyExc_TypeError, "daemon ids must be a list or None");
+      return nullptr;
+    }
+    svc_ids.emplace();
+    if (!string_list_from_python(py_ids, "daemon ids", &*svc_ids)) {
+      return nullptr;
+    }
+  }
+  return self->py_modules->get_latest_counters_python(svc_types, prio_limit,
+                                                      svc_ids);
+}
+
+static PyObject*
+get_counters(BaseMgrModule *self, PyObject *args)
+{
+  char *svc_type = nullptr;
+  PyObject *py_ids = nullptr;
+  PyObject *py_paths = nullptr;
+  if (!PyArg_ParseTuple(args, "sO!O!:get_counters", &svc_type,
+                        &PyList_Type, &py_ids, &PyList_Type, &py_paths)) {
+    return nullptr;
+  }
+  std::vector<std::string> svc_ids;
+  std::vector<std::string> paths;
+  if (!string_list_from_python(py_ids, "daemon ids", &svc_ids) ||
+      !string_list_from_python(py_paths, "counter paths", &paths)) {
+    return nullptr;
+  }
+  return self->py_modules->get_counters_python(svc_type, svc_ids, paths);
+}
+
 static PyObject*
 ceph_get_rocksdb_version(BaseMgrModule *self)
 {
@@ -1483,6 +1552,12 @@ PyMethodDef BaseMgrModule_methods[] = {
   {"_ceph_get_perf_schema", (PyCFunction)get_perf_schema, METH_VARARGS,
     "Get the performance counter schema"},
 
+  {"_ceph_get_latest_counters", (PyCFunction)get_latest_counters, METH_VARARGS,
+    "Get the latest values of all the performance counters of daemon types"},
+
+  {"_ceph_get_counters", (PyCFunction)get_counters, METH_VARARGS,
+    "Get the data points of performance counters of several daemons"},
+
   {"_ceph_get_rocksdb_version", (PyCFunction)ceph_get_rocksdb_version, METH_NOARGS,
     "Get the current RocksDB version number"},
 
@@ -75,6 +75,8 @@ class BaseMgrModule(object):
     def _ceph_get_rocksdb_version(self) -> str: ...
     def _ceph_get_counter(self, svc_type: str, svc_name: str, path: str) -> Dict[str, List[Tuple[float, int]]]: ...
     def _ceph_get_latest_counter(self, svc_type, svc_name, path): ...
+    def _ceph_get_latest_counters(self, svc_types: List[str], prio_limit: int, svc_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]: ...
+    def _ceph_get_counters(self, svc_type: str, svc_ids: List[str], paths: List[str]) -> Dict[str, Dict[str, List[Any]]]: ...
     def _ceph_get_metadata(self, svc_type, svc_id): ...
     def _ceph_get_daemon_status(self, svc_type, svc_id): ...
     def _ceph_send_command(self,
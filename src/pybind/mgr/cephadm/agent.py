@@ -6,6 +6,7 @@ except ImportError:
     class Server:  # type: ignore
         pass
 
+import gzip
 import json
 import logging
 import socket
@@ -42,6 +43,9 @@ def cherrypy_filter(record: logging.LogRecord) -> bool:
 logging.getLogger('cherrypy.error').addFilter(cherrypy_filter)
 cherrypy.log.access_log.propagate = False
 
+# the sections of the metadata an agent reports
+AGENT_METADATA_SECTIONS = ['ls', 'networks', 'facts', 'volume']
+
 
 class AgentEndpoint:
 
@@ -624,6 +628,16 @@ class NodeProxyEndpoint:
         return results
 
 
+def _json_processor(entity: Any) -> None:
+    # like cherrypy's own JSON processor, but for bodies that agents send gzip
+    # compressed too
+    body = entity.fp.read()
+    with cherrypy.HTTPError.handle((ValueError, OSError, EOFError), 400, 'Invalid JSON document'):
+        if cherrypy.request.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        cherrypy.request.json = json.loads(body.decode('utf-8'))
+
+
 class HostData(Server):
     exposed = True
 
@@ -642,7 +656,7 @@ class HostData(Server):
         super().stop()
 
     @cherrypy.tools.allow(methods=['POST'])
-    @cherrypy.tools.json_in()
+    @cherrypy.tools.json_in(processor=_json_processor)
     @cherrypy.tools.json_out()
     @cherrypy.expose
     def index(self) -> Dict[str, Any]:
@@ -658,6 +672,10 @@ class HostData(Server):
             # host agent is reporting on is marked offline, it shouldn't be any more
             self.mgr.offline_hosts_remove(data['host'])
             results['result'] = self.handle_metadata(data)
+            if self.mgr.agent_cache.unknown_sections(data['host'], data.get('hashes', {})):
+                # we are missing the data of sections the agent considers
+                # unchanged, have it send everything again
+                results['resync'] = True
         return results
 
     def check_request_fields(self, data: Dict[str, Any]) -> None:
@@ -688,7 +706,9 @@ class HostData(Server):
                 f'Counter value from agent on host {host} could not be converted to an integer: {e}')
         metadata_types = ['ls', 'networks', 'facts', 'volume']
         metadata_types_str = '{' + ', '.join(metadata_types) + '}'
-        if not all(item in data.keys() for item in metadata_types):
+        # sections the agent considers unchanged are only sent as a hash
+        hashes = data.get('hashes') or {}
+        if not all(item in data.keys() or item in hashes for item in metadata_types):
             self.mgr.log.warning(
                 f'Agent on host {host} reported incomplete metadata. Not all of {metadata_types_str} were present. Received fields {fields}')
 
@@ -721,6 +741,10 @@ class HostData(Server):
                 self.mgr.log.debug(
                     f'Received old metadata from agent on host {host}. Requested up-to-date metadata.')
 
+            # agents only send the sections of their metadata that changed,
+            # along with the hashes of all of them
+            hashes: Dict[str, str] = data.get('hashes', {})
+            section_hashes = self.mgr.agent_cache.agent_section_hashes.setdefault(host, {})
             if 'ls' in data and data['ls']:
                 self.mgr._process_ls_output(host, data['ls'])
                 self.mgr.update_failed_daemon_health_check()
@@ -731,6 +755,15 @@ class HostData(Server):
             if 'volume' in data and data['volume']:
                 ret = Devices.from_json(json.loads(data['volume']))
                 self.mgr.cache.update_host_devices(host, ret.devices)
+            for section in AGENT_METADATA_SECTIONS:
+                if section in data and section in hashes:
+                    section_hashes[section] = hashes[section]
+            unchanged = [
+                section for section in AGENT_METADATA_SECTIONS
+                if section not in data and section in hashes
+                and section_hashes.get(section) == hashes[section]
+            ]
+            self.mgr.cache.touch_host_metadata(host, unchanged)
 
             if (
                 error_daemons_old != set([dd.name() for dd in self.mgr.cache.get_error_daemons()])
@@ -740,7 +773,7 @@ class HostData(Server):
                     f'Change detected in state of daemons from {host} agent metadata. Kicking serve loop')
                 self.mgr._kick_serve_loop()
 
-            if up_to_date and ('ls' in data and data['ls']):
+            if up_to_date and (('ls' in data and data['ls']) or 'ls' in unchanged):
                 was_out_of_date = not self.mgr.cache.all_host_metadata_up_to_date()
                 self.mgr.cache.metadata_up_to_date[host] = True
                 if was_out_of_date and self.mgr.cache.all_host_metadata_up_to_date():
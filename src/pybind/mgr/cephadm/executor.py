@@ -0,0 +1,125 @@
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from orchestrator import OrchestratorError
+
+if TYPE_CHECKING:
+    from asyncssh.connection import SSHClientConnection
+    from asyncssh.process import SSHClientProcess
+    from cephadm.ssh import RemoteCommand
+
+logger = logging.getLogger(__name__)
+
+# how long to wait for a new executor to report that it is ready
+EXECUTOR_START_TIMEOUT = 30
+
+
+class ExecutorError(OrchestratorError):
+    pass
+
+
+class CephadmExecutor:
+    """
+    A long-lived `cephadm executor` process on a host, running the cephadm
+    commands that are sent to it over its stdin as JSON requests.
+
+    The executor forks every command from an interpreter that has already
+    loaded cephadm, sparing each command the startup of a new python
+    process and the unpacking of the cephadm zipapp. Requests are
+    identified by an id, so any number of them can be in flight on the
+    same executor at once.
+    """
+
+    def __init__(self, host: str, cmd: "RemoteCommand") -> None:
+        self.host = host
+        self.cmd = cmd
+        self._process: Optional["SSHClientProcess"] = None
+        self._reader: Optional["asyncio.Future[None]"] = None
+        self._requests: Dict[int, "asyncio.Future[Dict[str, Any]]"] = {}
+        self._next_id = 0
+        self._closed = False
+
+    @property
+    def running(self) -> bool:
+        return not self._closed and self._reader is not None and not self._reader.done()
+
+    async def start(self, conn: "SSHClientConnection", command: str) -> None:
+        """
+        Start the executor by running `command`, the (possibly sudo
+        wrapped) `cmd` of the executor, over `conn`.
+        """
+        self._process = await conn.create_process(command)
+        line: str = await asyncio.wait_for(self._process.stdout.readline(),
+                                           timeout=EXECUTOR_START_TIMEOUT)
+        try:
+            hello = json.loads(line)
+        except ValueError:
+            hello = None
+        if not isinstance(hello, dict) or 'executor' not in hello:
+            stderr = ''
+            if not line:
+                # the process exited, find out why
+                try:
+                    stderr = await asyncio.wait_for(self._process.stderr.read(), timeout=5)
+                except asyncio.TimeoutError:
+                    pass
+            raise ExecutorError(f'cephadm executor did not start on {self.host}: {stderr or line}')
+        logger.debug(f'Started cephadm executor on {self.host}: {hello}')
+        self._reader = asyncio.ensure_future(self._read_responses())
+
+    async def _read_responses(self) -> None:
+        assert self._process
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._requests.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except Exception as e:
+            logger.debug(f'cephadm executor on {self.host} failed: {e}')
+        finally:
+            logger.debug(f'cephadm executor on {self.host} exited')
+            for future in self._requests.values():
+                if not future.done():
+                    future.set_exception(
+                        ExecutorError(f'cephadm executor on {self.host} exited'))
+            self._requests = {}
+
+    async def run(self, args: List[str], stdin: Optional[str] = None) -> Tuple[str, str, int]:
+        if not self.running:
+            raise ExecutorError(f'cephadm executor on {self.host} is not running')
+        assert self._process
+        request_id = self._next_id
+        self._next_id += 1
+        future = asyncio.get_event_loop().create_future()
+        self._requests[request_id] = future
+        try:
+            self._process.stdin.write(json.dumps({
+                'id': request_id,
+                'args': args,
+                'stdin': stdin or '',
+            }) + '\n')
+            await self._process.stdin.drain()
+            response = await future
+        finally:
+            self._requests.pop(request_id, None)
+        return (response['out'].rstrip('\n'),
+                response['err'].rstrip('\n'),
+                response['code'])
+
+    def close(self) -> None:
+        self._closed = True
+        if self._process is not None:
+            # closing its stdin lets the executor finish the commands that
+            # are still running and exit
+            try:
+                self._process.stdin.write_eof()
+            except Exception as e:
+                logger.debug(f'Unable to close cephadm executor on {self.host}: {e}')
+        if self._reader is not None:
+            self._reader.cancel()
@@ -1,5 +1,6 @@
 import datetime
 import enum
+import hashlib
 from copy import copy
 import ipaddress
 import itertools
@@ -7,6 +8,7 @@ import json
 import logging
 import math
 import socket
+import threading
 from typing import TYPE_CHECKING, Dict, List, Iterator, Optional, Any, Tuple, Set, Mapping, cast, \
     NamedTuple, Type, ValuesView, Union
 
@@ -25,8 +27,9 @@ from ceph.utils import str_to_datetime, datetime_to_str, datetime_now
 from orchestrator import OrchestratorError, HostSpec, OrchestratorEvent, service_to_daemon_types
 from cephadm.services.cephadmservice import CephadmDaemonDeploySpec
 
-from .utils import resolve_ip, SpecialHostLabels
+from .utils import resolve_ip, SpecialHostLabels, is_repo_digest
 from .migrations import queue_migrate_nfs_spec, queue_migrate_rgw_spec
+from .schedule import DaemonPlacement, PlacementHosts
 
 if TYPE_CHECKING:
     from .module import CephadmOrchestrator
@@ -254,6 +257,9 @@ class SpecStore():
         self.spec_deleted = {}  # type: Dict[str, datetime.datetime]
         self.spec_preview = {}  # type: Dict[str, ServiceSpec]
         self._needs_configuration: Dict[str, bool] = {}
+        # service_name -> digest of the placement inputs, and the slots
+        # placed for them
+        self._placements: Dict[str, Tuple[str, List[DaemonPlacement]]] = {}
 
     @property
     def all_specs(self) -> Mapping[str, ServiceSpec]:
@@ -357,7 +363,23 @@ class SpecStore():
         self._rank_maps[name] = rank_map
         self._save(name)
 
+    def get_placement(self, name: str, inputs: str) -> Optional[List[DaemonPlacement]]:
+        """
+        Return the slots of the last placement of a service that left
+        nothing to add or remove, if it was for the same inputs
+        """
+        if name in self._placements and self._placements[name][0] == inputs:
+            return self._placements[name][1]
+        return None
+
+    def save_placement(self, name: str, inputs: str, slots: List[DaemonPlacement]) -> None:
+        self._placements[name] = (inputs, slots)
+
+    def forget_placement(self, name: str) -> None:
+        self._placements.pop(name, None)
+
     def _save(self, name: str) -> None:
+        self.forget_placement(name)
         data: Dict[str, Any] = {
             'spec': self._specs[name].to_json(),
         }
@@ -463,6 +485,7 @@ class SpecStore():
     def finally_rm(self, service_name):
         # type: (str) -> bool
         found = service_name in self._specs
+        self.forget_placement(service_name)
         if found:
             self._rm_certs_and_keys(self._specs[service_name])
             del self._specs[service_name]
@@ -750,6 +773,14 @@ class HostCache():
     Used to run daemon actions after deploying a daemon. We need to
     store it persistently, in order to stay consistent across
     MGR failovers.
+
+    6. `images`: O(hosts)
+
+    The container images known to be on each host, with their repo
+    digests, as found when inspecting or pulling them. Not persisted,
+    images are inspected again after a MGR failover. An image referred to
+    by tag is only trusted for `image_tag_cache_timeout` seconds, as the
+    tag may be moved to another image.
     """
 
     def __init__(self, mgr):
@@ -785,6 +816,18 @@ class HostCache():
 
         self.metadata_up_to_date = {}  # type: Dict[str, bool]
 
+        # host -> image -> (time of the inspection or pull, repo digests)
+        self.images: Dict[str, Dict[str, Tuple[datetime.datetime, List[str]]]] = {}
+
+        # service name -> host -> daemons, see get_daemons_by_service()
+        self._service_index: Dict[str, Dict[str, List[orchestrator.DaemonDescription]]] = {}
+        self._service_index_lock = threading.Lock()
+        # the daemons dict the index was built from, the services of each
+        # host in the index, and the hosts whose daemons changed since
+        self._service_index_of: Optional[Dict[str, Dict[str, orchestrator.DaemonDescription]]] = None
+        self._service_index_services: Dict[str, Set[str]] = {}
+        self._service_index_stale: Set[str] = set()
+
     def load(self):
         # type: () -> None
         for k, v in self.mgr.get_store_prefix(HOST_CACHE_PREFIX).items():
@@ -808,6 +851,7 @@ class HostCache():
                 self.daemon_refresh_queue.append(host)
                 self.network_refresh_queue.append(host)
                 self.daemons[host] = {}
+                self._daemons_changed(host)
                 self.osdspec_previews[host] = []
                 self.osdspec_last_applied[host] = {}
                 self.networks[host] = {}
@@ -870,6 +914,7 @@ class HostCache():
     def update_host_daemons(self, host, dm):
         # type: (str, Dict[str, orchestrator.DaemonDescription]) -> None
         self.daemons[host] = dm
+        self._daemons_changed(host)
         self._tmp_daemons.pop(host, {})
         self.last_daemon_update[host] = datetime_now()
 
@@ -930,6 +975,24 @@ class HostCache():
         self.networks[host] = nets
         self.last_network_update[host] = datetime_now()
 
+    def touch_host_metadata(self, host: str, sections: List[str]) -> None:
+        """
+        Mark sections ('ls', 'networks', 'facts' or 'volume') of the metadata
+        of a host as refreshed without a change, as an agent reports them.
+        Nothing but the refresh times changes, so there is nothing to save.
+        """
+        now = datetime_now()
+        if 'ls' in sections and host in self.last_daemon_update:
+            self.last_daemon_update[host] = now
+            for dd in self.daemons.get(host, {}).values():
+                dd.last_refresh = now
+        if 'networks' in sections and host in self.last_network_update:
+            self.last_network_update[host] = now
+        if 'facts' in sections and host in self.last_facts_update:
+            self.last_facts_update[host] = now
+        if 'volume' in sections and host in self.last_device_update:
+            self.last_device_update[host] = now
+
     def update_daemon_config_deps(self, host: str, name: str, deps: List[str], stamp: datetime.datetime) -> None:
         self.daemon_config_deps[host][name] = {
             'deps': deps,
@@ -968,6 +1031,7 @@ class HostCache():
         Install an empty entry for a host
         """
         self.daemons[host] = {}
+        self._daemons_changed(host)
         self.devices[host] = []
         self.networks[host] = {}
         self.osdspec_previews[host] = []
@@ -1128,6 +1192,7 @@ class HostCache():
         # type: (str) -> None
         if host in self.daemons:
             del self.daemons[host]
+            self._daemons_changed(host)
         if host in self.devices:
             del self.devices[host]
         if host in self.facts:
@@ -1160,12 +1225,43 @@ class HostCache():
             del self.scheduled_daemon_actions[host]
         if host in self.last_client_files:
             del self.last_client_files[host]
+        if host in self.images:
+            del self.images[host]
         self.mgr.set_store(HOST_CACHE_PREFIX + host, None)
 
     def get_hosts(self):
         # type: () -> List[str]
         return list(self.daemons)
 
+    def update_host_image(self, host: str, image: str, digests: List[str]) -> None:
+        self.images.setdefault(host, {})[image] = (datetime_now(), digests)
+
+    def get_host_image(self, host: str, image: str,
+                       digests: Optional[List[str]] = None) -> Optional[List[str]]:
+        """
+        Returns the repo digests of the image if it is known to be on the
+        host, with one of the given digests if any. A daemon running from
+        one of the digests is as good as having seen the image. Without
+        digests to compare, an image referred to by tag is only known for
+        `image_tag_cache_timeout` seconds after it was last seen.
+        """
+        if is_repo_digest(image):
+            digests = (digests or []) + [image]
+        entry = self.images.get(host, {}).get(image)
+        if entry is not None:
+            seen, known = entry
+            if digests:
+                if any(d in digests for d in known):
+                    return known
+            elif seen >= datetime_now() - datetime.timedelta(
+                    seconds=self.mgr.image_tag_cache_timeout):
+                return known
+        if digests:
+            for dd in self.daemons.get(host, {}).values():
+                if any(d in digests for d in dd.container_image_digests or []):
+                    return dd.container_image_digests
+        return None
+
     def get_schedulable_hosts(self) -> List[HostSpec]:
         """
         Returns all usable hosts that went through _refresh_host_daemons().
@@ -1183,6 +1279,32 @@ class HostCache():
             )
         ]
 
+    def get_placement_hosts(self) -> PlacementHosts:
+        """
+        Returns the hosts of get_schedulable_hosts(), get_non_draining_hosts(),
+        get_draining_hosts() and get_unreachable_hosts() from a single pass
+        over the inventory, along with a digest of their state
+        """
+        schedulable: List[HostSpec] = []
+        non_draining: List[HostSpec] = []
+        draining: List[HostSpec] = []
+        unreachable: List[HostSpec] = []
+        state: List[Any] = []
+        for h in self.mgr.inventory.all_specs():
+            had_daemon_refresh = self.host_had_daemon_refresh(h.hostname)
+            offline = h.hostname in self.mgr.offline_hosts
+            if SpecialHostLabels.DRAIN_DAEMONS in h.labels:
+                draining.append(h)
+            else:
+                non_draining.append(h)
+                if had_daemon_refresh:
+                    schedulable.append(h)
+            if h.status.lower() in ['maintenance', 'offline'] or offline:
+                unreachable.append(h)
+            state.append([h.hostname, sorted(h.labels), h.status, had_daemon_refresh, offline])
+        digest = hashlib.sha256(json.dumps(state).encode('utf-8')).hexdigest()
+        return PlacementHosts(schedulable, non_draining, draining, unreachable, digest)
+
     def get_conf_keyring_available_hosts(self) -> List[HostSpec]:
         """
         Returns all hosts without the drain conf and keyrings
@@ -1321,12 +1443,45 @@ class HostCache():
         for host, dm in self.daemons.copy().items():
             yield host, {name: alter(host, d) for name, d in dm.items()}
 
+    def _daemons_changed(self, host: str) -> None:
+        with self._service_index_lock:
+            self._service_index_stale.add(host)
+
+    def _refresh_service_index(self) -> None:
+        if self._service_index_of is not self.daemons:
+            # the daemons were replaced wholesale
+            self._service_index = {}
+            self._service_index_services = {}
+            self._service_index_of = self.daemons
+            stale = set(self.daemons)
+        else:
+            stale = self._service_index_stale
+        self._service_index_stale = set()
+        for host in stale:
+            for service_name in self._service_index_services.pop(host, set()):
+                by_host = self._service_index[service_name]
+                by_host.pop(host, None)
+                if not by_host:
+                    del self._service_index[service_name]
+            services: Set[str] = set()
+            for dd in list(self.daemons.get(host, {}).values()):
+                service_name = dd.service_name()
+                self._service_index.setdefault(service_name, {}).setdefault(host, []).append(dd)
+                services.add(service_name)
+            if services:
+                self._service_index_services[host] = services
+
     def get_daemons_by_service(self, service_name):
         # type: (str) -> List[orchestrator.DaemonDescription]
         assert not service_name.startswith('keepalived.')
         assert not service_name.startswith('haproxy.')
 
-        return list(dd for dd in self._get_daemons() if dd.service_name() == service_name)
+        # the index is only rebuilt for the hosts whose daemons changed
+        with self._service_index_lock:
+            self._refresh_service_index()
+            by_host = self._service_index.get(service_name, {})
+            # in the order of the hosts
+            return [dd for host in list(self.daemons) if host in by_host for dd in by_host[host]]
 
     def get_related_service_daemons(self, service_spec: ServiceSpec) -> Optional[List[orchestrator.DaemonDescription]]:
         if service_spec.service_type == 'ingress':
@@ -1530,6 +1685,7 @@ class HostCache():
         # type: (str, orchestrator.DaemonDescription) -> None
         assert host in self.daemons
         self.daemons[host][dd.name()] = dd
+        self._daemons_changed(host)
 
     def rm_daemon(self, host: str, name: str) -> None:
         assert not name.startswith('ha-rgw.')
@@ -1537,6 +1693,7 @@ class HostCache():
         if host in self.daemons:
             if name in self.daemons[host]:
                 del self.daemons[host][name]
+                self._daemons_changed(host)
 
     def daemon_cache_filled(self) -> bool:
         """
@@ -1802,6 +1959,10 @@ class AgentCache():
         self.agent_keys = {}  # type: Dict[str, str]
         self.agent_ports = {}  # type: Dict[str, int]
         self.sending_agent_message = {}  # type: Dict[str, bool]
+        # hashes of the metadata sections most recently applied from each
+        # agent. Deliberately not persisted: after a failover the agents are
+        # asked for a full report
+        self.agent_section_hashes = {}  # type: Dict[str, Dict[str, str]]
 
     def load(self):
         # type: () -> None
@@ -1861,6 +2022,14 @@ class AgentCache():
                 self.agent_config_deps[host].get('last_config', None)
         return None, None
 
+    def unknown_sections(self, host: str, hashes: Dict[str, str]) -> List[str]:
+        """
+        Return the sections an agent reported by their hash for which we
+        did not apply the data with that hash.
+        """
+        known = self.agent_section_hashes.get(host, {})
+        return [section for section, h in hashes.items() if known.get(section) != h]
+
     def messaging_agent(self, host: str) -> bool:
         if host not in self.sending_agent_message or not self.sending_agent_message[host]:
             return False
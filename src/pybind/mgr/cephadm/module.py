@@ -95,6 +95,7 @@ from .utils import CEPH_IMAGE_TYPES, RESCHEDULE_FROM_OFFLINE_HOSTS_TYPES, forall
     cephadmNoImage, CEPH_UPGRADE_ORDER, SpecialHostLabels
 from .configchecks import CephadmConfigChecks
 from .offline_watcher import OfflineHostWatcher
+from .prefetch import ImagePrefetcher
 from .tuned_profiles import TunedProfileUtils
 from .ceph_volume import CephVolume
 
@@ -359,6 +360,13 @@ class CephadmOrchestrator(orchestrator.Orchestrator, MgrModule,
             default=False,
             desc='Use cephadm agent on each host to gather and send metadata'
         ),
+        Option(
+            'use_cephadm_executor',
+            type='bool',
+            default=True,
+            desc='Run cephadm commands through a long-lived cephadm process on each host, '
+                 'rather than starting a new cephadm process for every command'
+        ),
         Option(
             'agent_refresh_rate',
             type='secs',
@@ -389,6 +397,35 @@ class CephadmOrchestrator(orchestrator.Orchestrator, MgrModule,
             default=10,
             desc='max number of osds that will be drained simultaneously when osds are removed'
         ),
+        Option(
+            'upgrade_parallelism',
+            type='int',
+            default=16,
+            min=1,
+            desc='max number of daemons that are redeployed together in one step of an upgrade'
+        ),
+        Option(
+            'image_prefetch_concurrency',
+            type='int',
+            default=10,
+            min=1,
+            desc='max number of hosts that pull a container image at the same time when '
+                 'it is pulled ahead of deploying daemons'
+        ),
+        Option(
+            'image_prefetch_rate',
+            type='float',
+            default=0.0,
+            desc='max number of container image pulls started per second when images are '
+                 'pulled ahead of deploying daemons (0 for no limit)'
+        ),
+        Option(
+            'image_tag_cache_timeout',
+            type='secs',
+            default=10 * 60,
+            desc='seconds to trust that a host has an image referred to by tag, '
+                 'as the tag may be moved to another image meanwhile'
+        ),
         Option(
             'service_discovery_port',
             type='int',
@@ -455,6 +492,12 @@ class CephadmOrchestrator(orchestrator.Orchestrator, MgrModule,
         self._cluster_fsid: str = self.get('mon_map')['fsid']
         self.last_monmap: Optional[datetime.datetime] = None
 
+        # the client files (ceph.conf, keyrings) of each host, and what they
+        # were calculated from. See CephadmServe._write_all_client_files()
+        self.client_files: Dict[str, Dict[str, Tuple[int, int, int, bytes, str]]] = {}
+        self.client_files_inputs: Optional[str] = None
+        self.last_client_files_calc: Optional[datetime.datetime] = None
+
         # for serve()
         self.run = True
         self.event = Event()
@@ -523,6 +566,7 @@ class CephadmOrchestrator(orchestrator.Orchestrator, MgrModule,
             self.ssh_pub: Optional[str] = None
             self.ssh_cert: Optional[str] = None
             self.use_agent = False
+            self.use_cephadm_executor = True
             self.agent_refresh_rate = 0
             self.agent_down_multiplier = 0.0
             self.agent_starting_port = 0
@@ -531,6 +575,10 @@ class CephadmOrchestrator(orchestrator.Orchestrator, MgrModule,
             self.secure_monitoring_stack = False
             self.apply_spec_fails: List[Tuple[str, str]] = []
             self.max_osd_draining_count = 10
+            self.upgrade_parallelism = 16
+            self.image_prefetch_concurrency = 10
+            self.image_prefetch_rate = 0.0
+            self.image_tag_cache_timeout = 0
             self.device_enhanced_scan = False
             self.inventory_list_all = False
             self.cgroups_split = True
@@ -570,6 +618,8 @@ class CephadmOrchestrator(orchestrator.Orchestrator, MgrModule,
         self.cache = HostCache(self)
         self.cache.load()
 
+        self.image_prefetcher = ImagePrefetcher(self)
+
         self.node_proxy_cache = NodeProxyCache(self)
         self.node_proxy_cache.load()
 
@@ -2500,14 +2550,7 @@ Then run the following:
             return self._rotate_daemon_key(daemon_spec)
 
         if action == 'redeploy' or action == 'reconfig':
-            if daemon_spec.daemon_type != 'osd':
-                daemon_spec = service_registry.get_service(daemon_type_to_service(
-                    daemon_spec.daemon_type)).prepare_create(daemon_spec)
-            else:
-                # for OSDs, we still need to update config, just not carry out the full
-                # prepare_create function
-                daemon_spec.final_config, daemon_spec.deps = self.osd_service.generate_config(
-                    daemon_spec)
+            daemon_spec = self._prepare_daemon_redeploy(daemon_spec)
             with self.async_timeout_handler(daemon_spec.host, f'cephadm deploy ({daemon_spec.daemon_type} daemon)'):
                 return self.wait_async(
                     CephadmServe(self)._create_daemon(daemon_spec, reconfig=(action == 'reconfig')))
@@ -2531,6 +2574,16 @@ Then run the following:
         self.events.for_daemon(name, 'INFO', msg)
         return msg
 
+    def _prepare_daemon_redeploy(self, daemon_spec: CephadmDaemonDeploySpec) -> CephadmDaemonDeploySpec:
+        if daemon_spec.daemon_type != 'osd':
+            return service_registry.get_service(daemon_type_to_service(
+                daemon_spec.daemon_type)).prepare_create(daemon_spec)
+        # for OSDs, we still need to update config, just not carry out the full
+        # prepare_create function
+        daemon_spec.final_config, daemon_spec.deps = self.osd_service.generate_config(
+            daemon_spec)
+        return daemon_spec
+
     def _daemon_action_set_image(self, action: str, image: Optional[str], daemon_type: str, daemon_id: str) -> None:
         if image is not None:
             if action != 'redeploy':
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+
+from cephadm.serve import CephadmServe
+from orchestrator import OrchestratorError
+
+if TYPE_CHECKING:
+    from cephadm.module import CephadmOrchestrator
+
+logger = logging.getLogger(__name__)
+
+
+class ImagePrefetcher:
+    """
+    Pulls container images on hosts ahead of deploying daemons with them,
+    so that the pulls of many hosts overlap instead of each host pulling
+    when its daemons are deployed.
+
+    Pulls fan out to the hosts with at most `image_prefetch_concurrency`
+    hosts at a time and at most `image_prefetch_rate` pulls started per
+    second. The images known to be on a host are tracked in the HostCache,
+    hosts that already have an image are not asked to pull it again.
+    """
+
+    def __init__(self, mgr: "CephadmOrchestrator") -> None:
+        self.mgr = mgr
+        self._next_pull = 0.0
+
+    async def _throttle(self) -> None:
+        rate = self.mgr.image_prefetch_rate
+        if rate <= 0:
+            return
+        now = time.monotonic()
+        start = max(now, self._next_pull)
+        self._next_pull = start + 1.0 / rate
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def ensure_image(self, host: str, image: str,
+                           digests: Optional[List[str]] = None) -> List[str]:
+        """
+        Make sure the host has the image, with one of the given repo digests
+        if any, pulling it if needed. Returns the repo digests of the image
+        on the host, which may not be the given ones if pulling the image
+        got a different one.
+        """
+        known = self.mgr.cache.get_host_image(host, image, digests)
+        if known is not None:
+            return known
+
+        serve = CephadmServe(self.mgr)
+        out, err, code = await serve._run_cephadm(
+            host, '', 'inspect-image', [],
+            image=image, no_fsid=True, error_ok=True)
+        if not code:
+            found = json.loads(''.join(out)).get('repo_digests', [])
+            if not digests or any(d in digests for d in found):
+                self.mgr.cache.update_host_image(host, image, found)
+                return found
+
+        await serve._registry_login_if_needed(host)
+        pullargs: List[str] = []
+        if self.mgr.registry_insecure:
+            pullargs.append('--insecure')
+        await self._throttle()
+        logger.info(f'Pulling {image} on {host}')
+        out, err, code = await serve._run_cephadm(
+            host, '', 'pull', pullargs,
+            image=image, no_fsid=True, error_ok=True)
+        if code:
+            raise OrchestratorError(f'Failed to pull {image} on {host}: {err}')
+        found = json.loads(''.join(out)).get('repo_digests', [])
+        self.mgr.cache.update_host_image(host, image, found)
+        return found
+
+    async def prefetch(self, images: Dict[str, str],
+                       digests: Optional[List[str]] = None
+                       ) -> Dict[str, Union[List[str], Exception]]:
+        """
+        Make sure each host in `images` has its image. Returns the repo
+        digests of the image on each host, or the exception that prevented
+        that.
+        """
+        sem = asyncio.Semaphore(max(1, self.mgr.image_prefetch_concurrency))
+
+        async def _one(host: str, image: str) -> Union[List[str], Exception]:
+            async with sem:
+                try:
+                    return await self.ensure_image(host, image, digests)
+                except Exception as e:
+                    logger.debug(f'Unable to prefetch {image} on {host}: {e}')
+                    return e
+
+        hosts = list(images)
+        results = await asyncio.gather(*[_one(h, images[h]) for h in hosts])
+        return dict(zip(hosts, results))
+
+    def prefetch_wait(self, images: Dict[str, str],
+                      digests: Optional[List[str]] = None
+                      ) -> Dict[str, Union[List[str], Exception]]:
+        if not images:
+            return {}
+        with self.mgr.async_timeout_handler(cmd='cephadm pull (prefetch)'):
+            return self.mgr.wait_async(self.prefetch(images, digests))
@@ -138,6 +138,19 @@ class DaemonPlacement(NamedTuple):
         return rank_map[dd.rank][dd.rank_generation] == dd.daemon_id
 
 
+class PlacementHosts(NamedTuple):
+    """
+    The hosts daemons are placed on, gathered once for a whole pass over
+    the service specs, along with a digest of everything about them that
+    placement depends on.
+    """
+    schedulable: List[orchestrator.HostSpec]
+    non_draining: List[orchestrator.HostSpec]
+    draining: List[orchestrator.HostSpec]
+    unreachable: List[orchestrator.HostSpec]
+    digest: str
+
+
 class HostAssignment(object):
 
     def __init__(self,
@@ -160,6 +173,8 @@ class HostAssignment(object):
         self.hosts: List[orchestrator.HostSpec] = hosts
         self.unreachable_hosts: List[orchestrator.HostSpec] = unreachable_hosts
         self.draining_hosts: List[orchestrator.HostSpec] = draining_hosts
+        self.unreachable_hostnames = {h.hostname for h in unreachable_hosts}
+        self.draining_hostnames = {h.hostname for h in draining_hosts}
         self.filter_new_host = filter_new_host
         self.service_name = spec.service_name()
         self.daemons = daemons
@@ -240,8 +255,7 @@ class HostAssignment(object):
                     to_remove.append(dd)
             to_add += host_slots
 
-        to_remove = [d for d in to_remove if d.hostname not in [
-            h.hostname for h in self.unreachable_hosts]]
+        to_remove = [d for d in to_remove if d.hostname not in self.unreachable_hostnames]
 
         return slots, to_add, to_remove
 
@@ -306,10 +320,15 @@ class HostAssignment(object):
         to_remove: List[orchestrator.DaemonDescription] = []
         ranks: List[int] = list(range(len(candidates)))
         others: List[DaemonPlacement] = candidates.copy()
+        # a daemon can only match the slots on its own host
+        others_by_host: Dict[str, List[DaemonPlacement]] = {}
+        for p in others:
+            others_by_host.setdefault(p.hostname, []).append(p)
         for dd in daemons:
             found = False
-            for p in others:
+            for p in others_by_host.get(dd.hostname or '', []):
                 if p.matches_daemon(dd) and p.matches_rank_map(dd, self.rank_map, ranks):
+                    others_by_host[p.hostname].remove(p)
                     others.remove(p)
                     if dd.is_active:
                         existing_active.append(dd)
@@ -334,8 +353,7 @@ class HostAssignment(object):
 
         # build to_add
         if not count:
-            to_add = [dd for dd in others if dd.hostname not in [
-                h.hostname for h in self.unreachable_hosts]]
+            to_add = [dd for dd in others if dd.hostname not in self.unreachable_hostnames]
         else:
             # The number of new slots that need to be selected in order to fulfill count
             need = count - len(existing)
@@ -351,12 +369,12 @@ class HostAssignment(object):
                 # Note that we are only doing this over picking arbitrary hosts to satisfy
                 # the count. We are not breaking any deterministic placements in order to
                 # match the placement with a related service.
-                related_service_hosts = list(set(dd.hostname for dd in self.related_service_daemons))
+                related_service_hosts = set(dd.hostname for dd in self.related_service_daemons)
                 matching_dps = [dp for dp in others if dp.hostname in related_service_hosts]
                 for dp in matching_dps:
                     if need <= 0:
                         break
-                    if dp.hostname in related_service_hosts and dp.hostname not in [h.hostname for h in self.unreachable_hosts]:
+                    if dp.hostname in related_service_hosts and dp.hostname not in self.unreachable_hostnames:
                         logger.debug(f'Preferring {dp.hostname} for service {self.service_name} as related daemons have been placed there')
                         to_add.append(dp)
                         need -= 1  # this is last use of need so it can work as a counter
@@ -370,7 +388,7 @@ class HostAssignment(object):
             for dp in others:
                 if need <= 0:
                     break
-                if dp.hostname not in [h.hostname for h in self.unreachable_hosts]:
+                if dp.hostname not in self.unreachable_hostnames:
                     to_add.append(dp)
                     need -= 1  # this is last use of need in this function so it can work as a counter
 
@@ -407,7 +425,7 @@ class HostAssignment(object):
                 DaemonPlacement(daemon_type=self.primary_daemon_type,
                                 hostname=h.hostname, network=h.network, name=h.name,
                                 ports=self.ports_start)
-                for h in self.spec.placement.hosts if h.hostname not in [dh.hostname for dh in self.draining_hosts]
+                for h in self.spec.placement.hosts if h.hostname not in self.draining_hostnames
             ]
         elif self.spec.placement.label:
             ls = [
@@ -416,7 +434,8 @@ class HostAssignment(object):
                 for x in self.hosts_by_label(self.spec.placement.label)
             ]
             if self.spec.placement.host_pattern:
-                ls = [h for h in ls if h.hostname in self.spec.placement.filter_matching_hostspecs(self.hosts)]
+                pattern_hostnames = set(self.spec.placement.filter_matching_hostspecs(self.hosts))
+                ls = [h for h in ls if h.hostname in pattern_hostnames]
         elif self.spec.placement.host_pattern:
             ls = [
                 DaemonPlacement(daemon_type=self.primary_daemon_type,
@@ -479,7 +498,6 @@ class HostAssignment(object):
                 in_maintenance[h.hostname] = True
                 continue
             in_maintenance[h.hostname] = False
-        unreachable_hosts = [h.hostname for h in self.unreachable_hosts]
         candidates = [
-            c for c in candidates if c.hostname not in unreachable_hosts or in_maintenance[c.hostname]]
+            c for c in candidates if c.hostname not in self.unreachable_hostnames or in_maintenance[c.hostname]]
         return candidates
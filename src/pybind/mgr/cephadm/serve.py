@@ -1,4 +1,5 @@
 import ipaddress
+import datetime
 import hashlib
 import json
 import logging
@@ -25,10 +26,10 @@ import orchestrator
 from orchestrator import OrchestratorError, set_exception_subject, OrchestratorEvent, \
     DaemonDescriptionStatus, daemon_type_to_service
 from cephadm.services.cephadmservice import CephadmDaemonDeploySpec
-from cephadm.schedule import HostAssignment
+from cephadm.schedule import DaemonPlacement, HostAssignment, PlacementHosts
 from cephadm.autotune import MemoryAutotuner
 from cephadm.utils import forall_hosts, cephadmNoImage, is_repo_digest, \
-    CephadmNoImage, CEPH_TYPES, ContainerInspectInfo, SpecialHostLabels
+    CephadmNoImage, CEPH_TYPES, CEPH_IMAGE_TYPES, ContainerInspectInfo, SpecialHostLabels
 from mgr_module import MonCommandFailed
 from mgr_util import format_bytes, verify_tls, get_cert_issuer_info, ServerConfigException
 from cephadm.services.service_registry import service_registry
@@ -626,9 +627,10 @@ class CephadmServe:
         for name in ['CEPHADM_APPLY_SPEC_FAIL', 'CEPHADM_DAEMON_PLACE_FAIL']:
             self.mgr.remove_health_warning(name)
         self.mgr.apply_spec_fails = []
+        placement_hosts = self.mgr.cache.get_placement_hosts()
         for spec in specs:
             try:
-                if self._apply_service(spec):
+                if self._apply_service(spec, placement_hosts):
                     r = True
             except Exception as e:
                 msg = f'Failed to apply {spec.service_name()} spec {spec}: {str(e)}'
@@ -646,6 +648,26 @@ class CephadmServe:
         self.mgr.tuned_profile_utils._write_all_tuned_profiles()
         return r
 
+    def _prefetch_images(self, spec: ServiceSpec, slots: List[DaemonPlacement]) -> None:
+        images: Dict[str, str] = {}
+        for slot in slots:
+            if slot.daemon_type not in CEPH_IMAGE_TYPES or slot.hostname in images:
+                continue
+            # the id of most new daemons is only picked when they are
+            # deployed, their image is then the one configured for the service
+            if slot.name:
+                image = self.mgr._get_container_image(f'{slot.daemon_type}.{slot.name}')
+            else:
+                image = self.mgr._get_container_image(spec.service_name())
+            if image:
+                images[slot.hostname] = image
+        if len(images) < 2:
+            return
+        try:
+            self.mgr.image_prefetcher.prefetch_wait(images)
+        except OrchestratorError as e:
+            self.log.info(f'Failed to pull images ahead of deploying daemons: {e}')
+
     def _apply_service_config(self, spec: ServiceSpec) -> None:
         if spec.config:
             section = utils.name_to_config_section(spec.service_name())
@@ -718,10 +740,39 @@ class CephadmServe:
         else:
             self.mgr.remove_health_warning('CEPHADM_RGW')
 
-    def _apply_service(self, spec: ServiceSpec) -> bool:
+    def _placement_inputs(self,
+                          spec: ServiceSpec,
+                          placement_hosts: PlacementHosts,
+                          daemons: List[orchestrator.DaemonDescription],
+                          related_service_daemons: Optional[List[orchestrator.DaemonDescription]],
+                          public_networks: List[str],
+                          host_filtered: bool) -> str:
+        """
+        Digest of everything the placement of a service depends on
+        """
+        inputs: List[Any] = [
+            placement_hosts.digest,
+            spec.to_json(),
+            spec.get_port_start(),
+            [(d.name(), d.hostname, d.daemon_type, d.ports, d.ip, d.rank,
+              d.rank_generation, d.is_active) for d in daemons],
+            [(d.name(), d.hostname) for d in related_service_daemons or []],
+            public_networks,
+        ]
+        if spec.networks or host_filtered:
+            inputs.append(self.mgr.cache.networks)
+        return hashlib.sha256(
+            json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _apply_service(self, spec: ServiceSpec,
+                       placement_hosts: Optional[PlacementHosts] = None) -> bool:
         """
         Schedule a service.  Deploy new daemons or remove old ones, depending
         on the target label and count specified in the placement.
+
+        The placement of a service is only recomputed when its inputs changed
+        since its last placement, or that placement left daemons to add or
+        remove.
         """
         self.mgr.migration.verify_no_migration()
 
@@ -818,12 +869,14 @@ class CephadmServe:
         rank_map = None
         if svc.ranked(spec):
             rank_map = self.mgr.spec_store[spec.service_name()].rank_map or {}
+        if placement_hosts is None:
+            placement_hosts = self.mgr.cache.get_placement_hosts()
         ha = HostAssignment(
             spec=spec,
-            hosts=self.mgr.cache.get_non_draining_hosts() if spec.service_name(
-            ) == 'agent' else self.mgr.cache.get_schedulable_hosts(),
-            unreachable_hosts=self.mgr.cache.get_unreachable_hosts(),
-            draining_hosts=self.mgr.cache.get_draining_hosts(),
+            hosts=placement_hosts.non_draining if spec.service_name(
+            ) == 'agent' else placement_hosts.schedulable,
+            unreachable_hosts=placement_hosts.unreachable,
+            draining_hosts=placement_hosts.draining,
             daemons=daemons,
             related_service_daemons=related_service_daemons,
             networks=self.mgr.cache.networks,
@@ -834,11 +887,30 @@ class CephadmServe:
             rank_map=rank_map,
         )
 
+        # ranked services update their rank_map on every pass, never reuse
+        # their placement
+        inputs = None
+        if rank_map is None:
+            inputs = self._placement_inputs(spec, placement_hosts, daemons,
+                                            related_service_daemons, public_networks,
+                                            service_type in host_filters)
+        memo = self.mgr.spec_store.get_placement(service_name, inputs) if inputs else None
+
+        slots_to_add: List[DaemonPlacement]
+        daemons_to_remove: List[orchestrator.DaemonDescription]
         try:
-            all_slots, slots_to_add, daemons_to_remove = ha.place()
+            if memo is not None:
+                self.log.debug('Placement inputs of %s unchanged, skipping placement' % service_name)
+                all_slots, slots_to_add, daemons_to_remove = memo, [], []
+            else:
+                all_slots, slots_to_add, daemons_to_remove = ha.place()
             daemons_to_remove = [d for d in daemons_to_remove if (d.hostname and self.mgr.inventory._inventory[d.hostname].get(
                 'status', '').lower() not in ['maintenance', 'offline'] and d.hostname not in self.mgr.offline_hosts)]
             self.log.debug('Add %s, remove %s' % (slots_to_add, daemons_to_remove))
+            if inputs and not slots_to_add and not daemons_to_remove:
+                self.mgr.spec_store.save_placement(service_name, inputs, all_slots)
+            else:
+                self.mgr.spec_store.forget_placement(service_name)
         except OrchestratorError as e:
             msg = f'Failed to apply {spec.service_name()} spec {spec}: {str(e)}'
             self.log.error(msg)
@@ -922,6 +994,10 @@ class CephadmServe:
                 # fence them
                 svc.fence_old_ranks(spec, rank_map, len(all_slots))
 
+            # pull the images of the new daemons on all of their hosts at
+            # once, rather than on each host as its daemons are deployed
+            self._prefetch_images(spec, slots_to_add)
+
             # create daemons
             daemon_place_fails = []
             for slot in slots_to_add:
@@ -1246,23 +1322,36 @@ class CephadmServe:
         config = self.mgr.get_minimal_ceph_conf().encode('utf-8')
         config_digest = ''.join('%02x' % c for c in hashlib.sha256(config).digest())
         cluster_cfg_dir = f'/var/lib/ceph/{self.mgr._cluster_fsid}/config'
-
-        if self.mgr.manage_etc_ceph_ceph_conf:
-            try:
-                pspec = PlacementSpec.from_string(self.mgr.manage_etc_ceph_ceph_conf_hosts)
+        # the same file, shared by all hosts that get it
+        ceph_conf = (0o644, 0, 0, bytes(config), str(config_digest))
+
+        available_hosts = self.mgr.cache.get_conf_keyring_available_hosts()
+        unreachable_hosts = self.mgr.cache.get_unreachable_hosts()
+        draining_hosts = self.mgr.cache.get_conf_keyring_draining_hosts()
+        # placement -> hosts, keyrings often share the same placement
+        placed: Dict[str, Set[str]] = {}
+
+        def _place(placement: PlacementSpec) -> Set[str]:
+            key = json.dumps(placement.to_json(), sort_keys=True)
+            if key not in placed:
                 ha = HostAssignment(
-                    spec=ServiceSpec('mon', placement=pspec),
-                    hosts=self.mgr.cache.get_conf_keyring_available_hosts(),
-                    unreachable_hosts=self.mgr.cache.get_unreachable_hosts(),
-                    draining_hosts=self.mgr.cache.get_conf_keyring_draining_hosts(),
+                    spec=ServiceSpec('mon', placement=placement),
+                    hosts=available_hosts,
+                    unreachable_hosts=unreachable_hosts,
+                    draining_hosts=draining_hosts,
                     daemons=[],
                     networks=self.mgr.cache.networks,
                 )
                 all_slots, _, _ = ha.place()
-                for host in {s.hostname for s in all_slots}:
+                placed[key] = {s.hostname for s in all_slots}
+            return placed[key]
+
+        if self.mgr.manage_etc_ceph_ceph_conf:
+            try:
+                pspec = PlacementSpec.from_string(self.mgr.manage_etc_ceph_ceph_conf_hosts)
+                for host in _place(pspec):
                     if host not in client_files:
                         client_files[host] = {}
-                    ceph_conf = (0o644, 0, 0, bytes(config), str(config_digest))
                     client_files[host]['/etc/ceph/ceph.conf'] = ceph_conf
                     client_files[host][f'{cluster_cfg_dir}/ceph.conf'] = ceph_conf
             except Exception as e:
@@ -1281,23 +1370,13 @@ class CephadmServe:
                     continue
                 digest = ''.join('%02x' % c for c in hashlib.sha256(
                     keyring.encode('utf-8')).digest())
-                ha = HostAssignment(
-                    spec=ServiceSpec('mon', placement=ks.placement),
-                    hosts=self.mgr.cache.get_conf_keyring_available_hosts(),
-                    unreachable_hosts=self.mgr.cache.get_unreachable_hosts(),
-                    draining_hosts=self.mgr.cache.get_conf_keyring_draining_hosts(),
-                    daemons=[],
-                    networks=self.mgr.cache.networks,
-                )
-                all_slots, _, _ = ha.place()
-                for host in {s.hostname for s in all_slots}:
+                client_key = (ks.mode, ks.uid, ks.gid, keyring.encode('utf-8'), digest)
+                for host in _place(ks.placement):
                     if host not in client_files:
                         client_files[host] = {}
-                    ceph_conf = (0o644, 0, 0, bytes(config), str(config_digest))
                     if ks.include_ceph_conf:
                         client_files[host]['/etc/ceph/ceph.conf'] = ceph_conf
                         client_files[host][f'{cluster_cfg_dir}/ceph.conf'] = ceph_conf
-                    client_key = (ks.mode, ks.uid, ks.gid, keyring.encode('utf-8'), digest)
                     client_files[host][ks.path] = client_key
                     client_files[host][f'{cluster_cfg_dir}/{os.path.basename(ks.path)}'] = client_key
             except Exception as e:
@@ -1305,17 +1384,71 @@ class CephadmServe:
                     f'unable to calc client keyring {ks.entity} placement {ks.placement}: {e}')
         return client_files
 
+    def _client_files_inputs(self) -> str:
+        """
+        Digest of what the client files depend on, apart from the contents
+        of the keyrings and of the minimal ceph.conf. Those change along
+        with the keyring specs, the mon map or the extra ceph.conf, or are
+        fetched again every daemon_cache_timeout.
+        """
+        extra_conf = self.mgr.extra_ceph_conf()
+        inputs = [
+            self.mgr.manage_etc_ceph_ceph_conf,
+            self.mgr.manage_etc_ceph_ceph_conf_hosts,
+            [ks.to_json() for ks in self.mgr.keys.keys.values()],
+            [(h.hostname, sorted(h.labels), h.status, self.mgr.cache.host_had_daemon_refresh(h.hostname))
+             for h in self.mgr.inventory.all_specs()],
+            sorted(self.mgr.offline_hosts),
+            self.mgr.last_monmap,
+            extra_conf.conf,
+            extra_conf.last_modified,
+        ]
+        return hashlib.sha256(json.dumps(inputs, default=str).encode('utf-8')).hexdigest()
+
+    def _client_files_differ(self,
+                             files: Dict[str, Tuple[int, int, int, bytes, str]],
+                             host: str) -> bool:
+        old_files = self.mgr.cache.get_host_client_files(host)
+        for path, (mode, uid, gid, _, digest) in files.items():
+            if old_files.get(path) != (digest, mode, uid, gid):
+                return True
+        return any(path not in files and path != '/etc/ceph/ceph.conf' for path in old_files)
+
     def _write_all_client_files(self) -> None:
-        if self.mgr.manage_etc_ceph_ceph_conf or self.mgr.keys.keys:
-            client_files = self._calc_client_files()
-        else:
-            client_files = {}
+        """
+        Write the client files that are not what they should be. They are
+        only calculated again when their inputs changed or their contents
+        are due to be fetched again, and only the hosts whose files differ
+        are written to.
+        """
+        inputs = self._client_files_inputs()
+        cutoff = datetime_now() - datetime.timedelta(seconds=self.mgr.daemon_cache_timeout)
+        if (
+            inputs != self.mgr.client_files_inputs
+            or self.mgr.last_client_files_calc is None
+            or self.mgr.last_client_files_calc < cutoff
+        ):
+            if self.mgr.manage_etc_ceph_ceph_conf or self.mgr.keys.keys:
+                self.mgr.client_files = self._calc_client_files()
+            else:
+                self.mgr.client_files = {}
+            self.mgr.client_files_inputs = inputs
+            self.mgr.last_client_files_calc = datetime_now()
+        client_files = self.mgr.client_files
+
+        hosts = [
+            h for h in self.mgr.cache.get_hosts()
+            if not self.mgr.cache.is_host_unreachable(h)
+            and self._client_files_differ(client_files.get(h, {}), h)
+        ]
+        if not hosts:
+            return
 
         @forall_hosts
         def _write_files(host: str) -> None:
             self._write_client_files(client_files, host)
 
-        _write_files(self.mgr.cache.get_hosts())
+        _write_files(hosts)
 
     def _write_client_files(self,
                             client_files: Dict[str, Dict[str, Tuple[int, int, int, bytes, str]]],
@@ -1402,8 +1535,7 @@ class CephadmServe:
                         daemon_spec.final_config.update(
                             {'custom_config_files': [c.to_json() for c in configs]})
 
-                if self.mgr.cache.host_needs_registry_login(daemon_spec.host) and self.mgr.registry_url:
-                    await self._registry_login(daemon_spec.host, json.loads(str(self.mgr.get_store('registry_credentials'))))
+                await self._registry_login_if_needed(daemon_spec.host)
 
                 self.log.info('%s daemon %s on %s' % (
                     'Reconfiguring' if reconfig else 'Deploying',
@@ -1715,12 +1847,15 @@ class CephadmServe:
             if stdin and 'agent' not in str(entity):
                 self.log.debug('stdin: %s' % stdin)
 
-            cmd = ssh.RemoteCommand(WHICH, ['python3'])
-            try:
-                # when connection was broken/closed, retrying resets the connection
-                python = await self.mgr.ssh._check_execute_command(host, cmd, addr=addr)
-            except ssh.HostConnectionError:
-                python = await self.mgr.ssh._check_execute_command(host, cmd, addr=addr)
+            python = self.mgr.ssh.python_paths.get(host)
+            if not python:
+                cmd = ssh.RemoteCommand(WHICH, ['python3'])
+                try:
+                    # when connection was broken/closed, retrying resets the connection
+                    python = await self.mgr.ssh._check_execute_command(host, cmd, addr=addr)
+                except ssh.HostConnectionError:
+                    python = await self.mgr.ssh._check_execute_command(host, cmd, addr=addr)
+                self.mgr.ssh.python_paths[host] = python
 
             # N.B. because the python3 executable is based on the results of the
             # which command we can not know it ahead of time and must be converted
@@ -1731,8 +1866,18 @@ class CephadmServe:
             )
 
             try:
-                out, err, code = await self.mgr.ssh._execute_command(
-                    host, cmd, stdin=stdin, addr=addr)
+                result = None
+                if self.mgr.use_cephadm_executor:
+                    executor_cmd = ssh.RemoteCommand(
+                        ssh.RemoteExecutable(python),
+                        [self.mgr.cephadm_binary_path, 'executor']
+                    )
+                    result = await self.mgr.ssh._execute_in_executor(
+                        host, executor_cmd, final_args, stdin=stdin, addr=addr)
+                if result is None:
+                    result = await self.mgr.ssh._execute_command(
+                        host, cmd, stdin=stdin, addr=addr)
+                out, err, code = result
                 if code == 2:
                     ls_cmd = ssh.RemoteCommand(
                         ssh.Executables.LS,
@@ -1742,6 +1887,9 @@ class CephadmServe:
                                                                                   log_command=log_output)
                     if code_ls == 2:
                         await self._deploy_cephadm_binary(host, addr)
+                        # any executor on the host is running a binary that
+                        # no longer exists
+                        self.mgr.ssh._forget_host(host)
                         out, err, code = await self.mgr.ssh._execute_command(
                             host, cmd, stdin=stdin, addr=addr)
                         # if there is an agent on this host, make sure it is using the most recent
@@ -1788,8 +1936,7 @@ class CephadmServe:
             break
         if not host:
             raise OrchestratorError('no hosts defined')
-        if self.mgr.cache.host_needs_registry_login(host) and self.mgr.registry_url:
-            await self._registry_login(host, json.loads(str(self.mgr.get_store('registry_credentials'))))
+        await self._registry_login_if_needed(host)
 
         j = None
         if not self.mgr.use_repo_digest:
@@ -1807,6 +1954,7 @@ class CephadmServe:
 
             j = await self._run_cephadm_json(host, '', 'pull', pullargs,
                                              image=image_name, no_fsid=True)
+        self.mgr.cache.update_host_image(host, image_name, j.get('repo_digests') or [])
         r = ContainerInspectInfo(
             j['image_id'],
             j.get('ceph_version'),
@@ -1815,6 +1963,10 @@ class CephadmServe:
         self.log.debug(f'image {image_name} -> {r}')
         return r
 
+    async def _registry_login_if_needed(self, host: str) -> None:
+        if self.mgr.cache.host_needs_registry_login(host) and self.mgr.registry_url:
+            await self._registry_login(host, json.loads(str(self.mgr.get_store('registry_credentials'))))
+
     # function responsible for logging single host into custom registry
     async def _registry_login(self, host: str, registry_json: Dict[str, str]) -> Optional[str]:
         self.log.debug(
@@ -11,6 +11,8 @@ from shlex import quote
 from typing import TYPE_CHECKING, Optional, List, Tuple, Dict, Iterator, TypeVar, Awaitable, Union
 from orchestrator import OrchestratorError
 
+from cephadm.executor import CephadmExecutor
+
 try:
     import asyncssh
 except ImportError:
@@ -145,6 +147,12 @@ class SSHManager:
     def __init__(self, mgr: "CephadmOrchestrator"):
         self.mgr: "CephadmOrchestrator" = mgr
         self.cons: Dict[str, "SSHClientConnection"] = {}
+        # the python3 interpreter found on each connected host
+        self.python_paths: Dict[str, str] = {}
+        self.executors: Dict[str, CephadmExecutor] = {}
+        # the executor commands that failed to start, by host
+        self.failed_executors: Dict[str, RemoteCommand] = {}
+        self._executor_locks: Dict[str, asyncio.Lock] = {}
 
     async def _remote_connection(self,
                                  host: str,
@@ -378,7 +386,56 @@ class SSHManager:
             self.mgr.wait_async(self._write_remote_file(
                 host, path, content, mode, uid, gid, addr))
 
+    async def _execute_in_executor(self,
+                                   host: str,
+                                   executor_cmd: RemoteCommand,
+                                   args: List[str],
+                                   stdin: Optional[str] = None,
+                                   addr: Optional[str] = None,
+                                   ) -> Optional[Tuple[str, str, int]]:
+        """
+        Run a cephadm command, `args`, on the long-lived cephadm executor of
+        the host, starting the executor with `executor_cmd` if needed.
+
+        Returns None if no executor could be started on the host.
+        """
+        lock = self._executor_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            executor = self.executors.get(host)
+            if executor is None or not executor.running or executor.cmd != executor_cmd:
+                self._close_executor(host)
+                if self.failed_executors.get(host) == executor_cmd:
+                    return None
+                conn = await self._remote_connection(host, addr)
+                use_sudo = (self.mgr.ssh_user != 'root')
+                rcmd = RemoteSudoCommand.wrap(executor_cmd, use_sudo=use_sudo)
+                logger.debug(f'Starting cephadm executor: {rcmd}')
+                executor = CephadmExecutor(host, executor_cmd)
+                try:
+                    await executor.start(conn, str(rcmd))
+                except Exception as e:
+                    logger.info(f'Unable to start cephadm executor on {host}, '
+                                f'running commands one at a time: {e}')
+                    executor.close()
+                    self.failed_executors[host] = executor_cmd
+                    return None
+                self.executors[host] = executor
+        return await executor.run(args, stdin)
+
+    def _close_executor(self, host: str) -> None:
+        executor = self.executors.pop(host, None)
+        if executor:
+            logger.debug(f'closing cephadm executor on {host}')
+            executor.close()
+
+    def _forget_host(self, host: str) -> None:
+        """Forget what we learned about the host over its connection."""
+        self._close_executor(host)
+        self.failed_executors.pop(host, None)
+        self.python_paths.pop(host, None)
+
     async def _reset_con(self, host: str) -> None:
+        self._forget_host(host)
         conn = self.cons.get(host)
         if conn:
             logger.debug(f'_reset_con close {host}')
@@ -390,6 +447,10 @@ class SSHManager:
             self.mgr.wait_async(self._reset_con(host))
 
     def _reset_cons(self) -> None:
+        for host in list(self.executors):
+            self._forget_host(host)
+        self.failed_executors = {}
+        self.python_paths = {}
         for host, conn in self.cons.items():
             logger.debug(f'_reset_cons close {host}')
             conn.close()
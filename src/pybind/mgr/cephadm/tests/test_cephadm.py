@@ -1,4 +1,5 @@
 import asyncio
+import datetime
 import json
 import logging
 
@@ -2387,6 +2388,46 @@ class TestCephadm(object):
         assert '/etc/ceph/ceph.keyring1.keyring' in client_files['host1']
         assert '/etc/ceph/ceph.conf' not in client_files['host1']
 
+    @mock.patch("cephadm.ssh.SSHManager.write_remote_file")
+    @mock.patch('cephadm.CephadmOrchestrator.mon_command')
+    def test_write_client_files_only_on_change(self, _mon_command, _write_file, cephadm_module):
+        _mon_command.return_value = (0, 'my-keyring', '')
+        cephadm_module.keys.update(ClientKeyringSpec('keyring1', PlacementSpec(label='keyring1'),
+                                                     include_ceph_conf=False))
+        cephadm_module.inventory.add_host(HostSpec('host1', '1.2.3.1', labels=['keyring1']))
+        cephadm_module.inventory.add_host(HostSpec('host2', '1.2.3.2'))
+        cephadm_module.cache.update_host_daemons('host1', {})
+        cephadm_module.cache.update_host_daemons('host2', {})
+
+        def auth_gets():
+            return [c for c in _mon_command.call_args_list if c.args[0]['prefix'] == 'auth get']
+
+        CephadmServe(cephadm_module)._write_all_client_files()
+        assert {c.args[0] for c in _write_file.call_args_list} == {'host1'}
+        assert len(auth_gets()) == 1
+
+        # nothing changed: nothing is fetched nor written
+        _write_file.reset_mock()
+        _mon_command.reset_mock()
+        CephadmServe(cephadm_module)._write_all_client_files()
+        _mon_command.assert_not_called()
+        _write_file.assert_not_called()
+
+        # a new label only writes to the host that got it
+        cephadm_module.inventory.add_label('host2', 'keyring1')
+        CephadmServe(cephadm_module)._write_all_client_files()
+        assert len(auth_gets()) == 1
+        assert {c.args[0] for c in _write_file.call_args_list} == {'host2'}
+
+        # the keyrings are fetched again once in a while
+        _write_file.reset_mock()
+        _mon_command.reset_mock()
+        cephadm_module.last_client_files_calc -= datetime.timedelta(
+            seconds=cephadm_module.daemon_cache_timeout + 1)
+        CephadmServe(cephadm_module)._write_all_client_files()
+        assert len(auth_gets()) == 1
+        _write_file.assert_not_called()
+
     def test_etc_ceph_init(self):
         with with_cephadm_module({'manage_etc_ceph_ceph_conf': True}) as m:
             assert m.manage_etc_ceph_ceph_conf is True
@@ -3044,3 +3085,114 @@ Traceback (most recent call last):
             assert osd.cpu_percentage == '6.54%'
             assert osd.memory_usage == 73410805
             assert osd.created == str_to_datetime('2023-09-22T22:41:03.615080Z')
+
+    @mock.patch("cephadm.serve.CephadmServe._run_cephadm", _run_cephadm('[]'))
+    def test_agent_metadata_deltas(self, cephadm_module):
+        from cephadm.agent import HostData
+
+        with with_host(cephadm_module, 'test'):
+            with mock.patch.object(HostData, 'subscribe'):
+                host_data = HostData(cephadm_module, 7150, '0.0.0.0')
+            cephadm_module.agent_cache.agent_counter['test'] = 1
+            ls = [{
+                'style': 'cephadm:v1',
+                'fsid': cephadm_module._cluster_fsid,
+                'name': 'mon.test',
+                'state': 'running',
+            }]
+            hashes = {'ls': 'a', 'networks': 'b', 'facts': 'c', 'volume': 'd'}
+            report = {
+                'host': 'test',
+                'port': '7777',
+                'ack': '1',
+                'hashes': hashes,
+                'ls': ls,
+                'networks': {'10.0.0.0/8': {'eth0': ['10.1.2.3']}},
+                'facts': json.dumps({'hostname': 'test'}),
+                'volume': '[]',
+            }
+            with mock.patch.object(cephadm_module.cache, 'save_host') as _save_host:
+                host_data.handle_metadata(report)
+                _save_host.assert_called_with('test')
+                assert cephadm_module.agent_cache.agent_section_hashes['test'] == hashes
+                assert cephadm_module.agent_cache.unknown_sections('test', hashes) == []
+
+                # unchanged sections are only reported by their hash
+                cephadm_module.cache.metadata_up_to_date['test'] = False
+                _save_host.reset_mock()
+                host_data.handle_metadata({
+                    'host': 'test',
+                    'port': '7777',
+                    'ack': '1',
+                    'hashes': dict(hashes, facts='e'),
+                    'facts': json.dumps({'hostname': 'test', 'new': 'fact'}),
+                })
+                _save_host.assert_not_called()
+                assert cephadm_module.cache.facts['test']['new'] == 'fact'
+                assert 'mon.test' in cephadm_module.cache.daemons['test']
+                assert cephadm_module.cache.metadata_up_to_date['test']
+
+            # after a failover the unchanged sections are unknown
+            cephadm_module.agent_cache.agent_section_hashes = {}
+            assert cephadm_module.agent_cache.unknown_sections('test', hashes) == [
+                'ls', 'networks', 'facts', 'volume']
+
+    @mock.patch("cephadm.serve.CephadmServe._run_cephadm", _run_cephadm('[]'))
+    def test_agent_delta_report_complete(self, cephadm_module):
+        from cephadm.agent import HostData
+
+        with with_host(cephadm_module, 'test'):
+            with mock.patch.object(HostData, 'subscribe'):
+                host_data = HostData(cephadm_module, 7150, '0.0.0.0')
+            cephadm_module.agent_cache.agent_keys['test'] = 'key'
+            report = {
+                'host': 'test',
+                'keyring': 'key',
+                'port': '7777',
+                'ack': '1',
+                'hashes': {'ls': 'a', 'networks': 'b', 'facts': 'c', 'volume': 'd'},
+                'facts': '{}',
+            }
+            with mock.patch.object(cephadm_module.log, 'warning') as _warning:
+                host_data.check_request_fields(report)
+                _warning.assert_not_called()
+
+                del report['hashes']['volume']
+                host_data.check_request_fields(report)
+                _warning.assert_called_once()
+
+    @mock.patch("cephadm.serve.CephadmServe._run_cephadm", _run_cephadm('{}'))
+    def test_apply_service_reuses_placement(self, cephadm_module: CephadmOrchestrator):
+        from cephadm.schedule import HostAssignment
+
+        spec = ServiceSpec('crash', placement=PlacementSpec(label='foo'))
+        with with_host(cephadm_module, 'host1'), with_host(cephadm_module, 'host2'):
+            cephadm_module.inventory.add_label('host1', 'foo')
+            with with_service(cephadm_module, spec):
+                with mock.patch.object(HostAssignment, 'place', autospec=True,
+                                       side_effect=HostAssignment.place) as _place:
+                    # nothing changed since the placement that deployed the daemon
+                    CephadmServe(cephadm_module)._apply_all_services()
+                    CephadmServe(cephadm_module)._apply_all_services()
+                    assert _place.call_count == 1
+                    assert [d.hostname for d in
+                            cephadm_module.cache.get_daemons_by_service('crash')] == ['host1']
+
+                    cephadm_module.inventory.add_label('host2', 'foo')
+                    CephadmServe(cephadm_module)._apply_all_services()
+                    assert _place.call_count == 2
+                    assert sorted(d.hostname for d in
+                                  cephadm_module.cache.get_daemons_by_service('crash')) == ['host1', 'host2']
+
+    @mock.patch("cephadm.serve.CephadmServe._run_cephadm", _run_cephadm('[]'))
+    def test_daemons_by_service_index(self, cephadm_module: CephadmOrchestrator):
+        with with_host(cephadm_module, 'host1'), with_host(cephadm_module, 'host2'):
+            dd1 = DaemonDescription('mds', 'a.host1.x', 'host1', service_name='mds.a')
+            dd2 = DaemonDescription('mds', 'a.host2.y', 'host2', service_name='mds.a')
+            cephadm_module.cache.add_daemon('host2', dd2)
+            assert cephadm_module.cache.get_daemons_by_service('mds.a') == [dd2]
+            cephadm_module.cache.add_daemon('host1', dd1)
+            assert cephadm_module.cache.get_daemons_by_service('mds.a') == [dd1, dd2]
+            cephadm_module.cache.rm_daemon('host2', dd2.name())
+            assert cephadm_module.cache.get_daemons_by_service('mds.a') == [dd1]
+            assert cephadm_module.cache.get_daemons_by_service('mds.b') == []
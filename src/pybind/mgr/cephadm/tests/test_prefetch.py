@@ -0,0 +1,124 @@
+import asyncio
+import datetime
+import json
+from unittest import mock
+
+from ceph.deployment.service_spec import RGWSpec, ServiceSpec
+from cephadm import CephadmOrchestrator
+from cephadm.schedule import DaemonPlacement
+from cephadm.serve import CephadmServe
+from orchestrator import DaemonDescription, OrchestratorError
+
+
+def _fake_run_cephadm(present, calls, running=None):
+    async def _run_cephadm(host, entity, command, args, **kwargs):
+        calls.append((host, command))
+        if running is not None:
+            running.append(host)
+            await asyncio.sleep(0)
+            assert len(running) == 1
+            running.remove(host)
+        if command == 'inspect-image':
+            if host in present:
+                return [json.dumps({'repo_digests': ['image@old']})], '', 0
+            return [''], 'no such image', 1
+        if host == 'bad':
+            return [''], 'pull failed', 1
+        return [json.dumps({'repo_digests': ['image@new']})], '', 0
+    return _run_cephadm
+
+
+def test_prefetch(cephadm_module: CephadmOrchestrator):
+    calls = []
+    cephadm_module.cache.update_host_image('cached', 'image', ['image@new'])
+    with mock.patch("cephadm.serve.CephadmServe._run_cephadm",
+                    side_effect=_fake_run_cephadm(['present'], calls)):
+        results = cephadm_module.image_prefetcher.prefetch_wait({
+            'cached': 'image',
+            'present': 'image',
+            'missing': 'image',
+            'bad': 'image',
+        })
+    assert results['cached'] == ['image@new']
+    assert results['present'] == ['image@old']
+    assert results['missing'] == ['image@new']
+    assert isinstance(results['bad'], OrchestratorError)
+    assert sorted(calls) == [
+        ('bad', 'inspect-image'), ('bad', 'pull'),
+        ('missing', 'inspect-image'), ('missing', 'pull'),
+        ('present', 'inspect-image'),
+    ]
+    assert cephadm_module.cache.get_host_image('missing', 'image') == ['image@new']
+    assert cephadm_module.cache.get_host_image('bad', 'image') is None
+
+    # a host with another digest pulls the requested one
+    calls.clear()
+    with mock.patch("cephadm.serve.CephadmServe._run_cephadm",
+                    side_effect=_fake_run_cephadm(['present'], calls)):
+        results = cephadm_module.image_prefetcher.prefetch_wait(
+            {'present': 'image', 'missing': 'image'}, ['image@new'])
+    assert results == {'present': ['image@new'], 'missing': ['image@new']}
+    assert calls == [('present', 'inspect-image'), ('present', 'pull')]
+
+
+def test_prefetch_concurrency(cephadm_module: CephadmOrchestrator):
+    calls = []
+    cephadm_module.image_prefetch_concurrency = 1
+    with mock.patch("cephadm.serve.CephadmServe._run_cephadm",
+                    side_effect=_fake_run_cephadm([], calls, running=[])):
+        results = cephadm_module.image_prefetcher.prefetch_wait(
+            {f'host{i}': 'image' for i in range(4)})
+    assert all(r == ['image@new'] for r in results.values())
+    assert len(calls) == 8
+
+
+def test_host_image_from_daemons(cephadm_module: CephadmOrchestrator):
+    cephadm_module.cache.update_host_daemons('host1', {
+        'osd.1': DaemonDescription('osd', '1', 'host1',
+                                   container_image_digests=['image@digest']),
+    })
+    assert cephadm_module.cache.get_host_image('host1', 'image') is None
+    assert cephadm_module.cache.get_host_image('host1', 'image', ['image@digest']) == ['image@digest']
+    assert cephadm_module.cache.get_host_image('host1', 'image@digest') == ['image@digest']
+    assert cephadm_module.cache.get_host_image('host1', 'image@other') is None
+
+
+def test_host_image_tag_expires(cephadm_module: CephadmOrchestrator):
+    cephadm_module.cache.update_host_image('host1', 'image:tag', ['image@digest'])
+    cephadm_module.cache.update_host_image('host1', 'image@digest', ['image@digest'])
+    assert cephadm_module.cache.get_host_image('host1', 'image:tag') == ['image@digest']
+    for image, (seen, digests) in cephadm_module.cache.images['host1'].items():
+        cephadm_module.cache.images['host1'][image] = (
+            seen - datetime.timedelta(seconds=cephadm_module.image_tag_cache_timeout + 1),
+            digests)
+    # the tag may have been moved meanwhile, but not the digest
+    assert cephadm_module.cache.get_host_image('host1', 'image:tag') is None
+    assert cephadm_module.cache.get_host_image(
+        'host1', 'image:tag', ['image@digest']) == ['image@digest']
+    assert cephadm_module.cache.get_host_image('host1', 'image@digest') == ['image@digest']
+
+
+def test_prefetch_images_of_service(cephadm_module: CephadmOrchestrator):
+    images = {'client.rgw.foo': 'rgw-foo-image', 'mon.host1': 'mon-host1-image'}
+
+    def _get_foreign_ceph_option(entity, key):
+        assert key == 'container_image'
+        return images.get(entity, 'global-image')
+
+    with mock.patch.object(cephadm_module, 'get_foreign_ceph_option',
+                           side_effect=_get_foreign_ceph_option), \
+            mock.patch.object(cephadm_module.image_prefetcher, 'prefetch_wait') as prefetch_wait:
+        # the new daemons have no name yet, they get the image of their service
+        CephadmServe(cephadm_module)._prefetch_images(
+            RGWSpec(service_id='foo'),
+            [DaemonPlacement(daemon_type='rgw', hostname=f'host{i}') for i in range(2)])
+        prefetch_wait.assert_called_once_with({'host0': 'rgw-foo-image',
+                                               'host1': 'rgw-foo-image'})
+
+        prefetch_wait.reset_mock()
+        CephadmServe(cephadm_module)._prefetch_images(
+            ServiceSpec('mon'),
+            [DaemonPlacement(daemon_type='mon', hostname=f'host{i}', name=f'host{i}')
+             for i in range(2)])
+        prefetch_wait.assert_called_once_with({'host0': 'global-image',
+                                               'host1': 'mon-host1-image'})
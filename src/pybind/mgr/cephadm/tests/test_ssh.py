@@ -1,3 +1,6 @@
+import asyncio
+import json
+
 import asyncssh
 from asyncssh.process import SSHCompletedProcess
 from unittest import mock
@@ -114,3 +117,96 @@ def test_remote_command():
         '-rf',
         '/tmp/blat',
     ]
+
+
+class FakeExecutorProcess:
+    """
+    Plays the remote side of `cephadm executor`: answers the requests it
+    receives in reverse order, once two of them are in flight.
+    """
+
+    class Stream:
+        def __init__(self):
+            self.lines = asyncio.Queue()
+
+        async def readline(self):
+            return await self.lines.get()
+
+    class Writer:
+        def __init__(self, process):
+            self.process = process
+
+        def write(self, data):
+            self.process.requests.append(json.loads(data))
+            if len(self.process.requests) == 2:
+                for r in reversed(self.process.requests):
+                    self.process.stdout.lines.put_nowait(json.dumps({
+                        'id': r['id'],
+                        'out': ' '.join(r['args']) + '\n',
+                        'err': r['stdin'],
+                        'code': 0,
+                    }) + '\n')
+
+        async def drain(self):
+            pass
+
+        def write_eof(self):
+            self.process.stdout.lines.put_nowait('')
+
+    def __init__(self):
+        self.requests = []
+        self.stdout = self.Stream()
+        self.stdin = self.Writer(self)
+        self.stdout.lines.put_nowait(json.dumps({'executor': 1}) + '\n')
+
+
+def test_executor_pipelines_commands():
+    from cephadm.executor import CephadmExecutor, ExecutorError
+    from cephadm.ssh import RemoteCommand, RemoteExecutable
+
+    process = FakeExecutorProcess()
+    conn = mock.Mock()
+    conn.create_process = AsyncMock(return_value=process)
+
+    async def run():
+        executor = CephadmExecutor('test', RemoteCommand(RemoteExecutable('python3'), ['cephadm', 'executor']))
+        await executor.start(conn, 'python3 cephadm executor')
+        assert executor.running
+        results = await asyncio.gather(executor.run(['ls']), executor.run(['gather-facts'], stdin='x'))
+        executor.close()
+        with pytest.raises(ExecutorError):
+            await executor.run(['ls'])
+        return results
+
+    assert asyncio.new_event_loop().run_until_complete(run()) == [('ls', '', 0), ('gather-facts', 'x', 0)]
+    assert [r['id'] for r in process.requests] == [0, 1]
+
+
+@mock.patch("cephadm.ssh.SSHManager._remote_connection")
+@mock.patch("cephadm.ssh.SSHManager._execute_command")
+@mock.patch("cephadm.ssh.SSHManager._check_execute_command")
+@mock.patch("cephadm.ssh.SSHManager._execute_in_executor")
+def test_run_cephadm_uses_executor(_execute_in_executor, _check_execute_command, _execute_command,
+                                   _remote_connection, cephadm_module):
+    _remote_connection.side_effect = async_side_effect(mock.Mock())
+    _check_execute_command.side_effect = async_side_effect('/usr/bin/python3')
+    _execute_in_executor.side_effect = async_side_effect(('{}', '', 0))
+    with with_host(cephadm_module, 'test'):
+        _check_execute_command.reset_mock()
+        _execute_in_executor.reset_mock()
+        for _ in range(3):
+            out, err, code = cephadm_module.wait_async(
+                CephadmServe(cephadm_module)._run_cephadm('test', 'mon', 'ls', []))
+            assert (out, err, code) == (['{}'], [''], 0)
+        # the python interpreter found when the host was added is reused
+        assert _check_execute_command.call_count == 0
+        assert _execute_in_executor.call_count == 3
+        executor_cmd = _execute_in_executor.call_args[0][1]
+        assert list(executor_cmd) == ['/usr/bin/python3', cephadm_module.cephadm_binary_path, 'executor']
+        _execute_command.assert_not_called()
+
+        # falls back to running the commands one at a time
+        _execute_in_executor.side_effect = async_side_effect(None)
+        _execute_command.side_effect = async_side_effect(('{}', '', 0))
+        cephadm_module.wait_async(CephadmServe(cephadm_module)._run_cephadm('test', 'mon', 'ls', []))
+        _execute_command.assert_called_once()
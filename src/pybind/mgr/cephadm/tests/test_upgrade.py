@@ -9,6 +9,7 @@ from cephadm.upgrade import CephadmUpgrade, UpgradeState
 from cephadm.ssh import HostConnectionError
 from cephadm.utils import ContainerInspectInfo
 from orchestrator import OrchestratorError, DaemonDescription
+from mgr_module import HandleCommandResult
 from .fixtures import _run_cephadm, wait, with_host, with_service, \
     receive_agent_metadata, async_side_effect
 
@@ -240,6 +241,113 @@ def test_enough_mds_for_ok_to_stop(get, get_daemons_by_service, cephadm_module:
         DaemonDescription(daemon_type='mds', daemon_id='myfs.test.host1.gfknd', service_name='mds.myfs.test'))
 
 
+def test_redeploy_waves(cephadm_module: CephadmOrchestrator):
+    osds = [(DaemonDescription(daemon_type='osd', daemon_id=str(i), hostname='host1'), False)
+            for i in range(3)]
+    rgws = [(DaemonDescription(daemon_type='rgw', daemon_id=f'foo.host{i}.abc', hostname=f'host{i}',
+                               service_name='rgw.foo'), False) for i in range(2)]
+    waves = cephadm_module.upgrade._redeploy_waves(osds + rgws)
+    assert waves == [osds + rgws[:1], rgws[1:]]
+
+    cephadm_module.upgrade_parallelism = 2
+    waves = cephadm_module.upgrade._redeploy_waves(osds)
+    assert waves == [osds[:2], osds[2:]]
+
+
+@mock.patch("cephadm.module.CephadmOrchestrator._daemon_action_set_image")
+@mock.patch("cephadm.module.CephadmOrchestrator._prepare_daemon_redeploy", side_effect=lambda spec: spec)
+@mock.patch("cephadm.serve.CephadmServe._create_daemon")
+@mock.patch("cephadm.serve.CephadmServe._run_cephadm")
+def test_upgrade_daemons_together(_run_cephadm, _create_daemon, _prepare, _set_image,
+                                  cephadm_module: CephadmOrchestrator):
+    cephadm_module.upgrade.upgrade_state = UpgradeState(
+        'target_image', 0, total_count=10, remaining_count=10)
+    _run_cephadm.side_effect = async_side_effect(
+        (json.dumps({'repo_digests': ['target@digest']}), '', 0))
+    deployed = []
+
+    async def _create(spec, **kwargs):
+        deployed.append(spec.name())
+        if spec.name() == 'osd.2':
+            raise OrchestratorError('boom')
+        return ''
+
+    _create_daemon.side_effect = _create
+    to_upgrade = [(DaemonDescription(daemon_type='osd', daemon_id=str(i),
+                                     hostname=f'host{i % 2}'), False) for i in range(4)]
+    cephadm_module.upgrade._upgrade_daemons(to_upgrade, 'target_image', ['target@digest'])
+
+    # the image is checked once per host, all osds are redeployed at once
+    assert sorted(c[0][0] for c in _run_cephadm.call_args_list) == ['host0', 'host1']
+    assert sorted(deployed) == ['osd.0', 'osd.1', 'osd.2', 'osd.3']
+    state = cephadm_module.upgrade.upgrade_state
+    assert state.redeployed_count == 3
+    assert state.remaining_count == 7
+    assert state.paused
+    assert 'osd.2' in state.error
+    assert cephadm_module.upgrade.upgrade_rate() is not None
+
+    # the hosts are known to have the image now
+    _run_cephadm.reset_mock()
+    cephadm_module.upgrade._pull_target_image(['host0', 'host1'], 'target_image', ['target@digest'])
+    _run_cephadm.assert_not_called()
+
+
+@mock.patch("cephadm.module.CephadmOrchestrator._daemon_action_set_image")
+@mock.patch("cephadm.module.CephadmOrchestrator._prepare_daemon_redeploy", side_effect=lambda spec: spec)
+@mock.patch("cephadm.serve.CephadmServe._create_daemon")
+@mock.patch("cephadm.serve.CephadmServe._run_cephadm")
+def test_upgrade_daemons_paused_between_waves(_run_cephadm, _create_daemon, _prepare, _set_image,
+                                              cephadm_module: CephadmOrchestrator):
+    cephadm_module.upgrade.upgrade_state = UpgradeState('target_image', 0)
+    cephadm_module.upgrade_parallelism = 2
+    _run_cephadm.side_effect = async_side_effect(
+        (json.dumps({'repo_digests': ['target@digest']}), '', 0))
+    deployed = []
+
+    async def _create(spec, **kwargs):
+        deployed.append(spec.name())
+        # paused while the first wave is redeployed
+        cephadm_module.upgrade.upgrade_state.paused = True
+        return ''
+
+    _create_daemon.side_effect = _create
+    to_upgrade = [(DaemonDescription(daemon_type='osd', daemon_id=str(i),
+                                     hostname='host0'), False) for i in range(4)]
+    cephadm_module.upgrade._upgrade_daemons(to_upgrade, 'target_image', ['target@digest'])
+    assert sorted(deployed) == ['osd.0', 'osd.1']
+    assert cephadm_module.upgrade.upgrade_state.redeployed_count == 2
+
+
+@mock.patch("cephadm.services.osd.OSDService.ok_to_stop")
+def test_to_upgrade_osd_failure_domain_paused(ok_to_stop, cephadm_module: CephadmOrchestrator):
+    cephadm_module.upgrade.upgrade_state = UpgradeState('target_image', 0, paused=True)
+    need_upgrade = [(DaemonDescription(daemon_type='osd', daemon_id=str(i), hostname='host0',
+                                       container_image_id='old'), False) for i in range(2)]
+    _continue, to_upgrade = cephadm_module.upgrade._to_upgrade(need_upgrade, 'target_image')
+    assert not _continue
+    assert to_upgrade == []
+    ok_to_stop.assert_not_called()
+
+
+@mock.patch("cephadm.services.osd.OSDService.ok_to_stop")
+def test_to_upgrade_osd_failure_domain(ok_to_stop, cephadm_module: CephadmOrchestrator):
+    def _ok_to_stop(ids, known=None, force=False):
+        if len(ids) > 1:
+            known.extend(f'osd.{i}' for i in ids)
+            return HandleCommandResult(0, 'ok', '')
+        return HandleCommandResult(-16, '', 'not ok')
+
+    ok_to_stop.side_effect = _ok_to_stop
+    cephadm_module.upgrade.upgrade_state = UpgradeState('target_image', 0)
+    need_upgrade = [(DaemonDescription(daemon_type='osd', daemon_id=str(i), hostname=f'host{i % 2}',
+                                       container_image_id='old'), False) for i in range(4)]
+    _continue, to_upgrade = cephadm_module.upgrade._to_upgrade(need_upgrade, 'target_image')
+    assert _continue
+    assert [d.name() for d, _ in to_upgrade] == ['osd.0', 'osd.2']
+    ok_to_stop.assert_called_once_with(['0', '2'], known=mock.ANY, force=True)
+
+
 @pytest.mark.parametrize("current_version, use_tags, show_all_versions, tags, result",
                          [
                              # several candidate versions (from different major versions)
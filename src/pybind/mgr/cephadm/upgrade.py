@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import time
@@ -26,6 +27,11 @@ logger = logging.getLogger(__name__)
 CEPH_MDSMAP_ALLOW_STANDBY_REPLAY = (1 << 5)
 CEPH_MDSMAP_NOT_JOINABLE = (1 << 0)
 
+# daemon types of which any number of daemons of the same service can be
+# redeployed at the same time: osds that passed ok-to-stop together and
+# daemons that only serve their own host
+PARALLEL_UPGRADE_TYPES = ['osd', 'crash', 'ceph-exporter', 'node-exporter']
+
 
 def normalize_image_digest(digest: str, default_registry: str) -> str:
     """
@@ -71,6 +77,8 @@ class UpgradeState:
                  services: Optional[List[str]] = None,
                  total_count: Optional[int] = None,
                  remaining_count: Optional[int] = None,
+                 redeployed_count: int = 0,
+                 redeploy_seconds: float = 0.0,
                  ):
         self._target_name: str = target_name  # Use CephadmUpgrade.target_image instead.
         self.progress_id: str = progress_id
@@ -88,6 +96,9 @@ class UpgradeState:
         self.services = services
         self.total_count = total_count
         self.remaining_count = remaining_count
+        # daemons redeployed so far and the time spent redeploying them
+        self.redeployed_count = redeployed_count
+        self.redeploy_seconds = redeploy_seconds
 
     def to_json(self) -> dict:
         return {
@@ -106,6 +117,8 @@ class UpgradeState:
             'services': self.services,
             'total_count': self.total_count,
             'remaining_count': self.remaining_count,
+            'redeployed_count': self.redeployed_count,
+            'redeploy_seconds': self.redeploy_seconds,
         }
 
     @classmethod
@@ -181,12 +194,23 @@ class CephadmUpgrade:
                 r.message = self.upgrade_info_str
             except AttributeError:
                 pass
+            rate = self.upgrade_rate()
+            if r.message and rate is not None:
+                r.message += f' ({rate:.1f} daemons/min)'
             if self.upgrade_state.error:
                 r.message = 'Error: ' + self.upgrade_state.error
             elif self.upgrade_state.paused:
                 r.message = 'Upgrade paused'
         return r
 
+    def upgrade_rate(self) -> Optional[float]:
+        """
+        Daemons redeployed per minute spent redeploying daemons
+        """
+        if not self.upgrade_state or not self.upgrade_state.redeploy_seconds:
+            return None
+        return self.upgrade_state.redeployed_count / self.upgrade_state.redeploy_seconds * 60
+
     def _get_upgrade_info(self) -> Tuple[str, List[str]]:
         if not self.upgrade_state or not self.upgrade_state.target_digests:
             return '', []
@@ -563,6 +587,23 @@ class CephadmUpgrade:
             tries -= 1
         return False
 
+    def _ok_to_stop_together(
+            self, daemons: List[DaemonDescription],
+            known: Optional[List[str]] = None,  # NOTE: output argument!
+    ) -> bool:
+        # a single check for the whole group, _wait_for_ok_to_stop retries
+        # with just one of them
+        if not self.upgrade_state or self.upgrade_state.paused:
+            return False
+        assert daemons[0].daemon_type is not None
+        r = service_registry.get_service(daemon_type_to_service(daemons[0].daemon_type)).ok_to_stop(
+            [cast(str, d.daemon_id) for d in daemons], known=known, force=True)
+        if r.retval:
+            logger.info(f'Upgrade: {r.stderr}')
+            return False
+        logger.info(f'Upgrade: {r.stdout}')
+        return True
+
     def _clear_upgrade_health_checks(self) -> None:
         for k in self.UPGRADE_ERRORS:
             if k in self.mgr.health_checks:
@@ -839,9 +880,18 @@ class CephadmUpgrade:
                 continue
 
             if d.daemon_type == 'osd':
+                # first try to stop all the osds of the host, the smallest
+                # failure domain, together; the mons extend a successful check
+                # to the other osds of the failure domain, up to
+                # upgrade_parallelism of them.
                 # NOTE: known_ok_to_stop is an output argument for
-                # _wait_for_ok_to_stop
-                if not self._wait_for_ok_to_stop(d, known_ok_to_stop):
+                # _ok_to_stop_together and _wait_for_ok_to_stop
+                group = [e[0] for e in need_upgrade
+                         if e[0].daemon_type == 'osd' and e[0].hostname == d.hostname]
+                if (
+                    not (len(group) > 1 and self._ok_to_stop_together(group, known_ok_to_stop))
+                    and not self._wait_for_ok_to_stop(d, known_ok_to_stop)
+                ):
                     return False, to_upgrade
 
             if d.daemon_type == 'mon' and self._enough_mons_for_ok_to_stop():
@@ -867,86 +917,183 @@ class CephadmUpgrade:
                 break
         return True, to_upgrade
 
+    def _prefetch_target_image(self, daemons: List[DaemonDescription], target_image: str,
+                               target_digests: List[str]) -> None:
+        """
+        Pull the target image, in parallel, on all hosts with daemons to
+        upgrade ahead of upgrading them. Failures are left for
+        _pull_target_image to report when the daemons of the host are
+        upgraded.
+        """
+        hosts = sorted(set(d.hostname for d in daemons
+                           if d.hostname and d.daemon_type not in NON_CEPH_IMAGE_TYPES))
+        images = {h: target_image for h in hosts
+                  if self.mgr.cache.get_host_image(h, target_image, target_digests) is None}
+        if not images:
+            return
+        self.upgrade_info_str = 'Pulling %s image on %d host(s)' % (target_image, len(images))
+        try:
+            self.mgr.image_prefetcher.prefetch_wait(images, target_digests)
+        except OrchestratorError as e:
+            logger.info(f'Upgrade: {e}')
+
+    def _pull_target_image(self, hosts: List[str], target_image: str,
+                           target_digests: List[str]) -> bool:
+        """
+        Make sure all the hosts have the target image, pulling it on all of
+        them in parallel. Returns False if the upgrade can not go on.
+        """
+        assert self.upgrade_state is not None
+        images = {h: target_image for h in hosts
+                  if self.mgr.cache.get_host_image(h, target_image, target_digests) is None}
+        if not images:
+            return True
+
+        self.upgrade_info_str = 'Pulling %s image on host(s) %s' % (
+            target_image, ', '.join(images))
+        results = self.mgr.image_prefetcher.prefetch_wait(images, target_digests)
+        failed = []
+        for host, result in results.items():
+            if isinstance(result, HostConnectionError):
+                raise result
+            if isinstance(result, Exception):
+                failed.append(host)
+        if failed:
+            self._fail_upgrade('UPGRADE_FAILED_PULL', {
+                'severity': 'warning',
+                'summary': 'Upgrade: failed to pull target image',
+                'count': len(failed),
+                'detail': [
+                    'failed to pull %s on host %s' % (target_image, h) for h in failed],
+            })
+            return False
+        for host, digests in results.items():
+            assert not isinstance(digests, Exception)
+            if not any(d in target_digests for d in digests):
+                logger.info('Upgrade: image %s pull on %s got new digests %s (not %s), restarting' % (
+                    target_image, host, digests, target_digests))
+                self.upgrade_info_str = 'Image %s pull on %s got new digests %s (not %s), restarting' % (
+                    target_image, host, digests, target_digests)
+                self.upgrade_state.target_digests = digests
+                self._save_upgrade_state()
+                return False
+        return True
+
+    def _redeploy_waves(
+            self, to_upgrade: List[Tuple[DaemonDescription, bool]]
+    ) -> List[List[Tuple[DaemonDescription, bool]]]:
+        """
+        Split the daemons into waves of daemons that are redeployed at the
+        same time: at most upgrade_parallelism of them, and at most one
+        daemon of a service unless its type is in PARALLEL_UPGRADE_TYPES.
+        """
+        waves: List[List[Tuple[DaemonDescription, bool]]] = []
+        for d_entry in to_upgrade:
+            d = d_entry[0]
+            for wave in waves:
+                if len(wave) < self.mgr.upgrade_parallelism and (
+                    d.daemon_type in PARALLEL_UPGRADE_TYPES
+                    or all(w[0].service_name() != d.service_name() for w in wave)
+                ):
+                    wave.append(d_entry)
+                    break
+            else:
+                waves.append([d_entry])
+        return waves
+
     def _upgrade_daemons(self, to_upgrade: List[Tuple[DaemonDescription, bool]], target_image: str, target_digests: Optional[List[str]] = None) -> None:
         assert self.upgrade_state is not None
-        num = 1
         if target_digests is None:
             target_digests = []
+        batch: List[Tuple[DaemonDescription, bool]] = []
+        remaining = self.upgrade_state.remaining_count
         for d_entry in to_upgrade:
-            if self.upgrade_state.remaining_count is not None and self.upgrade_state.remaining_count <= 0 and not d_entry[1]:
+            if remaining is not None and remaining <= 0 and not d_entry[1]:
                 self.mgr.log.info(
                     f'Hit upgrade limit of {self.upgrade_state.total_count}. Stopping upgrade')
-                return
-            d = d_entry[0]
-            assert d.daemon_type is not None
-            assert d.daemon_id is not None
-            assert d.hostname is not None
+                break
+            batch.append(d_entry)
+            if remaining is not None and not d_entry[1]:
+                remaining -= 1
+        if not batch:
+            return
 
-            # make sure host has latest container image
-            with self.mgr.async_timeout_handler(d.hostname, 'cephadm inspect-image'):
-                out, errs, code = self.mgr.wait_async(CephadmServe(self.mgr)._run_cephadm(
-                    d.hostname, '', 'inspect-image', [],
-                    image=target_image, no_fsid=True, error_ok=True))
-            if code or not any(d in target_digests for d in json.loads(''.join(out)).get('repo_digests', [])):
-                logger.info('Upgrade: Pulling %s on %s' % (target_image,
-                                                           d.hostname))
-                self.upgrade_info_str = 'Pulling %s image on host %s' % (
-                    target_image, d.hostname)
-                with self.mgr.async_timeout_handler(d.hostname, 'cephadm pull'):
-                    out, errs, code = self.mgr.wait_async(CephadmServe(self.mgr)._run_cephadm(
-                        d.hostname, '', 'pull', [],
-                        image=target_image, no_fsid=True, error_ok=True))
-                if code:
-                    self._fail_upgrade('UPGRADE_FAILED_PULL', {
-                        'severity': 'warning',
-                        'summary': 'Upgrade: failed to pull target image',
-                        'count': 1,
-                        'detail': [
-                            'failed to pull %s on host %s' % (target_image,
-                                                              d.hostname)],
-                    })
-                    return
-                r = json.loads(''.join(out))
-                if not any(d in target_digests for d in r.get('repo_digests', [])):
-                    logger.info('Upgrade: image %s pull on %s got new digests %s (not %s), restarting' % (
-                        target_image, d.hostname, r['repo_digests'], target_digests))
-                    self.upgrade_info_str = 'Image %s pull on %s got new digests %s (not %s), restarting' % (
-                        target_image, d.hostname, r['repo_digests'], target_digests)
-                    self.upgrade_state.target_digests = r['repo_digests']
-                    self._save_upgrade_state()
-                    return
+        # make sure the hosts have the latest container image
+        hosts = list(dict.fromkeys(cast(str, d.hostname) for d, _ in batch))
+        if not self._pull_target_image(hosts, target_image, target_digests):
+            return
 
-                self.upgrade_info_str = 'Currently upgrading %s daemons' % (d.daemon_type)
+        num = 1
+        for wave in self._redeploy_waves(batch):
+            if not self.upgrade_state or self.upgrade_state.paused:
+                logger.info('Upgrade: Paused, not redeploying the remaining daemons')
+                return
+            self.upgrade_info_str = 'Currently upgrading %s daemons' % (wave[0][0].daemon_type)
+            specs: List[CephadmDaemonDeploySpec] = []
+            deploying: List[Tuple[DaemonDescription, bool]] = []
+            failed: List[Tuple[DaemonDescription, bool, Exception]] = []
+            for d_entry in wave:
+                d = d_entry[0]
+                assert d.daemon_type is not None
+                assert d.daemon_id is not None
+                assert d.hostname is not None
+                if len(batch) > 1:
+                    logger.info('Upgrade: Updating %s.%s (%d/%d)' % (d.daemon_type, d.daemon_id, num, len(batch)))
+                else:
+                    logger.info('Upgrade: Updating %s.%s' %
+                                (d.daemon_type, d.daemon_id))
+                num += 1
+                try:
+                    self.mgr._daemon_action_set_image(
+                        'redeploy', target_image if not d_entry[1] else None,
+                        d.daemon_type, d.daemon_id)
+                    specs.append(self.mgr._prepare_daemon_redeploy(
+                        CephadmDaemonDeploySpec.from_daemon_description(d)))
+                    deploying.append(d_entry)
+                except Exception as e:
+                    failed.append((d, d_entry[1], e))
 
-            if len(to_upgrade) > 1:
-                logger.info('Upgrade: Updating %s.%s (%d/%d)' % (d.daemon_type, d.daemon_id, num, min(len(to_upgrade),
-                            self.upgrade_state.remaining_count if self.upgrade_state.remaining_count is not None else 9999999)))
-            else:
-                logger.info('Upgrade: Updating %s.%s' %
-                            (d.daemon_type, d.daemon_id))
-            action = 'Upgrading' if not d_entry[1] else 'Redeploying'
+            async def _redeploy_all() -> List[Any]:
+                return await asyncio.gather(*[
+                    CephadmServe(self.mgr)._create_daemon(spec) for spec in specs
+                ], return_exceptions=True)
+
+            start = time.monotonic()
             try:
-                daemon_spec = CephadmDaemonDeploySpec.from_daemon_description(d)
-                self.mgr._daemon_action(
-                    daemon_spec,
-                    'redeploy',
-                    image=target_image if not d_entry[1] else None
-                )
-                self.mgr.cache.metadata_up_to_date[d.hostname] = False
+                with self.mgr.async_timeout_handler(cmd='cephadm deploy (upgrade)'):
+                    results = self.mgr.wait_async(_redeploy_all()) if specs else []
             except Exception as e:
+                results = [e] * len(specs)
+
+            redeployed = 0
+            for d_entry, result in zip(deploying, results):
+                d = d_entry[0]
+                assert d.hostname is not None
+                if isinstance(result, Exception):
+                    failed.append((d, d_entry[1], result))
+                    continue
+                redeployed += 1
+                self.mgr.cache.metadata_up_to_date[d.hostname] = False
+                if self.upgrade_state.remaining_count is not None and not d_entry[1]:
+                    self.upgrade_state.remaining_count -= 1
+            self.upgrade_state.redeployed_count += redeployed
+            self.upgrade_state.redeploy_seconds += time.monotonic() - start
+            self._save_upgrade_state()
+            logger.info('Upgrade: Redeployed %d %s daemon(s) in %.1f seconds' % (
+                redeployed, wave[0][0].daemon_type, time.monotonic() - start))
+
+            if failed:
+                d, redeploy_only, _ = failed[0]
+                action = 'Upgrading' if not redeploy_only else 'Redeploying'
                 self._fail_upgrade('UPGRADE_REDEPLOY_DAEMON', {
                     'severity': 'warning',
                     'summary': f'{action} daemon {d.name()} on host {d.hostname} failed.',
-                    'count': 1,
+                    'count': len(failed),
                     'detail': [
-                        f'Upgrade daemon: {d.name()}: {e}'
+                        f'Upgrade daemon: {d.name()}: {e}' for d, _, e in failed
                     ],
                 })
                 return
-            num += 1
-            if self.upgrade_state.remaining_count is not None and not d_entry[1]:
-                self.upgrade_state.remaining_count -= 1
-                self._save_upgrade_state()
 
     def _handle_need_upgrade_self(self, need_upgrade_self: bool, upgrading_mgrs: bool) -> None:
         if need_upgrade_self:
@@ -1193,6 +1340,7 @@ class CephadmUpgrade:
         if self.upgrade_state.hosts is not None:
             logger.debug(f'Filtering daemons to upgrade by hosts: {self.upgrade_state.hosts}')
             daemons = [d for d in daemons if d.hostname in self.upgrade_state.hosts]
+        self._prefetch_target_image(daemons, target_image, target_digests)
         upgraded_daemon_count: int = 0
         for daemon_type in CEPH_UPGRADE_ORDER:
             if self.upgrade_state.remaining_count is not None and self.upgrade_state.remaining_count <= 0:
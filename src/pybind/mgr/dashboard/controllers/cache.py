@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+from ..plugins.ttl_cache import CacheManager
+from ..security import Scope
+from ..tools import ViewCache
+from . import BaseController, Endpoint, ReadPermission, UIRouter
+
+
+@UIRouter('/cache', Scope.DASHBOARD_SETTINGS)
+class Cache(BaseController):
+
+    @Endpoint()
+    @ReadPermission
+    def metrics(self):
+        """
+        Hit, miss and latency counters of the dashboard's internal caches.
+        """
+        return {
+            'view_caches': ViewCache.get_metrics(),
+            'ttl_caches': [cache.stats() for cache in list(CacheManager.caches.values())],
+        }
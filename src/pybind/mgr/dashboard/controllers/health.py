@@ -2,11 +2,14 @@
 
 import json
 
+import cherrypy
+
 from .. import mgr
 from ..rest_client import RequestException
 from ..security import Permission, Scope
 from ..services.ceph_service import CephService
 from ..services.cluster import ClusterModel
+from ..services.health import HealthSnapshot
 from ..services.iscsi_cli import IscsiGatewaysConfig
 from ..services.iscsi_client import IscsiClient
 from ..tools import partial_dict
@@ -124,40 +127,63 @@ class HealthData(object):
         self._has_permissions = auth_callback
         self._minimal = minimal
 
-    def all_health(self):
-        result = {
-            "health": self.basic_health(),
-        }
+    def sections(self):
+        """
+        :return: the sections of the report the user is allowed to read
+        """
+        sections = ['health']
 
         if self._has_permissions(Permission.READ, Scope.MONITOR):
-            result['mon_status'] = self.mon_status()
+            sections.append('mon_status')
 
         if self._has_permissions(Permission.READ, Scope.CEPHFS):
-            result['fs_map'] = self.fs_map()
+            sections.append('fs_map')
 
         if self._has_permissions(Permission.READ, Scope.OSD):
-            result['osd_map'] = self.osd_map()
-            result['scrub_status'] = self.scrub_status()
-            result['pg_info'] = self.pg_info()
+            sections.extend(['osd_map', 'scrub_status', 'pg_info'])
 
         if self._has_permissions(Permission.READ, Scope.MANAGER):
-            result['mgr_map'] = self.mgr_map()
+            sections.append('mgr_map')
 
         if self._has_permissions(Permission.READ, Scope.POOL):
-            result['pools'] = self.pools()
-            result['df'] = self.df()
-            result['client_perf'] = self.client_perf()
+            sections.extend(['pools', 'df', 'client_perf'])
 
         if self._has_permissions(Permission.READ, Scope.HOSTS):
-            result['hosts'] = self.host_count()
+            sections.append('hosts')
 
         if self._has_permissions(Permission.READ, Scope.RGW):
-            result['rgw'] = self.rgw_count()
+            sections.append('rgw')
 
         if self._has_permissions(Permission.READ, Scope.ISCSI):
-            result['iscsi_daemons'] = self.iscsi_daemons()
-
-        return result
+            sections.append('iscsi_daemons')
+
+        return sections
+
+    def section(self, section):
+        return HealthSnapshot.get(self._minimal, section, self._compute(section))
+
+    def _compute(self, section):
+        return {
+            'health': self.basic_health,
+            'hosts': self.host_count,
+            'rgw': self.rgw_count,
+        }.get(section) or getattr(self, section)
+
+    def all_health(self, sections=None):
+        return self.all_health_tagged(sections)[0]
+
+    def all_health_tagged(self, sections=None):
+        """
+        :return: the report and an entity tag that only changes along with it
+        """
+        if sections is None:
+            sections = self.sections()
+        report = {}
+        versions = {}
+        for section in sections:
+            report[section], versions[section] = HealthSnapshot.get_versioned(
+                self._minimal, section, self._compute(section))
+        return report, HealthSnapshot.etag(self._minimal, versions)
 
     def basic_health(self):
         health_data = mgr.get("health")
@@ -166,7 +192,7 @@ class HealthData(object):
         # Transform the `checks` dict into a list for the convenience
         # of rendering from javascript.
         checks = []
-        for k, v in health['checks'].items():
+        for k, v in health.get('checks', {}).items():
             v['type'] = k
             checks.append(v)
 
@@ -284,15 +310,29 @@ class Health(BaseController):
         self.health_full = HealthData(self._has_permissions, minimal=False)
         self.health_minimal = HealthData(self._has_permissions, minimal=True)
 
+    @staticmethod
+    def _conditional(health_data):
+        """
+        The report of `health_data`, or a 304 if the client already has it.
+        Browsers revalidate the polled report by its ETag, so an unchanged
+        report is neither serialized nor transferred again.
+        """
+        report, etag = health_data.all_health_tagged()
+        cherrypy.response.headers['ETag'] = etag
+        cherrypy.response.headers['Cache-Control'] = 'private, no-cache'
+        if etag in cherrypy.request.headers.get('If-None-Match', ''):
+            raise cherrypy.HTTPRedirect([], 304)
+        return report
+
     @Endpoint()
     def full(self):
-        return self.health_full.all_health()
+        return self._conditional(self.health_full)
 
     @Endpoint()
     @EndpointDoc("Get Cluster's minimal health report",
                  responses={200: HEALTH_MINIMAL_SCHEMA})
     def minimal(self):
-        return self.health_minimal.all_health()
+        return self._conditional(self.health_minimal)
 
     @Endpoint()
     def get_cluster_capacity(self):
@@ -12,9 +12,10 @@ from mgr_util import get_most_recent_rate
 from .. import mgr
 from ..exceptions import DashboardException
 from ..security import Scope
-from ..services._paginate import ListPaginator
+from ..services._paginate import IndexedList, IndexedListCache, ListPaginator
 from ..services.ceph_service import CephService, SendCommandError
 from ..services.exception import handle_orchestrator_error, handle_send_command_error
+from ..services.health import HealthSnapshot
 from ..services.orchestrator import OrchClient, OrchFeature
 from ..services.osd import HostStorageSummary, OsdDeploymentOptions
 from ..tools import str_to_bool
@@ -120,74 +121,123 @@ def osd_task(name, metadata, wait_for=2.0):
     return Task("osd/{}".format(name), metadata, wait_for)
 
 
+class OsdView(object):
+    """
+    The OSDs of one osdmap epoch together with their stats, CRUSH tree node
+    and host, looked up once and shared by all the requests until the
+    osdmap or the PG stats change.
+    """
+
+    def __init__(self, index: IndexedList):
+        self.index = index
+        self.stats = {stat['osd']: stat for stat in mgr.get('osd_stats')['osd_stats']}
+        self.tree: Dict[int, dict] = {}
+        self.hosts: Dict[int, dict] = {}
+        for node in mgr.get('osd_map_tree')['nodes']:
+            if node['type'] == 'osd':
+                self.tree[node['id']] = node
+            elif node['type'] == 'host':
+                for osd_id in node['children']:
+                    if osd_id >= 0:
+                        self.hosts[osd_id] = node
+
+    def decorate(self, osd: dict) -> dict:
+        """
+        :return: a copy of `osd`, extended by its stats, tree node and host
+        """
+        osd = dict(osd)
+        osd_id = osd['id']
+        if osd_id in self.stats:
+            osd['osd_stats'] = self.stats[osd_id]
+        if osd_id in self.tree:
+            osd['tree'] = self.tree[osd_id]
+        if osd_id in self.hosts:
+            osd['host'] = self.hosts[osd_id]
+        return osd
+
+
 @APIRouter('/osd', Scope.OSD)
 @APIDoc('OSD management API', 'OSD')
 class Osd(RESTController):
+    _osd_index: IndexedListCache[IndexedList] = IndexedListCache()
+    _osd_view: IndexedListCache[OsdView] = IndexedListCache()
+
+    RATE_STATS = ['osd.op_w', 'osd.op_in_bytes', 'osd.op_r', 'osd.op_out_bytes']
+    GAUGE_STATS = ['osd.numpg', 'osd.stat_bytes', 'osd.stat_bytes_used']
+
+    @classmethod
+    def get_osd_index(cls) -> IndexedList:
+        """
+        The OSDs of the current osdmap, indexed for pagination.  Only
+        rebuilt when the osdmap epoch changes.
+        """
+        return cls._osd_index.get(mgr.get_osdmap().get_epoch(),
+                                  lambda: IndexedList(cls.get_osd_map().values(),
+                                                      searchable_params=['id']))
+
+    @classmethod
+    def get_osd_view(cls) -> OsdView:
+        """
+        The OSDs of the current osdmap with their stats, tree node and host.
+        Only rebuilt when the osdmap or the PG stats change.
+        """
+        index = cls.get_osd_index()
+        # the index is kept by the view, so its id is not reused while cached
+        return cls._osd_view.get((id(index), HealthSnapshot.generation('osd_map', 'pg_summary')),
+                                 lambda: OsdView(index))
+
     @RESTController.MethodMap(version=APIVersion(1, 1))
     def list(self, offset: int = 0, limit: int = 10,
              search: str = '', sort: str = ''):
-        all_osds = self.get_osd_map()
-
+        view = self.get_osd_view()
         paginator = ListPaginator(int(offset), int(limit), sort, search,
-                                  input_list=all_osds.values(),
+                                  input_list=view.index,
                                   searchable_params=['id'],
                                   sortable_params=['id'],
                                   default_sort='+id')
 
         cherrypy.response.headers['X-Total-Count'] = paginator.get_count()
 
-        paginated_osds_list = list(paginator.list())
-        # creating a dictionary to have faster lookups
-        paginated_osds_by_id = {osd['id']: osd for osd in paginated_osds_list}
-        try:
-            osds = {
-                key: paginated_osds_by_id[int(key)]
-                for key in all_osds.keys()
-                if int(key) in paginated_osds_by_id
-            }
-        except ValueError as e:
-            raise DashboardException(e, component='osd', http_status_code=400)
-
-        # Extending by osd stats information
-        for stat in mgr.get('osd_stats')['osd_stats']:
-            if stat['osd'] in osds:
-                osds[stat['osd']]['osd_stats'] = stat
-
-        # Extending by osd node information
-        nodes = mgr.get('osd_map_tree')['nodes']
-        for node in nodes:
-            if node['type'] == 'osd' and node['id'] in osds:
-                osds[node['id']]['tree'] = node
-
-        # Extending by osd parent node information
-        for host in [n for n in nodes if n['type'] == 'host']:
-            for osd_id in host['children']:
-                if osd_id >= 0 and osd_id in osds:
-                    osds[osd_id]['host'] = host
+        # the indexed OSDs are shared between requests, decorate copies
+        osds = [view.decorate(osd) for osd in paginator.list()]
 
         removing_osd_ids = self.get_removing_osds()
 
         # Extending by osd histogram and orchestrator data
-        for osd_id, osd in osds.items():
+        self.gauge_stats_batch(osds)
+        for osd in osds:
+            if 'osd' not in osd:
+                continue  # pragma: no cover - simple early continue
+            osd['operational_status'] = self._get_operational_status(osd['id'],
+                                                                     removing_osd_ids)
+        return osds
+
+    @classmethod
+    def gauge_stats_batch(cls, osds: List[dict]):
+        """
+        Extend the OSDs of a page by their perf counters. The counters of all
+        of them are read by one call for the histories and one for the
+        gauges.
+        """
+        for osd in osds:
             osd['stats'] = {}
             osd['stats_history'] = {}
-            osd_spec = str(osd_id)
+        osd_specs = [str(osd['osd']) for osd in osds if 'osd' in osd]
+        if not osd_specs:
+            return
+        rates_by_osd = CephService.get_rates_of_daemons('osd', osd_specs, cls.RATE_STATS)
+        latest_by_osd = CephService.get_latest_batch('osd', osd_specs, cls.GAUGE_STATS)
+        for osd in osds:
             if 'osd' not in osd:
                 continue  # pragma: no cover - simple early continue
-            self.gauge_stats(osd, osd_spec)
-            osd['operational_status'] = self._get_operational_status(osd_id, removing_osd_ids)
-        return list(osds.values())
-
-    @staticmethod
-    def gauge_stats(osd, osd_spec):
-        for stat in ['osd.op_w', 'osd.op_in_bytes', 'osd.op_r', 'osd.op_out_bytes']:
-            prop = stat.split('.')[1]
-            rates = CephService.get_rates('osd', osd_spec, stat)
-            osd['stats'][prop] = get_most_recent_rate(rates)
-            osd['stats_history'][prop] = rates
+            osd_spec = str(osd['osd'])
+            for stat, rates in rates_by_osd[osd_spec].items():
+                prop = stat.split('.')[1]
+                osd['stats'][prop] = get_most_recent_rate(rates)
+                osd['stats_history'][prop] = rates
             # Gauge stats
-        for stat in ['osd.numpg', 'osd.stat_bytes', 'osd.stat_bytes_used']:
-            osd['stats'][stat.split('.')[1]] = mgr.get_latest('osd', osd_spec, stat)
+            for stat, value in latest_by_osd[osd_spec].items():
+                osd['stats'][stat.split('.')[1]] = value
 
     @RESTController.Collection('GET', version=APIVersion.EXPERIMENTAL)
     @ReadPermission
@@ -14,14 +14,15 @@ import rbd
 from .. import mgr
 from ..controllers.pool import RBDPool
 from ..exceptions import DashboardException
+from ..plugins.ttl_cache import ttl_cache_invalidator
 from ..security import Scope
 from ..services.ceph_service import CephService
 from ..services.exception import handle_rados_error, handle_rbd_error, serialize_dashboard_exception
-from ..services.rbd import MIRROR_IMAGE_MODE, RbdConfiguration, \
-    RbdImageMetadataService, RbdMirroringService, RbdService, \
-    RbdSnapshotService, format_bitmask, format_features, get_image_spec, \
-    parse_image_spec, rbd_call, rbd_image_call
-from ..tools import ViewCache, str_to_bool
+from ..services.rbd import MIRROR_IMAGE_MODE, RBD_IMAGE_INFO_CACHE, \
+    RbdConfiguration, RbdImageMetadataService, RbdMirroringService, \
+    RbdService, RbdSnapshotService, format_bitmask, format_features, \
+    get_image_spec, parse_image_spec, rbd_call, rbd_image_call
+from ..tools import TaskManager, ViewCache, str_to_bool
 from . import APIDoc, APIRouter, BaseController, CreatePermission, \
     DeletePermission, Endpoint, EndpointDoc, ReadPermission, RESTController, \
     Task, UIRouter, UpdatePermission, allow_empty_body
@@ -67,18 +68,14 @@ class Rbd(RESTController):
             pools, offset=offset, limit=limit, search=search, sort=sort)
         cherrypy.response.headers['X-Total-Count'] = num_total_images
         pool_result = {}
-        for i, image in enumerate(images):
+        for image in images:
             pool = image['pool_name']
             if pool not in pool_result:
                 pool_result[pool] = {'value': [], 'pool_name': image['pool_name']}
+            # the configuration and metadata were collected together with
+            # the image stat
             pool_result[pool]['value'].append(image)
 
-            images[i]['configuration'] = RbdConfiguration(
-                pool, image['namespace'], image['name']).list()
-            images[i]['metadata'] = rbd_image_call(
-                pool, image['namespace'], image['name'],
-                lambda ioctx, image: RbdImageMetadataService(image).list())
-
         return list(pool_result.values())
 
     @handle_rbd_error()
@@ -230,6 +227,7 @@ class RbdSnapshot(RESTController):
 
     @RbdTask('snap/create',
              ['{image_spec}', '{snapshot_name}', '{mirrorImageSnapshot}'], 2.0)
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def create(self, image_spec, snapshot_name, mirrorImageSnapshot):
         pool_name, namespace, image_name = parse_image_spec(image_spec)
 
@@ -251,6 +249,7 @@ class RbdSnapshot(RESTController):
 
     @RbdTask('snap/edit',
              ['{image_spec}', '{snapshot_name}'], 4.0)
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def set(self, image_spec, snapshot_name, new_snap_name=None,
             is_protected=None):
         def _edit(ioctx, img, snapshot_name):
@@ -272,6 +271,7 @@ class RbdSnapshot(RESTController):
     @RESTController.Resource('POST')
     @UpdatePermission
     @allow_empty_body
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def rollback(self, image_spec, snapshot_name):
         def _rollback(ioctx, img, snapshot_name):
             img.rollback_to_snap(snapshot_name)
@@ -286,6 +286,7 @@ class RbdSnapshot(RESTController):
               'child_image_name': '{child_image_name}'}, 2.0)
     @RESTController.Resource('POST')
     @allow_empty_body
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def clone(self, image_spec, snapshot_name, child_pool_name,
               child_image_name, child_namespace=None, obj_size=None, features=None,
               stripe_unit=None, stripe_count=None, data_pool=None,
@@ -384,14 +385,18 @@ class RbdTrash(RESTController):
         """Remove all expired images from trash."""
         now = "{}Z".format(datetime.utcnow().isoformat())
         pools = self._trash_list(pool_name)
-
-        for pool in pools:
-            for image in pool['value']:
-                if image['deferment_end_time'] < now:
-                    logger.info('Removing trash image %s (pool=%s, namespace=%s, name=%s)',
-                                image['id'], pool['pool_name'], image['namespace'], image['name'])
-                    rbd_call(pool['pool_name'], image['namespace'],
-                             self.rbd_inst.trash_remove, image['id'], 0)
+        expired = [(pool, image) for pool in pools for image in pool['value']
+                   if image['deferment_end_time'] < now]
+
+        task = TaskManager.current_task()
+        if expired:
+            task.set_batch_size(len(expired))
+        for pool, image in expired:
+            logger.info('Removing trash image %s (pool=%s, namespace=%s, name=%s)',
+                        image['id'], pool['pool_name'], image['namespace'], image['name'])
+            rbd_call(pool['pool_name'], image['namespace'],
+                     self.rbd_inst.trash_remove, image['id'], 0)
+            task.inc_batch_done()
 
     @RbdTask('trash/restore', ['{image_id_spec}', '{new_image_name}'], 2.0)
     @RESTController.Resource('POST')
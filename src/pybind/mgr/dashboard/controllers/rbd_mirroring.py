@@ -218,7 +218,13 @@ def _get_pool_stats(pool_names):
     return pool_stats
 
 
-@ViewCache()
+# The mirroring state changes slowly and the summary polls it for every
+# client. The views are reset whenever the dashboard changes the mirroring
+# configuration, so they may be reused for longer than the default.
+MIRRORING_STALE_PERIOD = 5.0
+
+
+@ViewCache(stale_period=MIRRORING_STALE_PERIOD)
 def get_daemons_and_pools():  # pylint: disable=R0915
     daemons = get_daemons()
     daemons_and_pools = {
@@ -248,7 +254,7 @@ def _get_mirror_mode(ioctx, image_name):
         return mirror_mode_str
 
 
-@ViewCache()
+@ViewCache(stale_period=MIRRORING_STALE_PERIOD)
 @no_type_check
 def _get_pool_datum(pool_name):
     data = {}
@@ -347,7 +353,7 @@ def _update_syncing_image_data(mirror_image, image):
         })
 
 
-@ViewCache()
+@ViewCache(stale_period=MIRRORING_STALE_PERIOD)
 def _get_content_data():  # pylint: disable=R0914
     pool_names = [pool['pool_name'] for pool in CephService.get_pool_list('rbd')
                   if pool.get('type', 1) == 1]
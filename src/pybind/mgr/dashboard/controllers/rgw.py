@@ -4,7 +4,8 @@
 import json
 import logging
 import re
-from typing import Any, Dict, List, NamedTuple, Optional, Union
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Union
 
 import cherrypy
 
@@ -184,8 +185,12 @@ class RgwMultisiteController(RESTController):
                         and zonegroup['id'] == zonegroups_info['default_zonegroup']),
                     ''
                 )
+            sync_policies = RgwClient.fan_out({
+                bucket: partial(multisite_instance.get_sync_policy, bucket, zonegroup_name)
+                for bucket in buckets
+            })
             for bucket in buckets:
-                sync_policy = multisite_instance.get_sync_policy(bucket, zonegroup_name)
+                sync_policy = sync_policies[bucket]
                 for policy in sync_policy['groups']:
                     policy['bucketName'] = bucket
                     sync_policy_list.append(policy)
@@ -398,8 +403,9 @@ class RgwBucket(RgwRESTController):
                 if bucket['tenant'] else bucket['bucket']
         return bucket
 
-    def _get_owner(self, owner):
-        accounts = RgwAccounts().get_accounts()
+    def _get_owner(self, owner, accounts=None):
+        if accounts is None:
+            accounts = RgwAccounts().get_accounts()
 
         # if the owner is present in the accounts list,
         # then the bucket is owned by an account.
@@ -544,29 +550,55 @@ class RgwBucket(RgwRESTController):
 
         return result
 
+    def _get_details(self, buckets, daemon_name=None):
+        # type: (List[dict], Optional[str]) -> List[dict]
+        """
+        Append the S3 attributes to the given buckets, as returned by the
+        admin API. The requests for all of them are sent concurrently.
+        """
+        accounts = RgwAccounts().get_accounts() if buckets else []
+        calls: Dict[Hashable, Callable[[], Any]] = {}
+        for i, result in enumerate(buckets):
+            bucket_name = RgwBucket.get_s3_bucket_name(result['bucket'],
+                                                       result['tenant'])
+            owner = self._get_owner(result['owner'], accounts)
+            calls.update({
+                (i, 'versioning'): partial(self._get_versioning, owner, daemon_name,
+                                           bucket_name),
+                (i, 'encryption'): partial(self._get_encryption, bucket_name, daemon_name,
+                                           owner),
+                (i, 'bucket_policy'): partial(self._get_policy, bucket_name, daemon_name,
+                                              owner),
+                (i, 'acl'): partial(self._get_acl, bucket_name, daemon_name, owner),
+                (i, 'replication'): partial(self._get_replication, bucket_name, owner,
+                                            daemon_name),
+                (i, 'lifecycle'): partial(self._get_lifecycle, bucket_name, daemon_name,
+                                          owner),
+                (i, 'locking'): partial(self._get_locking, owner, daemon_name, bucket_name),
+            })
+        details = RgwClient.fan_out(calls)
+
+        for i, result in enumerate(buckets):
+            # Append the versioning configuration.
+            versioning = details[(i, 'versioning')]
+            result['encryption'] = details[(i, 'encryption')]['Status']
+            result['versioning'] = versioning['Status']
+            result['mfa_delete'] = versioning['MfaDelete']
+            result['bucket_policy'] = details[(i, 'bucket_policy')]
+            result['acl'] = details[(i, 'acl')]
+            result['replication'] = details[(i, 'replication')]
+            result['lifecycle'] = details[(i, 'lifecycle')]
+
+            # Append the locking configuration.
+            result.update(details[(i, 'locking')])
+            self._append_bid(result)
+
+        return buckets
+
     def get(self, bucket, daemon_name=None):
         # type: (str, Optional[str]) -> dict
         result = self.proxy(daemon_name, 'GET', 'bucket', {'bucket': bucket})
-        bucket_name = RgwBucket.get_s3_bucket_name(result['bucket'],
-                                                   result['tenant'])
-
-        owner = self._get_owner(result['owner'])
-        # Append the versioning configuration.
-        versioning = self._get_versioning(owner, daemon_name, bucket_name)
-        encryption = self._get_encryption(bucket_name, daemon_name, owner)
-        result['encryption'] = encryption['Status']
-        result['versioning'] = versioning['Status']
-        result['mfa_delete'] = versioning['MfaDelete']
-        result['bucket_policy'] = self._get_policy(bucket_name, daemon_name, owner)
-        result['acl'] = self._get_acl(bucket_name, daemon_name, owner)
-        result['replication'] = self._get_replication(bucket_name, owner, daemon_name)
-        result['lifecycle'] = self._get_lifecycle(bucket_name, daemon_name, owner)
-
-        # Append the locking configuration.
-        locking = self._get_locking(owner, daemon_name, bucket_name)
-        result.update(locking)
-
-        return self._append_bid(result)
+        return self._get_details([result], daemon_name)[0]
 
     @allow_empty_body
     def create(self, bucket, uid, zonegroup=None, placement_target=None,
@@ -709,6 +741,20 @@ class RgwBucket(RgwRESTController):
 
 @UIRouter('/rgw/bucket', Scope.RGW)
 class RgwBucketUi(RgwBucket):
+    @Endpoint('GET', query_params=['buckets'])
+    @ReadPermission
+    def details(self, buckets, daemon_name=None):
+        """
+        Get the details of several buckets at once.
+        :param buckets: Comma separated list of bucket names.
+        """
+        names = [name for name in buckets.split(',') if name]
+        results = RgwClient.fan_out({
+            name: partial(self.proxy, daemon_name, 'GET', 'bucket', {'bucket': name})
+            for name in names
+        })
+        return self._get_details([results[name] for name in names], daemon_name)
+
     @Endpoint('GET')
     @ReadPermission
     # pylint: disable=W0613
@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import json
-
 from .. import mgr
 from ..controllers.rbd_mirroring import get_daemons_and_pools
 from ..exceptions import ViewCacheNoDataException
@@ -9,6 +7,7 @@ from ..security import Permission, Scope
 from ..services import progress
 from ..tools import TaskManager
 from . import APIDoc, APIRouter, BaseController, Endpoint, EndpointDoc
+from .health import HealthData
 
 SUMMARY_SCHEMA = {
     "health_status": (str, ""),
@@ -41,8 +40,7 @@ SUMMARY_SCHEMA = {
 @APIDoc("Get Ceph Summary Details", "Summary")
 class Summary(BaseController):
     def _health_status(self):
-        health_data = mgr.get("health")
-        return json.loads(health_data["json"])['status']
+        return HealthData(self._has_permissions).section('health')['status']
 
     def _rbd_mirroring(self):
         try:
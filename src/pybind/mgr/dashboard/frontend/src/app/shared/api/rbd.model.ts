@@ -9,6 +9,7 @@ export interface RbdPool {
 
 export interface RbdImage {
   disk_usage: number;
+  disk_usage_timestamp: string;
   stripe_unit: number;
   name: string;
   parent: any;
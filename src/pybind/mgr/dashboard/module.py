@@ -35,6 +35,7 @@ from .grafana import push_local_dashboards
 from .services import nvmeof_cli  # noqa # pylint: disable=unused-import
 from .services.auth import AuthManager, AuthManagerTool, JwtManager
 from .services.exception import dashboard_exception_handler
+from .services.health import HealthSnapshot
 from .services.service import RgwServiceManager
 from .services.sso import SSO_COMMANDS, handle_sso_command
 from .settings import handle_option_command, options_command_list, options_schema_list
@@ -280,7 +281,8 @@ class Module(MgrModule, CherryPyConfig):
     for options in PLUGIN_MANAGER.hook.get_options() or []:
         MODULE_OPTIONS.extend(options)
 
-    NOTIFY_TYPES = [NotifyType.clog]
+    NOTIFY_TYPES = [NotifyType.clog, NotifyType.health, NotifyType.mon_map,
+                    NotifyType.osd_map, NotifyType.fs_map, NotifyType.pg_summary]
 
     __pool_stats = collections.defaultdict(lambda: collections.defaultdict(
         lambda: collections.deque(maxlen=10)))  # type: dict
@@ -358,6 +360,7 @@ class Module(MgrModule, CherryPyConfig):
 
         cherrypy.engine.start()
         NotificationQueue.start_queue()
+        HealthSnapshot.register()
         TaskManager.init()
         logger.info('Engine started.')
         update_dashboards = str_to_bool(
@@ -64,6 +64,12 @@ class TTLCache:
         with self.rlock:
             self.cache.clear()
 
+    def stats(self) -> Dict[str, Any]:
+        with self.rlock:
+            return {'name': self.reference, 'ttl': self.ttl, 'hits': self.hits,
+                    'misses': self.misses, 'expired': self.expired,
+                    'maxsize': self.maxsize, 'entries': len(self.cache)}
+
     def info(self) -> str:
         return (f'cache={self.reference} hits={self.hits}, misses={self.misses},'
                 f'expired={self.expired}, maxsize={self.maxsize}, currsize={len(self.cache)}')
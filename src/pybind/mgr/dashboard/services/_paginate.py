@@ -1,12 +1,182 @@
-from typing import Any, Dict, List
+import os
+import time
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, List, \
+    Optional, Tuple, TypeVar, Union
 
 from ..exceptions import DashboardException
 
+T = TypeVar('T')
+
+
+def find_value(item: Dict[str, Any], key: str):
+    # dot separated keys to lookup nested values
+    keys = key.split('.')
+    value = item
+    for nested_key in keys:
+        if nested_key in value:
+            value = value[nested_key]
+        else:
+            return ''
+    return value
+
+
+class IndexedList:
+    """
+    A materialized collection that keeps its sorted orders and recent
+    search results around, so that a page can be served by slicing instead
+    of searching and sorting the whole collection on every request.
+
+    Indexes are built lazily, the first time a sort order or search term
+    is requested, and live as long as the IndexedList instance does.
+
+    A search term of at least `NGRAM` characters only checks the items
+    containing its least common n-gram, so its cost depends on the number
+    of candidates and not on the size of the collection. Shorter terms,
+    which usually match a large part of the collection anyway, are checked
+    against every item.
+    """
+    MAX_SEARCHES = 32
+    NGRAM = 3
+
+    # pylint: disable=W0102
+    def __init__(self, items: Iterable[Any], searchable_params: List[str] = []):
+        self.items = list(items)
+        self.searchable_params = searchable_params
+        # (sort_by, desc) -> positions of all items in that order
+        self._sorted: Dict[Tuple[str, bool], List[int]] = {}
+        # (sort_by, desc, search) -> positions of the matching items in that order
+        self._searches: 'OrderedDict[Tuple[str, bool, str], List[int]]' = OrderedDict()
+        # (sort_by, desc) -> rank of every position in that order
+        self._ranks: Dict[Tuple[str, bool], List[int]] = {}
+        self._search_values: Optional[List[List[str]]] = None
+        # n-gram -> positions of the items containing it
+        self._ngrams: Optional[Dict[str, List[int]]] = None
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self.items)
+
+    def _sorted_positions(self, sort_by: str, desc: bool) -> List[int]:
+        key = (sort_by, desc)
+        if key not in self._sorted:
+            self._sorted[key] = sorted(range(len(self.items)),
+                                       key=lambda pos: find_value(self.items[pos], sort_by),
+                                       reverse=desc)
+        return self._sorted[key]
+
+    def _sort_ranks(self, sort_by: str, desc: bool) -> List[int]:
+        key = (sort_by, desc)
+        if key not in self._ranks:
+            ranks = [0] * len(self.items)
+            for rank, pos in enumerate(self._sorted_positions(sort_by, desc)):
+                ranks[pos] = rank
+            self._ranks[key] = ranks
+        return self._ranks[key]
+
+    def _get_search_values(self) -> List[List[str]]:
+        if self._search_values is None:
+            self._search_values = [
+                [value for value in (find_value(item, param) for param in self.searchable_params)
+                 if isinstance(value, str)]
+                for item in self.items
+            ]
+        return self._search_values
+
+    def _matches(self, pos: int, search: str) -> bool:
+        return any(search in value for value in self._get_search_values()[pos])
+
+    def _ngram_index(self) -> Dict[str, List[int]]:
+        if self._ngrams is None:
+            ngrams: Dict[str, List[int]] = {}
+            for pos, values in enumerate(self._get_search_values()):
+                for ngram in {value[i:i + self.NGRAM] for value in values
+                              for i in range(len(value) - self.NGRAM + 1)}:
+                    ngrams.setdefault(ngram, []).append(pos)
+            self._ngrams = ngrams
+        return self._ngrams
+
+    def _candidates(self, search: str) -> Optional[List[int]]:
+        """
+        :return: the positions of the items that may match `search`, in
+            collection order, or None if any item may match
+        """
+        if len(search) < self.NGRAM:
+            return None
+        index = self._ngram_index()
+        candidates: Optional[List[int]] = None
+        for i in range(len(search) - self.NGRAM + 1):
+            positions = index.get(search[i:i + self.NGRAM], [])
+            if candidates is None or len(positions) < len(candidates):
+                candidates = positions
+            if not candidates:
+                break
+        return candidates
+
+    def select(self, sort_by: str, desc: bool, search: str = '') -> List[int]:
+        """
+        :return: the positions of the items matching `search`, in sort order
+        """
+        with self._lock:
+            positions = self._sorted_positions(sort_by, desc)
+            if not search:
+                return positions
+            key = (sort_by, desc, search)
+            if key in self._searches:
+                self._searches.move_to_end(key)
+                return self._searches[key]
+            # a term that contains an already searched term (e.g. the user
+            # kept typing) can only match a subset of that term's matches
+            for (c_sort_by, c_desc, c_search), c_positions in self._searches.items():
+                if (c_sort_by, c_desc) == (sort_by, desc) and c_search in search and \
+                        len(c_positions) < len(positions):
+                    positions = c_positions
+            candidates = self._candidates(search)
+            if candidates is not None and len(candidates) < len(positions):
+                positions = sorted(candidates, key=self._sort_ranks(sort_by, desc).__getitem__)
+            result = [pos for pos in positions if self._matches(pos, search)]
+            self._searches[key] = result
+            if len(self._searches) > self.MAX_SEARCHES:
+                self._searches.popitem(last=False)
+            return result
+
+
+class IndexedListCache(Generic[T]):
+    """
+    Holds the IndexedList (or any other view) of one collection and
+    rebuilds it only when the version of its source (e.g. the epoch of a
+    map) changes or when it is older than `ttl` seconds.
+    """
+
+    def __init__(self, ttl: int = 30):
+        # disable caching while running unit tests
+        if 'UNITTEST' in os.environ:
+            ttl = 0
+        self.ttl = ttl
+        self._version: Optional[Hashable] = None
+        self._timestamp = 0.0
+        self._index: Optional[T] = None
+        self._lock = RLock()
+
+    def get(self, version: Hashable, loader: Callable[[], T]) -> T:
+        with self._lock:
+            if self._index is None or self._version != version or \
+                    time.time() - self._timestamp >= self.ttl:
+                self._index = loader()
+                self._version = version
+                self._timestamp = time.time()
+            return self._index
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+
 
 class ListPaginator:
     # pylint: disable=W0102
     def __init__(self, offset: int, limit: int, sort: str, search: str,
-                 input_list: List[Any], default_sort: str,
+                 input_list: Union[Iterable[Any], IndexedList], default_sort: str,
                  searchable_params: List[str] = [], sortable_params: List[str] = []):
         self.offset = offset
         if limit < -1:
@@ -14,6 +184,8 @@ class ListPaginator:
         self.limit = limit
         self.sort = sort
         self.search = search
+        if not isinstance(input_list, IndexedList):
+            input_list = IndexedList(input_list, searchable_params)
         self.input_list = input_list
         self.default_sort = default_sort
         self.searchable_params = searchable_params
@@ -24,15 +196,7 @@ class ListPaginator:
         return self.count
 
     def find_value(self, item: Dict[str, Any], key: str):
-        # dot separated keys to lookup nested values
-        keys = key.split('.')
-        value = item
-        for nested_key in keys:
-            if nested_key in value:
-                value = value[nested_key]
-            else:
-                return ''
-        return value
+        return find_value(item, key)
 
     def list(self):
         end = self.offset + self.limit
@@ -49,23 +213,7 @@ class ListPaginator:
         if sort_by not in self.sortable_params:
             sort_by = self.default_sort[1:]
 
-        # trim down by search
-        trimmed_list = []
-        if self.search:
-            for item in self.input_list:
-                for searchable_param in self.searchable_params:
-                    value = self.find_value(item, searchable_param)
-                    if isinstance(value, str):
-                        if self.search in str(value):
-                            trimmed_list.append(item)
-
-        else:
-            trimmed_list = self.input_list
-
-        def sort(item):
-            return self.find_value(item, sort_by)
-
-        sorted_list = sorted(trimmed_list, key=sort, reverse=desc)
-        self.count = len(sorted_list)
-        for item in sorted_list[self.offset:end]:
-            yield item
+        positions = self.input_list.select(sort_by, desc, self.search)
+        self.count = len(positions)
+        for pos in positions[self.offset:end]:
+            yield self.input_list.items[pos]
@@ -5,7 +5,7 @@ import logging
 from abc import ABC, abstractmethod
 
 import rados
-from mgr_module import CommandResult
+from mgr_module import CommandResult, MgrModule
 from mgr_util import get_most_recent_rate, get_time_series_rates, name_to_config_section
 
 from .. import mgr
@@ -535,6 +535,52 @@ class CephService(object):
         data = mgr.get_counter(svc_type, svc_name, path)[path]
         return get_time_series_rates(data)
 
+    @classmethod
+    def get_rates_of_daemons(cls, svc_type, svc_names, paths):
+        """
+        Like get_rates(), but for all the given daemons and counters, read
+        by a single mgr.get_counters() call.
+
+        :return: the derivatives of the counters by daemon name and counter
+            path
+        :rtype: dict[str, dict[str, list[tuple[int, float]]]]
+        """
+        counters = mgr.get_counters(svc_type, svc_names, paths)
+        return {
+            svc_name: {
+                path: get_time_series_rates(counters.get(svc_name, {}).get(path, []))
+                for path in paths
+            }
+            for svc_name in svc_names
+        }
+
+    @classmethod
+    def get_latest_batch(cls, svc_type, svc_names, paths, prio_limit=MgrModule.PRIO_USEFUL):
+        """
+        Like mgr.get_latest(), but for all the given daemons and counters,
+        read by a single mgr.get_latest_counters() call. Only the counters
+        with a priority of at least `prio_limit` are available.
+
+        :return: the latest values by daemon name and counter path
+        :rtype: dict[str, dict[str, int]]
+        """
+        counters = mgr.get_latest_counters([svc_type], prio_limit,
+                                           svc_ids=svc_names).get(svc_type, {})
+        columns = {counter['path']: i for i, counter in enumerate(counters.get('schema', []))}
+        daemons = counters.get('daemons', {})
+        result = {}
+        for svc_name in svc_names:
+            values = daemons.get(svc_name) or []
+            latest = {}
+            for path in paths:
+                i = columns.get(path)
+                value = values[i] if i is not None and i < len(values) else None
+                if isinstance(value, list):
+                    value = value[0]  # the sum of a long running average
+                latest[path] = value or 0
+            result[svc_name] = latest
+        return result
+
     @classmethod
     def get_rate(cls, svc_type, svc_name, path):
         """returns most recent rate"""
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from functools import partial
+from typing import Dict, List
+
+from ..tools import NotificationQueue
+
+
+class HealthSnapshot(object):
+    """
+    The sections of the health report, shared by all the requests. A
+    section is only computed again once one of the maps it is derived from
+    changed, or, for the sections no notification exists for, once it is
+    older than `TTL` seconds.
+    """
+    # section -> notifications after which it is computed again
+    SECTIONS: Dict[str, List[str]] = {
+        'health': ['health'],
+        'mon_status': ['mon_map', 'health'],
+        'fs_map': ['fs_map'],
+        'osd_map': ['osd_map'],
+        'scrub_status': ['pg_summary'],
+        'pg_info': ['pg_summary', 'osd_map'],
+        'mgr_map': [],
+        'pools': ['pg_summary', 'osd_map'],
+        'df': ['pg_summary', 'osd_map'],
+        'client_perf': ['pg_summary'],
+        'hosts': [],
+        'rgw': [],
+        'iscsi_daemons': [],
+    }
+    TTL = 5
+
+    # disable caching while running unit tests
+    if 'UNITTEST' in os.environ:
+        TTL = 0
+
+    _lock = threading.Lock()
+    _register_lock = threading.Lock()
+    _registered = False
+    # notification type -> number of notifications received
+    _generations = {}  # type: dict
+    # (minimal, section) -> (generation, timestamp, value, version)
+    _values = {}  # type: dict
+    _compute_locks = {}  # type: dict
+    # distinguishes the versions of this process from those of a previous
+    # active mgr
+    _instance = uuid.uuid4().hex
+
+    @classmethod
+    def _on_notification(cls, notify_type, _):
+        with cls._lock:
+            cls._generations[notify_type] = cls._generations.get(notify_type, 0) + 1
+
+    @classmethod
+    def register(cls):
+        """
+        Subscribe to the notifications the sections are derived from. To be
+        called once the notification queue is started.
+        """
+        with cls._register_lock:
+            if cls._registered:
+                return
+            for notify_type in {t for types in cls.SECTIONS.values() for t in types}:
+                NotificationQueue.register(partial(cls._on_notification, notify_type),
+                                           notify_type)
+            cls._registered = True
+
+    @classmethod
+    def generation(cls, *notify_types):
+        """
+        :return: a value that changes whenever one of the given maps changed
+        """
+        with cls._lock:
+            return tuple(cls._generations.get(t, 0) for t in notify_types)
+
+    @classmethod
+    def _generation(cls, section):
+        return tuple(cls._generations.get(t, 0) for t in cls.SECTIONS.get(section, []))
+
+    @classmethod
+    def _cached(cls, key):
+        section = key[1]
+        with cls._lock:
+            cached = cls._values.get(key)
+            if cached is None or cached[0] != cls._generation(section):
+                return None
+            if not cls.SECTIONS.get(section) and time.time() - cached[1] >= cls.TTL:
+                return None
+            return cached
+
+    @classmethod
+    def get(cls, minimal, section, compute):
+        """
+        :return: the value of `section`, computed by `compute` if the
+            cached value is outdated
+        """
+        return cls.get_versioned(minimal, section, compute)[0]
+
+    @classmethod
+    def get_versioned(cls, minimal, section, compute):
+        """
+        Like `get`, but also return the version of the value. The version
+        only changes along with the value, not with every computation.
+
+        :return: a tuple of the value of `section` and its version
+        """
+        key = (minimal, section)
+        cached = cls._cached(key)
+        if cached is not None:
+            return cached[2], cached[3]
+        with cls._lock:
+            compute_lock = cls._compute_locks.setdefault(key, threading.Lock())
+        # only one request computes a section, the others wait for its result
+        with compute_lock:
+            cached = cls._cached(key)
+            if cached is not None:
+                return cached[2], cached[3]
+            with cls._lock:
+                generation = cls._generation(section)
+                previous = cls._values.get(key)
+            value = compute()
+            version = 0
+            if previous is not None:
+                version = previous[3] if previous[2] == value else previous[3] + 1
+            with cls._lock:
+                cls._values[key] = (generation, time.time(), value, version)
+            return value, version
+
+    @classmethod
+    def etag(cls, minimal, versions):
+        """
+        :param versions: the versions of the sections of a report, by section
+        :return: an entity tag of that report
+        """
+        state = (cls._instance, minimal, sorted(versions.items()))
+        return '"{}"'.format(hashlib.sha1(repr(state).encode('utf8')).hexdigest())
@@ -2,8 +2,16 @@
 # pylint: disable=unused-argument
 import errno
 import json
+import logging
 import math
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
 from enum import IntEnum
+from threading import RLock
 
 import cherrypy
 import rados
@@ -12,14 +20,16 @@ import rbd
 from .. import mgr
 from ..exceptions import DashboardException
 from ..plugins.ttl_cache import ttl_cache, ttl_cache_invalidator
-from ._paginate import ListPaginator
+from ._paginate import IndexedList, ListPaginator
 from .ceph_service import CephService
 
 try:
-    from typing import List, Optional
+    from typing import Dict, List, Optional, Tuple
 except ImportError:
     pass  # For typing only
 
+logger = logging.getLogger('rbd')
+
 
 RBD_FEATURES_NAME_MAPPING = {
     rbd.RBD_FEATURE_LAYERING: "layering",
@@ -34,6 +44,7 @@ RBD_FEATURES_NAME_MAPPING = {
 }
 
 RBD_IMAGE_REFS_CACHE_REFERENCE = 'rbd_image_refs'
+RBD_IMAGE_INFO_CACHE = 'rbd_image_info'
 GET_IOCTX_CACHE = 'get_ioctx'
 POOL_NAMESPACES_CACHE = 'pool_namespaces'
 
@@ -265,18 +276,44 @@ class RbdConfiguration(object):
                     self.remove(option_name)
 
 
-class RbdService(object):
-    _rbd_inst = rbd.RBD()
+class RbdDiskUsage(object):
+    def __init__(self, snaps, head, timestamp):
+        self.snaps: Dict[int, int] = snaps
+        self.head: int = head
+        self.total: int = sum(snaps.values()) + head
+        self.timestamp: float = timestamp
 
-    # set of image features that can be enable on existing images
-    ALLOW_ENABLE_FEATURES = {"exclusive-lock", "object-map", "fast-diff", "journaling"}
 
-    # set of image features that can be disabled on existing images
-    ALLOW_DISABLE_FEATURES = {"exclusive-lock", "object-map", "fast-diff", "deep-flatten",
-                              "journaling"}
+class RbdDiskUsageCache(object):
+    """
+    Provisioned bytes of RBD images, computed in the background.
 
-    @classmethod
-    def _rbd_disk_usage(cls, image, snaps, whole_object=True):
+    The usage of a snapshot is its delta to the previous snapshot, which
+    never changes while both snapshots exist, so it is computed only once.
+    The delta of the image HEAD to its newest snapshot is computed again
+    when it is older than `TTL` seconds, but until the new value is ready
+    the old one is served along with the time it was computed at.
+    """
+    TTL = 60
+    # max seconds a request waits for a usage that was never computed
+    WAIT_TIMEOUT = 2
+    MAX_SNAPS = 8192
+    MAX_HEADS = 1024
+
+    # disable caching while running unit tests
+    if 'UNITTEST' in os.environ:
+        TTL = 0
+
+    _lock = RLock()
+    # (pool, namespace, image id, previous snap id, snap id) -> used bytes
+    _snaps: 'OrderedDict[tuple, int]' = OrderedDict()
+    # (pool, namespace, image id) -> (newest snap id, image size, used bytes, timestamp)
+    _heads: 'OrderedDict[tuple, tuple]' = OrderedDict()
+    _pending: dict = {}
+    _executor = ThreadPoolExecutor(max_workers=2)
+
+    @staticmethod
+    def _diff_usage(image, from_snap, size):
         class DUCallback(object):
             def __init__(self):
                 self.used_size = 0
@@ -285,24 +322,115 @@ class RbdService(object):
                 if exists:
                     self.used_size += length
 
-        snap_map = {}
-        prev_snap = None
-        total_used_size = 0
-        for _, size, name in snaps:
-            image.set_snap(name)
-            du_callb = DUCallback()
-            image.diff_iterate(0, size, prev_snap, du_callb,
-                               whole_object=whole_object)
-            snap_map[name] = du_callb.used_size
-            total_used_size += du_callb.used_size
-            prev_snap = name
+        du_callb = DUCallback()
+        image.diff_iterate(0, size, from_snap, du_callb, whole_object=True)
+        return du_callb.used_size
 
-        return total_used_size, snap_map
+    @classmethod
+    def _cached(cls, image_key, snaps, size):
+        """
+        :return: the cached usage, and whether it needs to be computed again
+        """
+        with cls._lock:
+            snap_usage = {}
+            prev_snap_id = None
+            for snap_id, _, _ in snaps:
+                snap_key = image_key + (prev_snap_id, snap_id)
+                if snap_key not in cls._snaps:
+                    return None, True
+                cls._snaps.move_to_end(snap_key)
+                snap_usage[snap_id] = cls._snaps[snap_key]
+                prev_snap_id = snap_id
+            head = cls._heads.get(image_key)
+            if head is None or head[:2] != (prev_snap_id, size):
+                return None, True
+            cls._heads.move_to_end(image_key)
+            stale = time.time() - head[3] >= cls.TTL
+            return RbdDiskUsage(snap_usage, head[2], head[3]), stale
+
+    @classmethod
+    def _compute(cls, image_key, image_name, snaps, size):
+        pool_name, namespace, _ = image_key
+        try:
+            with mgr.rados.open_ioctx(pool_name) as ioctx:
+                ioctx.set_namespace(namespace)
+                with rbd.Image(ioctx, image_name, read_only=True) as img:
+                    prev_snap_id, prev_snap_name = None, None
+                    for snap_id, snap_size, snap_name in snaps:
+                        snap_key = image_key + (prev_snap_id, snap_id)
+                        with cls._lock:
+                            known = snap_key in cls._snaps
+                        if not known:
+                            img.set_snap(snap_name)
+                            used = cls._diff_usage(img, prev_snap_name, snap_size)
+                            with cls._lock:
+                                cls._snaps[snap_key] = used
+                                if len(cls._snaps) > cls.MAX_SNAPS:
+                                    cls._snaps.popitem(last=False)
+                        prev_snap_id, prev_snap_name = snap_id, snap_name
+                    img.set_snap(None)
+                    used = cls._diff_usage(img, prev_snap_name, size)
+                    with cls._lock:
+                        cls._heads[image_key] = (prev_snap_id, size, used, time.time())
+                        if len(cls._heads) > cls.MAX_HEADS:
+                            cls._heads.popitem(last=False)
+        except (rados.Error, rbd.Error) as e:
+            logger.warning('Failed to compute the disk usage of %s: %s',
+                           get_image_spec(pool_name, namespace, image_name), e)
+        finally:
+            with cls._lock:
+                cls._pending.pop(image_key, None)
+
+    @classmethod
+    def get(cls, pool_name, namespace, image_id, image_name, snaps, size):
+        """
+        :param snaps: (id, size, name) of the snapshots, oldest first
+        :param size: the size of the image HEAD
+        :return: the cached usage, or None if it is not known (yet)
+        """
+        image_key = (pool_name, namespace or '', image_id)
+        usage, refresh = cls._cached(image_key, snaps, size)
+        if not refresh:
+            return usage
+        with cls._lock:
+            future = cls._pending.get(image_key)
+            if future is None:
+                future = cls._executor.submit(cls._compute, image_key, image_name, snaps, size)
+                cls._pending[image_key] = future
+        if usage is not None:
+            return usage
+        try:
+            future.result(timeout=cls.WAIT_TIMEOUT)
+        except FutureTimeoutError:
+            return None
+        return cls._cached(image_key, snaps, size)[0]
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._snaps.clear()
+            cls._heads.clear()
+
+
+class RbdService(object):
+    _rbd_inst = rbd.RBD()
+
+    # set of image features that can be enable on existing images
+    ALLOW_ENABLE_FEATURES = {"exclusive-lock", "object-map", "fast-diff", "journaling"}
+
+    # set of image features that can be disabled on existing images
+    ALLOW_DISABLE_FEATURES = {"exclusive-lock", "object-map", "fast-diff", "deep-flatten",
+                              "journaling"}
+
+    # max number of images that are opened concurrently when listing images,
+    # shared by all the requests
+    IMAGE_INFO_WORKERS = 8
+    _image_info_executor = ThreadPoolExecutor(max_workers=IMAGE_INFO_WORKERS)
 
     @classmethod
     def _rbd_image(cls, ioctx, pool_name, namespace, image_name,  # pylint: disable=R0912
-                   omit_usage=False):
-        with rbd.Image(ioctx, image_name) as img:
+                   omit_usage=False, read_only=False):
+        with rbd.Image(ioctx, image_name, read_only=read_only) as img:
             stat = img.stat()
             mirror_info = img.mirror_image_get_info()
             mirror_mode = img.mirror_image_get_mode()
@@ -389,27 +517,24 @@ class RbdService(object):
 
             # disk usage
             img_flags = img.flags()
+            stat['total_disk_usage'] = None
+            stat['disk_usage'] = None
+            stat['disk_usage_timestamp'] = None
             if not omit_usage and 'fast-diff' in stat['features_name'] and \
                     not rbd.RBD_FLAG_FAST_DIFF_INVALID & img_flags and \
                     mirror_mode != rbd.RBD_MIRROR_IMAGE_MODE_SNAPSHOT:
                 snaps = [(s['id'], s['size'], s['name'])
                          for s in stat['snapshots']]
                 snaps.sort(key=lambda s: s[0])
-                snaps += [(snaps[-1][0] + 1 if snaps else 0, stat['size'], None)]
-                total_prov_bytes, snaps_prov_bytes = cls._rbd_disk_usage(
-                    img, snaps, True)
-                stat['total_disk_usage'] = total_prov_bytes
-                for snap, prov_bytes in snaps_prov_bytes.items():
-                    if snap is None:
-                        stat['disk_usage'] = prov_bytes
-                        continue
+                usage = RbdDiskUsageCache.get(pool_name, namespace, stat['id'], image_name,
+                                              snaps, stat['size'])
+                if usage is not None:
+                    stat['total_disk_usage'] = usage.total
+                    stat['disk_usage'] = usage.head
+                    stat['disk_usage_timestamp'] = "{}Z".format(
+                        datetime.utcfromtimestamp(usage.timestamp).isoformat())
                     for ss in stat['snapshots']:
-                        if ss['name'] == snap:
-                            ss['disk_usage'] = prov_bytes
-                            break
-            else:
-                stat['total_disk_usage'] = None
-                stat['disk_usage'] = None
+                        ss['disk_usage'] = usage.snaps.get(ss['id'])
 
             stat['configuration'] = RbdConfiguration(
                 pool_ioctx=ioctx, image_name=image_name, image_ioctx=img).list()
@@ -459,7 +584,7 @@ class RbdService(object):
 
     @classmethod
     def _rbd_image_stat(cls, ioctx, pool_name, namespace, image_name):
-        return cls._rbd_image(ioctx, pool_name, namespace, image_name)
+        return cls._rbd_image(ioctx, pool_name, namespace, image_name, read_only=True)
 
     @classmethod
     def _rbd_image_stat_removing(cls, ioctx, pool_name, namespace, image_id):
@@ -476,6 +601,42 @@ class RbdService(object):
         raise rbd.ImageNotFound('No image {} in status `REMOVING` found.'.format(img_spec),
                                 errno=errno.ENOENT)
 
+    @classmethod
+    @ttl_cache(10, maxsize=1024, label=RBD_IMAGE_INFO_CACHE)
+    def _rbd_image_info(cls, pool_name, namespace, image_id, image_name):
+        """
+        Collect stat, configuration and metadata of an image, opening it
+        only once.
+
+        :return: the image info, or None if the image does not exist anymore
+        """
+        ioctx = cls.get_ioctx(pool_name, namespace)
+        # Check if the RBD has been deleted partially. This happens for example if
+        # the deletion process of the RBD has been started and was interrupted.
+        try:
+            return cls._rbd_image_stat(ioctx, pool_name, namespace, image_name)
+        except rbd.ImageNotFound:
+            try:
+                return cls._rbd_image_stat_removing(ioctx, pool_name, namespace, image_id)
+            except rbd.ImageNotFound:
+                return None
+
+    @classmethod
+    def _rbd_image_infos(cls, image_refs):
+        """
+        Fetch the info of the given images concurrently, keeping the order
+        of `image_refs` and skipping the images that were removed meanwhile.
+        """
+        if not image_refs:
+            return []
+
+        def _info(image_ref):
+            return cls._rbd_image_info(image_ref['pool_name'], image_ref['namespace'],
+                                       image_ref['id'], image_ref['name'])
+
+        infos = list(cls._image_info_executor.map(_info, image_refs))
+        return [info for info in infos if info is not None]
+
     @classmethod
     def _rbd_pool_image_refs(cls, pool_names: List[str], namespace: Optional[str] = None):
         joint_refs = []
@@ -488,33 +649,24 @@ class RbdService(object):
                     joint_refs.append(image)
         return joint_refs
 
+    @classmethod
+    @ttl_cache(30, label=RBD_IMAGE_REFS_CACHE_REFERENCE)
+    def _rbd_pool_image_index(cls, pool_names: Tuple[str, ...], namespace: Optional[str] = None):
+        # Shares the label of the image refs cache, so that creating, renaming
+        # or removing images drops the index as well.
+        return IndexedList(cls._rbd_pool_image_refs(list(pool_names), namespace),
+                           searchable_params=['name', 'pool_name', 'namespace'])
+
     @classmethod
     def rbd_pool_list(cls, pool_names: List[str], namespace: Optional[str] = None, offset: int = 0,
                       limit: int = 5, search: str = '', sort: str = ''):
-        image_refs = cls._rbd_pool_image_refs(pool_names, namespace)
+        image_refs = cls._rbd_pool_image_index(tuple(pool_names), namespace)
         params = ['name', 'pool_name', 'namespace']
         paginator = ListPaginator(offset, limit, sort, search, image_refs,
                                   searchable_params=params, sortable_params=params,
                                   default_sort='+name')
 
-        result = []
-        for image_ref in paginator.list():
-            with mgr.rados.open_ioctx(image_ref['pool_name']) as ioctx:
-                ioctx.set_namespace(image_ref['namespace'])
-                # Check if the RBD has been deleted partially. This happens for example if
-                # the deletion process of the RBD has been started and was interrupted.
-
-                try:
-                    stat = cls._rbd_image_stat(
-                        ioctx, image_ref['pool_name'], image_ref['namespace'], image_ref['name'])
-                except rbd.ImageNotFound:
-                    try:
-                        stat = cls._rbd_image_stat_removing(
-                            ioctx, image_ref['pool_name'], image_ref['namespace'], image_ref['id'])
-                    except rbd.ImageNotFound:
-                        continue
-                result.append(stat)
-        return result, paginator.get_count()
+        return cls._rbd_image_infos(list(paginator.list())), paginator.get_count()
 
     @classmethod
     def get_image(cls, image_spec, omit_usage=False):
@@ -529,6 +681,7 @@ class RbdService(object):
 
     @classmethod
     @ttl_cache_invalidator(RBD_IMAGE_REFS_CACHE_REFERENCE)
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def create(cls, name, pool_name, size, namespace=None,
                obj_size=None, features=None, stripe_unit=None, stripe_count=None,
                data_pool=None, configuration=None, metadata=None):
@@ -557,6 +710,7 @@ class RbdService(object):
 
     @classmethod
     @ttl_cache_invalidator(RBD_IMAGE_REFS_CACHE_REFERENCE)
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def set(cls, image_spec, name=None, size=None, features=None,
             configuration=None, metadata=None, enable_mirror=None, primary=None,
             force=False, resync=False, mirror_mode=None, image_mirror_mode=None,
@@ -636,6 +790,7 @@ class RbdService(object):
 
     @classmethod
     @ttl_cache_invalidator(RBD_IMAGE_REFS_CACHE_REFERENCE)
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def delete(cls, image_spec):
         pool_name, namespace, image_name = parse_image_spec(image_spec)
 
@@ -649,6 +804,7 @@ class RbdService(object):
 
     @classmethod
     @ttl_cache_invalidator(RBD_IMAGE_REFS_CACHE_REFERENCE)
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def copy(cls, image_spec, dest_pool_name, dest_namespace, dest_image_name,
              snapshot_name=None, obj_size=None, features=None,
              stripe_unit=None, stripe_count=None, data_pool=None,
@@ -682,6 +838,7 @@ class RbdService(object):
 
     @classmethod
     @ttl_cache_invalidator(RBD_IMAGE_REFS_CACHE_REFERENCE)
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def flatten(cls, image_spec):
         def _flatten(ioctx, image):
             image.flatten()
@@ -690,6 +847,7 @@ class RbdService(object):
         return rbd_image_call(pool_name, namespace, image_name, _flatten)
 
     @classmethod
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def move_image_to_trash(cls, image_spec, delay):
         pool_name, namespace, image_name = parse_image_spec(image_spec)
         rbd_inst = cls._rbd_inst
@@ -699,6 +857,7 @@ class RbdService(object):
 class RbdSnapshotService(object):
 
     @classmethod
+    @ttl_cache_invalidator(RBD_IMAGE_INFO_CACHE)
     def remove_snapshot(cls, image_spec, snapshot_name, unprotect=False):
         def _remove_snapshot(ioctx, img, snapshot_name, unprotect):
             if unprotect:
@@ -7,22 +7,25 @@ import json
 import logging
 import os
 import re
+import threading
 import time
 import uuid
 import xml.etree.ElementTree as ET  # noqa: N814
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from subprocess import SubprocessError
 from urllib.parse import urlparse
 
 import requests
 from mgr_util import build_url, name_to_config_section
+from requests.adapters import HTTPAdapter
 
 from .. import mgr
 from ..awsauth import S3Auth
 from ..controllers.multi_cluster import MultiCluster
 from ..exceptions import DashboardException
-from ..rest_client import RequestException, RestClient
+from ..rest_client import RequestException, RestClient, TimeoutRequestsSession
 from ..settings import Settings
 from ..tools import dict_contains_path, dict_get, json_str_to_object, str_to_bool
 from .ceph_service import CephService
@@ -30,7 +33,7 @@ from .orchestrator import OrchClient
 from .service import RgwServiceManager
 
 try:
-    from typing import Any, Dict, List, Optional, Tuple, Union
+    from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
 except ImportError:
     pass  # For typing only
 
@@ -228,6 +231,15 @@ class RgwClient(RestClient):
     got_keys_from_config: bool
     userid: str
 
+    # keep-alive connections kept per daemon, shared by all its users
+    POOL_SIZE = 16
+    # max number of requests sent concurrently by fan_out()
+    MAX_IN_FLIGHT = 16
+
+    _sessions: Dict[Tuple[str, int, bool], TimeoutRequestsSession] = {}
+    _instances_lock = threading.RLock()
+    _executor = ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT, thread_name_prefix='rgw_client')
+
     @staticmethod
     def _handle_response_status_code(status_code: int) -> int:
         # Do not return auth error codes (so they are not handled as ceph API user auth errors).
@@ -307,24 +319,35 @@ class RgwClient(RestClient):
                 logger.exception('Failed to determine default RGW daemon: %s', str(e))
                 daemon_name = next(iter(daemon_keys))
 
-        # Discard all cached instances if any rgw setting has changed
-        if RgwClient._rgw_settings_snapshot != RgwClient._rgw_settings():
-            RgwClient._rgw_settings_snapshot = RgwClient._rgw_settings()
-            RgwClient.drop_instance()
-
-        if daemon_name not in RgwClient._config_instances:
+        # Creating an instance talks to the RGW, which is done outside of
+        # the lock so that a slow RGW does not hold up the callers that find
+        # their instance cached. Should two callers race, the instance of the
+        # first one is kept.
+        with RgwClient._instances_lock:
+            # Discard all cached instances if any rgw setting has changed
+            if RgwClient._rgw_settings_snapshot != RgwClient._rgw_settings():
+                RgwClient._rgw_settings_snapshot = RgwClient._rgw_settings()
+                RgwClient.drop_instance()
+            config_instance = RgwClient._config_instances.get(daemon_name)  # type: ignore
+
+        if config_instance is None:
             connection_info = RgwClient._get_daemon_connection_info(daemon_name)  # type: ignore
-            RgwClient._config_instances[daemon_name] = RgwClient(connection_info['access_key'],  # type: ignore  # noqa E501  #pylint: disable=line-too-long
-                                                                 connection_info['secret_key'],
-                                                                 daemon_name)  # type: ignore
+            instance = RgwClient(connection_info['access_key'], connection_info['secret_key'],
+                                 daemon_name)  # type: ignore
+            with RgwClient._instances_lock:
+                config_instance = RgwClient._config_instances.setdefault(
+                    daemon_name, instance)  # type: ignore
+
+        if not userid or userid == config_instance.userid:
+            return config_instance
 
-        if not userid or userid == RgwClient._config_instances[daemon_name].userid:  # type: ignore
-            return RgwClient._config_instances[daemon_name]  # type: ignore
+        with RgwClient._instances_lock:
+            user_instance = RgwClient._user_instances.get(
+                daemon_name, {}).get(userid)  # type: ignore
 
-        if daemon_name not in RgwClient._user_instances \
-                or userid not in RgwClient._user_instances[daemon_name]:
+        if user_instance is None:
             # Get the access and secret keys for the specified user.
-            keys = RgwClient._config_instances[daemon_name].get_user_keys(userid)  # type: ignore
+            keys = config_instance.get_user_keys(userid)
             if not keys:
                 raise RequestException(
                     "User '{}' does not have any keys configured.".format(
@@ -333,9 +356,11 @@ class RgwClient(RestClient):
                                  keys['secret_key'],
                                  daemon_name,  # type: ignore
                                  userid)
-            RgwClient._user_instances.update({daemon_name: {userid: instance}})  # type: ignore
+            with RgwClient._instances_lock:
+                user_instance = RgwClient._user_instances.setdefault(
+                    daemon_name, {}).setdefault(userid, instance)  # type: ignore
 
-        return RgwClient._user_instances[daemon_name][userid]  # type: ignore
+        return user_instance
 
     @staticmethod
     def admin_instance(daemon_name: Optional[str] = None) -> 'RgwClient':
@@ -354,6 +379,36 @@ class RgwClient(RestClient):
         else:
             RgwClient._config_instances.clear()
             RgwClient._user_instances.clear()
+            RgwClient._sessions.clear()
+
+    @staticmethod
+    def _get_session(daemon: RgwDaemon, ssl_verify: bool) -> TimeoutRequestsSession:
+        """
+        Get the session of a daemon. Its connections are kept alive and
+        reused by all the users, as the credentials are sent per request.
+        """
+        key = (daemon.host, daemon.port, ssl_verify)
+        with RgwClient._instances_lock:
+            if key not in RgwClient._sessions:
+                session = TimeoutRequestsSession()
+                session.verify = ssl_verify
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RgwClient.POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                RgwClient._sessions[key] = session
+            return RgwClient._sessions[key]
+
+    @staticmethod
+    def fan_out(calls: Dict[Hashable, Callable[[], Any]]) -> Dict[Hashable, Any]:
+        """
+        Run independent requests concurrently, at most `MAX_IN_FLIGHT` of
+        them at a time. Must not be used from within one of the calls.
+
+        :return: the result of each call, by the key of the call
+        :raises: the exception of the first failing call
+        """
+        futures = {key: RgwClient._executor.submit(call) for key, call in calls.items()}
+        return {key: future.result() for key, future in futures.items()}
 
     def _reset_login(self):
         if self.got_keys_from_config:
@@ -386,6 +441,7 @@ class RgwClient(RestClient):
                                         daemon.ssl,
                                         self.auth,
                                         ssl_verify=ssl_verify)
+        self.session = RgwClient._get_session(daemon, ssl_verify)
         self.got_keys_from_config = not user_id
         try:
             self.userid = self._get_user_id(self.admin_path) if self.got_keys_from_config \
@@ -1,7 +1,10 @@
 
+import threading
 import unittest
 
+from ..exceptions import ViewCacheNoDataException
 from ..plugins.ttl_cache import CacheManager, TTLCache
+from ..tools import ViewCache
 
 
 class TTLCacheTest(unittest.TestCase):
@@ -46,3 +49,49 @@ class TTLCacheManagerTest(unittest.TestCase):
         cache0 = CacheManager.get(ref)
         cache1 = CacheManager.get(ref)
         self.assertEqual(id(cache0), id(cache1))
+
+
+class ViewCacheTest(unittest.TestCase):
+    def test_single_flight(self):
+        calls = []
+        release = threading.Event()
+        cache = ViewCache(timeout=0)
+
+        @cache
+        def _slow():
+            calls.append(1)
+            release.wait(5)
+            return 'value'
+
+        for _ in range(3):
+            with self.assertRaises(ViewCacheNoDataException):
+                _slow()
+        future = cache.cache_by_args[()].future
+        release.set()
+        future.result()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(_slow(), (ViewCache.VALUE_OK, 'value'))
+
+    def test_lru_eviction(self):
+        @ViewCache(maxsize=2)
+        def _get(key):
+            return key
+
+        for key in ['a', 'b', 'a', 'c']:
+            self.assertEqual(_get(key), (ViewCache.VALUE_OK, key))
+        metrics = [m for m in ViewCache.get_metrics() if m['name'].endswith('_get')][0]
+        self.assertEqual(metrics['entries'], 2)
+        self.assertEqual(metrics['evictions'], 1)
+        self.assertEqual(metrics['hits'], 1)
+        self.assertEqual(metrics['misses'], 3)
+
+    def test_ttl_eviction(self):
+        @ViewCache(ttl=0)
+        def _get_ttl(key):
+            return key
+
+        _get_ttl('a')
+        _get_ttl('b')
+        metrics = [m for m in ViewCache.get_metrics() if m['name'].endswith('_get_ttl')][0]
+        self.assertEqual(metrics['entries'], 1)
+        self.assertEqual(metrics['evictions'], 1)
@@ -66,6 +66,39 @@ class CephServiceTest(unittest.TestCase):
     def test_get_pg_status_without_match(self):
         self.assertEqual(self.service.get_pool_pg_status('no-pool'), {})
 
+    @mock.patch('dashboard.mgr.get_latest_counters')
+    def test_get_latest_batch(self, get_latest_counters):
+        get_latest_counters.return_value = {
+            'osd': {
+                'schema': [{'path': 'osd.numpg'}, {'path': 'osd.op_r_latency'}],
+                'daemons': {'0': [12, [300, 4]], '1': [None, [0, 0]]},
+            },
+        }
+        self.assertEqual(
+            self.service.get_latest_batch('osd', ['0', '1', '2'],
+                                          ['osd.numpg', 'osd.op_r_latency', 'osd.other']),
+            {
+                '0': {'osd.numpg': 12, 'osd.op_r_latency': 300, 'osd.other': 0},
+                '1': {'osd.numpg': 0, 'osd.op_r_latency': 0, 'osd.other': 0},
+                '2': {'osd.numpg': 0, 'osd.op_r_latency': 0, 'osd.other': 0},
+            })
+        get_latest_counters.assert_called_once_with(['osd'], 5, svc_ids=['0', '1', '2'])
+
+    @mock.patch('dashboard.mgr.get_counters')
+    def test_get_rates_of_daemons(self, get_counters):
+        get_counters.return_value = {
+            '0': {'osd.op_w': [[10, 5], [20, 25]], 'osd.op_r': []},
+            '1': {'osd.op_w': [], 'osd.op_r': []},
+        }
+        self.assertEqual(
+            self.service.get_rates_of_daemons('osd', ['0', '1', '2'], ['osd.op_w', 'osd.op_r']),
+            {
+                '0': {'osd.op_w': [(20, 2.0)], 'osd.op_r': []},
+                '1': {'osd.op_w': [], 'osd.op_r': []},
+                '2': {'osd.op_w': [], 'osd.op_r': []},
+            })
+        get_counters.assert_called_once_with('osd', ['0', '1', '2'], ['osd.op_w', 'osd.op_r'])
+
 
 @contextmanager
 def mock_smart_data(data):
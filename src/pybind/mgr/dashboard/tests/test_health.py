@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from ..controllers._version import APIVersion
+from ..controllers.health import Health, HealthData
+from ..services.health import HealthSnapshot
+from . import ControllerTestCase  # pylint: disable=no-name-in-module
+
+
+class HealthSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        HealthSnapshot._values.clear()  # pylint: disable=protected-access
+        patcher = mock.patch('dashboard.services.health.NotificationQueue')
+        self.queue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_computed_once_per_change(self):
+        compute = mock.Mock(side_effect=['HEALTH_OK', 'HEALTH_WARN'])
+        self.assertEqual(HealthSnapshot.get(True, 'health', compute), 'HEALTH_OK')
+        self.assertEqual(HealthSnapshot.get(True, 'health', compute), 'HEALTH_OK')
+        self.assertEqual(compute.call_count, 1)
+
+        # pylint: disable=protected-access
+        HealthSnapshot._on_notification('osd_map', '')
+        self.assertEqual(HealthSnapshot.get(True, 'health', compute), 'HEALTH_OK')
+        HealthSnapshot._on_notification('health', '')
+        self.assertEqual(HealthSnapshot.get(True, 'health', compute), 'HEALTH_WARN')
+        self.assertEqual(compute.call_count, 2)
+
+    def test_sections_without_notifications_expire(self):
+        compute = mock.Mock(side_effect=[1, 2])
+        with mock.patch.object(HealthSnapshot, 'TTL', 60):
+            self.assertEqual(HealthSnapshot.get(True, 'hosts', compute), 1)
+            self.assertEqual(HealthSnapshot.get(True, 'hosts', compute), 1)
+        with mock.patch.object(HealthSnapshot, 'TTL', 0):
+            self.assertEqual(HealthSnapshot.get(True, 'hosts', compute), 2)
+
+    def test_version_changes_with_the_value(self):
+        compute = mock.Mock(side_effect=[1, 1, 2])
+        # pylint: disable=protected-access
+        self.assertEqual(HealthSnapshot.get_versioned(True, 'health', compute), (1, 0))
+        HealthSnapshot._on_notification('health', '')
+        self.assertEqual(HealthSnapshot.get_versioned(True, 'health', compute), (1, 0))
+        HealthSnapshot._on_notification('health', '')
+        self.assertEqual(HealthSnapshot.get_versioned(True, 'health', compute), (2, 1))
+
+        self.assertEqual(HealthSnapshot.etag(True, {'health': 1}),
+                         HealthSnapshot.etag(True, {'health': 1}))
+        self.assertNotEqual(HealthSnapshot.etag(True, {'health': 1}),
+                            HealthSnapshot.etag(True, {'health': 0}))
+        self.assertNotEqual(HealthSnapshot.etag(True, {'health': 1}),
+                            HealthSnapshot.etag(False, {'health': 1}))
+        self.assertNotEqual(HealthSnapshot.etag(True, {'health': 1}),
+                            HealthSnapshot.etag(True, {'health': 1, 'hosts': 0}))
+
+    @mock.patch.object(HealthSnapshot, '_registered', False)
+    def test_register_retried_after_failure(self):
+        self.queue.register.side_effect = [Exception('not ready')] + [None] * 10
+        with self.assertRaises(Exception):
+            HealthSnapshot.register()
+        self.assertFalse(HealthSnapshot._registered)  # pylint: disable=protected-access
+        HealthSnapshot.register()
+        self.assertTrue(HealthSnapshot._registered)  # pylint: disable=protected-access
+        calls = self.queue.register.call_count
+        HealthSnapshot.register()
+        self.assertEqual(self.queue.register.call_count, calls)
+
+
+class HealthControllerTest(ControllerTestCase):
+
+    @classmethod
+    def setup_server(cls):
+        cls.setup_controllers([Health])
+
+    def setUp(self):
+        HealthSnapshot._values.clear()  # pylint: disable=protected-access
+        patcher = mock.patch.object(HealthData, 'sections', return_value=['health'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get_minimal(self, etag=None):
+        headers = [('Accept', APIVersion.DEFAULT.to_mime_type())]
+        if etag:
+            headers.append(('If-None-Match', etag))
+        self._get('/api/health/minimal', headers=headers)
+        return {k.lower(): v for k, v in self.headers}.get('etag')
+
+    @mock.patch.object(HealthData, 'basic_health')
+    def test_minimal_not_modified(self, basic_health):
+        basic_health.return_value = {'status': 'HEALTH_OK'}
+        etag = self._get_minimal()
+        self.assertStatus(200)
+        self.assertJsonBody({'health': {'status': 'HEALTH_OK'}})
+
+        self.assertIsNotNone(etag)
+        self.assertEqual(self._get_minimal(etag), etag)
+        self.assertStatus(304)
+
+        basic_health.return_value = {'status': 'HEALTH_WARN'}
+        HealthSnapshot._on_notification('health', '')  # pylint: disable=protected-access
+        self.assertNotEqual(self._get_minimal(etag), etag)
+        self.assertStatus(200)
+        self.assertJsonBody({'health': {'status': 'HEALTH_WARN'}})
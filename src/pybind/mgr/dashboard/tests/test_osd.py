@@ -235,15 +235,27 @@ class OsdTest(ControllerTestCase):
                 return {'nodes': OsdHelper.gen_osdmap_tree_nodes(osdmap_tree_node_ids)}
             raise NotImplementedError()
 
-        def mgr_get_counter_replacement(svc_type, _, path):
+        def mgr_get_counters_replacement(svc_type, svc_ids, paths):
             if svc_type == 'osd':
-                return {path: OsdHelper.gen_mgr_get_counter()}
+                return {svc_id: {path: OsdHelper.gen_mgr_get_counter() for path in paths}
+                        for svc_id in svc_ids}
+            raise NotImplementedError()
+
+        def mgr_get_latest_counters_replacement(svc_types, _, svc_ids):
+            if svc_types == ['osd']:
+                return {'osd': {
+                    'schema': [{'path': path} for path in Osd.GAUGE_STATS],
+                    'daemons': {str(i): [1146609664] * len(Osd.GAUGE_STATS)
+                                for i in osd_stat_ids if str(i) in svc_ids}
+                }}
             raise NotImplementedError()
 
         with mock.patch.object(Osd, 'get_osd_map', return_value=OsdHelper.gen_osdmap(osdmap_ids)):
             with mock.patch.object(mgr, 'get', side_effect=mgr_get_replacement):
-                with mock.patch.object(mgr, 'get_counter', side_effect=mgr_get_counter_replacement):
-                    with mock.patch.object(mgr, 'get_latest', return_value=1146609664):
+                with mock.patch.object(mgr, 'get_counters',
+                                       side_effect=mgr_get_counters_replacement):
+                    with mock.patch.object(mgr, 'get_latest_counters',
+                                           side_effect=mgr_get_latest_counters_replacement):
                         with mock.patch.object(Osd, 'get_removing_osds', return_value=[]):
                             yield
 
@@ -279,6 +291,22 @@ class OsdTest(ControllerTestCase):
             self.assertEqual(len(self.json_body()), 2, 'It should display two OSDs without failure')
             self.assertStatus(200)
 
+    def test_osd_list_decorated(self):
+        with self._mock_osd_list(osd_stat_ids=[0, 1], osdmap_tree_node_ids=[0, 1],
+                                 osdmap_ids=[0, 1]):
+            self._get('/api/osd?offset=1&limit=1', version=APIVersion(1, 1))
+            self.assertStatus(200)
+            self.assertHeader('X-Total-Count', '2')
+            osd, = self.json_body()
+            self.assertEqual(osd['id'], 1)
+            self.assertEqual(osd['osd_stats']['osd'], 1)
+            self.assertEqual(osd['tree']['id'], 1)
+            self.assertEqual(osd['host']['id'], -3)
+            self.assertEqual(osd['stats']['numpg'], 1146609664)
+            self.assertEqual(osd['stats']['op_w'], 0.0)
+            self.assertEqual(len(osd['stats_history']['op_r']), 3)
+            self.assertEqual(osd['operational_status'], 'working')
+
     @mock.patch('dashboard.controllers.osd.CephService')
     def test_osd_scrub(self, ceph_service):
         self._task_post('/api/osd/1/scrub', {'deep': True})
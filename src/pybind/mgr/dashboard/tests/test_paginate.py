@@ -0,0 +1,90 @@
+import unittest
+
+from ..services._paginate import IndexedList, IndexedListCache, ListPaginator
+
+
+class ListPaginatorTest(unittest.TestCase):
+    ITEMS = [
+        {'name': 'img-b', 'pool_name': 'rbd', 'size': 3},
+        {'name': 'img-a', 'pool_name': 'rbd2', 'size': 1},
+        {'name': 'other', 'pool_name': 'rbd', 'size': 2},
+        {'name': 'img-c', 'pool_name': 'img-pool', 'size': 1},
+    ]
+    PARAMS = ['name', 'pool_name']
+
+    def _list(self, input_list, offset=0, limit=-1, sort='', search=''):
+        paginator = ListPaginator(offset, limit, sort, search, input_list,
+                                  default_sort='+name', searchable_params=self.PARAMS,
+                                  sortable_params=self.PARAMS + ['size'])
+        return [item['name'] for item in paginator.list()], paginator.get_count()
+
+    def test_sort(self):
+        self.assertEqual(self._list(self.ITEMS),
+                         (['img-a', 'img-b', 'img-c', 'other'], 4))
+        self.assertEqual(self._list(self.ITEMS, sort='-name'),
+                         (['other', 'img-c', 'img-b', 'img-a'], 4))
+        # equal keys keep their original order, also when sorting descending
+        self.assertEqual(self._list(self.ITEMS, sort='+size'),
+                         (['img-a', 'img-c', 'other', 'img-b'], 4))
+        self.assertEqual(self._list(self.ITEMS, sort='-size'),
+                         (['img-b', 'other', 'img-a', 'img-c'], 4))
+        # unknown sort params fall back to the default sort
+        self.assertEqual(self._list(self.ITEMS, sort='+unknown'),
+                         (['img-a', 'img-b', 'img-c', 'other'], 4))
+
+    def test_page(self):
+        self.assertEqual(self._list(self.ITEMS, offset=1, limit=2), (['img-b', 'img-c'], 4))
+        self.assertEqual(self._list(self.ITEMS, offset=3, limit=2), (['other'], 4))
+
+    def test_search(self):
+        # an item matching in several params is only listed once
+        self.assertEqual(self._list(self.ITEMS, search='img'),
+                         (['img-a', 'img-b', 'img-c'], 3))
+        self.assertEqual(self._list(self.ITEMS, search='rbd2'), (['img-a'], 1))
+        self.assertEqual(self._list(self.ITEMS, search='nomatch'), ([], 0))
+
+    def test_indexed_list_reuses_search_results(self):
+        index = IndexedList(self.ITEMS, self.PARAMS)
+        self.assertEqual(self._list(index, search='img', limit=1), (['img-a'], 3))
+        self.assertEqual(self._list(index, search='img-', limit=1), (['img-a'], 3))
+        self.assertEqual(self._list(index, search='img-c'), (['img-c'], 1))
+        self.assertIs(index.select('name', False, 'img'), index.select('name', False, 'img'))
+
+    def test_indexed_list_only_checks_candidates(self):
+        items = [{'name': 'img-{}'.format(i), 'pool_name': 'rbd'} for i in range(100)]
+        items.append({'name': 'unique', 'pool_name': 'rbd'})
+        index = IndexedList(items, self.PARAMS)
+        checked = []
+        matches = index._matches
+
+        def _matches(pos, search):
+            checked.append(pos)
+            return matches(pos, search)
+
+        index._matches = _matches  # type: ignore
+        self.assertEqual(self._list(index, search='niq'), (['unique'], 1))
+        self.assertEqual(checked, [100])
+        # the candidates are served in sort order
+        self.assertEqual(self._list(index, search='img-1', sort='-name', limit=3),
+                         (['img-19', 'img-18', 'img-17'], 11))
+        # terms shorter than an n-gram are checked against every item
+        del checked[:]
+        self.assertEqual(self._list(index, search='un'), (['unique'], 1))
+        self.assertEqual(len(checked), 101)
+
+    def test_indexed_list_cache(self):
+        cache = IndexedListCache()
+        cache.ttl = 60
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return IndexedList(self.ITEMS)
+
+        first = cache.get(1, loader)
+        self.assertIs(cache.get(1, loader), first)
+        self.assertIsNot(cache.get(2, loader), first)
+        self.assertEqual(len(loads), 2)
+        cache.clear()
+        cache.get(2, loader)
+        self.assertEqual(len(loads), 3)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from unittest import mock
+
+from ..controllers.rbd import RbdTrash
+from ..tests import ControllerTestCase
+from ..tools import NotificationQueue, TaskManager
+
+
+class RbdTrashControllerTest(ControllerTestCase):
+    @classmethod
+    def setup_server(cls):
+        cls.setup_controllers([RbdTrash])
+        NotificationQueue.start_queue()
+        TaskManager.init()
+
+    @classmethod
+    def tearDownClass(cls):
+        NotificationQueue.stop()
+
+    @staticmethod
+    def _trash_image(image_id, deferment_end_time):
+        return {'id': image_id, 'name': 'img{}'.format(image_id), 'namespace': '',
+                'deferment_end_time': deferment_end_time}
+
+    @mock.patch('dashboard.controllers.rbd.rbd_call')
+    @mock.patch.object(RbdTrash, '_trash_list')
+    def test_purge_reports_progress(self, trash_list, rbd_call):
+        trash_list.return_value = [{
+            'pool_name': 'rbd', 'status': 0,
+            'value': [self._trash_image('1', '2000-01-01T00:00:00Z'),
+                      self._trash_image('2', '9999-01-01T00:00:00Z'),
+                      self._trash_image('3', '2000-01-01T00:00:00Z')]
+        }, {
+            'pool_name': 'rbd2', 'status': 0,
+            'value': [self._trash_image('4', '2000-01-01T00:00:00Z')]
+        }]
+        progress = []
+        rbd_call.side_effect = lambda *args: progress.append(
+            TaskManager.current_task().progress)
+
+        self._task_post('/api/block/image/trash/purge')
+        self.assertStatus(200)
+        self.assertEqual([c[0][:2] + c[0][3:] for c in rbd_call.call_args_list],
+                         [('rbd', '', '1', 0), ('rbd', '', '3', 0), ('rbd2', '', '4', 0)])
+        # the progress is derived from the images removed so far
+        self.assertEqual(progress, [0, 33, 66])
@@ -11,8 +11,8 @@ except ImportError:
     import unittest.mock as mock
 
 from .. import mgr
-from ..services.rbd import RbdConfiguration, RBDSchedulerInterval, RbdService, \
-    get_image_spec, parse_image_spec
+from ..services.rbd import RbdConfiguration, RbdDiskUsageCache, \
+    RBDSchedulerInterval, RbdService, get_image_spec, parse_image_spec
 
 
 class ImageNotFoundStub(Exception):
@@ -148,6 +148,23 @@ class RbdServiceTest(unittest.TestCase):
             'namespace': ''
         }], 1))
 
+    @mock.patch('dashboard.services.rbd.RbdService._rbd_image_info')
+    def test_rbd_image_infos(self, rbd_image_info_mock):
+        def _info(pool_name, namespace, image_id, image_name):
+            if image_name == 'removed':
+                return None
+            return {'pool_name': pool_name, 'name': image_name}
+
+        rbd_image_info_mock.side_effect = _info
+        image_refs = [{'pool_name': 'pool{}'.format(i % 2), 'namespace': '', 'id': str(i),
+                       'name': 'removed' if i == 3 else 'img{}'.format(i)} for i in range(20)]
+        # pylint: disable=protected-access
+        infos = RbdService._rbd_image_infos(image_refs)
+        self.assertEqual([info['name'] for info in infos],
+                         ['img{}'.format(i) for i in range(20) if i != 3])
+        self.assertEqual(rbd_image_info_mock.call_count, 20)
+        self.assertEqual(RbdService._rbd_image_infos([]), [])
+
     def test_valid_interval(self):
         test_cases = [
             ('15m', False),
@@ -177,3 +194,43 @@ class RbdServiceTest(unittest.TestCase):
             # pylint: disable=protected-access
             res = RbdService._rbd_image_refs(ioctx_mock, str(i))
             self.assertEqual(res, images[i*2:(i*2)+2])
+
+
+class RbdDiskUsageCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        RbdDiskUsageCache.clear()
+        self.image = MagicMock()
+        self.image.__enter__.return_value = self.image
+        self.diffs = []
+
+        def diff_iterate(offset, length, from_snap, callback, whole_object):
+            self.diffs.append(from_snap)
+            callback(0, length // 2, True)
+            callback(length // 2, length // 2, False)
+
+        self.image.diff_iterate.side_effect = diff_iterate
+        mgr.rados = MagicMock()
+
+    def test_snapshot_usage_is_computed_once(self):
+        snaps = [(1, 100, 'snap1'), (2, 200, 'snap2')]
+        with mock.patch('dashboard.services.rbd.rbd.Image', return_value=self.image):
+            usage = RbdDiskUsageCache.get('pool', '', 'id', 'img', snaps, 400)
+            self.assertEqual(usage.snaps, {1: 50, 2: 100})
+            self.assertEqual(usage.head, 200)
+            self.assertEqual(usage.total, 350)
+            self.assertEqual(self.diffs, [None, 'snap1', 'snap2'])
+
+            # only the HEAD delta is computed again
+            self.diffs = []
+            self.assertEqual(RbdDiskUsageCache.get('pool', '', 'id', 'img', snaps, 400).total, 350)
+            # the stale value is returned while it is refreshed in the background
+            for future in list(RbdDiskUsageCache._pending.values()):  # pylint: disable=W0212
+                future.result()
+            self.assertEqual(self.diffs, ['snap2'])
+
+            # removing a snapshot changes the delta of the next one
+            self.diffs = []
+            usage = RbdDiskUsageCache.get('pool', '', 'id', 'img', snaps[1:], 400)
+            self.assertEqual(self.diffs, [None, 'snap2'])
+            self.assertEqual(usage.snaps, {2: 100})
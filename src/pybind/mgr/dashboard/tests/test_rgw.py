@@ -1,7 +1,7 @@
 from unittest.mock import Mock, call, patch
 
 from .. import mgr
-from ..controllers.rgw import Rgw, RgwDaemon, RgwUser
+from ..controllers.rgw import Rgw, RgwBucketUi, RgwDaemon, RgwUser
 from ..rest_client import RequestException
 from ..services.rgw_client import RgwClient, RgwMultisite
 from ..tests import ControllerTestCase, RgwStub
@@ -303,6 +303,36 @@ class RgwDaemonControllerTestCase(ControllerTestCase):
         }])
 
 
+class RgwBucketUiControllerTestCase(ControllerTestCase):
+    @classmethod
+    def setup_server(cls):
+        cls.setup_controllers([RgwBucketUi], '/test')
+
+    @patch.object(RgwBucketUi, '_get_details')
+    @patch('dashboard.controllers.rgw.RgwRESTController.proxy')
+    def test_details(self, mock_proxy, mock_get_details):
+        mock_proxy.side_effect = lambda daemon_name, method, path, params: {
+            'bucket': params['bucket'], 'tenant': '', 'owner': 'admin'
+        }
+        mock_get_details.side_effect = lambda buckets, daemon_name: [
+            dict(bucket, versioning='Enabled') for bucket in buckets
+        ]
+        self._get('/test/ui-api/rgw/bucket/details?buckets=b1,b2,&daemon_name=dummy-daemon')
+        self.assertStatus(200)
+        mock_proxy.assert_has_calls([
+            call('dummy-daemon', 'GET', 'bucket', {'bucket': 'b1'}),
+            call('dummy-daemon', 'GET', 'bucket', {'bucket': 'b2'})
+        ], any_order=True)
+        mock_get_details.assert_called_once_with([
+            {'bucket': 'b1', 'tenant': '', 'owner': 'admin'},
+            {'bucket': 'b2', 'tenant': '', 'owner': 'admin'}
+        ], 'dummy-daemon')
+        self.assertJsonBody([
+            {'bucket': 'b1', 'tenant': '', 'owner': 'admin', 'versioning': 'Enabled'},
+            {'bucket': 'b2', 'tenant': '', 'owner': 'admin', 'versioning': 'Enabled'}
+        ])
+
+
 class RgwUserControllerTestCase(ControllerTestCase):
     @classmethod
     def setup_server(cls):
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=too-many-public-methods
 import errno
+from threading import Thread
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
@@ -176,6 +177,49 @@ class RgwClientTest(TestCase, CLICommandTestMixin):
         instance = RgwClient.admin_instance()
         self.assertFalse(instance.session.verify)
 
+    def test_session_shared_by_users(self):
+        admin = RgwClient.admin_instance()
+        with patch.object(RgwClient, 'get_user_keys',
+                          Mock(return_value={'access_key': 'a', 'secret_key': 's'})):
+            user = RgwClient.instance('user1')
+            other = RgwClient.instance('user2')
+        self.assertIsNot(admin, user)
+        self.assertIs(admin.session, user.session)
+        self.assertIs(user.session, other.session)
+        # cached user instances of the same daemon do not replace each other
+        self.assertIs(RgwClient.instance('user1'), user)
+
+    def test_user_keys_fetched_without_lock(self):
+        RgwClient.admin_instance()
+        lock_free = []
+
+        def _try_lock():
+            if RgwClient._instances_lock.acquire(timeout=1):
+                RgwClient._instances_lock.release()
+                lock_free.append(True)
+
+        def _get_user_keys(_self, userid):
+            # other callers are not held up while talking to the RGW
+            thread = Thread(target=_try_lock)
+            thread.start()
+            thread.join()
+            return {'access_key': 'a', 'secret_key': 's'}
+
+        with patch.object(RgwClient, 'get_user_keys', _get_user_keys):
+            user = RgwClient.instance('user3')
+        self.assertEqual(lock_free, [True])
+        self.assertIs(RgwClient.instance('user3'), user)
+
+    def test_fan_out(self):
+        self.assertEqual(RgwClient.fan_out({i: (lambda i=i: i * 2) for i in range(40)}),
+                         {i: i * 2 for i in range(40)})
+
+        def _fail():
+            raise DashboardException('fail')
+
+        with self.assertRaises(DashboardException):
+            RgwClient.fan_out({'ok': lambda: 1, 'fail': _fail})
+
     def test_no_daemons(self):
         RgwStub.get_mgr_no_services()
         with self.assertRaises(NoRgwDaemonsException) as cm:
@@ -6,6 +6,7 @@ import time
 import unittest
 from collections import defaultdict
 from functools import partial
+from unittest import mock
 
 from ..services.exception import serialize_dashboard_exception
 from ..tools import NotificationQueue, TaskExecutor, TaskManager
@@ -430,3 +431,69 @@ class TaskTest(unittest.TestCase):
                 'name': 'test15/task1'
             }
         })
+
+    def test_concurrency_limit(self):
+        TaskManager.CONCURRENCY['test16/task'] = 1
+        try:
+            task1 = MyTask(0, wait=True)
+            task2 = MyTask(0, wait=True, progress=20)
+            self.assertEqual(task1.run('test16/task', 0.5)[0], TaskManager.VALUE_EXECUTING)
+            self.assertEqual(task2.run('test16/task', 0.5)[0], TaskManager.VALUE_EXECUTING)
+            # the second task is queued until the first one finished
+            ex_t, _ = TaskManager.list('test16/*')
+            self.assertEqual(sorted(t.progress for t in ex_t), [0, 50])
+            self.assertEqual(len(TaskManager._queued['test16/task']), 1)
+            task2.resume()
+            task1.resume()
+            for _ in range(50):
+                if not TaskManager.list('test16/*')[0]:
+                    break
+                time.sleep(0.1)
+            _, fn_t = TaskManager.list('test16/*')
+            self.assertEqual(len(fn_t), 2)
+            self.assertEqual(TaskManager._running['test16/task'], 0)
+        finally:
+            del TaskManager.CONCURRENCY['test16/task']
+
+    def test_batch_progress(self):
+        def batch_op():
+            task = TaskManager.current_task()
+            task.set_batch_size(4)
+            task.inc_batch_done()
+            task.inc_batch_done(2)
+            return task.progress
+
+        state, result = TaskManager.run('test17/task1', {}, batch_op).wait(5)
+        self.assertEqual(state, TaskManager.VALUE_DONE)
+        self.assertEqual(result, 75)
+
+    @mock.patch('dashboard.tools.mgr')
+    def test_journal(self, mgr):
+        store = {}
+        mgr.set_store.side_effect = store.__setitem__
+        mgr.get_store.side_effect = store.get
+        task1 = MyTask(0, wait=True)
+        task2 = MyTask(0, fail=True)
+        task1.run('test18/task1', 0.5)
+        with self.assertRaises(Exception):
+            task2.run('test18/task2', 0.5)
+        self.wait_for_task('test18/task2')
+        TaskManager._write_journal()
+        entries = json.loads(store[TaskManager.JOURNAL_KEY])
+        self.assertEqual(sorted(e['name'] for e in entries if e['name'].startswith('test18/')),
+                         ['test18/task1', 'test18/task2'])
+
+        # a new mgr restores the journaled tasks as finished
+        with mock.patch.object(TaskManager, '_finished_tasks', []), \
+                mock.patch.object(TaskManager, '_journal_loaded', False):
+            TaskManager._load_journal()
+            _, fn_t = TaskManager.list_serializable('test18/*')
+        self.assertEqual(len(fn_t), 2)
+        results = {t['name']: t for t in fn_t}
+        self.assertEqual(results['test18/task1']['exception'],
+                         {'detail': 'Interrupted by a failover of the manager'})
+        self.assertEqual(results['test18/task2']['exception'],
+                         {'detail': 'Task Unexpected Exception'})
+        self.assertFalse(results['test18/task2']['success'])
+        task1.resume()
+        self.wait_for_task('test18/task1')
@@ -8,7 +8,10 @@ import logging
 import threading
 import time
 import urllib
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import wraps
 
 import cherrypy
 from ceph.utils import strtobool
@@ -124,60 +127,81 @@ class RequestLoggingTool(cherrypy.Tool):
 
 # pylint: disable=too-many-instance-attributes
 class ViewCache(object):
+    """
+    Caches the return value of the decorated function per arguments.
+
+    Values younger than `stale_period` seconds are returned right away.
+    Otherwise the value is refreshed on the executor shared by all view
+    caches, with at most one refresh per arguments in flight. If that takes
+    longer than `timeout` seconds, the previous value is returned as stale.
+
+    At most `maxsize` values are kept; the least recently used ones, and
+    the ones not used for `ttl` seconds, are dropped.
+    """
     VALUE_OK = 0
     VALUE_STALE = 1
     VALUE_NONE = 2
 
-    class GetterThread(threading.Thread):
-        def __init__(self, view, fn, args, kwargs):
-            super(ViewCache.GetterThread, self).__init__()
-            self._view = view
-            self.event = threading.Event()
-            self.fn = fn
-            self.args = args
-            self.kwargs = kwargs
+    MAX_WORKERS = 10
 
-        # pylint: disable=broad-except
-        def run(self):
-            t0 = 0.0
-            t1 = 0.0
-            try:
-                t0 = time.time()
-                self._view.logger.debug("starting execution of %s", self.fn)
-                val = self.fn(*self.args, **self.kwargs)
-                t1 = time.time()
-            except Exception as ex:
-                with self._view.lock:
-                    self._view.logger.exception("Error while calling fn=%s ex=%s", self.fn,
-                                                str(ex))
-                    self._view.value = None
-                    self._view.value_when = None
-                    self._view.getter_thread = None
-                    self._view.exception = ex
-            else:
-                with self._view.lock:
-                    self._view.latency = t1 - t0
-                    self._view.value = val
-                    self._view.value_when = datetime.now()
-                    self._view.getter_thread = None
-                    self._view.exception = None
-
-            self._view.logger.debug("execution of %s finished in: %s", self.fn,
-                                    t1 - t0)
-            self.event.set()
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='viewcache')
 
-    class RemoteViewCache(object):
-        # Return stale data if
-        STALE_PERIOD = 1.0
+    _metrics = {}  # type: Dict[str, ViewCache.Metrics]
+    _metrics_lock = threading.Lock()
 
-        def __init__(self, timeout):
-            self.getter_thread = None
-            # Consider data within 1s old to be sufficiently fresh
+    class Metrics(object):
+        def __init__(self, name, timeout, stale_period):
+            self.name = name
+            self.timeout = timeout
+            self.stale_period = stale_period
+            self.lock = threading.Lock()
+            self.entries = 0
+            self.hits = 0
+            self.stale_hits = 0
+            self.misses = 0
+            self.errors = 0
+            self.evictions = 0
+            self.refreshes = 0
+            self.latency_sum = 0.0
+            self.latency_max = 0.0
+
+        def inc(self, counter, value=1):
+            with self.lock:
+                setattr(self, counter, getattr(self, counter) + value)
+
+        def refreshed(self, latency):
+            with self.lock:
+                self.refreshes += 1
+                self.latency_sum += latency
+                self.latency_max = max(self.latency_max, latency)
+
+        def to_dict(self):
+            with self.lock:
+                return {
+                    'name': self.name,
+                    'timeout': self.timeout,
+                    'stale_period': self.stale_period,
+                    'entries': self.entries,
+                    'hits': self.hits,
+                    'stale_hits': self.stale_hits,
+                    'misses': self.misses,
+                    'errors': self.errors,
+                    'evictions': self.evictions,
+                    'refreshes': self.refreshes,
+                    'latency_avg': self.latency_sum / self.refreshes if self.refreshes else 0.0,
+                    'latency_max': self.latency_max,
+                }
+
+    class RemoteViewCache(object):
+        def __init__(self, timeout, stale_period, metrics):
+            self.future = None  # type: Optional[futures.Future]
             self.timeout = timeout
-            self.event = threading.Event()
+            self.stale_period = stale_period
+            self.metrics = metrics
+            self.last_used = time.time()
             self.value_when = None
             self.value = None
-            self.latency = 0
+            self.latency = 0.0
             self.exception = None
             self.lock = threading.Lock()
             self.logger = logging.getLogger('viewcache')
@@ -187,6 +211,31 @@ class ViewCache(object):
                 self.value_when = None
                 self.value = None
 
+        # pylint: disable=broad-except
+        def _refresh(self, fn, args, kwargs):
+            t0 = time.time()
+            self.logger.debug("starting execution of %s", fn)
+            try:
+                val = fn(*args, **kwargs)
+            except Exception as ex:
+                self.logger.exception("Error while calling fn=%s ex=%s", fn, str(ex))
+                self.metrics.inc('errors')
+                with self.lock:
+                    self.value = None
+                    self.value_when = None
+                    self.future = None
+                    self.exception = ex
+            else:
+                latency = time.time() - t0
+                self.metrics.refreshed(latency)
+                with self.lock:
+                    self.latency = latency
+                    self.value = val
+                    self.value_when = datetime.now()
+                    self.future = None
+                    self.exception = None
+            self.logger.debug("execution of %s finished in: %s", fn, time.time() - t0)
+
         def run(self, fn, args, kwargs):
             """
             If data less than `stale_period` old is available, return it
@@ -204,23 +253,23 @@ class ViewCache(object):
             with self.lock:
                 now = datetime.now()
                 if self.value_when and now - self.value_when < timedelta(
-                        seconds=self.STALE_PERIOD):
+                        seconds=self.stale_period):
+                    self.metrics.inc('hits')
                     return ViewCache.VALUE_OK, self.value
 
-                if self.getter_thread is None:
-                    self.getter_thread = ViewCache.GetterThread(self, fn, args,
-                                                                kwargs)
-                    self.getter_thread.start()
+                if self.future is None:
+                    self.future = ViewCache.executor.submit(self._refresh, fn, args, kwargs)
                 else:
-                    self.logger.debug("getter_thread still alive for: %s", fn)
+                    self.logger.debug("refresh still running for: %s", fn)
 
-                ev = self.getter_thread.event
+                future = self.future
 
-            success = ev.wait(timeout=self.timeout)
+            done, _ = futures.wait([future], timeout=self.timeout)
 
             with self.lock:
-                if success:
+                if done:
                     # We fetched the data within the timeout
+                    self.metrics.inc('misses')
                     if self.exception:
                         # execution raised an exception
                         # pylint: disable=raising-bad-type
@@ -228,28 +277,69 @@ class ViewCache(object):
                     return ViewCache.VALUE_OK, self.value
                 if self.value_when is not None:
                     # We have some data, but it doesn't meet freshness requirements
+                    self.metrics.inc('stale_hits')
                     return ViewCache.VALUE_STALE, self.value
                 # We have no data, not even stale data
+                self.metrics.inc('misses')
                 raise ViewCacheNoDataException()
 
-    def __init__(self, timeout=5):
+    def __init__(self, timeout=5, stale_period=1.0, maxsize=128, ttl=300):
         self.timeout = timeout
-        self.cache_by_args = {}
+        self.stale_period = stale_period
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # least recently used first
+        self.cache_by_args = collections.OrderedDict()  # type: collections.OrderedDict
+        self.lock = threading.Lock()
+        self.metrics = None  # type: Optional[ViewCache.Metrics]
+
+    def _get_entry(self, args):
+        assert self.metrics is not None
+        now = time.time()
+        with self.lock:
+            rvc = self.cache_by_args.pop(args, None)
+            while self.cache_by_args:
+                oldest = next(iter(self.cache_by_args.values()))
+                if now - oldest.last_used < self.ttl and \
+                        len(self.cache_by_args) < self.maxsize:
+                    break
+                self.cache_by_args.popitem(last=False)
+                self.metrics.inc('entries', -1)
+                self.metrics.inc('evictions')
+            if rvc is None:
+                rvc = ViewCache.RemoteViewCache(self.timeout, self.stale_period, self.metrics)
+                self.metrics.inc('entries')
+            rvc.last_used = now
+            self.cache_by_args[args] = rvc
+            return rvc
 
     def __call__(self, fn):
+        name = '{}.{}'.format(fn.__module__, fn.__qualname__)
+        with ViewCache._metrics_lock:
+            self.metrics = ViewCache._metrics.get(name)
+            if self.metrics is None:
+                self.metrics = ViewCache.Metrics(name, self.timeout, self.stale_period)
+                ViewCache._metrics[name] = self.metrics
+
+        @wraps(fn)
         def wrapper(*args, **kwargs):
-            rvc = self.cache_by_args.get(args, None)
-            if not rvc:
-                rvc = ViewCache.RemoteViewCache(self.timeout)
-                self.cache_by_args[args] = rvc
-            return rvc.run(fn, args, kwargs)
+            return self._get_entry(args).run(fn, args, kwargs)
         wrapper.reset = self.reset  # type: ignore
         return wrapper
 
     def reset(self):
-        for _, rvc in self.cache_by_args.items():
+        with self.lock:
+            entries = list(self.cache_by_args.values())
+        for rvc in entries:
             rvc.reset()
 
+    @classmethod
+    def get_metrics(cls):
+        # type: () -> List[Dict[str, Any]]
+        with cls._metrics_lock:
+            metrics = list(cls._metrics.values())
+        return [m.to_dict() for m in metrics]
+
 
 class NotificationQueue(threading.Thread):
     _ALL_TYPES_ = '__ALL__'
@@ -259,6 +349,7 @@ class NotificationQueue(threading.Thread):
     _queue = collections.deque()  # type: Deque[Tuple[str, Any]]
     _running = False
     _instance = None
+    logger = logging.getLogger('notification_queue')
 
     def __init__(self):
         super(NotificationQueue, self).__init__()
@@ -271,8 +362,7 @@ class NotificationQueue(threading.Thread):
                 return
             cls._running = True
             cls._instance = NotificationQueue()
-        cls.logger = logging.getLogger('notification_queue')  # type: ignore
-        cls.logger.debug("starting notification queue")  # type: ignore
+        cls.logger.debug("starting notification queue")
         cls._instance.start()
 
     @classmethod
@@ -286,9 +376,9 @@ class NotificationQueue(threading.Thread):
             cls._running = False
         with cls._cond:
             cls._cond.notify()
-        cls.logger.debug("waiting for notification queue to finish")  # type: ignore
+        cls.logger.debug("waiting for notification queue to finish")
         instance.join()
-        cls.logger.debug("notification queue stopped")  # type: ignore
+        cls.logger.debug("notification queue stopped")
 
     @classmethod
     def _registered_handler(cls, func, n_types):
@@ -319,7 +409,7 @@ class NotificationQueue(threading.Thread):
             for ev_type in n_types:
                 if not cls._registered_handler(func, ev_type):
                     cls._listeners[ev_type].add((priority, func))
-                    cls.logger.debug(  # type: ignore
+                    cls.logger.debug(
                         "function %s was registered for events of type %s",
                         func, ev_type
                     )
@@ -353,7 +443,7 @@ class NotificationQueue(threading.Thread):
                         break
                 if to_remove:
                     listeners.discard(to_remove)
-                    cls.logger.debug(  # type: ignore
+                    cls.logger.debug(
                         "function %s was deregistered for events of type %s",
                         func, ev_type
                     )
@@ -377,10 +467,10 @@ class NotificationQueue(threading.Thread):
                 listener[1](notify_value)
 
     def run(self):
-        self.logger.debug("notification queue started")  # type: ignore
+        self.logger.debug("notification queue started")
         while self._running:
             private_buffer = []
-            self.logger.debug("processing queue: %s", len(self._queue))  # type: ignore
+            self.logger.debug("processing queue: %s", len(self._queue))
             try:
                 while True:
                     private_buffer.append(self._queue.popleft())
@@ -391,10 +481,10 @@ class NotificationQueue(threading.Thread):
                 while self._running and not self._queue:
                     self._cond.wait()
         # flush remaining events
-        self.logger.debug("flush remaining events: %s", len(self._queue))  # type: ignore
+        self.logger.debug("flush remaining events: %s", len(self._queue))
         self._notify_listeners(self._queue)
         self._queue.clear()
-        self.logger.debug("notification queue finished")  # type: ignore
+        self.logger.debug("notification queue finished")
 
 
 # pylint: disable=too-many-arguments, protected-access
@@ -405,16 +495,44 @@ class TaskManager(object):
     VALUE_DONE = "done"
     VALUE_EXECUTING = "executing"
 
+    # number of worker threads shared by all the tasks
+    MAX_WORKERS = 16
+    # number of tasks of the same name that may execute at once, the
+    # others are queued until one of them finished
+    DEFAULT_CONCURRENCY = 8
+    CONCURRENCY = {
+        'rbd/copy': 2,
+        'rbd/delete': 4,
+        'rbd/flatten': 2,
+        'rbd/trash/purge': 1,
+        'rbd/trash/remove': 4,
+    }  # type: Dict[str, int]
+
+    # the executing and most recently finished tasks are journaled in the
+    # mgr store, so that their status survives a failover of the mgr
+    JOURNAL_KEY = 'task_journal'
+    JOURNAL_SIZE = 100
+    JOURNAL_DELAY = 1.0
+
     _executing_tasks = set()  # type: Set[Task]
     _finished_tasks = []  # type: List[Task]
     _lock = threading.Lock()
 
+    _pool = None  # type: Optional[ThreadPoolExecutor]
+    # task name -> number of tasks executing on the pool
+    _running = collections.defaultdict(int)  # type: DefaultDict[str, int]
+    # task name -> executors waiting for a free slot
+    _queued = collections.defaultdict(collections.deque)  # type: DefaultDict[str, Deque]
+    _journal_loaded = False
+    _journal_timer = None  # type: Optional[threading.Timer]
+
     _task_local_data = threading.local()
 
     @classmethod
     def init(cls):
         cls.logger = logging.getLogger('taskmgr')  # type: ignore
         NotificationQueue.register(cls._handle_finished_task, 'cd_task_finished')
+        cls._load_journal()
 
     @classmethod
     def _handle_finished_task(cls, task):
@@ -422,6 +540,112 @@ class TaskManager(object):
         with cls._lock:
             cls._executing_tasks.remove(task)
             cls._finished_tasks.append(task)
+        cls._save_journal()
+
+    @classmethod
+    def _submit(cls, executor):
+        """
+        Run `executor` on the worker pool, or queue it if as many tasks of
+        the same name as allowed are executing already.
+        """
+        name = executor.task.name
+        with cls._lock:
+            if cls._running[name] >= cls.CONCURRENCY.get(name, cls.DEFAULT_CONCURRENCY):
+                cls.logger.debug("queued %s", executor.task)  # type: ignore
+                cls._queued[name].append(executor)
+                return
+            cls._running[name] += 1
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS,
+                                               thread_name_prefix='task')
+            pool = cls._pool
+        pool.submit(cls._work, executor)
+
+    @classmethod
+    def _work(cls, executor):
+        name = executor.task.name
+        while executor is not None:
+            executor._run()
+            # the slot is handed over to the next queued task of that name
+            with cls._lock:
+                if cls._queued[name]:
+                    executor = cls._queued[name].popleft()
+                else:
+                    cls._running[name] -= 1
+                    executor = None
+
+    @staticmethod
+    def _journal_entry(task):
+        return {
+            'name': task.name,
+            'metadata': task.metadata,
+            'begin_time': task._begin_time,
+            'end_time': task._end_time,
+            'progress': task.progress,
+            'ret_value': task.ret_value,
+            'exception': str(task.exception) if task.exception else None,
+        }
+
+    @classmethod
+    def _write_journal(cls):
+        with cls._lock:
+            cls._journal_timer = None
+            finished = sorted(cls._finished_tasks, key=lambda t: t.end_time,
+                              reverse=True)[:cls.JOURNAL_SIZE]
+            entries = [cls._journal_entry(t) for t in cls._executing_tasks
+                       if t._begin_time is not None]
+            entries.extend(cls._journal_entry(t) for t in finished)
+        try:
+            mgr.set_store(cls.JOURNAL_KEY, json.dumps(entries, separators=(',', ':'),
+                                                      default=str))
+        except Exception:  # pylint: disable=broad-except
+            cls.logger.exception("failed to write the task journal")  # type: ignore
+
+    @classmethod
+    def _save_journal(cls):
+        """
+        Write the journal after `JOURNAL_DELAY` seconds, so that the status
+        changes of a burst of tasks are written at once.
+        """
+        with cls._lock:
+            if cls._journal_timer is not None:
+                return
+            cls._journal_timer = threading.Timer(cls.JOURNAL_DELAY, cls._write_journal)
+            cls._journal_timer.daemon = True
+            cls._journal_timer.start()
+
+    @classmethod
+    def _load_journal(cls):
+        """
+        Restore the tasks journaled by the previously active mgr. Tasks
+        that were still executing there are reported as failed.
+        """
+        with cls._lock:
+            if cls._journal_loaded:
+                return
+            cls._journal_loaded = True
+        try:
+            entries = json.loads(mgr.get_store(cls.JOURNAL_KEY))
+        except (TypeError, ValueError):
+            return
+        now = time.time()
+        with cls._lock:
+            for entry in entries:
+                task = Task(entry['name'], entry['metadata'], None, [], {}, None)
+                if task in cls._finished_tasks:
+                    continue
+                task._begin_time = entry['begin_time']
+                task.progress = entry['progress']
+                task.ret_value = entry['ret_value']
+                if entry['end_time'] is None:
+                    task._end_time = now
+                    task.exception = Exception('Interrupted by a failover of the manager')
+                else:
+                    task._end_time = entry['end_time']
+                    if entry['exception'] is not None:
+                        task.exception = Exception(entry['exception'])
+                task.duration = task.end_time - task.begin_time
+                cls._finished_tasks.append(task)
 
     @classmethod
     def run(cls, name, metadata, fn, args=None, kwargs=None, executor=None,
@@ -431,7 +655,7 @@ class TaskManager(object):
         if not kwargs:
             kwargs = {}
         if not executor:
-            executor = ThreadedExecutor()
+            executor = PooledExecutor()
         task = Task(name, metadata, fn, args, kwargs, executor,
                     exception_handler)
         with cls._lock:
@@ -444,6 +668,7 @@ class TaskManager(object):
             cls._executing_tasks.add(task)
         cls.logger.info("running %s", task)  # type: ignore
         task._run()
+        cls._save_journal()
         return task
 
     @classmethod
@@ -555,6 +780,16 @@ class ThreadedExecutor(TaskExecutor):
             self.finish(val, None)
 
 
+class PooledExecutor(ThreadedExecutor):
+    """
+    Runs the task on the worker pool of the TaskManager instead of a
+    thread of its own.
+    """
+
+    def start(self):
+        TaskManager._submit(self)
+
+
 class Task(object):
     def __init__(self, name, metadata, fn, args, kwargs, executor,
                  exception_handler=None):
@@ -568,6 +803,8 @@ class Task(object):
         self.running = False
         self.event = threading.Event()
         self.progress = None
+        self.batch_size = 0
+        self.batch_done = 0
         self.ret_value = None
         self._begin_time: Optional[float] = None
         self._end_time: Optional[float] = None
@@ -661,6 +898,23 @@ class Task(object):
         if not in_lock:
             self.lock.release()
 
+    def set_batch_size(self, size):
+        """
+        Declare the number of items processed by a batch operation. The
+        progress of the task is then aggregated from the items reported
+        by `inc_batch_done`, which may be called from several threads.
+        """
+        with self.lock:
+            self.batch_size = size
+            self.batch_done = 0
+            self.progress = 0
+
+    def inc_batch_done(self, count=1):
+        with self.lock:
+            assert self.batch_size, "set_batch_size must be called first"
+            self.batch_done = min(self.batch_done + count, self.batch_size)
+            self.progress = self.batch_done * 100 // self.batch_size
+
     @property
     def end_time(self) -> float:
         assert self._end_time is not None
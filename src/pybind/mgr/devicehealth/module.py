@@ -8,6 +8,7 @@ from mgr_module import MgrModule, CommandResult, MgrModuleRecoverDB, CLIRequires
 import operator
 import rados
 import re
+import zlib
 from threading import Event
 from datetime import datetime, timedelta, timezone
 from typing import cast, Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING, Union
@@ -47,6 +48,58 @@ def get_nvme_wear_level(data: Dict[Any, Any]) -> Optional[float]:
     return pct_used / 100.0
 
 
+def get_smart_features(data: Dict[Any, Any]) -> Dict[str, Any]:
+    """
+    Extract the numeric SMART attributes (plus capacity, model and vendor)
+    used by the failure predictors from smartctl -x --json output
+    """
+    features: Dict[str, Any] = {}
+    for attr in data.get('ata_smart_attributes', {}).get('table', []):
+        # get raw smart values
+        raw = attr.get('raw', {})
+        if raw.get('string') is not None:
+            raw_string = str(raw.get('string', '0'))
+            if raw_string.isdigit():
+                features['smart_%s_raw' % attr.get('id')] = int(raw_string)
+            elif raw_string.split(' ')[0].isdigit():
+                features['smart_%s_raw' % attr.get('id')] = int(raw_string.split(' ')[0])
+            else:
+                features['smart_%s_raw' % attr.get('id')] = raw.get('value', 0)
+        # get normalized smart values
+        if attr.get('value') is not None:
+            features['smart_%s_normalized' % attr.get('id')] = attr.get('value')
+    # add power on hours manually if not available in smart attributes
+    power_on_time = data.get('power_on_time', {}).get('hours')
+    if power_on_time is not None:
+        features['smart_9_raw'] = int(power_on_time)
+    # add device capacity
+    user_capacity = data.get('user_capacity', {}).get('bytes')
+    if user_capacity is not None:
+        features['user_capacity'] = user_capacity
+    # add device model and vendor
+    for key in ('model_name', 'vendor'):
+        if data.get(key) is not None:
+            features[key] = data[key]
+    return features
+
+
+def encode_raw_smart(data: Any) -> bytes:
+    """
+    Serialize smartctl output into a compact, zlib-compressed blob
+    """
+    return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_raw_smart(value: Union[str, bytes]) -> Any:
+    """
+    Parse a stored raw_smart value; rows written before schema v2 hold
+    plain JSON text, newer rows hold a compressed blob
+    """
+    if isinstance(value, bytes):
+        value = zlib.decompress(value).decode('utf-8')
+    return json.loads(value)
+
+
 class Module(MgrModule):
 
     # latest (if db does not exist)
@@ -63,7 +116,19 @@ class Module(MgrModule):
             raw_smart TEXT NOT NULL,
             PRIMARY KEY (time, devid)
         );
+        """,
         """
+        CREATE INDEX DeviceHealthMetricsDevidTime
+            ON DeviceHealthMetrics (devid, time);
+        """,
+        """
+        CREATE TABLE DeviceHealthFeatures (
+            time DATETIME NOT NULL,
+            devid TEXT NOT NULL REFERENCES Device (devid),
+            features TEXT NOT NULL,
+            PRIMARY KEY (devid, time)
+        ) WITHOUT ROWID;
+        """,
     ]
 
     SCHEMA_VERSIONED = [
@@ -82,7 +147,22 @@ class Module(MgrModule):
                 PRIMARY KEY (time, devid)
             );
             """,
-        ]
+        ],
+        # v2
+        [
+            """
+            CREATE TABLE DeviceHealthFeatures (
+                time DATETIME NOT NULL,
+                devid TEXT NOT NULL REFERENCES Device (devid),
+                features TEXT NOT NULL,
+                PRIMARY KEY (devid, time)
+            ) WITHOUT ROWID;
+            """,
+            """
+            CREATE INDEX DeviceHealthMetricsDevidTime
+                ON DeviceHealthMetrics (devid, time);
+            """,
+        ],
     ]
 
     MODULE_OPTIONS = [
@@ -215,11 +295,14 @@ class Module(MgrModule):
     @CLIRequiresDB
     @CLIReadCommand('device get-health-metrics')
     @MgrModuleRecoverDB
-    def do_get_health_metrics(self, devid: str, sample: Optional[str] = None) -> Tuple[int, str, str]:
+    def do_get_health_metrics(self,
+                              devid: str,
+                              sample: Optional[str] = None,
+                              features: bool = False) -> Tuple[int, str, str]:
         '''
-        Show stored device metrics for the device
+        Show stored device metrics (or only the extracted SMART features) for the device
         '''
-        return self.show_device_metrics(devid, sample)
+        return self.show_device_metrics(devid, sample, features)
 
     @CLIRequiresDB
     @CLICommand('device check-health')
@@ -292,8 +375,9 @@ class Module(MgrModule):
 
         self._create_device(devid)
         epoch = self._t2epoch(t)
-        json.loads(data)  # valid?
+        features = get_smart_features(json.loads(data))
         self.db.execute(SQL, (epoch, devid, data))
+        self._put_device_features(epoch, devid, features)
 
     devre = r"[a-zA-Z0-9-]+[_-][a-zA-Z0-9-]+[_-][a-zA-Z0-9-]+"
 
@@ -499,9 +583,15 @@ class Module(MgrModule):
             WHERE time < (strftime('%s', 'now') - ?);
         """
 
+        SQL_FEATURES = """
+        DELETE FROM DeviceHealthFeatures
+            WHERE time < (strftime('%s', 'now') - ?);
+        """
+
         cursor = self.db.execute(SQL, (self.retention_period,))
         if cursor.rowcount >= 1:
             self.log.info(f"pruned {cursor.rowcount} metrics")
+        self.db.execute(SQL_FEATURES, (self.retention_period,))
 
     def _create_device(self, devid: str) -> None:
         SQL = """
@@ -514,16 +604,26 @@ class Module(MgrModule):
         else:
             self.log.debug(f"device {devid} already exists")
 
+    def _put_device_features(self, epoch: int, devid: str, features: Dict[str, Any]) -> None:
+        SQL = """
+        INSERT OR REPLACE INTO DeviceHealthFeatures (time, devid, features)
+            VALUES (?, ?, ?);
+        """
+
+        self.db.execute(SQL, (epoch, devid, json.dumps(features, separators=(',', ':'))))
+
     def put_device_metrics(self, devid: str, data: Any) -> None:
         SQL = """
         INSERT OR REPLACE INTO DeviceHealthMetrics (devid, raw_smart, time)
-            VALUES (?, ?, strftime('%s', 'now'));
+            VALUES (?, ?, ?);
         """
 
+        epoch = int(datetime.now(timezone.utc).timestamp())
         with self._db_lock, self.db:
             self.db.execute('BEGIN;')
             self._create_device(devid)
-            self.db.execute(SQL, (devid, json.dumps(data)))
+            self.db.execute(SQL, (devid, encode_raw_smart(data), epoch))
+            self._put_device_features(epoch, devid, get_smart_features(data))
             self._prune_device_metrics()
 
         # extract wear level?
@@ -585,19 +685,63 @@ class Module(MgrModule):
                 t = row['time']
                 dt = datetime.utcfromtimestamp(t).strftime(TIME_FORMAT)
                 try:
-                    res[dt] = json.loads(row['raw_smart'])
-                except (ValueError, IndexError):
+                    res[dt] = decode_raw_smart(row['raw_smart'])
+                except (ValueError, IndexError, zlib.error):
                     self.log.debug(f"unable to parse value for {devid}:{t}")
                     pass
         return res
 
-    def show_device_metrics(self, devid: str, sample: Optional[str]) -> Tuple[int, str, str]:
+    def _get_device_features(self, devid: str,
+                             min_sample: Optional[str] = None,
+                             limit: int = -1) -> Dict[str, Dict[str, Any]]:
+        res = {}
+
+        # samples stored before the features table existed have no
+        # features row yet; only for those fall back to the raw blob
+        SQL = """
+        SELECT m.time AS time, f.features AS features,
+               CASE WHEN f.features IS NULL THEN m.raw_smart END AS raw_smart
+            FROM DeviceHealthMetrics AS m
+            LEFT JOIN DeviceHealthFeatures AS f
+                ON f.devid = m.devid AND f.time = m.time
+            WHERE m.devid = ? AND ? <= m.time
+            ORDER BY m.time DESC
+            LIMIT ?;
+        """
+
+        imin_sample = self._t2epoch(min_sample)
+
+        self.log.debug(f"_get_device_features: {devid} {min_sample} {limit}")
+
+        with self._db_lock, self.db:
+            self.db.execute('BEGIN;')
+            cursor = self.db.execute(SQL, (devid, imin_sample, limit))
+            for row in cursor:
+                t = row['time']
+                dt = datetime.utcfromtimestamp(t).strftime(TIME_FORMAT)
+                try:
+                    if row['features'] is not None:
+                        res[dt] = json.loads(row['features'])
+                    else:
+                        res[dt] = get_smart_features(decode_raw_smart(row['raw_smart']))
+                except (ValueError, IndexError, zlib.error):
+                    self.log.debug(f"unable to parse value for {devid}:{t}")
+                    pass
+        return res
+
+    def show_device_metrics(self, devid: str, sample: Optional[str],
+                            features: bool = False) -> Tuple[int, str, str]:
         # verify device exists
         r = self.get("device " + devid)
         if not r or 'device' not in r.keys():
             return -errno.ENOENT, '', 'device ' + devid + ' not found'
         # fetch metrics
-        res = self._get_device_metrics(devid, sample=sample)
+        if features and not sample:
+            res = self._get_device_features(devid)
+        else:
+            res = self._get_device_metrics(devid, sample=sample)
+            if features:
+                res = {t: get_smart_features(data) for t, data in res.items()}
         return 0, json.dumps(res, indent=4, sort_keys=True), ''
 
     def check_health(self) -> Tuple[int, str, str]:
@@ -792,5 +936,20 @@ class Module(MgrModule):
         except MgrDBNotReady:
             return dict()
 
+    def get_device_features(self, devid: str,
+                            min_sample: Optional[str] = None,
+                            limit: int = -1) -> Dict[str, Dict[str, Any]]:
+        try:
+            return self._get_device_features(devid, min_sample=min_sample, limit=limit)
+        except MgrDBNotReady:
+            return dict()
+
+    def get_devices_features(self, devids: List[str],
+                             limit: int = -1) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        try:
+            return {devid: self._get_device_features(devid, limit=limit) for devid in devids}
+        except MgrDBNotReady:
+            return dict()
+
     def get_time_format(self) -> str:
         return TIME_FORMAT
@@ -0,0 +1,106 @@
+import json
+import sqlite3
+from unittest import mock
+
+from devicehealth.module import Module, decode_raw_smart, encode_raw_smart, get_smart_features
+
+SMART = {
+    'model_name': 'ST4000NM0023',
+    'user_capacity': {'bytes': 4000787030016},
+    'power_on_time': {'hours': 1234},
+    'ata_smart_attributes': {
+        'table': [
+            {'id': 5, 'value': 100, 'raw': {'value': 0, 'string': '0'}},
+            {'id': 190, 'value': 71, 'raw': {'value': 29, 'string': '29 (Min/Max 18/35)'}},
+            {'id': 240, 'value': 100, 'raw': {'value': 7, 'string': 'n/a'}},
+        ],
+    },
+}
+
+
+def _module():
+    m = Module('devicehealth', None, None)
+    m.get = mock.Mock(return_value={})
+    m.set_device_wear_level = mock.Mock()
+    return m
+
+
+def _v1_db(m):
+    db = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    m.create_skeleton_schema(db)
+    for sql in Module.SCHEMA_VERSIONED[0]:
+        db.execute(sql)
+    m.update_schema_version(db, 1)
+    return db
+
+
+def _version(db):
+    return db.execute("SELECT value FROM MgrModuleKV WHERE key = '__version';").fetchone()[0]
+
+
+def test_encode_decode_round_trip():
+    blob = encode_raw_smart(SMART)
+    assert isinstance(blob, bytes)
+    assert len(blob) < len(json.dumps(SMART))
+    assert decode_raw_smart(blob) == SMART
+
+
+def test_decode_legacy_text():
+    assert decode_raw_smart(json.dumps(SMART)) == SMART
+
+
+def test_smart_features():
+    assert get_smart_features(SMART) == {
+        'smart_5_raw': 0,
+        'smart_5_normalized': 100,
+        'smart_190_raw': 29,
+        'smart_190_normalized': 71,
+        'smart_240_raw': 7,
+        'smart_240_normalized': 100,
+        'smart_9_raw': 1234,
+        'user_capacity': 4000787030016,
+        'model_name': 'ST4000NM0023',
+    }
+
+
+def test_fresh_db_is_latest_version():
+    m = _module()
+    db = sqlite3.connect(':memory:', isolation_level=None)
+    m.create_skeleton_schema(db)
+    m.maybe_upgrade(db, 0)
+    assert _version(db) == len(Module.SCHEMA_VERSIONED)
+
+
+def test_upgrade_keeps_legacy_rows_readable():
+    m = _module()
+    db = _v1_db(m)
+    db.execute("INSERT INTO Device (devid) VALUES ('dev1');")
+    db.execute("INSERT INTO DeviceHealthMetrics (devid, raw_smart) VALUES ('dev1', ?);",
+               (json.dumps(SMART),))
+
+    m.maybe_upgrade(db, 1)
+    assert _version(db) == 2
+    assert db.execute('SELECT COUNT(*) FROM DeviceHealthFeatures;').fetchone()[0] == 0
+
+    m._db = db
+    # the legacy row is plain text, and has its features extracted on read
+    assert list(m._get_device_metrics('dev1').values()) == [SMART]
+    assert list(m._get_device_features('dev1').values()) == [get_smart_features(SMART)]
+
+
+def test_put_device_metrics_stores_compressed_blob_and_features():
+    m = _module()
+    db = _v1_db(m)
+    m.maybe_upgrade(db, 1)
+    m._db = db
+
+    m.put_device_metrics('dev1', SMART)
+
+    raw_smart = db.execute('SELECT raw_smart FROM DeviceHealthMetrics;').fetchone()[0]
+    assert isinstance(raw_smart, bytes)
+    assert decode_raw_smart(raw_smart) == SMART
+    features = db.execute('SELECT features FROM DeviceHealthFeatures;').fetchone()[0]
+    assert json.loads(features) == get_smart_features(SMART)
+    assert list(m._get_device_metrics('dev1').values()) == [SMART]
+    assert list(m._get_device_features('dev1').values()) == [get_smart_features(SMART)]
@@ -40,6 +40,12 @@ class Module(MgrModule):
         # other
         self._run = True
         self._event = Event()
+        # the predictor is kept across predictions so that every model is
+        # only loaded from disk once
+        self._predictor: Optional[Predictor] = None
+        self._predictor_name = ''
+        # devid -> (predictor model, newest sample, prediction result)
+        self._predictions: Dict[str, Tuple[str, str, str]] = {}
         # for mypy which does not run the code
         if TYPE_CHECKING:
             self.sleep_interval = 0
@@ -121,89 +127,91 @@ class Module(MgrModule):
         return datetime.datetime.fromtimestamp(
             predicted_timestamp / (1000 ** 3) + life_expectancy_day).strftime('%Y-%m-%d')
 
-    def _predict_life_expectancy(self, devid: str) -> str:
-        predicted_result = ''
-        health_data: Dict[str, Dict[str, Any]] = {}
-        predict_datas: List[DevSmartT] = []
-        try:
-            r, outb, outs = self.remote(
-                'devicehealth', 'show_device_metrics', devid=devid, sample='')
-            if r != 0:
-                self.log.error('failed to get device %s health', devid)
-                health_data = {}
-            else:
-                health_data = json.loads(outb)
-        except Exception as e:
-            self.log.error('failed to get device %s health data due to %s', devid, str(e))
+    def _get_predictor(self) -> Optional[Predictor]:
+        if self._predictor is not None and self._predictor_name == self.predictor_model:
+            return self._predictor
+        self._predictor = None
+        self._predictions = {}
 
         # initialize appropriate disk failure predictor model
         obj_predictor = Predictor.create(self.predictor_model)
         if obj_predictor is None:
             self.log.error('invalid value received for MODULE_OPTIONS.predictor_model')
-            return predicted_result
+            return None
         try:
             obj_predictor.initialize(
                 "{}/models/{}".format(get_diskfailurepredictor_path(), self.predictor_model))
         except Exception as e:
             self.log.error('Error initializing predictor: %s', e)
-            return predicted_result
+            return None
+        self._predictor = obj_predictor
+        self._predictor_name = self.predictor_model
+        return obj_predictor
 
+    def _get_predict_datas(self, devid: str, health_data: Dict[str, DevSmartT]) -> List[DevSmartT]:
+        predict_datas: List[DevSmartT] = []
         if len(health_data) >= 6:
             o_keys = sorted(health_data.keys(), reverse=True)
             for o_key in o_keys:
-                # get values for current day (?)
-                dev_smart = {}
-                s_val = health_data[o_key]
-
-                # add all smart attributes
-                ata_smart = s_val.get('ata_smart_attributes', {})
-                for attr in ata_smart.get('table', []):
-                    # get raw smart values
-                    if attr.get('raw', {}).get('string') is not None:
-                        if str(attr.get('raw', {}).get('string', '0')).isdigit():
-                            dev_smart['smart_%s_raw' % attr.get('id')] = \
-                                int(attr.get('raw', {}).get('string', '0'))
-                        else:
-                            if str(attr.get('raw', {}).get('string', '0')).split(' ')[0].isdigit():
-                                dev_smart['smart_%s_raw' % attr.get('id')] = \
-                                    int(attr.get('raw', {}).get('string',
-                                                                '0').split(' ')[0])
-                            else:
-                                dev_smart['smart_%s_raw' % attr.get('id')] = \
-                                    attr.get('raw', {}).get('value', 0)
-                    # get normalized smart values
-                    if attr.get('value') is not None:
-                        dev_smart['smart_%s_normalized' % attr.get('id')] = \
-                            attr.get('value')
-                # add power on hours manually if not available in smart attributes
-                power_on_time = s_val.get('power_on_time', {}).get('hours')
-                if power_on_time is not None:
-                    dev_smart['smart_9_raw'] = int(power_on_time)
-                # add device capacity
-                user_capacity = s_val.get('user_capacity', {}).get('bytes')
-                if user_capacity is not None:
-                    dev_smart['user_capacity'] = user_capacity
-                else:
+                # the smart attributes, capacity, model and vendor were
+                # already extracted by devicehealth when the sample was stored
+                dev_smart = health_data[o_key]
+                if 'user_capacity' not in dev_smart:
                     self.log.debug('user_capacity not found in smart attributes list')
-                # add device model
-                model_name = s_val.get('model_name')
-                if model_name is not None:
-                    dev_smart['model_name'] = model_name
-                # add vendor
-                vendor = s_val.get('vendor')
-                if vendor is not None:
-                    dev_smart['vendor'] = vendor
                 # if smart data was found, then add that to list
                 if dev_smart:
                     predict_datas.append(dev_smart)
                 if len(predict_datas) >= 12:
                     break
         else:
-            self.log.error('unable to predict device due to health data records less than 6 days')
+            self.log.error('unable to predict device %s due to health data records less than 6 days',
+                           devid)
+        return predict_datas
+
+    def _predict_life_expectancies(self, devids: List[str]) -> Dict[str, str]:
+        """
+        Predict the health of the given devices with a single batched call
+        into the predictor.  A device is only predicted again once
+        devicehealth has stored a new sample for it.
+
+        :return: devid -> prediction result, '' if it could not be predicted
+        """
+        predicted_results = {devid: '' for devid in devids}
+        health_datas: Dict[str, Dict[str, DevSmartT]] = {}
+        try:
+            health_datas = self.remote('devicehealth', 'get_devices_features',
+                                       devids=devids, limit=12)
+        except Exception as e:
+            self.log.error('failed to get devices health data due to %s', str(e))
 
-        if len(predict_datas) >= 6:
-            predicted_result = obj_predictor.predict(predict_datas)
-        return predicted_result
+        obj_predictor = self._get_predictor()
+        if obj_predictor is None:
+            return predicted_results
+
+        datasets: Dict[str, List[DevSmartT]] = {}
+        for devid in devids:
+            health_data = health_datas.get(devid, {})
+            newest = max(health_data.keys(), default='')
+            cached = self._predictions.get(devid)
+            if cached is not None and cached[:2] == (self._predictor_name, newest):
+                predicted_results[devid] = cached[2]
+                continue
+            predict_datas = self._get_predict_datas(devid, health_data)
+            if len(predict_datas) >= 6:
+                datasets[devid] = predict_datas
+            self._predictions[devid] = (self._predictor_name, newest, '')
+
+        if datasets:
+            started = time.monotonic()
+            for devid, result in obj_predictor.predict_batch(datasets).items():
+                predicted_results[devid] = result
+                self._predictions[devid] = self._predictions[devid][:2] + (result,)
+            self.log.debug('predicted %d devices in %.3f seconds',
+                           len(datasets), time.monotonic() - started)
+        return predicted_results
+
+    def _predict_life_expectancy(self, devid: str) -> str:
+        return self._predict_life_expectancies([devid])[devid]
 
     def predict_life_expectancy(self, devid: str) -> Tuple[int, str, str]:
         result = self._predict_life_expectancy(devid)
@@ -255,14 +263,12 @@ class Module(MgrModule):
 
     def predict_all_devices(self) -> Tuple[int, str, str]:
         self.log.debug('predict_all_devices')
-        devices = self.get('devices').get('devices', [])
+        devices = [devInfo for devInfo in self.get('devices').get('devices', [])
+                   if devInfo.get('daemons') and devInfo.get('devid')]
+        results = self._predict_life_expectancies([devInfo['devid'] for devInfo in devices])
         for devInfo in devices:
-            if not devInfo.get('daemons'):
-                continue
-            if not devInfo.get('devid'):
-                continue
             self.log.debug('%s' % devInfo)
-            result = self._predict_life_expectancy(devInfo['devid'])
+            result = results[devInfo['devid']]
             if result == 'unknown':
                 self._reset_device_life_expectancy(devInfo['devid'])
                 continue
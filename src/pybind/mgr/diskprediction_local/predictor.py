@@ -26,7 +26,7 @@ import os
 import json
 import pickle
 import logging
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 
 import numpy as np
 
@@ -52,12 +52,43 @@ class Predictor:
         else:
             return None
 
+    def __init__(self) -> None:
+        # unpickled models and scalers, keyed by file path
+        self._loaded: Dict[str, Any] = {}
+
     def initialize(self, model_dir: str) -> None:
         raise NotImplementedError()
 
     def predict(self, dataset: Sequence[DevSmartT]) -> str:
         raise NotImplementedError()
 
+    def predict_batch(self, datasets: Mapping[str, Sequence[DevSmartT]]) -> Dict[str, str]:
+        """
+        Predict the health of many devices at once.
+
+        Args:
+            datasets: device id -> SMART attributes of that device, in the
+                      same format as passed to predict(...)
+
+        Returns:
+            device id -> prediction result
+        """
+        return {devid: self.predict(dataset) for devid, dataset in datasets.items()}
+
+    def _load(self, path: str) -> Any:
+        """
+        Unpickle a model (or scaler) file, only once per predictor instance.
+        """
+        if path not in self._loaded:
+            try:
+                with open(path, 'rb') as f:
+                    self._loaded[path] = pickle.load(f)
+            except UnicodeDecodeError:
+                # Compatibility for python3
+                with open(path, 'rb') as f:
+                    self._loaded[path] = pickle.load(f, encoding='latin1')
+        return self._loaded[path]
+
 
 class RHDiskFailurePredictor(Predictor):
     """Disk failure prediction module developed at Red Hat
@@ -88,6 +119,7 @@ class RHDiskFailurePredictor(Predictor):
         """
         This function may throw exception due to wrong file operation.
         """
+        super().__init__()
         self.model_dirpath = ""
         self.model_context: Dict[str, List[str]] = {}
 
@@ -168,7 +200,13 @@ class RHDiskFailurePredictor(Predictor):
         roll_window_size = 6
 
         # rolling means generator
-        dataset_size = disk_days_attrs.shape[0] - roll_window_size + 1
+        days = len(disk_days_attrs)
+        dataset_size = days - roll_window_size + 1
+        if dataset_size < 1:
+            RHDiskFailurePredictor.LOGGER.debug(
+                f"Not enough days of SMART data for prediction: {days}"
+            )
+            return None
         gen = (disk_days_attrs[i: i + roll_window_size, ...].mean(axis=0)
                for i in range(dataset_size))
         means = np.vstack(gen)  # type: ignore
@@ -188,9 +226,7 @@ class RHDiskFailurePredictor(Predictor):
 
         # scale features
         scaler_path = os.path.join(self.model_dirpath, manufacturer + "_scaler.pkl")
-        with open(scaler_path, 'rb') as f:
-            scaler = pickle.load(f)
-        featurized = scaler.transform(featurized)
+        featurized = self._load(scaler_path).transform(featurized)
         return featurized
 
     @staticmethod
@@ -211,7 +247,8 @@ class RHDiskFailurePredictor(Predictor):
             f"Could not infer manufacturer from model name {model_name}")
         return None
 
-    def predict(self, disk_days: Sequence[DevSmartT]) -> str:
+    @staticmethod
+    def __get_disk_manufacturer(disk_days: Sequence[DevSmartT]) -> Optional[str]:
         # get manufacturer preferably as a smartctl attribute
         # if not available then infer using model name
         manufacturer = disk_days[0].get("vendor")
@@ -230,25 +267,48 @@ class RHDiskFailurePredictor(Predictor):
                     or the model name is not according to the manufacturer's \
                         naming conventions known to DiskPredictor"
             )
-            return RHDiskFailurePredictor.PREDICTION_CLASSES[-1]
+        return manufacturer
 
-        # preprocess for feeding to model
-        preprocessed_data = self.__preprocess(disk_days, manufacturer)
-        if preprocessed_data is None:
-            return RHDiskFailurePredictor.PREDICTION_CLASSES[-1]
-
-        # get model for current manufacturer
-        model_path = os.path.join(
-            self.model_dirpath, manufacturer + "_predictor.pkl"
-        )
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
+    def predict(self, disk_days: Sequence[DevSmartT]) -> str:
+        return self.predict_batch({'': disk_days})['']
 
-        # use prediction for most recent day
-        # TODO: ensure that most recent day is last element and most previous day
-        # is first element in input disk_days
-        pred_class_id = model.predict(preprocessed_data)[-1]
-        return RHDiskFailurePredictor.PREDICTION_CLASSES[pred_class_id]
+    def predict_batch(self, datasets: Mapping[str, Sequence[DevSmartT]]) -> Dict[str, str]:
+        """
+        Preprocess every device, stack the feature rows of all devices of
+        the same manufacturer into one matrix and run the model once per
+        manufacturer.
+        """
+        results = {devid: RHDiskFailurePredictor.PREDICTION_CLASSES[-1] for devid in datasets}
+
+        # manufacturer -> [(devid, preprocessed data)]
+        groups: Dict[str, List[Tuple[str, np.ndarray]]] = {}
+        for devid, disk_days in datasets.items():
+            if not disk_days:
+                continue
+            manufacturer = RHDiskFailurePredictor.__get_disk_manufacturer(disk_days)
+            if manufacturer is None:
+                continue
+            # preprocess for feeding to model
+            preprocessed_data = self.__preprocess(disk_days, manufacturer)
+            if preprocessed_data is None or not preprocessed_data.shape[0]:
+                continue
+            groups.setdefault(manufacturer, []).append((devid, preprocessed_data))
+
+        for manufacturer, devices in groups.items():
+            # get model for current manufacturer
+            model = self._load(os.path.join(
+                self.model_dirpath, manufacturer + "_predictor.pkl"
+            ))
+            pred_class_ids = model.predict(np.vstack([data for _, data in devices]))
+
+            # use prediction for most recent day of each device
+            # TODO: ensure that most recent day is last element and most previous day
+            # is first element in input disk_days
+            end = 0
+            for devid, data in devices:
+                end += data.shape[0]
+                results[devid] = RHDiskFailurePredictor.PREDICTION_CLASSES[pred_class_ids[end - 1]]
+        return results
 
 
 class PSDiskFailurePredictor(Predictor):
@@ -264,7 +324,7 @@ class PSDiskFailurePredictor(Predictor):
         """
         This function may throw exception due to wrong file operation.
         """
-
+        super().__init__()
         self.model_dirpath = ""
         self.model_context: Dict[str, List[str]] = {}
 
@@ -448,37 +508,52 @@ class PSDiskFailurePredictor(Predictor):
         Raises:
             Pickle exceptions
         """
+        return self.predict_batch({'': disk_days})['']
 
-        all_pred = []
-
-        proc_disk_days = self.__preprocess(disk_days)
-        attr_list, diff_data = PSDiskFailurePredictor.__get_diff_attrs(proc_disk_days)
-        modellist = self.__get_best_models(attr_list)
-        if modellist is None:
-            return "Unknown"
-
-        for modelpath in modellist:
-            model_attrlist = modellist[modelpath]
-            ordered_data = PSDiskFailurePredictor.__get_ordered_attrs(
-                diff_data, model_attrlist
-            )
-
-            try:
-                with open(modelpath, "rb") as f_model:
-                    clf = pickle.load(f_model)
-
-            except UnicodeDecodeError:
-                # Compatibility for python3
-                with open(modelpath, "rb") as f_model:
-                    clf = pickle.load(f_model, encoding="latin1")
-
-            pred = clf.predict(ordered_data)
-
-            all_pred.append(1 if any(pred) else 0)
-
-        score = 2 ** sum(all_pred) - len(modellist)
-        if score > 10:
-            return "Bad"
-        if score > 4:
-            return "Warning"
-        return "Good"
+    def predict_batch(self, datasets: Mapping[str, Sequence[DevSmartT]]) -> Dict[str, str]:
+        """
+        Select the best models of every device, then run each model once
+        over the stacked differential attributes of all devices using it.
+        """
+        results = {}
+
+        # model path -> [(devid, ordered differential attributes)]
+        groups: Dict[str, List[Tuple[str, List[List[float]]]]] = {}
+        # devid -> number of best models
+        num_models: Dict[str, int] = {}
+        for devid, disk_days in datasets.items():
+            if not disk_days:
+                results[devid] = "Unknown"
+                continue
+            proc_disk_days = self.__preprocess(disk_days)
+            attr_list, diff_data = PSDiskFailurePredictor.__get_diff_attrs(proc_disk_days)
+            modellist = self.__get_best_models(attr_list)
+            if modellist is None:
+                results[devid] = "Unknown"
+                continue
+            num_models[devid] = len(modellist)
+            for modelpath, model_attrlist in modellist.items():
+                ordered_data = PSDiskFailurePredictor.__get_ordered_attrs(
+                    diff_data, model_attrlist
+                )
+                groups.setdefault(modelpath, []).append((devid, ordered_data))
+
+        all_pred: Dict[str, int] = {devid: 0 for devid in num_models}
+        for modelpath, devices in groups.items():
+            clf = self._load(modelpath)
+            pred = clf.predict([row for _, data in devices for row in data])
+            start = 0
+            for devid, data in devices:
+                end = start + len(data)
+                all_pred[devid] += 1 if any(pred[start:end]) else 0
+                start = end
+
+        for devid, count in num_models.items():
+            score = 2 ** all_pred[devid] - count
+            if score > 10:
+                results[devid] = "Bad"
+            elif score > 4:
+                results[devid] = "Warning"
+            else:
+                results[devid] = "Good"
+        return results
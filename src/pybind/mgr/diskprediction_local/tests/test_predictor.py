@@ -0,0 +1,36 @@
+import json
+import os
+from unittest import mock
+
+from diskprediction_local.predictor import PSDiskFailurePredictor, RHDiskFailurePredictor, \
+    get_diskfailurepredictor_path
+
+
+def _rh_predictor():
+    model_dir = os.path.join(get_diskfailurepredictor_path(), 'models', 'redhat')
+    predictor = RHDiskFailurePredictor()
+    # not initialize(): not every model file is part of the source tree
+    with open(os.path.join(model_dir, 'config.json')) as f:
+        predictor.model_context = json.load(f)
+    predictor.model_dirpath = model_dir
+    return predictor, predictor.model_context['hgst']
+
+
+def test_rh_predict_batch_without_rows():
+    predictor, attrs = _rh_predictor()
+    day = dict({attr: 1 for attr in attrs}, vendor='HGST')
+    model = mock.Mock()
+    with mock.patch.object(predictor, '_load', return_value=model):
+        results = predictor.predict_batch({
+            'no-days': [],
+            # fewer days than the rolling window yield no feature rows
+            'two-days': [day, day],
+        })
+    assert results == {'no-days': 'Unknown', 'two-days': 'Unknown'}
+    model.predict.assert_not_called()
+    assert predictor.predict([]) == 'Unknown'
+
+
+def test_ps_predict_batch_without_rows():
+    predictor = PSDiskFailurePredictor()
+    assert predictor.predict_batch({'no-days': []}) == {'no-days': 'Unknown'}
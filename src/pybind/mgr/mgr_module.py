@@ -1048,6 +1048,17 @@ class MgrModule(ceph_module.BaseMgrModule, MgrModuleLoggingMixin):
     PRIO_UNINTERESTING = 2
     PRIO_DEBUGONLY = 0
 
+    # daemon types get_unlabeled_perf_counters() reports on by default
+    PERF_COUNTER_SERVICES = (
+        "mds",
+        "mon",
+        "osd",
+        "rbd-mirror",
+        "cephfs-mirror",
+        "rgw",
+        "tcmu-runner",
+    )
+
     # counter value types
     PERFCOUNTER_TIME = 1
     PERFCOUNTER_U64 = 2
@@ -1103,7 +1114,10 @@ class MgrModule(ceph_module.BaseMgrModule, MgrModuleLoggingMixin):
 
         self._version = self._ceph_get_version()
 
-        self._perf_schema_cache = None
+        # daemon type -> (schema from get_latest_counters(),
+        #                 [(counter path, counter info, is long running avg)])
+        self._perf_schema_cache: Dict[str, Tuple[List[Dict[str, Any]],
+                                                 List[Tuple[str, Dict[str, Any], bool]]]] = {}
 
         # Keep a librados instance for those that need it.
         self._rados: Optional[rados.Rados] = None
@@ -1278,7 +1292,8 @@ class MgrModule(ceph_module.BaseMgrModule, MgrModuleLoggingMixin):
             assert self.SCHEMA is not None
             for sql in self.SCHEMA:
                 db.execute(sql)
-            self.update_schema_version(db, 1)
+            # SCHEMA is the latest schema, so skip the versioned upgrades
+            self.update_schema_version(db, len(self.SCHEMA_VERSIONED) if self.SCHEMA_VERSIONED else 1)
         else:
             assert self.SCHEMA_VERSIONED is not None
             latest = len(self.SCHEMA_VERSIONED)
@@ -1687,6 +1702,50 @@ class MgrModule(ceph_module.BaseMgrModule, MgrModuleLoggingMixin):
         """
         return self._ceph_get_latest_counter(svc_type, svc_name, path)
 
+    @API.expose
+    def get_latest_counters(self,
+                            svc_types: Sequence[str],
+                            prio_limit: int = PRIO_DEBUGONLY,
+                            svc_ids: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Called by the plugin to fetch the newest data point of all the
+        performance counters of all the daemons of the given types at once,
+        rather than one counter of one daemon at a time.
+
+        :param svc_types: daemon types, for example ``["osd", "mds"]``
+        :param int prio_limit: skip the counters with a lower priority
+        :param svc_ids: only the daemons with these ids, all of them if None
+        :return: a dict of daemon type to a dict with a ``schema`` and the
+            ``daemons`` of that type. The schema is a list of the counters
+            reported by any of the daemons, each as in ``get_perf_schema``
+            with an additional ``path``. ``daemons`` maps daemon ids to the
+            list of the latest values of their counters, in the order of the
+            schema. The value of a long running average is a ``[sum, count]``
+            pair, that of a counter the daemon does not report is None.
+        """
+        if svc_ids is None:
+            return self._ceph_get_latest_counters(list(svc_types), prio_limit)
+        return self._ceph_get_latest_counters(list(svc_types), prio_limit, list(svc_ids))
+
+    @API.expose
+    def get_counters(self,
+                     svc_type: str,
+                     svc_ids: Sequence[str],
+                     paths: Sequence[str]) -> Dict[str, Dict[str, List[Any]]]:
+        """
+        Called by the plugin to fetch the data points of several performance
+        counters of several daemons of a type at once, rather than calling
+        ``get_counter`` for each of them.
+
+        :param svc_type: daemon type, for example ``"osd"``
+        :param svc_ids: the ids of the daemons
+        :param paths: the counter paths, for example ``["osd.op_w"]``
+        :return: a dict of daemon id to a dict of counter path to its data
+            points, as returned by ``get_counter``. A counter or a daemon that
+            does not exist has no data points.
+        """
+        return self._ceph_get_counters(svc_type, list(svc_ids), list(paths))
+
     @API.expose
     def list_servers(self) -> List[ServerInfoT]:
         """
@@ -2192,20 +2251,66 @@ class MgrModule(ceph_module.BaseMgrModule, MgrModuleLoggingMixin):
         else:
             return 0, 0
 
+    def _get_perf_schema_cached(
+            self,
+            svc_type: str,
+            schema: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any], bool]]:
+        """
+        The counters of a `get_latest_counters()` schema as
+        ``(path, counter info, is long running avg)``, built once for as
+        long as the schema of the daemon type does not change.
+        """
+        cached = self._perf_schema_cache.get(svc_type)
+        if cached is None or cached[0] != schema:
+            counters = []
+            for counter in schema:
+                counter_schema = dict(counter)
+                counter_path = counter_schema.pop('path')
+                tp = counter_schema['type']
+                assert isinstance(tp, int)
+                counters.append((counter_path, counter_schema,
+                                 bool(tp & self.PERFCOUNTER_LONGRUNAVG)))
+            cached = (schema, counters)
+            self._perf_schema_cache[svc_type] = cached
+        return cached[1]
+
+    def iter_unlabeled_perf_counters(
+        self,
+        prio_limit: int = PRIO_USEFUL,
+        services: Sequence[str] = PERF_COUNTER_SERVICES,
+    ) -> Iterator[Tuple[str, Dict[str, dict]]]:
+        """
+        Like `get_unlabeled_perf_counters()`, but yield the counters of
+        one daemon at a time, as ``(service, counters)``. Only the compact
+        values from `get_latest_counters()` are held in the meantime, so a
+        caller that drops each daemon's counters before asking for the
+        next never has those of all the daemons in memory.
+        """
+        latest = self.get_latest_counters(services, prio_limit)
+        for svc_type, counters in latest.items():
+            schema = self._get_perf_schema_cached(svc_type, counters['schema'])
+            for svc_id, values in counters['daemons'].items():
+                # not every daemon reports every counter of its type
+                daemon_counters = {}
+                for (counter_path, counter_schema, avg), value in zip(schema, values):
+                    if value is None:
+                        continue
+                    counter_info = dict(counter_schema)
+                    # Also populate count for the long running avgs
+                    if avg:
+                        counter_info['value'], counter_info['count'] = value
+                    else:
+                        counter_info['value'] = value
+                    daemon_counters[counter_path] = counter_info
+                if daemon_counters:
+                    yield "{0}.{1}".format(svc_type, svc_id), daemon_counters
+
     @API.expose
     @profile_method()
     def get_unlabeled_perf_counters(
         self,
         prio_limit: int = PRIO_USEFUL,
-        services: Sequence[str] = (
-            "mds",
-            "mon",
-            "osd",
-            "rbd-mirror",
-            "cephfs-mirror",
-            "rgw",
-            "tcmu-runner",
-        ),
+        services: Sequence[str] = PERF_COUNTER_SERVICES,
     ) -> Dict[str, dict]:
         """
         Return the perf counters currently known to this ceph-mgr
@@ -2219,56 +2324,7 @@ class MgrModule(ceph_module.BaseMgrModule, MgrModuleLoggingMixin):
         value.
         """
 
-        result = defaultdict(dict)  # type: Dict[str, dict]
-
-        for server in self.list_servers():
-            for service in cast(List[ServiceInfoT], server['services']):
-                if service['type'] not in services:
-                    continue
-
-                schemas = self.get_perf_schema(service['type'], service['id'])
-                if not schemas:
-                    self.log.warning("No perf counter schema for {0}.{1}".format(
-                        service['type'], service['id']
-                    ))
-                    continue
-
-                # Value is returned in a potentially-multi-service format,
-                # get just the service we're asking about
-                svc_full_name = "{0}.{1}".format(
-                    service['type'], service['id'])
-                schema = schemas[svc_full_name]
-
-                # Populate latest values
-                for counter_path, counter_schema in schema.items():
-                    # self.log.debug("{0}: {1}".format(
-                    #     counter_path, json.dumps(counter_schema)
-                    # ))
-                    priority = counter_schema['priority']
-                    assert isinstance(priority, int)
-                    if priority < prio_limit:
-                        continue
-
-                    tp = counter_schema['type']
-                    assert isinstance(tp, int)
-                    counter_info = dict(counter_schema)
-                    # Also populate count for the long running avgs
-                    if tp & self.PERFCOUNTER_LONGRUNAVG:
-                        v, c = self.get_latest_avg(
-                            service['type'],
-                            service['id'],
-                            counter_path
-                        )
-                        counter_info['value'], counter_info['count'] = v, c
-                        result[svc_full_name][counter_path] = counter_info
-                    else:
-                        counter_info['value'] = self.get_latest(
-                            service['type'],
-                            service['id'],
-                            counter_path
-                        )
-
-                    result[svc_full_name][counter_path] = counter_info
+        result = dict(self.iter_unlabeled_perf_counters(prio_limit, services))
 
         self.log.debug("returning {0} counter".format(len(result)))
 
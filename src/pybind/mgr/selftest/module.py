@@ -1,14 +1,16 @@
 
-from mgr_module import MgrModule, CommandResult, HandleCommandResult, CLICommand, Option
+from mgr_module import MgrModule, CommandResult, HandleCommandResult, CLICommand, Option, \
+    ServiceInfoT
 import enum
 import json
 import random
 import sys
 import threading
+import time
 from code import InteractiveInterpreter
 from contextlib import redirect_stderr, redirect_stdout
 from io import StringIO
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 
 # These workloads are things that can be requested to run inside the
@@ -364,6 +366,14 @@ class Module(MgrModule):
     def _self_test_perf_counters(self) -> None:
         self.get_perf_schema("osd", "0")
         self.get_counter("osd", "0", "osd.op")
+        latest = self.get_latest_counters(["osd"])
+        for values in latest.get("osd", {}).get("daemons", {}).values():
+            assert len(values) == len(latest["osd"]["schema"])
+        latest = self.get_latest_counters(["osd"], svc_ids=["0"])
+        assert set(latest.get("osd", {}).get("daemons", {})) <= {"0"}
+        counters = self.get_counters("osd", ["0"], ["osd.op"])
+        assert set(counters) == {"0"} and set(counters["0"]) == {"osd.op"}
+        self.get_unlabeled_perf_counters()
         # get_counter
         # get_all_perf_coutners
 
@@ -468,6 +478,56 @@ class Module(MgrModule):
         self._event.clear()
         self.log.info("Ended command_spam workload...")
 
+    @CLICommand('mgr self-test perf-counters-bench', perm='r')
+    def perf_counters_bench(self, iterations: int = 5) -> Tuple[int, str, str]:
+        '''
+        Time get_unlabeled_perf_counters() against fetching the same counters one at a time
+        '''
+        per_counter = bulk = 0.0
+        for _ in range(iterations):
+            start = time.monotonic()
+            expected = self._unlabeled_perf_counters_per_counter()
+            per_counter += time.monotonic() - start
+            start = time.monotonic()
+            got = self.get_unlabeled_perf_counters()
+            bulk += time.monotonic() - start
+        # the values may have moved on in between, the counters should not
+        assert {d: set(c) for d, c in got.items()} == {d: set(c) for d, c in expected.items()}
+        return 0, json.dumps({
+            'daemons': len(got),
+            'counters': sum(len(c) for c in got.values()),
+            'per_counter_seconds': per_counter / iterations,
+            'bulk_seconds': bulk / iterations,
+        }, indent=2), ''
+
+    def _unlabeled_perf_counters_per_counter(self) -> Dict[str, Dict[str, Any]]:
+        """
+        get_unlabeled_perf_counters() the way it was before
+        get_latest_counters(): a schema per daemon and a call per counter.
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        for server in self.list_servers():
+            for service in cast(List[ServiceInfoT], server['services']):
+                if service['type'] not in self.PERF_COUNTER_SERVICES:
+                    continue
+                svc_full_name = "{0}.{1}".format(service['type'], service['id'])
+                schema = self.get_perf_schema(service['type'], service['id']).get(svc_full_name, {})
+                for counter_path, counter_schema in schema.items():
+                    priority = counter_schema['priority']
+                    tp = counter_schema['type']
+                    assert isinstance(priority, int) and isinstance(tp, int)
+                    if priority < self.PRIO_USEFUL:
+                        continue
+                    counter_info: Dict[str, Any] = dict(counter_schema)
+                    if tp & self.PERFCOUNTER_LONGRUNAVG:
+                        counter_info['value'], counter_info['count'] = self.get_latest_avg(
+                            service['type'], service['id'], counter_path)
+                    else:
+                        counter_info['value'] = self.get_latest(
+                            service['type'], service['id'], counter_path)
+                    result.setdefault(svc_full_name, {})[counter_path] = counter_info
+        return result
+
     @CLICommand('mgr self-test eval')
     def eval(self,
              s: Optional[str] = None,
@@ -9,7 +9,9 @@ import numbers
 import enum
 import errno
 import hashlib
+import itertools
 import json
+import zlib
 import rbd
 import requests
 import uuid
@@ -18,7 +20,7 @@ from datetime import datetime, timedelta
 from prettytable import PrettyTable
 from threading import Event, Lock
 from collections import defaultdict
-from typing import cast, Any, DefaultDict, Dict, List, Optional, Tuple, TypeVar, TYPE_CHECKING, Union
+from typing import cast, Any, Callable, DefaultDict, Dict, Iterator, List, Optional, Tuple, TypeVar, TYPE_CHECKING, Union
 
 from mgr_module import CLICommand, CLIReadCommand, MgrModule, Option, OptionValue, ServiceInfoT
 
@@ -224,6 +226,10 @@ class Module(MgrModule):
                type='int',
                default=24,
                min=8),
+        Option(name='compress_report',
+               type='bool',
+               default=False,
+               desc='gzip the report body when sending it'),
         Option(name='channel_basic',
                type='bool',
                default=True,
@@ -259,7 +265,8 @@ class Module(MgrModule):
         self.last_opted_in_ceph_version: Optional[int] = None
         self.last_opted_out_ceph_version: Optional[int] = None
         self.last_upload: Optional[int] = None
-        self.last_report: Dict[str, Any] = dict()
+        # section -> gather/serialize timing and size of the last report
+        self.report_stats: Dict[str, Dict[str, Any]] = dict()
         self.report_id: Optional[str] = None
         self.salt: Optional[str] = None
         self.get_report_lock = Lock()
@@ -274,6 +281,7 @@ class Module(MgrModule):
             self.leaderboard_description = ''
             self.interval = 0
             self.proxy = ''
+            self.compress_report = False
             self.channel_basic = True
             self.channel_ident = False
             self.channel_crash = True
@@ -800,12 +808,14 @@ class Module(MgrModule):
             crashlist.append(c)
         return crashlist
 
-    def gather_perf_counters(self, mode: str = 'separated') -> Dict[str, dict]:
-        # Extract perf counter data with get_unlabeled_perf_counters(), a method
-        # from mgr/mgr_module.py. This method returns a nested dictionary that
-        # looks a lot like perf schema, except with some additional fields.
+    def iter_perf_counters(self) -> Iterator[Tuple[str, Dict[str, Dict[str, Dict[str, Any]]]]]:
+        # Yield the 'separated' perf counters one daemon at a time, as
+        # (daemon, counters).  The counters are extracted with
+        # iter_unlabeled_perf_counters(), a method from mgr/mgr_module.py,
+        # which yields nested dictionaries that look a lot like perf schema,
+        # except with some additional fields.
         #
-        # Example of output, a snapshot of a mon daemon:
+        # Example of input, a snapshot of a mon daemon:
         #   "mon.b": {
         #       "bluestore.kv_flush_lat": {
         #           "count": 2431,
@@ -817,33 +827,17 @@ class Module(MgrModule):
         #           "value": 88814109
         #       },
         #   },
-        perf_counters = self.get_unlabeled_perf_counters()
-
-        # Initialize 'result' dict
-        result: Dict[str, dict] = defaultdict(lambda: defaultdict(
-            lambda: defaultdict(lambda: defaultdict(int))))
-
-        # 'separated' mode
         anonymized_daemon_dict = {}
 
-        for daemon, perf_counters_by_daemon in perf_counters.items():
-            daemon_type = daemon[0:3] # i.e. 'mds', 'osd', 'rgw'
+        for daemon, perf_counters_by_daemon in self.iter_unlabeled_perf_counters():
+            # anonymize individual daemon names except osds
+            if daemon[0:3] != 'osd':
+                anonymized_daemon = self.anonymize_entity_name(daemon)
+                anonymized_daemon_dict[anonymized_daemon] = daemon
+                daemon = anonymized_daemon
 
-            if mode == 'separated':
-                # anonymize individual daemon names except osds
-                if (daemon_type != 'osd'):
-                    anonymized_daemon = self.anonymize_entity_name(daemon)
-                    anonymized_daemon_dict[anonymized_daemon] = daemon
-                    daemon = anonymized_daemon
-
-            # Calculate num combined daemon types if in aggregated mode
-            if mode == 'aggregated':
-                if 'num_combined_daemons' not in result[daemon_type]:
-                    result[daemon_type]['num_combined_daemons'] = 1
-                else:
-                    result[daemon_type]['num_combined_daemons'] += 1
-
-            for collection in perf_counters_by_daemon:
+            result: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+            for collection, counter in perf_counters_by_daemon.items():
                 # Split the collection to avoid redundancy in final report; i.e.:
                 #   bluestore.kv_flush_lat, bluestore.kv_final_lat -->
                 #   bluestore: kv_flush_lat, kv_final_lat
@@ -860,43 +854,58 @@ class Module(MgrModule):
                 if (daemon == "") or (col_0 == "") or (col_1 == ""):
                     self.log.debug("Instance of an empty key: {}{}".format(daemon, collection))
 
-                if mode == 'separated':
-                    # Add value to result
-                    result[daemon][col_0][col_1]['value'] = \
-                            perf_counters_by_daemon[collection]['value']
+                result[col_0][col_1] = {'value': counter['value']}
+                # Check that 'count' exists, as not all counters have a count field.
+                if 'count' in counter:
+                    result[col_0][col_1]['count'] = counter['count']
+            yield daemon, result
 
-                    # Check that 'count' exists, as not all counters have a count field.
-                    if 'count' in perf_counters_by_daemon[collection]:
-                        result[daemon][col_0][col_1]['count'] = \
-                                perf_counters_by_daemon[collection]['count']
-                elif mode == 'aggregated':
-                    # Not every rgw daemon has the same schema. Specifically, each rgw daemon
-                    # has a uniquely-named collection that starts off identically (i.e.
-                    # "objecter-0x...") then diverges (i.e. "...55f4e778e140.op_rmw").
-                    # This bit of code combines these unique counters all under one rgw instance.
-                    # Without this check, the schema would remain separeted out in the final report.
-                    if col_0[0:11] == "objecter-0x":
-                        col_0 = "objecter-0x"
-
-                    # Check that the value can be incremented. In some cases,
-                    # the files are of type 'pair' (real-integer-pair, integer-integer pair).
-                    # In those cases, the value is a dictionary, and not a number.
-                    #   i.e. throttle-msgr_dispatch_throttler-hbserver["wait"]
-                    if isinstance(perf_counters_by_daemon[collection]['value'], numbers.Number):
-                        result[daemon_type][col_0][col_1]['value'] += \
-                                perf_counters_by_daemon[collection]['value']
-
-                    # Check that 'count' exists, as not all counters have a count field.
-                    if 'count' in perf_counters_by_daemon[collection]:
-                        result[daemon_type][col_0][col_1]['count'] += \
-                                perf_counters_by_daemon[collection]['count']
-                else:
-                    self.log.error('Incorrect mode specified in gather_perf_counters: {}'.format(mode))
-                    return {}
+        # for debugging purposes only, this data is never reported
+        self.log.debug('Anonymized daemon mapping for telemetry perf_counters (anonymized: real): {}'.format(anonymized_daemon_dict))
 
+    def gather_perf_counters(self, mode: str = 'separated') -> Dict[str, dict]:
         if mode == 'separated':
-            # for debugging purposes only, this data is never reported
-            self.log.debug('Anonymized daemon mapping for telemetry perf_counters (anonymized: real): {}'.format(anonymized_daemon_dict))
+            return dict(self.iter_perf_counters())
+        if mode != 'aggregated':
+            self.log.error('Incorrect mode specified in gather_perf_counters: {}'.format(mode))
+            return {}
+
+        # Initialize 'result' dict
+        result: Dict[str, dict] = defaultdict(lambda: defaultdict(
+            lambda: defaultdict(lambda: defaultdict(int))))
+
+        for daemon, perf_counters_by_daemon in self.iter_unlabeled_perf_counters():
+            daemon_type = daemon[0:3] # i.e. 'mds', 'osd', 'rgw'
+
+            # Calculate num combined daemon types
+            if 'num_combined_daemons' not in result[daemon_type]:
+                result[daemon_type]['num_combined_daemons'] = 1
+            else:
+                result[daemon_type]['num_combined_daemons'] += 1
+
+            for collection in perf_counters_by_daemon:
+                col_0, col_1 = collection.split('.')
+
+                # Not every rgw daemon has the same schema. Specifically, each rgw daemon
+                # has a uniquely-named collection that starts off identically (i.e.
+                # "objecter-0x...") then diverges (i.e. "...55f4e778e140.op_rmw").
+                # This bit of code combines these unique counters all under one rgw instance.
+                # Without this check, the schema would remain separeted out in the final report.
+                if col_0[0:11] == "objecter-0x":
+                    col_0 = "objecter-0x"
+
+                # Check that the value can be incremented. In some cases,
+                # the files are of type 'pair' (real-integer-pair, integer-integer pair).
+                # In those cases, the value is a dictionary, and not a number.
+                #   i.e. throttle-msgr_dispatch_throttler-hbserver["wait"]
+                if isinstance(perf_counters_by_daemon[collection]['value'], numbers.Number):
+                    result[daemon_type][col_0][col_1]['value'] += \
+                            perf_counters_by_daemon[collection]['value']
+
+                # Check that 'count' exists, as not all counters have a count field.
+                if 'count' in perf_counters_by_daemon[collection]:
+                    result[daemon_type][col_0][col_1]['count'] += \
+                            perf_counters_by_daemon[collection]['count']
 
         return result
 
@@ -986,10 +995,330 @@ class Module(MgrModule):
         else:
             return 0
 
-    def compile_report(self, channels: Optional[List[str]] = None) -> Dict[str, Any]:
-        if not channels:
-            channels = self.get_active_channels()
-        report = {
+    def gather_basic_report(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {}
+        mon_map = self.get('mon_map')
+        osd_map = self.get('osd_map')
+        service_map = self.get('service_map')
+        fs_map = self.get('fs_map')
+        df = self.get('df')
+        df_pools = {pool['id']: pool for pool in df['pools']}
+
+        report['created'] = mon_map['created']
+
+        # mons
+        v1_mons = 0
+        v2_mons = 0
+        ipv4_mons = 0
+        ipv6_mons = 0
+        for mon in mon_map['mons']:
+            for a in mon['public_addrs']['addrvec']:
+                if a['type'] == 'v2':
+                    v2_mons += 1
+                elif a['type'] == 'v1':
+                    v1_mons += 1
+                if a['addr'].startswith('['):
+                    ipv6_mons += 1
+                else:
+                    ipv4_mons += 1
+        report['mon'] = {
+            'count': len(mon_map['mons']),
+            'features': mon_map['features'],
+            'min_mon_release': mon_map['min_mon_release'],
+            'v1_addr_mons': v1_mons,
+            'v2_addr_mons': v2_mons,
+            'ipv4_addr_mons': ipv4_mons,
+            'ipv6_addr_mons': ipv6_mons,
+        }
+
+        report['config'] = self.gather_configs()
+
+        # pools
+
+        rbd_num_pools = 0
+        rbd_num_images_by_pool = []
+        rbd_mirroring_by_pool = []
+        num_pg = 0
+        report['pools'] = list()
+        for pool in osd_map['pools']:
+            num_pg += pool['pg_num']
+            ec_profile = {}
+            if pool['erasure_code_profile']:
+                orig = osd_map['erasure_code_profiles'].get(
+                    pool['erasure_code_profile'], {})
+                ec_profile = {
+                    k: orig[k] for k in orig.keys()
+                    if k in ['k', 'm', 'plugin', 'technique',
+                             'crush-failure-domain', 'l']
+                }
+            pool_data = {
+                    'pool': pool['pool'],
+                    'pg_num': pool['pg_num'],
+                    'pgp_num': pool['pg_placement_num'],
+                    'size': pool['size'],
+                    'min_size': pool['min_size'],
+                    'pg_autoscale_mode': pool['pg_autoscale_mode'],
+                    'target_max_bytes': pool['target_max_bytes'],
+                    'target_max_objects': pool['target_max_objects'],
+                    'type': ['', 'replicated', '', 'erasure'][pool['type']],
+                    'erasure_code_profile': ec_profile,
+                    'cache_mode': pool['cache_mode'],
+                }
+
+            # basic_pool_usage collection
+            if self.is_enabled_collection(Collection.basic_pool_usage):
+                pool_data['application'] = []
+                for application in pool['application_metadata']:
+                    # Only include default applications
+                    if application in ['cephfs', 'mgr', 'rbd', 'rgw']:
+                        pool_data['application'].append(application)
+                pool_stats = df_pools[pool['pool']]['stats']
+                pool_data['stats'] = { # filter out kb_used
+                                        'avail_raw': pool_stats['avail_raw'],
+                                        'bytes_used': pool_stats['bytes_used'],
+                                        'compress_bytes_used': pool_stats['compress_bytes_used'],
+                                        'compress_under_bytes': pool_stats['compress_under_bytes'],
+                                        'data_bytes_used': pool_stats['data_bytes_used'],
+                                        'dirty': pool_stats['dirty'],
+                                        'max_avail': pool_stats['max_avail'],
+                                        'objects': pool_stats['objects'],
+                                        'omap_bytes_used': pool_stats['omap_bytes_used'],
+                                        'percent_used': pool_stats['percent_used'],
+                                        'quota_bytes': pool_stats['quota_bytes'],
+                                        'quota_objects': pool_stats['quota_objects'],
+                                        'rd': pool_stats['rd'],
+                                        'rd_bytes': pool_stats['rd_bytes'],
+                                        'stored': pool_stats['stored'],
+                                        'stored_data': pool_stats['stored_data'],
+                                        'stored_omap': pool_stats['stored_omap'],
+                                        'stored_raw': pool_stats['stored_raw'],
+                                        'wr': pool_stats['wr'],
+                                        'wr_bytes': pool_stats['wr_bytes']
+                    }
+                pool_data['options'] = {}
+                # basic_pool_options_bluestore collection
+                if self.is_enabled_collection(Collection.basic_pool_options_bluestore):
+                    bluestore_options = ['compression_algorithm',
+                                         'compression_mode',
+                                         'compression_required_ratio',
+                                         'compression_min_blob_size',
+                                         'compression_max_blob_size']
+                    for option in bluestore_options:
+                        if option in pool['options']:
+                            pool_data['options'][option] = pool['options'][option]
+
+            # basic_pool_flags collection
+            if self.is_enabled_collection(Collection.basic_pool_flags):
+                if 'flags_names' in pool and pool['flags_names'] is not None:
+                    # flags are defined in pg_pool_t (src/osd/osd_types.h)
+                    flags_to_report = [
+                        'hashpspool',
+                        'full',
+                        'ec_overwrites',
+                        'incomplete_clones',
+                        'nodelete',
+                        'nopgchange',
+                        'nosizechange',
+                        'write_fadvise_dontneed',
+                        'noscrub',
+                        'nodeep-scrub',
+                        'full_quota',
+                        'nearfull',
+                        'backfillfull',
+                        'selfmanaged_snaps',
+                        'pool_snaps',
+                        'creating',
+                        'eio',
+                        'bulk',
+                        'crimson',
+                        ]
+
+                    pool_data['flags_names'] = [flag for flag in pool['flags_names'].split(',') if flag in flags_to_report]
+
+            cast(List[Dict[str, Any]], report['pools']).append(pool_data)
+
+            if 'rbd' in pool['application_metadata']:
+                rbd_num_pools += 1
+                ioctx = self.rados.open_ioctx(pool['pool_name'])
+                rbd_num_images_by_pool.append(
+                    sum(1 for _ in rbd.RBD().list2(ioctx)))
+                rbd_mirroring_by_pool.append(
+                    rbd.RBD().mirror_mode_get(ioctx) != rbd.RBD_MIRROR_MODE_DISABLED)
+        report['rbd'] = {
+            'num_pools': rbd_num_pools,
+            'num_images_by_pool': rbd_num_images_by_pool,
+            'mirroring_by_pool': rbd_mirroring_by_pool}
+
+        # osds
+        cluster_network = False
+        for osd in osd_map['osds']:
+            if osd['up'] and not cluster_network:
+                front_ip = osd['public_addrs']['addrvec'][0]['addr'].split(':')[0]
+                back_ip = osd['cluster_addrs']['addrvec'][0]['addr'].split(':')[0]
+                if front_ip != back_ip:
+                    cluster_network = True
+        report['osd'] = {
+            'count': len(osd_map['osds']),
+            'require_osd_release': osd_map['require_osd_release'],
+            'require_min_compat_client': osd_map['require_min_compat_client'],
+            'cluster_network': cluster_network,
+        }
+
+        # crush
+        report['crush'] = self.gather_crush_info()
+
+        # cephfs
+        report['fs'] = {
+            'count': len(fs_map['filesystems']),
+            'feature_flags': fs_map['feature_flags'],
+            'num_standby_mds': len(fs_map['standbys']),
+            'filesystems': [],
+        }
+        num_mds = len(fs_map['standbys'])
+        for fsm in fs_map['filesystems']:
+            fs = fsm['mdsmap']
+            num_sessions = 0
+            cached_ino = 0
+            cached_dn = 0
+            cached_cap = 0
+            subtrees = 0
+            rfiles = 0
+            rbytes = 0
+            rsnaps = 0
+            for gid, mds in fs['info'].items():
+                num_sessions += self.get_latest('mds', mds['name'],
+                                                'mds_sessions.session_count')
+                cached_ino += self.get_latest('mds', mds['name'],
+                                              'mds_mem.ino')
+                cached_dn += self.get_latest('mds', mds['name'],
+                                             'mds_mem.dn')
+                cached_cap += self.get_latest('mds', mds['name'],
+                                              'mds_mem.cap')
+                subtrees += self.get_latest('mds', mds['name'],
+                                            'mds.subtrees')
+                if mds['rank'] == 0:
+                    rfiles = self.get_latest('mds', mds['name'],
+                                             'mds.root_rfiles')
+                    rbytes = self.get_latest('mds', mds['name'],
+                                             'mds.root_rbytes')
+                    rsnaps = self.get_latest('mds', mds['name'],
+                                             'mds.root_rsnaps')
+            report['fs']['filesystems'].append({  # type: ignore
+                'max_mds': fs['max_mds'],
+                'ever_allowed_features': fs['ever_allowed_features'],
+                'explicitly_allowed_features': fs['explicitly_allowed_features'],
+                'num_in': len(fs['in']),
+                'num_up': len(fs['up']),
+                'num_standby_replay': len(
+                    [mds for gid, mds in fs['info'].items()
+                     if mds['state'] == 'up:standby-replay']),
+                'num_mds': len(fs['info']),
+                'num_sessions': num_sessions,
+                'cached_inos': cached_ino,
+                'cached_dns': cached_dn,
+                'cached_caps': cached_cap,
+                'cached_subtrees': subtrees,
+                'balancer_enabled': len(fs['balancer']) > 0,
+                'num_data_pools': len(fs['data_pools']),
+                'standby_count_wanted': fs['standby_count_wanted'],
+                'approx_ctime': fs['created'][0:7],
+                'files': rfiles,
+                'bytes': rbytes,
+                'snaps': rsnaps,
+            })
+            num_mds += len(fs['info'])
+        report['fs']['total_num_mds'] = num_mds  # type: ignore
+
+        # daemons
+        report['metadata'] = dict(osd=self.gather_osd_metadata(osd_map),
+                                  mon=self.gather_mon_metadata(mon_map))
+
+        if self.is_enabled_collection(Collection.basic_mds_metadata):
+            report['metadata']['mds'] = self.gather_mds_metadata()  # type: ignore
+
+        # host counts
+        servers = self.list_servers()
+        self.log.debug('servers %s' % servers)
+        hosts = {
+            'num': len([h for h in servers if h['hostname']]),
+        }
+        for t in ['mon', 'mds', 'osd', 'mgr']:
+            nr_services = sum(1 for host in servers if
+                              any(service for service in cast(List[ServiceInfoT],
+                                                              host['services'])
+                                  if service['type'] == t))
+            hosts['num_with_' + t] = nr_services
+        report['hosts'] = hosts
+
+        report['usage'] = {
+            'pools': len(df['pools']),
+            'pg_num': num_pg,
+            'total_used_bytes': df['stats']['total_used_bytes'],
+            'total_bytes': df['stats']['total_bytes'],
+            'total_avail_bytes': df['stats']['total_avail_bytes']
+        }
+        # basic_usage_by_class collection
+        if self.is_enabled_collection(Collection.basic_usage_by_class):
+            report['usage']['stats_by_class'] = {} # type: ignore
+            for device_class in df['stats_by_class']:
+                if device_class in ['hdd', 'ssd', 'nvme']:
+                    report['usage']['stats_by_class'][device_class] = df['stats_by_class'][device_class] # type: ignore
+
+        services: DefaultDict[str, int] = defaultdict(int)
+        for key, value in service_map['services'].items():
+            services[key] += 1
+            if key == 'rgw':
+                rgw = {}
+                zones = set()
+                zonegroups = set()
+                frontends = set()
+                count = 0
+                d = value.get('daemons', dict())
+                for k, v in d.items():
+                    if k == 'summary' and v:
+                        rgw[k] = v
+                    elif isinstance(v, dict) and 'metadata' in v:
+                        count += 1
+                        zones.add(v['metadata']['zone_id'])
+                        zonegroups.add(v['metadata']['zonegroup_id'])
+                        frontends.add(v['metadata']['frontend_type#0'])
+
+                        # we could actually iterate over all the keys of
+                        # the dict and check for how many frontends there
+                        # are, but it is unlikely that one would be running
+                        # more than 2 supported ones
+                        f2 = v['metadata'].get('frontend_type#1', None)
+                        if f2:
+                            frontends.add(f2)
+
+                rgw['count'] = count
+                rgw['zones'] = len(zones)
+                rgw['zonegroups'] = len(zonegroups)
+                rgw['frontends'] = list(frontends)  # sets aren't json-serializable
+                report['rgw'] = rgw
+        report['services'] = services
+
+        try:
+            report['balancer'] = self.remote('balancer', 'gather_telemetry')
+        except ImportError:
+            report['balancer'] = {
+                'active': False
+            }
+
+        # Rook
+        self.get_rook_data(report)
+
+        return report
+
+    def report_sections(self, channels: List[str]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        '''
+        Yield the report as (channel, section, data) tuples.
+
+        Sections are only gathered when the generator is advanced, so a
+        consumer that serializes and drops each section before asking for
+        the next one never holds the whole report in memory.
+        '''
+        yield '', 'header', {
             'leaderboard': self.leaderboard,
             'leaderboard_description': self.leaderboard_description,
             'report_version': 1,
@@ -1003,340 +1332,125 @@ class Module(MgrModule):
         }
 
         if 'ident' in channels:
-            for option in ['description', 'contact', 'organization']:
-                report[option] = getattr(self, option)
-
-        if 'basic' in channels:
-            mon_map = self.get('mon_map')
-            osd_map = self.get('osd_map')
-            service_map = self.get('service_map')
-            fs_map = self.get('fs_map')
-            df = self.get('df')
-            df_pools = {pool['id']: pool for pool in df['pools']}
-
-            report['created'] = mon_map['created']
-
-            # mons
-            v1_mons = 0
-            v2_mons = 0
-            ipv4_mons = 0
-            ipv6_mons = 0
-            for mon in mon_map['mons']:
-                for a in mon['public_addrs']['addrvec']:
-                    if a['type'] == 'v2':
-                        v2_mons += 1
-                    elif a['type'] == 'v1':
-                        v1_mons += 1
-                    if a['addr'].startswith('['):
-                        ipv6_mons += 1
-                    else:
-                        ipv4_mons += 1
-            report['mon'] = {
-                'count': len(mon_map['mons']),
-                'features': mon_map['features'],
-                'min_mon_release': mon_map['min_mon_release'],
-                'v1_addr_mons': v1_mons,
-                'v2_addr_mons': v2_mons,
-                'ipv4_addr_mons': ipv4_mons,
-                'ipv6_addr_mons': ipv6_mons,
-            }
-
-            report['config'] = self.gather_configs()
-
-            # pools
-
-            rbd_num_pools = 0
-            rbd_num_images_by_pool = []
-            rbd_mirroring_by_pool = []
-            num_pg = 0
-            report['pools'] = list()
-            for pool in osd_map['pools']:
-                num_pg += pool['pg_num']
-                ec_profile = {}
-                if pool['erasure_code_profile']:
-                    orig = osd_map['erasure_code_profiles'].get(
-                        pool['erasure_code_profile'], {})
-                    ec_profile = {
-                        k: orig[k] for k in orig.keys()
-                        if k in ['k', 'm', 'plugin', 'technique',
-                                 'crush-failure-domain', 'l']
-                    }
-                pool_data = {
-                        'pool': pool['pool'],
-                        'pg_num': pool['pg_num'],
-                        'pgp_num': pool['pg_placement_num'],
-                        'size': pool['size'],
-                        'min_size': pool['min_size'],
-                        'pg_autoscale_mode': pool['pg_autoscale_mode'],
-                        'target_max_bytes': pool['target_max_bytes'],
-                        'target_max_objects': pool['target_max_objects'],
-                        'type': ['', 'replicated', '', 'erasure'][pool['type']],
-                        'erasure_code_profile': ec_profile,
-                        'cache_mode': pool['cache_mode'],
-                    }
-
-                # basic_pool_usage collection
-                if self.is_enabled_collection(Collection.basic_pool_usage):
-                    pool_data['application'] = []
-                    for application in pool['application_metadata']:
-                        # Only include default applications
-                        if application in ['cephfs', 'mgr', 'rbd', 'rgw']:
-                            pool_data['application'].append(application)
-                    pool_stats = df_pools[pool['pool']]['stats']
-                    pool_data['stats'] = { # filter out kb_used
-                                            'avail_raw': pool_stats['avail_raw'],
-                                            'bytes_used': pool_stats['bytes_used'],
-                                            'compress_bytes_used': pool_stats['compress_bytes_used'],
-                                            'compress_under_bytes': pool_stats['compress_under_bytes'],
-                                            'data_bytes_used': pool_stats['data_bytes_used'],
-                                            'dirty': pool_stats['dirty'],
-                                            'max_avail': pool_stats['max_avail'],
-                                            'objects': pool_stats['objects'],
-                                            'omap_bytes_used': pool_stats['omap_bytes_used'],
-                                            'percent_used': pool_stats['percent_used'],
-                                            'quota_bytes': pool_stats['quota_bytes'],
-                                            'quota_objects': pool_stats['quota_objects'],
-                                            'rd': pool_stats['rd'],
-                                            'rd_bytes': pool_stats['rd_bytes'],
-                                            'stored': pool_stats['stored'],
-                                            'stored_data': pool_stats['stored_data'],
-                                            'stored_omap': pool_stats['stored_omap'],
-                                            'stored_raw': pool_stats['stored_raw'],
-                                            'wr': pool_stats['wr'],
-                                            'wr_bytes': pool_stats['wr_bytes']
-                        }
-                    pool_data['options'] = {}
-                    # basic_pool_options_bluestore collection
-                    if self.is_enabled_collection(Collection.basic_pool_options_bluestore):
-                        bluestore_options = ['compression_algorithm',
-                                             'compression_mode',
-                                             'compression_required_ratio',
-                                             'compression_min_blob_size',
-                                             'compression_max_blob_size']
-                        for option in bluestore_options:
-                            if option in pool['options']:
-                                pool_data['options'][option] = pool['options'][option]
-
-                # basic_pool_flags collection
-                if self.is_enabled_collection(Collection.basic_pool_flags):
-                    if 'flags_names' in pool and pool['flags_names'] is not None:
-                        # flags are defined in pg_pool_t (src/osd/osd_types.h)
-                        flags_to_report = [
-                            'hashpspool',
-                            'full',
-                            'ec_overwrites',
-                            'incomplete_clones',
-                            'nodelete',
-                            'nopgchange',
-                            'nosizechange',
-                            'write_fadvise_dontneed',
-                            'noscrub',
-                            'nodeep-scrub',
-                            'full_quota',
-                            'nearfull',
-                            'backfillfull',
-                            'selfmanaged_snaps',
-                            'pool_snaps',
-                            'creating',
-                            'eio',
-                            'bulk',
-                            'crimson',
-                            ]
-
-                        pool_data['flags_names'] = [flag for flag in pool['flags_names'].split(',') if flag in flags_to_report]
-
-                cast(List[Dict[str, Any]], report['pools']).append(pool_data)
-
-                if 'rbd' in pool['application_metadata']:
-                    rbd_num_pools += 1
-                    ioctx = self.rados.open_ioctx(pool['pool_name'])
-                    rbd_num_images_by_pool.append(
-                        sum(1 for _ in rbd.RBD().list2(ioctx)))
-                    rbd_mirroring_by_pool.append(
-                        rbd.RBD().mirror_mode_get(ioctx) != rbd.RBD_MIRROR_MODE_DISABLED)
-            report['rbd'] = {
-                'num_pools': rbd_num_pools,
-                'num_images_by_pool': rbd_num_images_by_pool,
-                'mirroring_by_pool': rbd_mirroring_by_pool}
-
-            # osds
-            cluster_network = False
-            for osd in osd_map['osds']:
-                if osd['up'] and not cluster_network:
-                    front_ip = osd['public_addrs']['addrvec'][0]['addr'].split(':')[0]
-                    back_ip = osd['cluster_addrs']['addrvec'][0]['addr'].split(':')[0]
-                    if front_ip != back_ip:
-                        cluster_network = True
-            report['osd'] = {
-                'count': len(osd_map['osds']),
-                'require_osd_release': osd_map['require_osd_release'],
-                'require_min_compat_client': osd_map['require_min_compat_client'],
-                'cluster_network': cluster_network,
-            }
-
-            # crush
-            report['crush'] = self.gather_crush_info()
-
-            # cephfs
-            report['fs'] = {
-                'count': len(fs_map['filesystems']),
-                'feature_flags': fs_map['feature_flags'],
-                'num_standby_mds': len(fs_map['standbys']),
-                'filesystems': [],
-            }
-            num_mds = len(fs_map['standbys'])
-            for fsm in fs_map['filesystems']:
-                fs = fsm['mdsmap']
-                num_sessions = 0
-                cached_ino = 0
-                cached_dn = 0
-                cached_cap = 0
-                subtrees = 0
-                rfiles = 0
-                rbytes = 0
-                rsnaps = 0
-                for gid, mds in fs['info'].items():
-                    num_sessions += self.get_latest('mds', mds['name'],
-                                                    'mds_sessions.session_count')
-                    cached_ino += self.get_latest('mds', mds['name'],
-                                                  'mds_mem.ino')
-                    cached_dn += self.get_latest('mds', mds['name'],
-                                                 'mds_mem.dn')
-                    cached_cap += self.get_latest('mds', mds['name'],
-                                                  'mds_mem.cap')
-                    subtrees += self.get_latest('mds', mds['name'],
-                                                'mds.subtrees')
-                    if mds['rank'] == 0:
-                        rfiles = self.get_latest('mds', mds['name'],
-                                                 'mds.root_rfiles')
-                        rbytes = self.get_latest('mds', mds['name'],
-                                                 'mds.root_rbytes')
-                        rsnaps = self.get_latest('mds', mds['name'],
-                                                 'mds.root_rsnaps')
-                report['fs']['filesystems'].append({  # type: ignore
-                    'max_mds': fs['max_mds'],
-                    'ever_allowed_features': fs['ever_allowed_features'],
-                    'explicitly_allowed_features': fs['explicitly_allowed_features'],
-                    'num_in': len(fs['in']),
-                    'num_up': len(fs['up']),
-                    'num_standby_replay': len(
-                        [mds for gid, mds in fs['info'].items()
-                         if mds['state'] == 'up:standby-replay']),
-                    'num_mds': len(fs['info']),
-                    'num_sessions': num_sessions,
-                    'cached_inos': cached_ino,
-                    'cached_dns': cached_dn,
-                    'cached_caps': cached_cap,
-                    'cached_subtrees': subtrees,
-                    'balancer_enabled': len(fs['balancer']) > 0,
-                    'num_data_pools': len(fs['data_pools']),
-                    'standby_count_wanted': fs['standby_count_wanted'],
-                    'approx_ctime': fs['created'][0:7],
-                    'files': rfiles,
-                    'bytes': rbytes,
-                    'snaps': rsnaps,
-                })
-                num_mds += len(fs['info'])
-            report['fs']['total_num_mds'] = num_mds  # type: ignore
-
-            # daemons
-            report['metadata'] = dict(osd=self.gather_osd_metadata(osd_map),
-                                      mon=self.gather_mon_metadata(mon_map))
-
-            if self.is_enabled_collection(Collection.basic_mds_metadata):
-                report['metadata']['mds'] = self.gather_mds_metadata()  # type: ignore
-
-            # host counts
-            servers = self.list_servers()
-            self.log.debug('servers %s' % servers)
-            hosts = {
-                'num': len([h for h in servers if h['hostname']]),
-            }
-            for t in ['mon', 'mds', 'osd', 'mgr']:
-                nr_services = sum(1 for host in servers if
-                                  any(service for service in cast(List[ServiceInfoT],
-                                                                  host['services'])
-                                      if service['type'] == t))
-                hosts['num_with_' + t] = nr_services
-            report['hosts'] = hosts
-
-            report['usage'] = {
-                'pools': len(df['pools']),
-                'pg_num': num_pg,
-                'total_used_bytes': df['stats']['total_used_bytes'],
-                'total_bytes': df['stats']['total_bytes'],
-                'total_avail_bytes': df['stats']['total_avail_bytes']
+            yield 'ident', Collection.ident_base.name, {
+                option: getattr(self, option)
+                for option in ['description', 'contact', 'organization']
             }
-            # basic_usage_by_class collection
-            if self.is_enabled_collection(Collection.basic_usage_by_class):
-                report['usage']['stats_by_class'] = {} # type: ignore
-                for device_class in df['stats_by_class']:
-                    if device_class in ['hdd', 'ssd', 'nvme']:
-                        report['usage']['stats_by_class'][device_class] = df['stats_by_class'][device_class] # type: ignore
-
-            services: DefaultDict[str, int] = defaultdict(int)
-            for key, value in service_map['services'].items():
-                services[key] += 1
-                if key == 'rgw':
-                    rgw = {}
-                    zones = set()
-                    zonegroups = set()
-                    frontends = set()
-                    count = 0
-                    d = value.get('daemons', dict())
-                    for k, v in d.items():
-                        if k == 'summary' and v:
-                            rgw[k] = v
-                        elif isinstance(v, dict) and 'metadata' in v:
-                            count += 1
-                            zones.add(v['metadata']['zone_id'])
-                            zonegroups.add(v['metadata']['zonegroup_id'])
-                            frontends.add(v['metadata']['frontend_type#0'])
-
-                            # we could actually iterate over all the keys of
-                            # the dict and check for how many frontends there
-                            # are, but it is unlikely that one would be running
-                            # more than 2 supported ones
-                            f2 = v['metadata'].get('frontend_type#1', None)
-                            if f2:
-                                frontends.add(f2)
-
-                    rgw['count'] = count
-                    rgw['zones'] = len(zones)
-                    rgw['zonegroups'] = len(zonegroups)
-                    rgw['frontends'] = list(frontends)  # sets aren't json-serializable
-                    report['rgw'] = rgw
-            report['services'] = services
 
-            try:
-                report['balancer'] = self.remote('balancer', 'gather_telemetry')
-            except ImportError:
-                report['balancer'] = {
-                    'active': False
-                }
-
-            # Rook
-            self.get_rook_data(report)
+        if 'basic' in channels:
+            yield 'basic', Collection.basic_base.name, self.gather_basic_report()
 
         if 'crash' in channels:
-            report['crashes'] = self.gather_crashinfo()
+            yield 'crash', Collection.crash_base.name, {'crashes': self.gather_crashinfo()}
 
         if 'perf' in channels:
             if self.is_enabled_collection(Collection.perf_perf):
-                report['perf_counters'] = self.gather_perf_counters('separated')
-                report['stats_per_pool'] = self.get_stats_per_pool()
-                report['stats_per_pg'] = self.get_stats_per_pg()
-                report['io_rate'] = self.get_io_rate()
-                report['osd_perf_histograms'] = self.get_osd_histograms('separated')
-                report['mempool'] = self.get_mempool('separated')
-                report['heap_stats'] = self.get_heap_stats()
-                report['rocksdb_stats'] = self.get_rocksdb_stats()
+                perf_sections: List[Tuple[str, Callable[[], Any]]] = [
+                    # streamed one daemon at a time
+                    ('perf_counters', self.iter_perf_counters),
+                    ('stats_per_pool', self.get_stats_per_pool),
+                    ('stats_per_pg', self.get_stats_per_pg),
+                    ('io_rate', self.get_io_rate),
+                    ('osd_perf_histograms', lambda: self.get_osd_histograms('separated')),
+                    ('mempool', lambda: self.get_mempool('separated')),
+                    ('heap_stats', self.get_heap_stats),
+                    ('rocksdb_stats', self.get_rocksdb_stats),
+                ]
+                for key, gather in perf_sections:
+                    yield 'perf', key, {key: gather()}
 
         # NOTE: We do not include the 'device' channel in this report; it is
         # sent to a different endpoint.
 
+    def compile_report(self, channels: Optional[List[str]] = None) -> Dict[str, Any]:
+        if not channels:
+            channels = self.get_active_channels()
+        report: Dict[str, Any] = {}
+        for _, _, data in self.report_sections(channels):
+            report.update({key: dict(value) if isinstance(value, Iterator) else value
+                           for key, value in data.items()})
         return report
 
+    @staticmethod
+    def iter_json(value: Any, indent: Optional[int] = None, sort_keys: bool = False) -> Iterator[str]:
+        '''
+        Serialize value as json.dumps() would, in chunks. An iterator of
+        (key, value) pairs is serialized as an object, one pair at a time,
+        in the order of the iterator even with sort_keys.
+        '''
+        if not isinstance(value, Iterator):
+            yield json.dumps(value, indent=indent, sort_keys=sort_keys)
+            return
+        newline = '' if indent is None else '\n' + ' ' * indent
+
+        def members() -> Iterator[Tuple[str, str]]:
+            for k, v in value:
+                chunk = json.dumps(v, indent=indent, sort_keys=sort_keys)
+                yield k, json.dumps(k) + ': ' + chunk.replace('\n', newline)
+
+        first = True
+        for _, chunk in members():
+            yield ('{' if first else ',' + (' ' if indent is None else '')) + newline + chunk
+            first = False
+        yield '{}' if first else ('\n' if indent is not None else '') + '}'
+
+    def iter_report_json(self,
+                         channels: Optional[List[str]] = None,
+                         indent: Optional[int] = None,
+                         sort_keys: bool = False,
+                         format_histograms: bool = False) -> Iterator[str]:
+        '''
+        Serialize the report section by section, yielding JSON text chunks
+        that concatenate to the same document json.dumps() would produce
+        for compile_report().  With sort_keys, the keys are only sorted
+        within each section and within every value that is not streamed:
+        the sections and the streamed objects (the perf counters) are
+        emitted in the order they are gathered, so that no more than one
+        section is held in memory.  Timing and size of every section are
+        recorded in self.report_stats; the sections that are streamed are
+        gathered while they are serialized, so their gather time is part
+        of their serialize time.
+        '''
+        if not channels:
+            channels = self.get_active_channels()
+        item_sep = ', ' if indent is None else ',\n' + ' ' * indent
+        key_sep = ': '
+        stats: Dict[str, Dict[str, Any]] = {}
+        sections = self.report_sections(channels)
+        first = True
+
+        yield '{' if indent is None else '{\n' + ' ' * indent
+        while True:
+            started = time.monotonic()
+            try:
+                channel, name, data = next(sections)
+            except StopIteration:
+                break
+            elapsed = time.monotonic() - started
+            if format_histograms:
+                self.format_perf_histogram(data)
+            size = 0
+            for key, value in sorted(data.items()) if sort_keys else data.items():
+                if not first:
+                    yield item_sep
+                first = False
+                chunks = itertools.chain([json.dumps(key) + key_sep],
+                                         self.iter_json(value, indent, sort_keys))
+                for chunk in chunks:
+                    if indent is not None:
+                        chunk = chunk.replace('\n', '\n' + ' ' * indent)
+                    size += len(chunk)
+                    yield chunk
+            stats[name] = {
+                'channel': channel,
+                'gather_seconds': round(elapsed, 6),
+                'serialize_seconds': round(time.monotonic() - started - elapsed, 6),
+                'bytes': size,
+            }
+            del data
+        yield '}' if indent is None else '\n}'
+        self.report_stats = stats
+
     def get_rook_data(self, report: Dict[str, object]) -> None:
         r, outb, outs = self.mon_command({
             'prefix': 'config-key dump',
@@ -1373,15 +1487,43 @@ class Module(MgrModule):
 
         report[last_node] = value
 
-    def _try_post(self, what: str, url: str, report: Dict[str, Dict[str, str]]) -> Optional[str]:
+    @staticmethod
+    def compress_chunks(chunks: Iterator[str]) -> Iterator[bytes]:
+        '''
+        gzip a stream of text chunks incrementally
+        '''
+        # wbits=31 selects the gzip container
+        compressor = zlib.compressobj(wbits=31)
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode('utf-8'))
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def _try_post(self, what: str, url: str,
+                  report: Union[Dict[str, Dict[str, str]], Iterator[str]]) -> Optional[str]:
         self.log.info('Sending %s to: %s' % (what, url))
         proxies = dict()
         if self.proxy:
             self.log.info('Send using HTTP(S) proxy: %s', self.proxy)
             proxies['http'] = self.proxy
             proxies['https'] = self.proxy
+        headers = {'Content-Type': 'application/json'}
+        chunks = iter([json.dumps(report)]) if isinstance(report, dict) else report
+        body: Union[bytes, Iterator[bytes]]
+        if self.compress_report:
+            headers['Content-Encoding'] = 'gzip'
+            body = self.compress_chunks(chunks)
+        else:
+            body = (chunk.encode('utf-8') for chunk in chunks)
+        if isinstance(report, dict):
+            # the device reports are small, send them in one piece
+            body = b''.join(body)
+        # otherwise the generator is sent with chunked transfer encoding,
+        # as the report is compiled; a failure to compile the report fails
+        # the request
         try:
-            resp = requests.put(url=url, json=report, proxies=proxies)
+            resp = requests.put(url=url, data=body, headers=headers, proxies=proxies)
             resp.raise_for_status()
         except Exception as e:
             fail_reason = 'Failed to send %s to %s: %s' % (what, url, str(e))
@@ -1532,8 +1674,12 @@ class Module(MgrModule):
         self.set_store('collection', json.dumps(self.db_collection))
 
     def send(self,
-             report: Dict[str, Dict[str, str]],
+             report: Optional[Dict[str, Dict[str, str]]] = None,
              endpoint: Optional[List[EndPoint]] = None) -> Tuple[int, str, str]:
+        '''
+        Send the given report, or, if none is given, compile the report and
+        stream it section by section to the ceph endpoint
+        '''
         if not endpoint:
             endpoint = [self.EndPoint.ceph, self.EndPoint.device]
         failed = []
@@ -1541,7 +1687,8 @@ class Module(MgrModule):
         self.log.debug('Send endpoints %s' % endpoint)
         for e in endpoint:
             if e == self.EndPoint.ceph:
-                fail_reason = self._try_post('ceph report', self.url, report)
+                fail_reason = self._try_post('ceph report', self.url,
+                                             report if report is not None else self.iter_report_json())
                 if fail_reason:
                     failed.append(fail_reason)
                 else:
@@ -1643,6 +1790,7 @@ class Module(MgrModule):
             r[opt['name']] = getattr(self, opt['name'])
         r['last_upload'] = (time.ctime(self.last_upload)
                             if self.last_upload else self.last_upload)
+        r['last_report_stats'] = self.report_stats
         return 0, json.dumps(r, indent=4, sort_keys=True), ''
 
     @CLIReadCommand('telemetry diff')
@@ -1859,8 +2007,7 @@ To enable, add '--license {LICENSE}' to the 'ceph telemetry on' command.'''
 To manually send telemetry data, add '--license {LICENSE}' to the 'ceph telemetry send' command.
 Please consider enabling the telemetry module with 'ceph telemetry on'.'''
         else:
-            self.last_report = self.compile_report()
-            return self.send(self.last_report, endpoint)
+            return self.send(endpoint=endpoint)
 
     @CLIReadCommand('telemetry show')
     def show(self, channels: Optional[List[str]] = None) -> Tuple[int, str, str]:
@@ -1873,9 +2020,9 @@ Please consider enabling the telemetry module with 'ceph telemetry on'.'''
                   'Preview sample reports with `ceph telemetry preview`.'
             return 0, msg, ''
 
-        report = self.get_report_locked(channels=channels)
-        self.format_perf_histogram(report)
-        report = json.dumps(report, indent=4, sort_keys=True)
+        with self.get_report_lock:
+            report = ''.join(self.iter_report_json(channels, indent=4, sort_keys=True,
+                                                   format_histograms=True))
 
         if self.channel_device:
             report += '''\nDevice report is generated separately. To see it run 'ceph telemetry show-device'.'''
@@ -1979,15 +2126,22 @@ Please consider enabling the telemetry module with 'ceph telemetry on'.'''
                   'Preview sample reports with `ceph telemetry preview`.'
             return 0, msg, ''
 
-        if not self.channel_device:
-            # device channel is off, no need to display its report
-            report = self.get_report_locked('default')
-        else:
-            # telemetry is on and device channel is enabled, show both
-            report = self.get_report_locked('all')
+        with self.get_report_lock:
+            chunks = self.iter_report_json(indent=4, sort_keys=True, format_histograms=True)
+            if not self.channel_device:
+                # device channel is off, no need to display its report
+                report = ''.join(chunks)
+            else:
+                # telemetry is on and device channel is enabled, show both;
+                # nest the streamed report one level deeper, under 'report'
+                device_report = json.dumps(self.gather_device_report(), indent=4, sort_keys=True)
+                report = ''.join([
+                    '{\n    "device_report": ',
+                    device_report.replace('\n', '\n    '),
+                    ',\n    "report": ',
+                ] + [chunk.replace('\n', '\n    ') for chunk in chunks] + ['\n}'])
 
-        self.format_perf_histogram(report)
-        return 0, json.dumps(report, indent=4, sort_keys=True), ''
+        return 0, report, ''
 
     @CLIReadCommand('telemetry preview-all')
     def preview_all(self) -> Tuple[int, str, str]:
@@ -2094,11 +2248,9 @@ Please consider enabling the telemetry module with 'ceph telemetry on'.'''
                               self.url)
 
                 try:
-                    self.last_report = self.compile_report()
+                    self.send()
                 except Exception:
                     self.log.exception('Exception while compiling report:')
-
-                self.send(self.last_report)
             else:
                 self.log.debug('Interval for sending new report has not expired')
 
@@ -1,4 +1,5 @@
 import json
+import zlib
 import pytest
 import unittest
 from unittest import mock
@@ -119,3 +120,107 @@ class TestTelemetry:
         assert m.is_opted_in() == expected['is_opted_in']
         assert m.is_enabled_collection(Collection.basic_base) == expected['is_enabled_collection']['basic_base']
         assert m.is_enabled_collection(Collection.basic_mds_metadata) == expected['is_enabled_collection']['basic_mds_metadata']
+
+    @pytest.mark.parametrize("indent,sort_keys", [(None, False), (4, True)])
+    def test_iter_report_json(self, indent: Optional[int], sort_keys: bool) -> None:
+        m = telemetry.Module('telemetry', '', '')
+        m.config_update_module_option()
+        m.load()
+
+        def report_sections(channels: List[str]) -> Any:
+            yield '', 'header', {'report_id': 'abc', 'channels': channels}
+            yield 'crash', 'crash_base', {'crashes': [{'x': 1}, {'y': [1, 2]}]}
+            yield 'perf', 'mempool', {'mempool': {'osd': {'bytes': 12}}}
+            yield 'perf', 'io_rate', {'io_rate': {}}
+            yield 'perf', 'perf_counters', {'perf_counters': iter([
+                ('osd.1', {'osd': {'op': {'value': 2}}}),
+                ('osd.0', {'osd': {'op_r': {'value': 1, 'count': 3}}}),
+            ])}
+            yield 'perf', 'no_counters', {'no_counters': iter([])}
+
+        with mock.patch.object(m, 'report_sections', side_effect=report_sections):
+            streamed = ''.join(m.iter_report_json(['crash', 'perf'], indent=indent, sort_keys=sort_keys))
+            expected = json.dumps(m.compile_report(['crash', 'perf']), indent=indent, sort_keys=sort_keys)
+
+        if sort_keys:
+            # only sorted within the sections and the values not streamed
+            assert json.loads(streamed) == json.loads(expected)
+            pairs = json.loads(streamed, object_pairs_hook=list)
+            assert [k for k, _ in pairs] == ['channels', 'report_id', 'crashes', 'mempool',
+                                             'io_rate', 'perf_counters', 'no_counters']
+            assert [k for k, _ in dict(pairs)['perf_counters']] == ['osd.1', 'osd.0']
+        else:
+            assert streamed == expected
+        assert set(m.report_stats) == {'header', 'crash_base', 'mempool', 'io_rate',
+                                       'perf_counters', 'no_counters'}
+        assert m.report_stats['mempool']['channel'] == 'perf'
+        assert m.report_stats['mempool']['bytes'] > 0
+
+    def test_iter_report_json_sorted_is_streamed(self) -> None:
+        m = telemetry.Module('telemetry', '', '')
+        m.config_update_module_option()
+        m.load()
+        gathered = []
+
+        def report_sections(channels: List[str]) -> Any:
+            for name in ['header', 'crash_base', 'mempool']:
+                gathered.append(name)
+                yield 'perf', name, {name: {'b': 1, 'a': 2}}
+
+        with mock.patch.object(m, 'report_sections', side_effect=report_sections):
+            chunks = m.iter_report_json(indent=4, sort_keys=True)
+            assert next(chunks) == '{\n    '
+            assert next(chunks) == '"header": '
+            assert gathered == ['header']
+            assert ''.join(chunks).startswith('{\n        "a": 2,')
+            assert gathered == ['header', 'crash_base', 'mempool']
+
+    @mock.patch('telemetry.module.requests.put')
+    def test_send_streams_report(self, put: mock.Mock) -> None:
+        m = telemetry.Module('telemetry', '', '')
+        m.config_update_module_option()
+        m.load()
+        bodies = []
+
+        def _put(url: str, data: Any, **kwargs: Any) -> mock.Mock:
+            # not a whole report, but chunks, read as the report is sent
+            assert not isinstance(data, (bytes, str))
+            bodies.append(b''.join(data))
+            return mock.Mock()
+        put.side_effect = _put
+
+        with mock.patch.object(m, 'iter_report_json', return_value=iter(['{"a": ', '1}'])):
+            code, _, _ = m.send(endpoint=[m.EndPoint.ceph])
+        assert code == 0
+        assert json.loads(bodies[0]) == {'a': 1}
+
+    @mock.patch('telemetry.module.requests.put')
+    def test_send_device_report_when_compile_fails(self, put: mock.Mock) -> None:
+        m = telemetry.Module('telemetry', '', '')
+        m.config_update_module_option()
+        m.load()
+
+        def _put(url: str, data: Any, **kwargs: Any) -> mock.Mock:
+            if not isinstance(data, bytes):
+                b''.join(data)
+            return mock.Mock()
+        put.side_effect = _put
+
+        def report_sections(channels: List[str]) -> Any:
+            yield '', 'header', {'report_id': 'abc'}
+            raise RuntimeError('failed to gather')
+
+        with mock.patch.object(m, 'report_sections', side_effect=report_sections), \
+                mock.patch.object(m, 'get_active_channels', return_value=['basic', 'device']), \
+                mock.patch.object(m, 'gather_device_report',
+                                  return_value={'host1': {'dev1': {'model': 'x'}}}):
+            code, _, err = m.send()
+        assert code == 1
+        assert 'failed to gather' in err
+        assert 'Reported 1 devices from 1 hosts' in err
+        assert put.call_args_list[-1].kwargs['url'] == m.device_url
+
+    def test_compress_chunks(self) -> None:
+        chunks = ['{"a": ', '[1, 2, 3]', '}']
+        data = b''.join(telemetry.Module.compress_chunks(iter(chunks)))
+        assert json.loads(zlib.decompress(data, wbits=31)) == {'a': [1, 2, 3]}
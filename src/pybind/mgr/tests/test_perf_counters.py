@@ -0,0 +1,79 @@
+from unittest import mock
+
+from mgr_module import MgrModule
+
+
+class PerfModule(MgrModule):
+    pass
+
+
+SCHEMA = [
+    {'path': 'osd.op', 'description': 'ops', 'type': 10, 'priority': 8, 'units': 1},
+    {'path': 'osd.op_r_latency', 'description': 'read latency', 'nick': 'r_lat',
+     'type': 5, 'priority': 5, 'units': 1},
+]
+
+
+def _module(daemons):
+    m = PerfModule('perf', None, None)
+    m._ceph_get_latest_counters = mock.Mock(return_value={
+        'osd': {'schema': SCHEMA, 'daemons': daemons},
+    })
+    return m
+
+
+def test_unlabeled_perf_counters():
+    m = _module({
+        '0': [3, [10, 2]],
+        '1': [4, None],
+        '2': [None, None],
+    })
+    assert m.get_unlabeled_perf_counters(services=['osd']) == {
+        'osd.0': {
+            'osd.op': {'description': 'ops', 'type': 10, 'priority': 8, 'units': 1,
+                       'value': 3},
+            'osd.op_r_latency': {'description': 'read latency', 'nick': 'r_lat',
+                                 'type': 5, 'priority': 5, 'units': 1,
+                                 'value': 10, 'count': 2},
+        },
+        'osd.1': {
+            'osd.op': {'description': 'ops', 'type': 10, 'priority': 8, 'units': 1,
+                       'value': 4},
+        },
+    }
+    m._ceph_get_latest_counters.assert_called_once_with(['osd'], MgrModule.PRIO_USEFUL)
+
+
+def test_unlabeled_perf_counters_schema_cache():
+    m = _module({'0': [3, [10, 2]]})
+    first = m.get_unlabeled_perf_counters(services=['osd'])
+    schema = m._perf_schema_cache['osd']
+    second = m.get_unlabeled_perf_counters(services=['osd'])
+    assert first == second
+    assert m._perf_schema_cache['osd'] is schema
+    # the counter info is not shared between the results
+    assert first['osd.0']['osd.op'] is not second['osd.0']['osd.op']
+
+    m._ceph_get_latest_counters.return_value = {
+        'osd': {'schema': SCHEMA[:1], 'daemons': {'0': [5]}},
+    }
+    assert m.get_unlabeled_perf_counters(services=['osd']) == {
+        'osd.0': {
+            'osd.op': {'description': 'ops', 'type': 10, 'priority': 8, 'units': 1,
+                       'value': 5},
+        },
+    }
+    assert m._perf_schema_cache['osd'] is not schema
+
+
+def test_latest_counters_of_daemons():
+    m = _module({'0': [3, [10, 2]]})
+    m.get_latest_counters(['osd'], MgrModule.PRIO_USEFUL, svc_ids=['0'])
+    m._ceph_get_latest_counters.assert_called_once_with(['osd'], MgrModule.PRIO_USEFUL, ['0'])
+
+
+def test_counters():
+    m = _module({})
+    m._ceph_get_counters = mock.Mock(return_value={'0': {'osd.op': [[1.0, 3]]}})
+    assert m.get_counters('osd', ('0',), ('osd.op',)) == {'0': {'osd.op': [[1.0, 3]]}}
+    m._ceph_get_counters.assert_called_once_with('osd', ['0'], ['osd.op'])